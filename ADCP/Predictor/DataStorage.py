@@ -1,6 +1,5 @@
 import math
-import json
-import os
+from rti_python.ADCP.Predictor.PredictorConfig import get_config
 
 def calculate_storage_amount(**kwargs):
     """
@@ -31,10 +30,8 @@ def calculate_storage_amount(**kwargs):
     """
 
     # Get the configuration from the json file
-    script_dir = os.path.dirname(__file__)
-    json_file_path = os.path.join(script_dir, 'predictor.json')
     try:
-        config = json.loads(open(json_file_path).read())
+        config = get_config()
     except Exception as e:
         print("Error opening JSON file", e)
         return 0.0
@@ -91,10 +88,8 @@ def calculate_burst_storage_amount(**kwargs):
     """
 
     # Get the configuration from the json file
-    script_dir = os.path.dirname(__file__)
-    json_file_path = os.path.join(script_dir, 'predictor.json')
     try:
-        config = json.loads(open(json_file_path).read())
+        config = get_config()
     except Exception as e:
         print("Error opening JSON file", e)
         return 0.0
@@ -151,10 +146,8 @@ def calculate_ensemble_size(**kwargs):
     """
 
     # Get the configuration from the json file
-    script_dir = os.path.dirname(__file__)
-    json_file_path = os.path.join(script_dir, 'predictor.json')
     try:
-        config = json.loads(open(json_file_path).read())
+        config = get_config()
     except Exception as e:
         print("Error opening JSON file", e)
         return 0.0
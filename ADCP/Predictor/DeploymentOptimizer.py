@@ -0,0 +1,366 @@
+import time
+import numpy as np
+from rti_python.ADCP.Predictor.PredictorBatch import PredictorBatch
+
+
+class DeploymentOptimizer:
+    """
+    Search the deployment configurations for the best trade offs.
+
+    Every combination of the given CWPBN, CWPBS, CWPP, CEI and burst options
+    is a candidate.  The candidates that do not meet the constraints are
+    removed in stages, using the cheapest calculations first:
+
+    1. The water profile range only depends on the bin size, so the bin sizes
+       that do not reach the required range are removed.
+    2. The STD only depends on the bin size and pings, so those pairs with too
+       much STD are removed.  The bins must also be enough to cover the
+       required range.
+    3. The storage only depends on the bins and ensemble interval.
+    4. The power does not decrease with more bins, so the power is calculated
+       with the fewest bins for each bin size, pings and interval.  If that
+       is over the battery budget, all the bins are removed.
+
+    The remaining candidates are evaluated with PredictorBatch in chunks.
+    The Pareto front of the feasible candidates is then given for the
+    objectives, by default the least power, STD and ensemble interval.
+
+    optimizer = DeploymentOptimizer(SystemFrequency=288000, DeploymentDuration=30)
+    front = optimizer.optimize(CWPBN=range(10, 101, 10), CWPBS=[0.5, 1.0, 2.0, 4.0], CWPP=[1, 4, 9], CEI=[1, 60, 600],
+                               max_batteries=2, min_range=80.0, max_std=0.05)
+    front["power"]
+    """
+
+    # Objective to minimize or maximize and the result name
+    MIN = "min"
+    MAX = "max"
+    DEFAULT_OBJECTIVES = [("power", MIN), ("std", MIN), ("CEI", MIN)]
+
+    # Results given for each configuration
+    RESULTS = ["CWPBN", "CWPBS", "CWPP", "CEI", "CBI", "CBI_NumEns", "CBI_BurstInterval",
+               "power", "num_batteries", "wp_range", "cfg_range", "std", "storage"]
+
+    def __init__(self, batch=None, **params):
+        """
+        Set the parameters of the deployment that are not searched.
+        :param batch: PredictorBatch to use.  If not given, one is created with the default configuration.
+        :param params: Fixed predictor parameters.  SystemFrequency, DeploymentDuration, Beams ...
+        """
+        self.batch = batch if batch is not None else PredictorBatch()
+        self.params = params
+        self.stats = {}
+
+    def get_battery_power(self):
+        """
+        Get the power available from a single battery for the deployment.
+        Same as Power._calculate_number_batteries().
+        :return: Power for one battery in watt/hr.
+        """
+        defaults = self.batch.config["DEFAULT"]
+        capacity = self.params.get("BatteryCapacity", defaults["BatteryCapacity"])
+        derate = self.params.get("BatteryDerate", defaults["BatteryDerate"])
+        self_discharge = self.params.get("BatterySelfDischarge", defaults["BatterySelfDischarge"])
+        duration = self.params.get("DeploymentDuration", defaults["DeploymentDuration"])
+
+        return capacity * derate - self_discharge * duration / 365.0
+
+    def get_predictor_params(self, **kwargs):
+        """
+        Combine the fixed parameters with the given parameters for the predictor.
+        The battery parameters are not predictor parameters.
+        :param kwargs: Parameters of the candidates.
+        :return: Dictionary of parameters.
+        """
+        params = {name: value for name, value in self.params.items() if not name.startswith("Battery")}
+        params.update(kwargs)
+        return params
+
+    def optimize(self, CWPBN, CWPBS, CWPP, CEI, bursts=None,
+                 max_batteries=None, min_range=None, max_std=None, max_storage=None,
+                 objectives=None, chunk_size=65536):
+        """
+        Find the Pareto front of the feasible configurations.
+        :param CWPBN: Number of bins to search.
+        :param CWPBS: Bin sizes in meters to search.
+        :param CWPP: Number of pings to search.
+        :param CEI: Time between ensembles in seconds to search.
+        :param bursts: List of burst options.  None for continuous pinging or (CBI_NumEns, CBI_BurstInterval) for a burst.  Default is continuous only.
+        :param max_batteries: Maximum number of batteries.  None for no limit.
+        :param min_range: Required water profile range in meters.  The predicted range and the configured bins must reach it.  None for no limit.
+        :param max_std: Maximum STD in m/s.  None for no limit.
+        :param max_storage: Maximum storage in bytes.  None for no limit.
+        :param objectives: List of (result name, MIN or MAX).  Default is the least power, STD and CEI.
+        :param chunk_size: Number of candidates to evaluate at a time.
+        :return: Dictionary with an array for each result of the Pareto front configurations.
+        """
+        start_time = time.perf_counter()
+
+        cwpbn = np.unique(np.asarray(CWPBN, dtype=np.float64))
+        cwpbs = np.unique(np.asarray(CWPBS, dtype=np.float64))
+        cwpp = np.unique(np.asarray(CWPP, dtype=np.float64))
+        cei = np.unique(np.asarray(CEI, dtype=np.float64))
+        if bursts is None:
+            bursts = [None]
+        if objectives is None:
+            objectives = DeploymentOptimizer.DEFAULT_OBJECTIVES
+
+        battery_pwr = self.get_battery_power()
+        max_power = np.inf if max_batteries is None else max_batteries * battery_pwr
+
+        self.stats = {"candidates": len(cwpbn) * len(cwpbs) * len(cwpp) * len(cei) * len(bursts),
+                      "pruned_range": 0,
+                      "pruned_std": 0,
+                      "pruned_storage": 0,
+                      "pruned_power": 0,
+                      "evaluated": 0,
+                      "feasible": 0,
+                      "pareto": 0}
+
+        # Range for each bin size [bin size]
+        wp_range = self.batch.calculate_predicted_range(**self.get_predictor_params(CWPBS=cwpbs))[1]
+        range_ok = np.ones(len(cwpbs), dtype=bool) if min_range is None else wp_range >= min_range
+
+        # STD for each bin size and pings [bin size, pings]
+        std = self.batch.calculate_std(**self.get_predictor_params(CWPBS=cwpbs[:, np.newaxis], CWPP=cwpp[np.newaxis, :]))
+        std_ok = range_ok[:, np.newaxis] & (np.ones(std.shape, dtype=bool) if max_std is None else std <= max_std)
+
+        # Bins to cover the range for each bin size [bin size, bins]
+        cfg_range = self.batch.calculate_predicted_range(**self.get_predictor_params(CWPBS=cwpbs[:, np.newaxis], CWPBN=cwpbn[np.newaxis, :]))[3]
+        bins_ok = np.ones(cfg_range.shape, dtype=bool) if min_range is None else cfg_range >= min_range
+
+        results = []
+        for burst in bursts:
+            results.append(self.search_burst(burst, cwpbn, cwpbs, cwpp, cei,
+                                             range_ok, std_ok, bins_ok,
+                                             max_power, battery_pwr, max_storage, chunk_size))
+
+        # Combine the feasible configurations of all the burst options
+        feasible = {name: np.concatenate([result[name] for result in results]) for name in DeploymentOptimizer.RESULTS}
+        self.stats["feasible"] = len(feasible["power"])
+
+        # Pareto front of the objectives
+        values = np.column_stack([feasible[name] if direction == DeploymentOptimizer.MIN else -feasible[name]
+                                  for name, direction in objectives]) if len(objectives) > 0 else np.empty((0, 0))
+        front = DeploymentOptimizer.pareto_front(values) if self.stats["feasible"] > 0 else np.empty(0, dtype=np.int64)
+        self.stats["pareto"] = len(front)
+
+        elapsed = time.perf_counter() - start_time
+        self.stats["elapsed"] = elapsed
+        self.stats["candidates_per_sec"] = self.stats["candidates"] / elapsed if elapsed > 0 else 0.0
+
+        return {name: values[front] for name, values in feasible.items()}
+
+    def search_burst(self, burst, cwpbn, cwpbs, cwpp, cei, range_ok, std_ok, bins_ok, max_power, battery_pwr, max_storage, chunk_size):
+        """
+        Find the feasible configurations for a burst option.
+        :param burst: None for continuous pinging or (CBI_NumEns, CBI_BurstInterval).
+        :param cwpbn: Sorted bins.
+        :param cwpbs: Sorted bin sizes.
+        :param cwpp: Sorted pings.
+        :param cei: Sorted ensemble intervals.
+        :param range_ok: Bin sizes that reach the range [bin size].
+        :param std_ok: Bin size and pings that meet the range and STD [bin size, pings].
+        :param bins_ok: Bins that cover the range [bin size, bins].
+        :param max_power: Maximum power in watt/hr.
+        :param battery_pwr: Power of a single battery in watt/hr.
+        :param max_storage: Maximum storage in bytes.  None for no limit.
+        :param chunk_size: Number of candidates to evaluate at a time.
+        :return: Dictionary with an array for each result of the feasible configurations.
+        """
+        if burst is None:
+            burst_params = {}
+        else:
+            burst_params = {"CBI_NumEns": burst[0], "CBI_BurstInterval": burst[1]}
+
+        num_bins = len(cwpbn)
+        num_cei = len(cei)
+
+        # Candidates removed by the range and STD
+        num_per_pair = num_bins * num_cei
+        self.stats["pruned_range"] += int(np.count_nonzero(~range_ok)) * len(cwpp) * num_per_pair
+        self.stats["pruned_std"] += int(np.count_nonzero(~std_ok & range_ok[:, np.newaxis])) * num_per_pair
+        self.stats["pruned_range"] += int(np.count_nonzero(std_ok[:, :, np.newaxis] & ~bins_ok[:, np.newaxis, :])) * num_cei
+
+        # Storage for each bins and interval [bins, cei]
+        if max_storage is None:
+            storage_ok = np.ones((num_bins, num_cei), dtype=bool)
+        elif burst is None:
+            storage = self.batch.calculate_storage_amount(**self.get_predictor_params(CWPBN=cwpbn[:, np.newaxis], CEI=cei[np.newaxis, :]))
+            storage_ok = storage <= max_storage
+        else:
+            storage = self.batch.calculate_burst_storage_amount(**self.get_predictor_params(CWPBN=cwpbn[:, np.newaxis], CEI=cei[np.newaxis, :], **burst_params))
+            storage_ok = storage <= max_storage
+
+        # Candidate indices [bin size, pings, bins, cei] that meet the range, STD and storage
+        bs_i, pp_i, bn_i, cei_i = np.nonzero(std_ok[:, :, np.newaxis, np.newaxis] &
+                                             bins_ok[:, np.newaxis, :, np.newaxis] &
+                                             storage_ok[np.newaxis, np.newaxis, :, :])
+        self.stats["pruned_storage"] += int(np.count_nonzero(std_ok[:, :, np.newaxis, np.newaxis] &
+                                                              bins_ok[:, np.newaxis, :, np.newaxis] &
+                                                              ~storage_ok[np.newaxis, np.newaxis, :, :]))
+
+        # Lower bound of the power with the fewest bins that cover the range
+        # The power does not decrease with more bins
+        if np.isfinite(max_power) and len(bs_i) > 0:
+            has_bins = bins_ok.any(axis=1)
+            min_bins = cwpbn[np.argmax(bins_ok, axis=1)]
+            bound_bs, bound_pp, bound_cei = np.nonzero((std_ok & has_bins[:, np.newaxis])[:, :, np.newaxis] & np.ones(num_cei, dtype=bool))
+            bound_power = self.calculate_power(burst_params,
+                                               CWPBN=min_bins[bound_bs],
+                                               CWPBS=cwpbs[bound_bs],
+                                               CWPP=cwpp[bound_pp],
+                                               CEI=cei[bound_cei])
+            power_ok = np.zeros((len(cwpbs), len(cwpp), num_cei), dtype=bool)
+            power_ok[bound_bs, bound_pp, bound_cei] = bound_power <= max_power
+
+            keep = power_ok[bs_i, pp_i, cei_i]
+            self.stats["pruned_power"] += int(np.count_nonzero(~keep))
+            bs_i, pp_i, bn_i, cei_i = bs_i[keep], pp_i[keep], bn_i[keep], cei_i[keep]
+
+        # Evaluate the remaining candidates
+        chunks = []
+        for start in range(0, len(bs_i), chunk_size):
+            end = start + chunk_size
+            params = {"CWPBN": cwpbn[bn_i[start:end]],
+                      "CWPBS": cwpbs[bs_i[start:end]],
+                      "CWPP": cwpp[pp_i[start:end]],
+                      "CEI": cei[cei_i[start:end]]}
+            self.stats["evaluated"] += len(params["CEI"])
+
+            power = self.calculate_power(burst_params, **params)
+            feasible = power <= max_power
+            params = {name: values[feasible] for name, values in params.items()}
+            power = power[feasible]
+
+            ranges = self.batch.calculate_predicted_range(**self.get_predictor_params(**params))
+            if burst is None:
+                storage = self.batch.calculate_storage_amount(**self.get_predictor_params(**params))
+            else:
+                storage = self.batch.calculate_burst_storage_amount(**self.get_predictor_params(**params, **burst_params))
+
+            num = len(power)
+            chunk = dict(params)
+            chunk["CBI"] = np.full(num, burst is not None)
+            chunk["CBI_NumEns"] = np.full(num, burst[0] if burst is not None else 0)
+            chunk["CBI_BurstInterval"] = np.full(num, burst[1] if burst is not None else 0)
+            chunk["power"] = power
+            chunk["num_batteries"] = power / battery_pwr
+            chunk["wp_range"] = ranges[1]
+            chunk["cfg_range"] = ranges[3]
+            chunk["std"] = self.batch.calculate_std(**self.get_predictor_params(**params))
+            chunk["storage"] = storage
+            chunks.append(chunk)
+
+        if not chunks:
+            return {name: np.empty(0) for name in DeploymentOptimizer.RESULTS}
+
+        return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in DeploymentOptimizer.RESULTS}
+
+    def calculate_power(self, burst_params, **kwargs):
+        """
+        Calculate the power for continuous or burst pinging.
+        :param burst_params: Empty for continuous pinging or CBI_NumEns and CBI_BurstInterval for a burst.
+        :param kwargs: Parameters of the candidates.
+        :return: Power for each candidate.
+        """
+        if burst_params:
+            return self.batch.calculate_burst_power(**self.get_predictor_params(**kwargs, **burst_params))
+
+        return self.batch.calculate_power(**self.get_predictor_params(**kwargs))
+
+    @staticmethod
+    def pareto_front(values, block_size=1024):
+        """
+        Find the points that are not dominated by any other point.  All the
+        objectives are minimized.  Duplicate points are only given once.
+
+        The points are sorted by the objectives, so a point can only be
+        dominated by a point before it and the first objective is already
+        less or equal.  Each block of points is checked against the front of
+        the other objectives of the points before the block.  For up to
+        3 objectives this is a binary search on a staircase.  The points left
+        are then checked against the points before them in the block.
+        :param values: Array [point, objective].
+        :param block_size: Number of points checked at once.
+        :return: Index of the points in the front.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return np.empty(0, dtype=np.int64)
+        if values.shape[1] == 0:
+            return np.zeros(1, dtype=np.int64)
+
+        # Sort by the first objective, then the next to break ties
+        order = np.lexsort(values.T[::-1])
+
+        # Remove the duplicate points
+        keep = np.ones(len(order), dtype=bool)
+        keep[1:] = np.any(values[order[1:]] != values[order[:-1]], axis=1)
+        order = order[keep]
+
+        front = []
+        stair = np.empty((0, values.shape[1] - 1))
+        for start in range(0, len(order), block_size):
+            block = order[start:start + block_size]
+
+            # Remove the points dominated by the points before the block
+            block = block[~DeploymentOptimizer._is_dominated(stair, values[block, 1:])]
+
+            # Remove the points dominated by a point before it in the block
+            block_values = values[block]
+            dominated = np.all(block_values[np.newaxis, :, :] <= block_values[:, np.newaxis, :], axis=2)
+            block = block[~np.tril(dominated, -1).any(axis=1)]
+
+            front.append(block)
+            stair = DeploymentOptimizer._update_stair(stair, values[block, 1:])
+
+        return np.concatenate(front)
+
+    @staticmethod
+    def _is_dominated(stair, points):
+        """
+        Check if each point is dominated or equaled by a point in the staircase.
+        :param stair: Front of the points [point, objective] from _update_stair().
+        :param points: Points to check [point, objective].
+        :return: True for each point that is dominated.
+        """
+        if len(stair) == 0:
+            return np.zeros(len(points), dtype=bool)
+        if stair.shape[1] == 0:
+            return np.ones(len(points), dtype=bool)
+        if stair.shape[1] == 1:
+            return points[:, 0] >= stair[0, 0]
+        if stair.shape[1] == 2:
+            # Last step with the first objective less or equal has the least second objective
+            index = np.searchsorted(stair[:, 0], points[:, 0], side='right') - 1
+            return (index >= 0) & (stair[np.maximum(index, 0), 1] <= points[:, 1])
+
+        return np.all(stair[np.newaxis, :, :] <= points[:, np.newaxis, :], axis=2).any(axis=1)
+
+    @staticmethod
+    def _update_stair(stair, points):
+        """
+        Add the points to the staircase used by _is_dominated().
+        For 1 objective this is the least value.  For 2 objectives this is
+        the 2D front sorted by the first objective.  For more objectives all
+        the points are kept.
+        :param stair: Current staircase [point, objective].
+        :param points: Points to add [point, objective].
+        :return: New staircase.
+        """
+        if len(points) == 0:
+            return stair
+
+        stair = np.concatenate((stair, points))
+        if stair.shape[1] == 0:
+            return stair[:1]
+        if stair.shape[1] == 1:
+            return stair.min(axis=0, keepdims=True)
+        if stair.shape[1] == 2:
+            stair = stair[np.lexsort(stair.T[::-1])]
+            least = np.minimum.accumulate(stair[:, 1])
+            keep = np.ones(len(stair), dtype=bool)
+            keep[1:] = stair[1:, 1] < least[:-1]
+            return stair[keep]
+
+        return stair
@@ -1,7 +1,6 @@
-import json
-import os
 import math
 import pytest
+from rti_python.ADCP.Predictor.PredictorConfig import get_config
 
 
 def calculate_max_velocity(**kwargs):
@@ -21,11 +20,8 @@ def calculate_max_velocity(**kwargs):
     """
 
     # Get the configuration from the json file
-    script_dir = os.path.dirname(__file__)
-    json_file_path = os.path.join(script_dir, 'predictor.json')
-
     try:
-        config = json.loads(open(json_file_path).read())
+        config = get_config()
     except Exception as e:
         print("Error getting the configuration file.  MaxVelocity", e)
         return 0.0
@@ -56,11 +52,8 @@ def _calculate_max_velocity(_CWPBB_, _CWPBB_LagLength_, _CWPBS_, _BeamAngle_, _S
     """
 
     # Get the configuration from the json file
-    script_dir = os.path.dirname(__file__)
-    json_file_path = os.path.join(script_dir, 'predictor.json')
-
     try:
-        config = json.loads(open(json_file_path).read())
+        config = get_config()
     except Exception as e:
         print("Error getting the configuration file.  MaxVelocity", e)
         return 0.0
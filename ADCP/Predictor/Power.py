@@ -1,9 +1,8 @@
 import math
-import json
-import os
 import pytest
 import rti_python.ADCP.AdcpCommands
 import rti_python.ADCP.Predictor.Range
+from rti_python.ADCP.Predictor.PredictorConfig import get_config
 
 
 def calculate_power(**kwargs):
@@ -43,10 +42,8 @@ def calculate_power(**kwargs):
     """
 
     # Get the configuration from the json file
-    script_dir = os.path.dirname(__file__)
-    json_file_path = os.path.join(script_dir, 'predictor.json')
     try:
-        config = json.loads(open(json_file_path).read())
+        config = get_config()
     except Exception as e:
         print("Error opening predictor.JSON file.  Power", e)
         return 0.0
@@ -126,10 +123,8 @@ def calculate_burst_power(**kwargs):
     """
 
     # Get the configuration from the json file
-    script_dir = os.path.dirname(__file__)
-    json_file_path = os.path.join(script_dir, 'predictor.json')
     try:
-        config = json.loads(open(json_file_path).read())
+        config = get_config()
     except Exception as e:
         print("Error opening predictor.JSON file. Power", e)
         return 0.0
@@ -182,10 +177,8 @@ def calculate_number_batteries(**kwargs):
     """
 
     # Get the configuration from the json file
-    script_dir = os.path.dirname(__file__)
-    json_file_path = os.path.join(script_dir, 'predictor.json')
     try:
-        config = json.loads(open(json_file_path).read())
+        config = get_config()
     except Exception as e:
         print("Error opening predictor.JSON file", e)
         return 0.0
@@ -247,18 +240,12 @@ def _calculate_power(_cei_, _deployment_duration_, _beams_, _system_frequency_,
     """
 
     # Get the configuration from the json file
-    script_dir = os.path.dirname(__file__)
-    json_file_path = os.path.join(script_dir, 'predictor.json')
-
     try:
-        config = json.loads(open(json_file_path).read())
+        config = get_config()
     except Exception as e:
         print("Error opening predictor.JSON file", e)
         return 0.0
 
-    # Get the configuration from the json file
-    config = json.loads(open(json_file_path).read())
-
     # Number of Ensembles
     # Check for divide by 0
     num_ensembles = 0
@@ -291,23 +278,24 @@ def _calculate_power(_cei_, _deployment_duration_, _beams_, _system_frequency_,
             bottom_track_pings = round(_cwpp_ / 10.0) * num_ensembles
 
     # Bottom Track Time
-    (bottom_track_range, wp_range, first_bin, cfg_range) = rti_python.ADCP.Predictor.Range.calculate_predicted_range(CWPON=_cwpon_,
-                                                                                                                     CWPBB=_cwpbb_transmit_pulse_type_,
-                                                                                                                     CWPBS=_cwpbs_,
-                                                                                                                     CWPBN=_cwpbn_,
-                                                                                                                     CWPBL=_cwpbl_,
-                                                                                                                     CBTON=_cbton_,
-                                                                                                                     CBTBB=_cbtbb_transmit_pulse_type_,
-                                                                                                                     SystemFrequency=_system_frequency_,
-                                                                                                                     BeamDiameter=_beam_diameter_,
-                                                                                                                     CyclesPerElement=_cycles_per_element_,
-                                                                                                                     BeamAngle=_beam_angle_,
-                                                                                                                     SpeedOfSound=_speed_of_sound_,
-                                                                                                                     CWPBB_LagLength=_cwpbb_lag_length_,
-                                                                                                                     BroadbandPower=_broadband_power_,
-                                                                                                                     Salinity=_salinity_,
-                                                                                                                     Temperature=_temperature_,
-                                                                                                                     XdcrDepth=_xdcr_depth_)
+    # The parameters are already resolved, so use the range calculation directly
+    (bottom_track_range, wp_range, first_bin, cfg_range) = rti_python.ADCP.Predictor.Range._calculate_predicted_range(_cwpon_,
+                                                                                                                      _cwpbb_transmit_pulse_type_,
+                                                                                                                      _cwpbs_,
+                                                                                                                      _cwpbn_,
+                                                                                                                      _cwpbl_,
+                                                                                                                      _cbton_,
+                                                                                                                      _cbtbb_transmit_pulse_type_,
+                                                                                                                      _system_frequency_,
+                                                                                                                      _beam_diameter_,
+                                                                                                                      _cycles_per_element_,
+                                                                                                                      _beam_angle_,
+                                                                                                                      _speed_of_sound_,
+                                                                                                                      _cwpbb_lag_length_,
+                                                                                                                      _broadband_power_,
+                                                                                                                      _salinity_,
+                                                                                                                      _temperature_,
+                                                                                                                      _xdcr_depth_)
     bottom_track_time = 0.0015 * bottom_track_range
 
     # Transmit Power Bottom Track
@@ -0,0 +1,585 @@
+import numpy as np
+import rti_python.ADCP.AdcpCommands
+from rti_python.ADCP.Predictor.PredictorConfig import get_config
+
+
+class PredictorBatch:
+    """
+    Evaluate the predictor for many configurations at once.
+
+    The predictor configuration is loaded once and the values for each
+    frequency band are put in lookup tables.  Every parameter can be given as
+    a scalar or an array.  The parameters are broadcast together and the
+    power, ranges, STD, maximum velocity and storage are calculated with
+    NumPy for all the configurations at the same time.  The calculations are
+    the same as Power, Range, STD, MaxVelocity and DataStorage.  Parameters
+    not given use the default from predictor.json.
+
+    batch = PredictorBatch()
+    grid = PredictorBatch.grid(CWPBN=[30, 60, 100], CWPBS=[1.0, 2.0, 4.0], CEI=[1, 60, 600])
+    results = batch.calculate(SystemFrequency=288000, **grid)
+    results["power"][0]
+    """
+
+    # Frequency bands in the configuration.  Highest frequency first.
+    BANDS = ["1200000", "600000", "300000", "150000", "75000", "38000"]
+
+    # Values of each band used in the lookup tables
+    BAND_VALUES = ["FREQ", "UF", "XMIT_V", "BIN", "RANGE", "ABSORPTION_SCALE", "XMIT_W", "BEAM_ANGLE", "DIAM", "SAMPLING", "CPE"]
+
+    # Parameters and their default from the configuration.
+    # The names are the same as the kwargs of the predictor functions.
+    DEFAULTS = {"CEI": ("DEFAULT", "CEI"),
+                "DeploymentDuration": ("DEFAULT", "DeploymentDuration"),
+                "Beams": ("DEFAULT", "Beams"),
+                "SystemFrequency": ("DEFAULT", "SystemFrequency"),
+                "CWPON": ("DEFAULT", "CWPON"),
+                "CWPBL": ("DEFAULT", "CWPBL"),
+                "CWPBS": ("DEFAULT", "CWPBS"),
+                "CWPBN": ("DEFAULT", "CWPBN"),
+                "CWPBB_LagLength": ("DEFAULT", "CWPBB_LagLength"),
+                "CWPBB": ("DEFAULT", "CWPBB"),
+                "CWPP": ("DEFAULT", "CWPP"),
+                "CWPTBP": ("DEFAULT", "CWPTBP"),
+                "CBTON": ("DEFAULT", "CBTON"),
+                "CBTBB": ("DEFAULT", "CBTBB"),
+                "CBI_BurstInterval": ("DEFAULT", "CBI_BurstInterval"),
+                "CBI_NumEns": ("DEFAULT", "CBI_NumEns"),
+                "BeamAngle": ("BeamAngle",),
+                "SpeedOfSound": ("SpeedOfSound",),
+                "SystemBootPower": ("SystemBootPower",),
+                "SystemWakeUpTime": ("SystemWakeupTime",),
+                "SystemInitPower": ("SystemInitPower",),
+                "SystemInitTime": ("SystemInitTime",),
+                "BroadbandPower": ("BroadbandPower",),
+                "SystemSavePower": ("SystemSavePower",),
+                "SystemSaveTime": ("SystemSaveTime",),
+                "SystemSleepPower": ("SystemSleepPower",),
+                "BeamDiameter": ("BeamDiameter",),
+                "CyclesPerElement": ("CyclesPerElement",),
+                "Salinity": ("Salinity",),
+                "Temperature": ("Temperature",),
+                "XdcrDepth": ("XdcrDepth",),
+                "SNR": ("SNR",),
+                "Beta": ("Beta",),
+                "NbFudge": ("NbFudge",)}
+
+    # Data types that can be turned on and off for the storage
+    DATA_TYPES = ["IsE00000{:02d}".format(i) for i in range(1, 16)]
+
+    def __init__(self, config=None):
+        """
+        Create the lookup tables from the configuration.
+        :param config: Predictor configuration.  If not given, the cached predictor.json is used.
+        """
+        if config is None:
+            config = get_config()
+        self.config = config
+
+        # Default value of each parameter
+        self.defaults = {}
+        for name, path in PredictorBatch.DEFAULTS.items():
+            value = config
+            for key in path:
+                value = value[key]
+            self.defaults[name] = value
+        self.defaults["IsBurst"] = False
+        self.defaults["EnsemblesPerBurst"] = 0
+        for name in PredictorBatch.DATA_TYPES:
+            self.defaults[name] = config["DEFAULT"][name]
+        self.defaults["CEOUTPUT"] = config["CEOUTPUT"]
+
+        self.nb_profile_ref = config["DEFAULT"]["NB_PROFILE_REF"]
+
+        # Table for each band value.  The last entry is used when
+        # the frequency is not in any band and is 0.
+        self.band = {}
+        for value_name in PredictorBatch.BAND_VALUES:
+            table = [config["DEFAULT"][band][value_name] for band in PredictorBatch.BANDS] + [0.0]
+            self.band[value_name] = np.array(table, dtype=np.float64)
+
+    @staticmethod
+    def grid(**axes):
+        """
+        Create every combination of the given parameter values.
+        :param axes: List of values for each parameter.
+        :return: Dictionary with a flat array of the values for each parameter.
+        """
+        names = list(axes.keys())
+        mesh = np.meshgrid(*[np.asarray(axes[name]) for name in names], indexing='ij')
+        return {name: values.ravel() for name, values in zip(names, mesh)}
+
+    def get_params(self, **kwargs):
+        """
+        Get all the parameters as arrays with the same shape.
+        The defaults are used for the parameters not given.
+        :param kwargs: Parameters as scalars or arrays.
+        :return: Dictionary of arrays for each parameter.
+        """
+        unknown = set(kwargs) - set(self.defaults)
+        if unknown:
+            raise ValueError("Unknown predictor parameters: " + ", ".join(sorted(unknown)))
+
+        names = list(self.defaults.keys())
+        values = []
+        for name in names:
+            value = kwargs.get(name, self.defaults[name])
+            if name != "CEOUTPUT":
+                value = np.asarray(value, dtype=np.float64)
+            else:
+                value = np.asarray(value)
+            values.append(value)
+
+        return dict(zip(names, np.broadcast_arrays(*values)))
+
+    def get_band_index(self, freq):
+        """
+        Find the band of each system frequency.  The frequency must be between
+        the band frequency and the band frequency above it.
+        :param freq: Array of system frequencies.
+        :return: Index of the band.  -1 if the frequency is not in a band.
+        """
+        band_freq = self.band["FREQ"]
+        index = np.full(freq.shape, -1, dtype=np.int64)
+        index[freq > band_freq[0]] = 0
+        for i in range(1, len(PredictorBatch.BANDS)):
+            index[(freq > band_freq[i]) & (freq < band_freq[i - 1])] = i
+
+        return index
+
+    def get_samples(self, p, band_index):
+        """
+        Calculate the sample rate, meters per sample, lag samples, bin samples and code repeats.
+        :param p: Parameters.
+        :param band_index: Band of each configuration.
+        :return: Sample Rate, Meters Per Sample, Lag Samples, Bin Samples, Code Repeats
+        """
+        cpe = p["CyclesPerElement"]
+        sample_rate = p["SystemFrequency"] * (self.band["SAMPLING"][band_index] * self.band["CPE"][band_index] / cpe)
+        sample_rate = np.where(band_index < 0, 0.0, sample_rate)
+
+        meters_per_sample = np.where(sample_rate == 0, 0.0, np.cos(p["BeamAngle"] / 180.0 * np.pi) * p["SpeedOfSound"] / 2.0 / sample_rate)
+
+        lag_samples = np.where(meters_per_sample == 0, 0.0, 2 * np.trunc((np.trunc(p["CWPBB_LagLength"] / meters_per_sample) + 1.0) / 2.0))
+        bin_samples = np.where(meters_per_sample == 0, 0.0, np.trunc(p["CWPBS"] / meters_per_sample))
+
+        repeats = np.trunc(bin_samples / lag_samples) + 1.0
+        code_repeats = np.where(lag_samples == 0, 0.0, np.where(repeats < 2.0, 2.0, repeats))
+
+        return sample_rate, meters_per_sample, lag_samples, bin_samples, code_repeats
+
+    @staticmethod
+    def calc_absorption(freq, speed_of_sound, salinity, temperature, xdcr_depth):
+        """
+        Calculate the water absorption.  Same as Range.calc_absorption().
+        :param freq: System frequency
+        :param speed_of_sound:  Speed of Sound m/s
+        :param salinity: Salinity in ppt.
+        :param temperature: Water Temperature in C
+        :param xdcr_depth: Transducer Depth in m.
+        :return: Water Absorption.
+        """
+        ph = 8.0
+        p1 = 1.0
+        freq_khz = freq / 1000.0
+
+        a1 = 8.68 / speed_of_sound * 10.0 ** (0.78 * ph - 5.0)
+        f1 = 2.8 * ((salinity / 35.0) ** 0.5) * (10.0 ** (4.0 - 1245.0 / (273.0 + temperature)))
+        a2 = 21.44 * salinity / speed_of_sound * (1.0 + 0.025 * temperature)
+        p2 = 1.0 - 1.37 * (10.0 ** (-4.0)) * xdcr_depth + 6.2 * (10.0 ** (-9.0)) * (xdcr_depth ** 2)
+        f2 = 8.17 * (10.0 ** (8.0 - 1990.0 / (273.0 + temperature))) / (1.0 + 0.0018 * (salinity - 35.0))
+        a3 = 4.93 * (10.0 ** (-4.0)) - 2.59 * (10.0 ** (-5.0)) * temperature + 9.11 * (10.0 ** (-7.0)) * (temperature ** 2.0)
+        p3 = 1.0 - 3.83 * (10.0 ** (-5.0)) * xdcr_depth + 4.9 * (10.0 ** (-10.0)) * (xdcr_depth ** 2.0)
+
+        bar = a1 * p1 * f1 * (freq_khz ** 2.0) / ((freq_khz ** 2.0) + (f1 ** 2.0)) / 1000.0            # Boric Acid Relaxation
+        msr = a2 * p2 * f2 * (freq_khz ** 2.0) / ((freq_khz ** 2.0) + (f2 ** 2.0)) / 1000.0            # MgSO3 Magnesium Sulphate Relaxation
+        fa = a3 * p3 * (freq_khz ** 2.0) / 1000.0                                                       # Freshwater Attenuation
+
+        return np.where((speed_of_sound == 0) | (salinity == 0) | (freq == 0), 0.0, bar + msr + fa)
+
+    def calculate_predicted_range(self, **kwargs):
+        """
+        Calculate the predicted ranges.  Same as Range.calculate_predicted_range().
+        :param kwargs: Parameters as scalars or arrays.
+        :return: BT Range, WP Range, Range First Bin, Configured Range
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self._calculate_predicted_range(self.get_params(**kwargs))
+
+    def _calculate_predicted_range(self, p):
+        """
+        Calculate the predicted ranges.
+        :param p: Parameters from get_params().
+        :return: BT Range, WP Range, Range First Bin, Configured Range
+        """
+        narrowband = rti_python.ADCP.AdcpCommands.eCWPBB_TransmitPulseType.NARROWBAND.value
+        bt_narrowband = rti_python.ADCP.AdcpCommands.eCBTBB_Mode.NARROWBAND_LONG_RANGE.value
+
+        p = dict(p)
+        p["SpeedOfSound"] = np.where(p["SpeedOfSound"] == 0, 1490.0, p["SpeedOfSound"])
+        freq = p["SystemFrequency"]
+        cwpbs = p["CWPBS"]
+        cpe = p["CyclesPerElement"]
+        band_index = self.get_band_index(freq)
+        has_band = band_index >= 0
+
+        # DI
+        wave_length = p["SpeedOfSound"] / freq
+        di = np.where(wave_length == 0, 0.0, 20.0 * np.log10(np.pi * p["BeamDiameter"] / wave_length))
+
+        # Absorption
+        absorption = PredictorBatch.calc_absorption(freq, p["SpeedOfSound"], p["Salinity"], p["Temperature"], p["XdcrDepth"])
+
+        # Band values
+        ref_bin = self.band["BIN"][band_index]
+        xmt_w = self.band["XMIT_W"][band_index]
+        r_scale = np.cos(p["BeamAngle"] / 180.0 * np.pi) / np.cos(self.band["BEAM_ANGLE"][band_index] / 180.0 * np.pi)
+        di_band = 20.0 * np.log10(np.pi * self.band["DIAM"][band_index] / wave_length)
+        db = np.where((ref_bin == 0) | (cpe == 0),
+                      0.0,
+                      10.0 * np.log10(cwpbs / ref_bin) + di - di_band - 10.0 * np.log10(self.band["CPE"][band_index] / cpe))
+        absorption_range = self.band["RANGE"][band_index] + ((self.band["ABSORPTION_SCALE"][band_index] - absorption) * self.band["RANGE"][band_index])
+
+        # Bottom Track and Water Profile range
+        bt_nb = np.where(p["CBTBB"] == bt_narrowband, 15.0 * ref_bin, 0.0)
+        bt_range = np.where(p["CBTON"] != 0, 2.0 * r_scale * (absorption_range + ref_bin * db + bt_nb), 0.0)
+        wp_nb = np.where(p["CWPBB"] == narrowband, self.nb_profile_ref * ref_bin, 0.0)
+        wp_range = np.where(p["CWPON"] != 0, r_scale * (absorption_range + ref_bin * db + wp_nb), 0.0)
+
+        # Samples
+        sample_rate, meters_per_sample, lag_samples, bin_samples, code_repeats = self.get_samples(p, band_index)
+
+        # Xmt Scale
+        xmt_scale = np.where(p["BroadbandPower"] != 0, (lag_samples - 1.0) / lag_samples, 1.0 / lag_samples)
+        xmt_scale = np.where((p["CWPBB"] == narrowband) | (lag_samples == 0), 1.0, xmt_scale)
+
+        # Range Reduction
+        range_reduction = np.where(xmt_w == 0, 0.0, 10.0 * np.log10(xmt_scale * xmt_w / xmt_w) * ref_bin + 1.0)
+
+        # First Bin Position
+        pos = np.where(p["CWPBB"] > 1,
+                       cwpbs,
+                       (lag_samples * (code_repeats - 1.0) * meters_per_sample + cwpbs + p["CWPBB_LagLength"]) / 2.0)
+        pos = np.where(p["CWPBB"] == narrowband, (2.0 * cwpbs + 0.05) / 2.0, pos)
+        first_bin_position = p["CWPBL"] + pos
+
+        # Profile Range based off Settings
+        profile_range_settings = p["CWPBL"] + (cwpbs * p["CWPBN"])
+
+        bt = np.where(has_band, bt_range, 0.0)
+        wp = np.where(has_band, wp_range + range_reduction, 0.0)
+
+        return bt, wp, first_bin_position, profile_range_settings
+
+    def calculate_power(self, **kwargs):
+        """
+        Calculate the power.  Same as Power.calculate_power().
+        :param kwargs: Parameters as scalars or arrays.
+        :return: Power for each configuration.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            p = self.get_params(**kwargs)
+            bt_range = self._calculate_predicted_range(p)[0]
+            return self._calculate_power(p, bt_range)
+
+    def _calculate_power(self, p, bt_range):
+        """
+        Calculate the power.
+        :param p: Parameters from get_params().
+        :param bt_range: Bottom Track range for each configuration.
+        :return: Power for each configuration.
+        """
+        broadband = rti_python.ADCP.AdcpCommands.eCWPBB_TransmitPulseType.BROADBAND.value
+        narrowband = rti_python.ADCP.AdcpCommands.eCWPBB_TransmitPulseType.NARROWBAND.value
+
+        cei = p["CEI"]
+        duration = p["DeploymentDuration"]
+        beams = p["Beams"]
+        freq = p["SystemFrequency"]
+        cwpp = p["CWPP"]
+        cwptbp = p["CWPTBP"]
+        cwpbn = p["CWPBN"]
+        boot_power = p["SystemBootPower"]
+        is_burst = p["IsBurst"] != 0
+        band_index = self.get_band_index(freq)
+
+        # Number of Ensembles
+        num_ensembles = np.where(cei == 0, 0.0, np.round((duration * 24.0 * 3600.0) / cei))
+        num_ensembles = np.where(is_burst, p["EnsemblesPerBurst"], num_ensembles)
+
+        # Wakeups
+        wakeups = np.where(cei > 3.0, np.where(cwptbp > 3.0, num_ensembles * cwpp, num_ensembles), 1.0)
+
+        # Bottom Track Pings
+        bottom_track_pings = np.where(cwpp / 10.0 < 1, num_ensembles, np.round(cwpp / 10.0) * num_ensembles)
+        bottom_track_pings = np.where(p["CBTON"] != 0, bottom_track_pings, 0.0)
+
+        # Bottom Track Time
+        bottom_track_time = 0.0015 * bt_range
+
+        # Bottom Track Transmit and Receive Power
+        xmt_w = self.band["XMIT_W"][band_index]
+        bt_transmit_power = bottom_track_pings * 0.2 * (bottom_track_time * xmt_w * beams) / 3600.0
+        freq_mult = np.where(freq > 600000.0, 2.0, 1.0)
+        bt_receive_power = bottom_track_pings * (bottom_track_time * boot_power) / 3600.0 * freq_mult
+
+        # Wakeup and Init Power
+        wakeup_power = wakeups * p["SystemWakeUpTime"] * boot_power / 3600.0
+        init_power = wakeups * p["SystemInitPower"] * p["SystemInitTime"] / 3600.0
+
+        # Samples
+        sample_rate, meters_per_sample, lag_samples, bin_samples, code_repeats = self.get_samples(p, band_index)
+        bin_time = np.where(sample_rate == 0, 0.0, bin_samples / sample_rate)
+        lag_time = np.where(sample_rate == 0, 0.0, lag_samples / sample_rate)
+
+        # Transmit Code Time
+        transmit_code_time = np.where(p["CWPBB"] == narrowband, bin_time, 2.0 * bin_time)
+        transmit_code_time = np.where(p["CWPBB"] == broadband,
+                                      np.where(code_repeats < 3, 2.0 * bin_time, code_repeats * lag_time),
+                                      transmit_code_time)
+
+        # Transmit Scale
+        xmt_scale = np.where(p["BroadbandPower"] != 0, (lag_samples - 1.0) / lag_samples, 1.0 / lag_samples)
+        xmt_scale = np.where(lag_samples == 0, 0.0, xmt_scale)
+        xmt_scale = np.where(p["CWPBB"] == narrowband, 1.0, xmt_scale)
+
+        # Transmit Power
+        transmit_power = (transmit_code_time * xmt_scale * xmt_w * beams * num_ensembles * cwpp) / 3600.0
+
+        # Time Between Pings
+        profile_time = cwpbn * bin_samples / sample_rate
+        time_between_pings = np.where((sample_rate != 0) & (profile_time > cwptbp), profile_time, cwptbp)
+
+        # Profile Time / Receive Time
+        multi_ping_time = np.where(time_between_pings > 1.0, profile_time, time_between_pings)
+        receive_time = np.where(cwpp == 1, np.where(cei > 3, profile_time, cei), multi_ping_time)
+        receive_time = np.where(sample_rate == 0, cei, receive_time)
+        burst_receive_time = np.where((cwpp == 1) | (sample_rate == 0), cei, multi_ping_time)
+        receive_time = np.where(is_burst, burst_receive_time, receive_time)
+
+        # Receive Power
+        system_rcv_power = np.where(beams == 5, 4.30, np.where(beams >= 7, 5.00, 3.80))
+        freq_mult_rcv_pwr = np.where(freq > 700000.0, 2.0, 1.0)
+        receive_power = (receive_time * system_rcv_power * num_ensembles * cwpp) / 3600.0 * freq_mult_rcv_pwr
+
+        # Save Power
+        save_power = (wakeups * p["SystemSavePower"] * p["SystemSaveTime"]) / 3600.0
+
+        # Sleep Power
+        sleep_power = np.where(is_burst, p["SystemSleepPower"], p["SystemSleepPower"] * duration * 24.0)
+
+        # Transmit Voltage and Leakage
+        xmt_v = self.band["XMIT_V"][band_index]
+        leakage_ua = 3.0 * np.sqrt(2.0 * 0.000001 * self.band["UF"][band_index] * xmt_v)
+
+        # Cap Charge Power
+        leakage_hours = np.where(is_burst, 1.0, duration * 24.0)
+        cap_charge_power = 0.03 * (bt_transmit_power + transmit_power) + 1.3 * leakage_hours * xmt_v * 0.000001 * leakage_ua
+
+        return bt_transmit_power + bt_receive_power + wakeup_power + init_power + transmit_power + receive_power + save_power + sleep_power + cap_charge_power
+
+    def calculate_burst_power(self, **kwargs):
+        """
+        Calculate the power for a waves burst deployment.  Same as Power.calculate_burst_power().
+        :param kwargs: Parameters as scalars or arrays.  CBI_NumEns and CBI_BurstInterval set the burst.
+        :return: Power for each configuration.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            p = self.get_params(**kwargs)
+
+            # Power for a single burst
+            burst_p = dict(p)
+            burst_p["DeploymentDuration"] = np.ones_like(p["DeploymentDuration"])
+            burst_p["IsBurst"] = np.ones_like(p["IsBurst"])
+            burst_p["EnsemblesPerBurst"] = p["CBI_NumEns"]
+            burst_pwr = self._calculate_power(burst_p, self._calculate_predicted_range(burst_p)[0])
+
+            # Number of bursts in the deployment
+            interval = p["CBI_BurstInterval"]
+            num_burst = np.where(interval != 0, np.round(p["DeploymentDuration"] * 3600 * 24 / interval), 0.0)
+
+            return burst_pwr * num_burst
+
+    def calculate_std(self, **kwargs):
+        """
+        Calculate the standard deviation in m/s.  Same as STD.calculate_std().
+        :param kwargs: Parameters as scalars or arrays.
+        :return: Standard deviation for each configuration.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self._calculate_std(self.get_params(**kwargs))
+
+    def _calculate_std(self, p):
+        """
+        Calculate the standard deviation in m/s.
+        :param p: Parameters from get_params().
+        :return: Standard deviation for each configuration.
+        """
+        cwpp = p["CWPP"]
+        cwpbb = p["CWPBB"]
+        snr = p["SNR"]
+        beta = p["Beta"]
+        sos = p["SpeedOfSound"]
+        freq = p["SystemFrequency"]
+        beam_angle = p["BeamAngle"]
+        beam_angle_rad = beam_angle / 180.0 * np.pi
+
+        sample_rate, meters_per_sample, lag_samples, bin_samples, code_repeats = self.get_samples(p, self.get_band_index(freq))
+
+        # Nominal Correlation
+        rho = beta * ((code_repeats - 1.0) / code_repeats) / (1.0 + np.power(1.0 / 10.0, snr / 10.0))
+        rho = np.where((code_repeats == 0) | (snr == 0), 0.0, rho)
+        rho = np.where(cwpbb < 2, rho, beta)
+
+        # Broadband STD
+        std_dev_radial = 0.034 * (118.0 / lag_samples) * np.sqrt(14.0 / bin_samples) * np.power((rho / 0.5), -2.0)
+        std_dev_radial = np.where((lag_samples == 0) | (bin_samples == 0), 0.0, std_dev_radial)
+        std_dev_system = std_dev_radial / np.sqrt(cwpp) / np.sqrt(2.0) / np.sin(beam_angle_rad)
+        std_dev_system = np.where(beam_angle == 0, std_dev_radial, std_dev_system)
+        std_dev_system = np.where(cwpp == 0, 0.0, std_dev_system)
+
+        # Narrowband STD
+        nb_lamda = np.where(freq == 0, 0.0, sos / freq)
+        nb_ta = np.where((sos == 0) | (beam_angle_rad == 0), 0.0, 2.0 * p["CWPBS"] / sos / np.cos(beam_angle_rad))
+        nb_l = 0.5 * sos * nb_ta
+        snr_ratio = np.power(10.0, snr / 10.0)
+        nb_std_dev_radial = p["NbFudge"] * (sos * nb_lamda / (8 * np.pi * nb_l)) * np.sqrt(1 + 36 / snr_ratio + 30 / np.power(snr_ratio, 2))
+        nb_std_dev_radial = np.where((nb_l == 0) | (snr == 0), 0.0, nb_std_dev_radial)
+        nb_std_dev_system = nb_std_dev_radial / np.sin(beam_angle_rad) / np.sqrt(2) / np.sqrt(cwpp)
+        nb_std_dev_system = np.where((cwpp == 0) | (beam_angle == 0), 0.0, nb_std_dev_system)
+
+        return np.where(cwpbb > 0, std_dev_system, nb_std_dev_system)
+
+    def calculate_max_velocity(self, **kwargs):
+        """
+        Calculate the maximum velocity in m/s.  Same as MaxVelocity.calculate_max_velocity().
+        :param kwargs: Parameters as scalars or arrays.
+        :return: Maximum velocity for each configuration.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self._calculate_max_velocity(self.get_params(**kwargs))
+
+    def _calculate_max_velocity(self, p):
+        """
+        Calculate the maximum velocity in m/s.
+        :param p: Parameters from get_params().
+        :return: Maximum velocity for each configuration.
+        """
+        # Prevent divide by 0
+        p = dict(p)
+        p["CyclesPerElement"] = np.where(p["CyclesPerElement"] == 0, 1.0, p["CyclesPerElement"])
+        p["SpeedOfSound"] = np.where(p["SpeedOfSound"] == 0, 1490.0, p["SpeedOfSound"])
+        p["SystemFrequency"] = np.where(p["SystemFrequency"] == 0, self.band["FREQ"][0], p["SystemFrequency"])
+        sos = p["SpeedOfSound"]
+        beam_angle = p["BeamAngle"]
+        beam_angle_rad = beam_angle / 180.0 * np.pi
+
+        sample_rate, meters_per_sample, lag_samples, bin_samples, code_repeats = self.get_samples(p, self.get_band_index(p["SystemFrequency"]))
+
+        # Ua
+        ua_hz = np.where(lag_samples == 0, 0.0, sample_rate / (2.0 * lag_samples))
+        ua_radial = ua_hz * sos / (2.0 * p["SystemFrequency"])
+
+        # Narrowband
+        ta = 2.0 * p["CWPBS"] / sos / np.cos(beam_angle_rad)
+        nb_l = 0.5 * sos * ta
+
+        max_vel = np.where(p["CWPBB"] == 0, nb_l, ua_radial) / np.sin(beam_angle_rad)
+        return np.where(beam_angle == 0, ua_radial, max_vel)
+
+    def calculate_ensemble_size(self, **kwargs):
+        """
+        Calculate the number of bytes for an ensemble.  Same as DataStorage.calculate_ensemble_size().
+        :param kwargs: Parameters as scalars or arrays.
+        :return: Number of bytes for each configuration.
+        """
+        return self._calculate_ensemble_size(self.get_params(**kwargs))
+
+    def _calculate_ensemble_size(self, p):
+        """
+        Calculate the number of bytes for an ensemble.
+        :param p: Parameters from get_params().
+        :return: Number of bytes for each configuration.
+        """
+        matlab_overhead = 7
+        bins = p["CWPBN"]
+        beams = p["Beams"]
+
+        # RTB size of each data type
+        bin_beam = 4 * (bins * beams + matlab_overhead)
+        ds_sizes = [bin_beam, bin_beam, bin_beam, bin_beam, bin_beam, bin_beam, bin_beam,      # E0000001 - E0000007
+                    4 * (23 + matlab_overhead),                                                 # E0000008
+                    4 * (19 + matlab_overhead),                                                 # E0000009
+                    4 * (14 + 15 * beams + matlab_overhead),                                    # E0000010
+                    0,                                                                          # E0000011
+                    4 * (23 + matlab_overhead),                                                 # E0000012
+                    4 * (30 + matlab_overhead),                                                 # E0000013
+                    4 * (25 + matlab_overhead),                                                 # E0000014
+                    4 * (8 * beams + 1 + matlab_overhead)]                                      # E0000015
+
+        rtb_size = 4.0 + 32.0                                                                   # Checksum and Header
+        for name, ds_size in zip(PredictorBatch.DATA_TYPES, ds_sizes):
+            rtb_size = rtb_size + np.where(p[name] != 0, ds_size, 0.0)
+
+        # PD0 size.  Header, Fixed Leader, Variable Leader, Velocity, Echo Intensity, Correlation, Percent Good, Bottom Track and Checksum
+        pd0_size = (6 + 7) + 59 + 65 + (2 + (bins * (2 * beams))) + 3 * (2 + (bins * beams)) + 84 + 2
+
+        return np.where(p["CEOUTPUT"] == "RTB", rtb_size, pd0_size)
+
+    def calculate_storage_amount(self, **kwargs):
+        """
+        Calculate the number of bytes for the deployment.  Same as DataStorage.calculate_storage_amount().
+        :param kwargs: Parameters as scalars or arrays.
+        :return: Number of bytes for each configuration.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self._calculate_storage_amount(self.get_params(**kwargs))
+
+    def _calculate_storage_amount(self, p):
+        """
+        Calculate the number of bytes for the deployment.
+        :param p: Parameters from get_params().
+        :return: Number of bytes for each configuration.
+        """
+        cei = p["CEI"]
+        ensembles = np.where(cei != 0, np.round(p["DeploymentDuration"] * 24 * 3600 / cei), 0.0)
+        return ensembles * self._calculate_ensemble_size(p)
+
+    def calculate_burst_storage_amount(self, **kwargs):
+        """
+        Calculate the number of bytes for the waves burst deployment.  Same as DataStorage.calculate_burst_storage_amount().
+        :param kwargs: Parameters as scalars or arrays.  CBI_NumEns and CBI_BurstInterval set the burst.
+        :return: Number of bytes for each configuration.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self._calculate_burst_storage_amount(self.get_params(**kwargs))
+
+    def _calculate_burst_storage_amount(self, p):
+        """
+        Calculate the number of bytes for the waves burst deployment.
+        :param p: Parameters from get_params().
+        :return: Number of bytes for each configuration.
+        """
+        burst_mem = p["CBI_NumEns"] * self._calculate_ensemble_size(p)
+        num_bursts = np.round(p["DeploymentDuration"] * 3600.0 * 24.0 / p["CBI_BurstInterval"])
+        return burst_mem * num_bursts
+
+    def calculate(self, **kwargs):
+        """
+        Calculate the power, ranges, STD, maximum velocity and storage for all the configurations.
+        The parameters are resolved and the range is calculated once for all the results.
+        :param kwargs: Parameters as scalars or arrays.
+        :return: Dictionary with an array for each result.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            p = self.get_params(**kwargs)
+            bt_range, wp_range, first_bin, cfg_range = self._calculate_predicted_range(p)
+
+            return {"power": self._calculate_power(p, bt_range),
+                    "bt_range": bt_range,
+                    "wp_range": wp_range,
+                    "first_bin": first_bin,
+                    "cfg_range": cfg_range,
+                    "std": self._calculate_std(p),
+                    "max_velocity": self._calculate_max_velocity(p),
+                    "storage": self._calculate_storage_amount(p)}
@@ -0,0 +1,39 @@
+import json
+import os
+import functools
+
+
+# Default configuration file
+PREDICTOR_JSON = os.path.join(os.path.dirname(__file__), 'predictor.json')
+
+
+@functools.lru_cache(maxsize=None)
+def load_config(json_file_path=PREDICTOR_JSON):
+    """
+    Load the predictor configuration from the JSON file.
+    The file is only read and parsed the first time, after that the cached
+    configuration is given.  If the file could not be read, the error is
+    raised and nothing is cached.
+
+    The configuration is shared by all the predictor calculations, so it
+    must not be modified.  Use reload_config() if the file changes.
+    :param json_file_path: Path to the JSON configuration file.
+    :return: Dictionary of the configuration.
+    """
+    with open(json_file_path) as f:
+        return json.load(f)
+
+
+def get_config():
+    """
+    Get the cached predictor configuration from predictor.json.
+    :return: Dictionary of the configuration.
+    """
+    return load_config(PREDICTOR_JSON)
+
+
+def reload_config():
+    """
+    Clear the cached configuration, so the JSON file is read again on the next call.
+    """
+    load_config.cache_clear()
@@ -1,8 +1,7 @@
 import math
-import json
-import os
 import pytest
 import rti_python.ADCP.AdcpCommands
+from rti_python.ADCP.Predictor.PredictorConfig import get_config
 
 
 def calculate_predicted_range(**kwargs):
@@ -28,10 +27,8 @@ def calculate_predicted_range(**kwargs):
     """
 
     # Get the configuration from the json file
-    script_dir = os.path.dirname(__file__)
-    json_file_path = os.path.join(script_dir, 'predictor.json')
     try:
-        config = json.loads(open(json_file_path).read())
+        config = get_config()
     except Exception as e:
         print("Error opening JSON file Range", e)
         return (0.0, 0.0, 0.0, 0.0)
@@ -89,12 +86,9 @@ def _calculate_predicted_range(_CWPON_, _CWPBB_TransmitPulseType_, _CWPBS_, _CWP
     :return: BT Range, WP Range, Range First Bin, Configured Range
     """
 
-    script_dir = os.path.dirname(__file__)
-    json_file_path = os.path.join(script_dir, 'predictor.json')
-
     try:
         # Get the configuration from the json file
-        config = json.loads(open(json_file_path).read())
+        config = get_config()
     except Exception as e:
         print("Error getting the configuration file.  Range", e)
         return (0.0, 0.0, 0.0, 0.0)
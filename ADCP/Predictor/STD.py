@@ -1,7 +1,6 @@
-import json
-import os
 import math
 import pytest
+from rti_python.ADCP.Predictor.PredictorConfig import get_config
 
 
 def calculate_std(**kwargs):
@@ -24,11 +23,8 @@ def calculate_std(**kwargs):
     """
 
     # Get the configuration from the json file
-    script_dir = os.path.dirname(__file__)
-    json_file_path = os.path.join(script_dir, 'predictor.json')
-
     try:
-        config = json.loads(open(json_file_path).read())
+        config = get_config()
     except Exception as e:
         print("Error getting the configuration file.  STD", e)
         return 0.0
@@ -70,11 +66,8 @@ def _calculate_std(_CWPP_, _CWPBS_, _CWPBB_LagLength_,
     """
 
     # Get the configuration from the json file
-    script_dir = os.path.dirname(__file__)
-    json_file_path = os.path.join(script_dir, 'predictor.json')
-
     try:
-        config = json.loads(open(json_file_path).read())
+        config = get_config()
     except Exception as e:
         print("Error getting the configuration file.  STD", e)
         return 0.0
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+from obsub import event
+from rti_python.Codecs.BinaryCodec import BinaryCodec
+from rti_python.Codecs.BinaryCodec import EnsembleFramer
+
+
+class AdcpCodecAsync:
+    """
+    Decode the ADCP data with asyncio.
+
+    The data is framed as it is read, so many feeds can be decoded in one
+    event loop.  Each feed needs its own codec because the codec buffers the
+    incomplete ensembles.  stream() decodes the ensembles in an executor, so
+    a large ensemble does not stall the other feeds in the event loop.
+    decode() runs in the calling thread.
+
+    reader, writer = await asyncio.open_connection(host, port)
+    codec = AdcpCodecAsync()
+    async for ens in codec.stream(reader):
+        print(ens.EnsembleData.EnsembleNumber)
+
+    Subscribers of ensemble_event also receive every ensemble decoded.
+    """
+
+    def __init__(self, use_np=False, read_size=64 * 1024, executor=None):
+        """
+        Initialize the codec.
+        :param use_np: TRUE = Use numpy to decode the [Bin x Beam] datasets.
+        :param read_size: Maximum number of bytes to read from the stream at a time.
+        :param executor: Executor to decode the ensembles in stream().  None = Default executor of the event loop.
+        """
+        self.use_np = use_np
+        self.read_size = read_size
+        self.executor = executor
+        self.framer = EnsembleFramer()
+
+    @event
+    def ensemble_event(self, ens):
+        """
+        Event to subscribe to this object to receive the latest ensemble data.
+        :param ens: Ensemble object.
+        :return:
+        """
+        if ens.IsEnsembleData:
+            logging.debug(str(ens.EnsembleData.EnsembleNumber))
+
+    def decode(self, data):
+        """
+        Add the data and decode all the complete ensembles.
+        The incomplete ensemble data is kept for the next call.
+        :param data: Raw data.
+        :return: List of decoded ensembles.
+        """
+        self.framer.add(data)
+        return self.publish(self.decode_frames(list(self.framer.frames())))
+
+    async def decode_async(self, data):
+        """
+        Add the data and decode all the complete ensembles in the executor.
+        The data is framed in the event loop, only the decoding is done in the executor.
+        :param data: Raw data.
+        :return: List of decoded ensembles.
+        """
+        self.framer.add(data)
+        frames = list(self.framer.frames())
+        if not frames:
+            return []
+
+        loop = asyncio.get_running_loop()
+        return self.publish(await loop.run_in_executor(self.executor, self.decode_frames, frames))
+
+    def decode_frames(self, frames):
+        """
+        Decode the ensembles.
+        :param frames: List of complete ensemble binary data.
+        :return: List of decoded ensembles.
+        """
+        ensembles = []
+        for ens_bin in frames:
+            ens = BinaryCodec.decode_data_sets(ens_bin, self.use_np)
+            if ens:
+                ensembles.append(ens)
+
+        return ensembles
+
+    def publish(self, ensembles):
+        """
+        Pass the decoded ensembles to the subscribers.
+        :param ensembles: List of decoded ensembles.
+        :return: List of decoded ensembles.
+        """
+        for ens in ensembles:
+            self.ensemble_event(ens)
+
+        return ensembles
+
+    async def stream(self, reader):
+        """
+        Read the data from the stream and decode the ensembles until the end of the stream.
+        The ensembles are decoded in the executor.
+        :param reader: asyncio.StreamReader or any object with a coroutine read(n).
+        :return: Async generator of decoded ensembles.
+        """
+        while True:
+            data = await reader.read(self.read_size)
+            if not data:
+                break
+
+            for ens in await self.decode_async(data):
+                yield ens
+
+    def get_stats(self):
+        """
+        Get the decode statistics.
+        :return: Dictionary of the statistics.
+        """
+        return {"buffered_bytes": self.framer.available(),
+                "ens_count": self.framer.ens_count,
+                "bad_ens_count": self.framer.bad_ens_count}
@@ -0,0 +1,141 @@
+import mmap
+import os
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from rti_python.Ensemble.Ensemble import Ensemble
+from rti_python.Codecs.BinaryCodec import BinaryCodec
+from rti_python.Codecs.BinaryCodec import EnsembleFramer
+
+
+def decode_chunk(ens_file_path, chunk_start, chunk_end, use_np=False):
+    """
+    Verify and decode all the ensembles that start within the chunk of the file.
+    An ensemble that starts in the chunk is decoded even if it ends after the chunk.
+    This is run in a worker process.
+    :param ens_file_path: Ensemble file path.
+    :param chunk_start: Start of the chunk in the file.
+    :param chunk_end: End of the chunk in the file.
+    :param use_np: TRUE = Use numpy to decode the [Bin x Beam] datasets.
+    :return: List of decoded ensembles in file order.
+    """
+    ensembles = []
+
+    # Find any delimiter that starts within the chunk
+    search_end = chunk_end + len(EnsembleFramer.DELIMITER) - 1
+
+    with open(ens_file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        file_size = len(mm)
+        pos = mm.find(EnsembleFramer.DELIMITER, chunk_start, search_end)
+        while 0 <= pos <= file_size - Ensemble.HeaderSize:
+            ens_size = EnsembleFramer.get_ens_size(mm, pos)
+            if ens_size and pos + ens_size <= file_size:
+                ens_bin = mm[pos:pos + ens_size]
+                if BinaryCodec.verify_ens_data(ens_bin):
+                    ens = BinaryCodec.decode_data_sets(ens_bin, use_np)
+                    if ens:
+                        ensembles.append(ens)
+
+                    # Move past the good ensemble
+                    pos = mm.find(EnsembleFramer.DELIMITER, pos + ens_size, search_end)
+                    continue
+
+            # Bad ensemble, look for the next delimiter
+            pos = mm.find(EnsembleFramer.DELIMITER, pos + 1, search_end)
+
+    return ensembles
+
+
+class BinaryCodecParallel:
+    """
+    Decode an RTB file using multiple processes.
+
+    The file is split into chunks.  Each chunk starts at an ensemble
+    delimiter with a good header, so every ensemble belongs to one chunk.
+    The chunks are verified and decoded in a process pool and the ensembles
+    are given back in the original file order.
+
+    Only max_pending chunks are decoded ahead of the ensembles being
+    used, so the memory used does not depend on the size of the file.
+
+    codec = BinaryCodecParallel(num_workers=8)
+    for ens in codec.decode_file("/path/to/file.ens"):
+        print(ens.EnsembleData.EnsembleNumber)
+    """
+
+    def __init__(self, num_workers=None, chunk_size=8 * 1024 * 1024, max_pending=None, use_np=True):
+        """
+        Initialize the decoder.
+        :param num_workers: Number of worker processes.  Default: Number of CPUs.
+        :param chunk_size: Approximate size of each chunk in bytes.
+        :param max_pending: Maximum number of chunks decoded or waiting to be used.  Default: 2 x num_workers.
+        :param use_np: TRUE = Use numpy to decode the [Bin x Beam] datasets.
+        """
+        self.num_workers = num_workers if num_workers else os.cpu_count()
+        self.chunk_size = chunk_size
+        self.max_pending = max_pending if max_pending else self.num_workers * 2
+        self.use_np = use_np
+
+    @staticmethod
+    def split_file(ens_file_path, chunk_size):
+        """
+        Split the file into chunks.  Each chunk, except the first,
+        starts at a delimiter with a good ensemble header.
+        :param ens_file_path: Ensemble file path.
+        :param chunk_size: Approximate size of each chunk in bytes.
+        :return: List of (chunk_start, chunk_end).
+        """
+        file_size = os.path.getsize(ens_file_path)
+        if file_size == 0:
+            return []
+
+        boundaries = [0]
+        with open(ens_file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = chunk_size
+            while pos < file_size:
+                # Find the next good header after the chunk size
+                pos = mm.find(EnsembleFramer.DELIMITER, pos)
+                while 0 <= pos <= file_size - Ensemble.HeaderSize and not EnsembleFramer.get_ens_size(mm, pos):
+                    pos = mm.find(EnsembleFramer.DELIMITER, pos + 1)
+
+                if pos < 0 or pos > file_size - Ensemble.HeaderSize:
+                    break
+
+                boundaries.append(pos)
+                pos += chunk_size
+
+        boundaries.append(file_size)
+        return list(zip(boundaries[:-1], boundaries[1:]))
+
+    def decode_file(self, ens_file_path):
+        """
+        Verify and decode all the ensembles in the file.
+        :param ens_file_path: Ensemble file path.
+        :return: Generator of decoded ensembles in file order.
+        """
+        for chunk_end, ensembles in self.decode_file_chunks(ens_file_path):
+            for ens in ensembles:
+                yield ens
+
+    def decode_file_chunks(self, ens_file_path):
+        """
+        Verify and decode all the ensembles in the file.
+        The ensembles are given a chunk at a time.
+        :param ens_file_path: Ensemble file path.
+        :return: Generator of (chunk_end, [ensembles]) in file order.
+        """
+        chunks = deque(BinaryCodecParallel.split_file(ens_file_path, self.chunk_size))
+        logging.debug("Decoding " + ens_file_path + " in " + str(len(chunks)) + " chunks")
+
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=self.num_workers) as executor:
+            while chunks or pending:
+                # Keep the pool busy, but limit the number of chunks in memory
+                while chunks and len(pending) < self.max_pending:
+                    chunk_start, chunk_end = chunks.popleft()
+                    future = executor.submit(decode_chunk, ens_file_path, chunk_start, chunk_end, self.use_np)
+                    pending.append((chunk_end, future))
+
+                # Give the results in order
+                chunk_end, future = pending.popleft()
+                yield chunk_end, future.result()
@@ -1,17 +1,31 @@
 import logging
 import os
+import queue
 import struct
 import threading
+import time
 from rti_python.Waves.WaveEnsemble import WaveEnsemble
+from rti_python.Waves.WaveBurst import WaveBurst
 from obsub import event
 import collections
 import datetime
 import copy
+import numpy as np
 
 
 class WaveForceCodec:
     """
     Decode the ensemble data into a WaveForce Matlab file format.
+
+    When a burst is complete, it is put in a bounded queue.  A fixed pool of
+    worker threads takes the bursts from the queue and writes the Matlab files.
+    Subscribe to process_data_event to receive the file name of each burst.
+
+    If the queue is full, add() will wait up to block_timeout seconds for room in the
+    queue (back-pressure on the producer).  If there is still no room or block_when_full
+    is False, the burst is dropped and counted.  Use get_stats() to monitor the queue
+    and the burst processing time.  Call shutdown() to process the queued bursts and
+    stop the workers.
     """
 
     def __init__(self,
@@ -26,7 +40,11 @@ class WaveForceCodec:
                  height_source=4,
                  corr_thresh=0.25,
                  pressure_offset=0.0,
-                 replace_pressure_with_vert=False):
+                 replace_pressure_with_vert=False,
+                 num_workers=1,
+                 max_queue_size=4,
+                 block_when_full=True,
+                 block_timeout=1.0):
         """
         Initialize the wave recorder
         :param ens_in_burst: Number of ensembles in a burst.
@@ -38,6 +56,10 @@ class WaveForceCodec:
         :param bin3: Third selected bin.
         :param ps_depth Pressure Sensor depth.  Depth of the ADCP.
         :param replace_pressure_with_vert: Replace the pressure sensor data with the vertical beam height.
+        :param num_workers: Number of threads to process the bursts.  With more than 1, the bursts can complete out of order.
+        :param max_queue_size: Maximum number of bursts waiting to be processed.
+        :param block_when_full: TRUE = Wait for room in the queue.  FALSE = Drop the burst when the queue is full.
+        :param block_timeout: Maximum time in seconds to wait for room in the queue.  None = Wait forever.
         """
         self.EnsInBurst = ens_in_burst
         self.FilePath = path
@@ -65,12 +87,32 @@ class WaveForceCodec:
         if bin3 >= 0:
             self.selected_bin.append(bin3)
 
-        self.firstTime = datetime.datetime.now()
-        self.secondTime = datetime.datetime.now()         # Used to calculate the sample timing
-
         self.TotalEnsInBurst = 0
         self.VertEnsCount = 0
 
+        # Burst processing
+        self.burst_queue = queue.Queue(maxsize=max_queue_size)
+        self.block_when_full = block_when_full
+        self.block_timeout = block_timeout
+        self.num_workers = max(1, num_workers)
+        self.workers = []
+        self.file_lock = threading.Lock()           # Find the file name and write the file
+        self.stats_lock = threading.Lock()
+
+        # Burst statistics
+        self.max_queue_depth = 0                    # Largest queue depth seen
+        self.blocked_count = 0                      # Number of times add() had to wait for room
+        self.dropped_count = 0                      # Number of bursts dropped
+        self.dropped_ens_count = 0                  # Number of ensembles dropped from the buffer
+        self.burst_count = 0                        # Number of bursts processed
+        self.error_count = 0                        # Number of bursts that failed to process
+        self.last_latency = 0.0                     # Time in seconds from queuing to written for the last burst
+        self.max_latency = 0.0                      # Largest latency
+        self.total_latency = 0.0                    # Sum of the latency to calculate the average
+        self.last_process_time = 0.0                # Time in seconds to process the last burst
+        self.max_process_time = 0.0                 # Largest processing time
+        self.total_process_time = 0.0               # Sum of the processing time to calculate the average
+
     def update_settings(self, ens_in_burst=2048,
                         path=os.path.expanduser('~'),
                         lat=0.0,
@@ -144,59 +186,201 @@ class WaveForceCodec:
                     self.buffer_check_lock.release()
 
                 # Process the buffer when a burst is complete
-                # If BufferCount is 0, then no vertical beam
-                # Check if the total ensembles then is the total number of ensembles in burst
-                # or check if the total number of vertical beam ensembles is found
-                if self.VertEnsCount == 0 and self.TotalEnsInBurst >= self.EnsInBurst and len(self.Buffer) >= self.EnsInBurst:
-                    logging.debug("Begin Process " + str(self.RecordCount) + " " + str(len(self.Buffer)) + " " + str(self.TotalEnsInBurst) + " " + str(self.VertEnsCount))
-
-                    # Get the ensembles from the buffer
-                    ens_buff = []
-                    for idx in range(self.EnsInBurst):
-                        ens = self.Buffer.popleft()
-                        # Create a waves ensemble
-                        ens_wave = WaveEnsemble(ens,
-                                                self.selected_bin,
-                                                height_source=self.height_source,
-                                                corr_thresh=self.CorrThreshold,
-                                                pressure_offset=self.PressureOffset)
-
-                        ens_buff.append(ens_wave)
-                    logging.debug("Get Buffer Data.  New Buffer count: " + str(len(self.Buffer)))
-
-                    # Reset the codec
-                    self.reset()
-                    logging.debug("Reset counts")
-
-                    # Process the buffer
-                    th = threading.Thread(target=self.process, args=[ens_buff, ])
-                    th.start()
-                    logging.debug("Start WaveForceCodec processing thread")
-
-                elif self.VertEnsCount >= self.EnsInBurst and len(self.Buffer) >= self.EnsInBurst * 2:
-                    logging.debug("Begin Process1 " + str(self.RecordCount) + " " + str(len(self.Buffer)) + " " + str(self.TotalEnsInBurst) + " " + str(self.VertEnsCount) + " " + str(self.EnsInBurst))
-                    # Get the ensembles from the buffer
-                    ens_buff = []
-                    for idx in range(self.EnsInBurst * 2):                                              # Multiple by 2 to include the 4b and vert ensembles
-                        ens = self.Buffer.popleft()
-                        # Create a waves ensemble
-                        ens_wave = WaveEnsemble(ens,
-                                                self.selected_bin,
-                                                height_source=self.height_source,
-                                                corr_thresh=self.CorrThreshold,
-                                                pressure_offset=self.PressureOffset)
-
-                        ens_buff.append(ens_wave)
-                    logging.debug("Get Buffer Data1.  New Buffer count: " + str(len(self.Buffer)))
-
-                    # Reset the codec
-                    self.reset()
-                    logging.debug("Reset counts1")
-
-                    # Process the buffer
-                    th = threading.Thread(target=self.process, args=[ens_buff, ])
-                    th.start()
-                    logging.debug("Start1 WaveForceCodec processing thread")
+                # The ensembles left in the buffer can complete the next burst
+                # Limit the buffer if the bursts can not be found
+                # A burst with vertical beam data is at most EnsInBurst * 2 ensembles
+                while True:
+                    while self.process_buffer():
+                        pass
+                    if len(self.Buffer) <= self.EnsInBurst * 2:
+                        break
+                    self.drop_oldest_ens()
+
+    def process_buffer(self):
+        """
+        Process the oldest burst in the buffer if the burst is complete.
+        If VertEnsCount is 0, then no vertical beam.
+        Check if the total ensembles then is the total number of ensembles in burst
+        or check if the total number of vertical beam ensembles is found.
+        :return: TRUE = A burst was taken from the buffer.
+        """
+        if self.VertEnsCount == 0 and self.TotalEnsInBurst >= self.EnsInBurst and len(self.Buffer) >= self.EnsInBurst:
+            logging.debug("Begin Process " + str(self.RecordCount) + " " + str(len(self.Buffer)) + " " + str(self.TotalEnsInBurst) + " " + str(self.VertEnsCount))
+
+            # Get the ensembles from the buffer
+            ens_buff = []
+            burst = WaveBurst(self.EnsInBurst, self.selected_bin, self.height_source)
+            for idx in range(self.EnsInBurst):
+                ens = self.Buffer.popleft()
+                # Create a waves ensemble
+                ens_wave = WaveEnsemble(ens,
+                                        self.selected_bin,
+                                        height_source=self.height_source,
+                                        corr_thresh=self.CorrThreshold,
+                                        pressure_offset=self.PressureOffset)
+
+                ens_buff.append(ens_wave)
+                burst.add(ens_wave)
+            logging.debug("Get Buffer Data.  New Buffer count: " + str(len(self.Buffer)))
+
+            # Reset the codec
+            self.reset()
+            logging.debug("Reset counts")
+
+            # Process the buffer
+            self.queue_burst(ens_buff, burst)
+            return True
+
+        elif self.VertEnsCount >= self.EnsInBurst and len(self.Buffer) >= self.EnsInBurst * 2:
+            logging.debug("Begin Process1 " + str(self.RecordCount) + " " + str(len(self.Buffer)) + " " + str(self.TotalEnsInBurst) + " " + str(self.VertEnsCount) + " " + str(self.EnsInBurst))
+            # Get the ensembles from the buffer
+            ens_buff = []
+            burst = WaveBurst(self.EnsInBurst * 2, self.selected_bin, self.height_source)
+            for idx in range(self.EnsInBurst * 2):                                              # Multiple by 2 to include the 4b and vert ensembles
+                ens = self.Buffer.popleft()
+                # Create a waves ensemble
+                ens_wave = WaveEnsemble(ens,
+                                        self.selected_bin,
+                                        height_source=self.height_source,
+                                        corr_thresh=self.CorrThreshold,
+                                        pressure_offset=self.PressureOffset)
+
+                ens_buff.append(ens_wave)
+                burst.add(ens_wave)
+            logging.debug("Get Buffer Data1.  New Buffer count: " + str(len(self.Buffer)))
+
+            # Reset the codec
+            self.reset()
+            logging.debug("Reset counts1")
+
+            # Process the buffer
+            self.queue_burst(ens_buff, burst)
+            return True
+
+        return False
+
+    def drop_oldest_ens(self):
+        """
+        Remove the oldest ensemble from the buffer and the burst counts.
+        """
+        self.Buffer.popleft()
+        self.reset()
+
+        with self.stats_lock:
+            self.dropped_ens_count += 1
+
+    def queue_burst(self, ens_buff, burst):
+        """
+        Put the burst in the queue to be processed by the workers.
+        The workers are started with the first burst.
+        :param ens_buff: List of WaveEnsembles in the burst.
+        :param burst: WaveBurst with the data of the wave ensembles.
+        :return: TRUE = Burst added to the queue.  FALSE = Queue full and the burst was dropped.
+        """
+        if not self.workers:
+            self.start_workers()
+
+        try:
+            item = (ens_buff, burst, time.perf_counter())
+            if self.block_when_full:
+                if self.burst_queue.full():
+                    with self.stats_lock:
+                        self.blocked_count += 1
+                self.burst_queue.put(item, timeout=self.block_timeout)
+            else:
+                self.burst_queue.put_nowait(item)
+        except queue.Full:
+            with self.stats_lock:
+                self.dropped_count += 1
+            logging.warning("WaveForceCodec queue full.  Burst dropped: " + str(len(ens_buff)) + " ensembles")
+            return False
+
+        with self.stats_lock:
+            self.max_queue_depth = max(self.max_queue_depth, self.burst_queue.qsize())
+        logging.debug("Queued WaveForceCodec burst.  Queue depth: " + str(self.burst_queue.qsize()))
+        return True
+
+    def start_workers(self):
+        """
+        Start the worker threads to process the bursts.
+        The workers are daemon threads, so they do not keep the application running.
+        Use shutdown() to process the queued bursts before exiting.
+        """
+        for index in range(self.num_workers):
+            worker = threading.Thread(target=self.run_worker, name="WaveForceCodec Worker " + str(index))
+            worker.daemon = True
+            worker.start()
+            self.workers.append(worker)
+
+    def run_worker(self):
+        """
+        Process the bursts in the queue until None is received.
+        """
+        while True:
+            item = self.burst_queue.get()
+
+            # None is given on shutdown
+            if item is None:
+                self.burst_queue.task_done()
+                break
+
+            ens_buff, burst, queue_time = item
+            start_time = time.perf_counter()
+            try:
+                self.process(ens_buff, burst)
+                is_good = True
+            except Exception as e:
+                logging.error("Error processing the WaveForceCodec burst.  " + str(e))
+                is_good = False
+            end_time = time.perf_counter()
+
+            with self.stats_lock:
+                if is_good:
+                    self.burst_count += 1
+                    self.last_latency = end_time - queue_time
+                    self.max_latency = max(self.max_latency, self.last_latency)
+                    self.total_latency += self.last_latency
+                    self.last_process_time = end_time - start_time
+                    self.max_process_time = max(self.max_process_time, self.last_process_time)
+                    self.total_process_time += self.last_process_time
+                else:
+                    self.error_count += 1
+
+            self.burst_queue.task_done()
+
+    def shutdown(self):
+        """
+        Process all the bursts in the queue and stop the workers.
+        The workers are started again if another burst is completed.
+        """
+        for worker in self.workers:
+            self.burst_queue.put(None)
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+
+    def get_stats(self):
+        """
+        Get the queue and burst processing statistics.
+        The latency is the time from the burst being queued to the file being written.
+        :return: Dictionary of the statistics.
+        """
+        with self.stats_lock:
+            return {"queue_depth": self.burst_queue.qsize(),
+                    "max_queue_depth": self.max_queue_depth,
+                    "max_queue_size": self.burst_queue.maxsize,
+                    "num_workers": self.num_workers,
+                    "blocked_count": self.blocked_count,
+                    "dropped_count": self.dropped_count,
+                    "dropped_ens_count": self.dropped_ens_count,
+                    "burst_count": self.burst_count,
+                    "error_count": self.error_count,
+                    "last_latency": self.last_latency,
+                    "max_latency": self.max_latency,
+                    "avg_latency": self.total_latency / self.burst_count if self.burst_count > 0 else 0.0,
+                    "last_process_time": self.last_process_time,
+                    "max_process_time": self.max_process_time,
+                    "avg_process_time": self.total_process_time / self.burst_count if self.burst_count > 0 else 0.0}
 
     @event
     def process_data_event(self, file_name):
@@ -205,179 +389,72 @@ class WaveForceCodec:
     def reset(self):
         """
         Reset the codec.  When a burst is processed or
-        if you want to clear the buffer and start over.
+        an ensemble is dropped, count the ensembles left in the buffer.
         :return:
         """
 
         self.buffer_check_lock.acquire()
-        # Remove the ensembles from the buffer
-        if self.VertEnsCount >= self.EnsInBurst:
-            self.VertEnsCount = self.VertEnsCount - self.EnsInBurst
-            logging.debug("Reset BufferCount: " + str(self.VertEnsCount))
-
-        # Check if 4b and vert or 4b only data
-        if self.TotalEnsInBurst >= (self.EnsInBurst * 2):
-            self.TotalEnsInBurst = self.TotalEnsInBurst - (self.EnsInBurst * 2)
-            logging.debug("4B and Vert Reset TotalEnsInBurst: " + str(self.TotalEnsInBurst))
-        elif self.TotalEnsInBurst >= self.EnsInBurst:                                           # Only 4b data
-            self.TotalEnsInBurst = self.TotalEnsInBurst - self.EnsInBurst
-            logging.debug("4B Reset TotalEnsInBurst: " + str(self.TotalEnsInBurst))
+        self.VertEnsCount = sum(1 for ens in self.Buffer if ens.IsEnsembleData and ens.EnsembleData.NumBeams == 1)
+        self.TotalEnsInBurst = len(self.Buffer)
+        logging.debug("Reset TotalEnsInBurst: " + str(self.TotalEnsInBurst) + " VertEnsCount: " + str(self.VertEnsCount))
         self.buffer_check_lock.release()
 
-    def process(self, ens_buff):
+    def process(self, ens_buff, burst=None):
         """
         Process all the data in the ensemble buffer.
-        :param buffer: Ensemble data buffer.
+        :param ens_buff: List of WaveEnsembles in the burst.
+        :param burst: WaveBurst with the data of the wave ensembles.  If not given, it is created from ens_buff.
         """
         logging.debug("Process Waves Burst " + str(self.RecordCount) + " " + str(len(ens_buff)) + " " + str(len(self.Buffer)) + " " + str(self.TotalEnsInBurst) + " " + str(self.VertEnsCount))
 
+        # Collect the data of the waves ensembles into arrays
+        if burst is None:
+            burst = WaveBurst(len(ens_buff), self.selected_bin, self.height_source)
+            for ens_wave in ens_buff:
+                burst.add(ens_wave)
+
         # Local variables
         num_bins = len(self.selected_bin)
+        num_4beam_ens = burst.num_4beam_ens
+        num_vert_ens = burst.num_vert_ens
 
-        num_4beam_ens = 0
-        num_vert_ens = 0
-
-        wus_buff = bytearray()
-        wus_buff_cnt = 0
-        wvs_buff = bytearray()
-        wvs_buff_cnt = 0
-        wzs_buff = bytearray()
-        wzs_buff_cnt = 0
-
-        beam_0_vel = bytearray()
-        beam_1_vel = bytearray()
-        beam_2_vel = bytearray()
-        beam_3_vel = bytearray()
-        beam_vel_cnt = 0
-        beam_vert_vel = bytearray()
-        beam_vert_vel_cnt = 0
-
-        rt_0 = bytearray()
-        rt_1 = bytearray()
-        rt_2 = bytearray()
-        rt_3 = bytearray()
-        rt_vert = bytearray()
-
-        pressure = bytearray()
-        vert_pressure = bytearray()
-
-        heading = bytearray()
-        pitch = bytearray()
-        roll = bytearray()
-
-        water_temp = bytearray()
-        height = bytearray()
-        avg_range_track = bytearray()
+        wus_buff = burst.get_bytes(WaveBurst.WUS)
+        wvs_buff = burst.get_bytes(WaveBurst.WVS)
+        wzs_buff = burst.get_bytes(WaveBurst.WZS)
 
-        sel_bins_buff = bytearray()
+        beam_0_vel = burst.get_bytes(WaveBurst.WB0)
+        beam_1_vel = burst.get_bytes(WaveBurst.WB1)
+        beam_2_vel = burst.get_bytes(WaveBurst.WB2)
+        beam_3_vel = burst.get_bytes(WaveBurst.WB3)
+        beam_vert_vel = burst.get_bytes(WaveBurst.WZ0)
 
-        ps_depth_buff = bytearray()
+        rt_0 = burst.get_bytes(WaveBurst.WR0)
+        rt_1 = burst.get_bytes(WaveBurst.WR1)
+        rt_2 = burst.get_bytes(WaveBurst.WR2)
+        rt_3 = burst.get_bytes(WaveBurst.WR3)
+        rt_vert = burst.get_bytes(WaveBurst.WZR)
 
-        # Convert the buffer to wave ensembles
-        # Process the data for each waves ensemble
-        for ens in ens_buff:
-            #if ens.IsEnsembleData:
-            #    logging.warning("Wave Ens Datetime: " + str(ens.EnsembleData.datetime()))
+        pressure = burst.get_bytes(WaveBurst.WPS)
+        vert_pressure = burst.get_bytes(WaveBurst.WZP)
 
-            # Create a waves ensemble
-            #ens_wave = WaveEnsemble(ens, self.selected_bin, height_source=self.height_source, corr_thresh=self.CorrThreshold, pressure_offset=self.PressureOffset)
+        heading = burst.get_bytes(WaveBurst.WHG)
+        pitch = burst.get_bytes(WaveBurst.WPH)
+        roll = burst.get_bytes(WaveBurst.WRL)
 
-            # Add the waves ensemble to the list
-            #ens_waves_buff.append(ens_wave)
-
-            ens_wave = ens
-
-            logging.debug("Waves Ens DateTime: " + str(ens_wave.ens_datetime))
-
-            if ens_wave.is_vertical_ens:
-                # Vertical Beam data
-                num_vert_ens += 1
-
-                # Pressure (WZP)
-                vert_pressure.extend(struct.pack('f', ens_wave.pressure))
-
-                # Beam Velocity (WZ0)
-                for sel_bin in range(num_bins):
-                    if len(ens_wave.vert_beam_vel) > sel_bin:
-                        beam_vert_vel.extend(struct.pack('f', ens_wave.vert_beam_vel[sel_bin]))
-
-                # Range Tracking (WZR)
-                if len(ens_wave.range_tracking) > 0:
-                    rt_vert.extend(struct.pack('f', ens_wave.range_tracking[0]))
-
-                # Set the height source based off the selected height source (WHS)
-                if self.height_source == 4 or self.height_source == 5:
-                    height.extend(struct.pack('f', ens_wave.height))                        # Height (WHS)
-
-            else:
-                # 4 Beam Data
-                num_4beam_ens += 1
-
-                pressure.extend(struct.pack('f', ens_wave.pressure))                    # Pressure (WPS)
-                heading.extend(struct.pack('f', ens_wave.heading))                      # Heading (WHG)
-                pitch.extend(struct.pack('f', ens_wave.pitch))                          # Pitch (WPH)
-                roll.extend(struct.pack('f', ens_wave.roll))                            # Roll (WRL)
-                water_temp.extend(struct.pack('f', ens_wave.water_temp))                # Water Temp (WTS)
-                avg_range_track.extend(struct.pack('f', ens_wave.avg_range_tracking))   # Avg Range Tracking (WAH)
-
-                # Set the height source based off the selected height source (WHS)
-                if self.height_source == 0 or self.height_source == 1 or self.height_source == 2 or self.height_source == 3:
-                    height.extend(struct.pack('f', ens_wave.height))                        # Height (WHS)
-                #if self.height_source == 4 and num_vert_ens <= 0:
-                #    height.extend(struct.pack('f', ens_wave.avg_range_tracking))            # Average RT
-                #if self.height_source == 5 and num_vert_ens <= 0:
-                #    height.extend(struct.pack('f', ens_wave.pressure))                      # Pressure
-
-                # Range Tracking (WR0, WR1, WR2, WR3)
-                rt_0.extend(struct.pack('f', ens_wave.range_tracking[0]))               # Beam 0 RT
-                if ens_wave.num_beams > 1:
-                    rt_1.extend(struct.pack('f', ens_wave.range_tracking[1]))           # Beam 1 RT
-                if ens_wave.num_beams > 2:
-                    rt_2.extend(struct.pack('f', ens_wave.range_tracking[2]))           # Beam 2 RT
-                if ens_wave.num_beams > 3:
-                    rt_3.extend(struct.pack('f', ens_wave.range_tracking[3]))           # Beam 3 RT
-
-                # Count the good Earth Velocity and Beam Velocity
-                if len(ens_wave.east_vel) > 0:
-                    wus_buff_cnt += 1
-                if len(ens_wave.north_vel) > 0:
-                    wvs_buff_cnt += 1
-                if len(ens_wave.vertical_vel) > 0:
-                    wzs_buff_cnt += 1
-                if len(ens_wave.beam_vel) > 0:
-                    beam_vel_cnt += 1
-
-                # Set the selected bin data
-                for sel_bin in range(num_bins):
-                    # Earth Velocity (WUS, WVS, WZS)
-                    if len(ens_wave.east_vel) > 0 and len(ens_wave.east_vel) > sel_bin:
-                        wus_buff.extend(struct.pack('f', ens_wave.east_vel[sel_bin]))
-                    if len(ens_wave.north_vel) > 0 and len(ens_wave.north_vel) > sel_bin:
-                        wvs_buff.extend(struct.pack('f', ens_wave.north_vel[sel_bin]))
-                    if len(ens_wave.vertical_vel) > 0 and len(ens_wave.vertical_vel) > sel_bin:
-                        wzs_buff.extend(struct.pack('f', ens_wave.vertical_vel[sel_bin]))
-
-                    # Beam Velocity (WB0, WB1, WB2, WB3)
-                    if len(ens_wave.beam_vel) > sel_bin and len(ens_wave.beam_vel[sel_bin]) > 0:
-                        beam_0_vel.extend(struct.pack('f', ens_wave.beam_vel[sel_bin][0]))          # Beam 0 Beam Velocity
-                        if ens_wave.num_beams > 1:
-                            beam_1_vel.extend(struct.pack('f', ens_wave.beam_vel[sel_bin][1]))      # Beam 1 Beam Velocity
-                        if ens_wave.num_beams > 2:
-                            beam_2_vel.extend(struct.pack('f', ens_wave.beam_vel[sel_bin][2]))      # Beam 2 Beam Velocity
-                        if ens_wave.num_beams > 3:
-                            beam_3_vel.extend(struct.pack('f', ens_wave.beam_vel[sel_bin][3]))      # Beam 3 Beam Velocity
+        water_temp = burst.get_bytes(WaveBurst.WTS)
+        height = burst.get_bytes(WaveBurst.WHS)
+        avg_range_track = burst.get_bytes(WaveBurst.WAH)
 
         # Selected Bin Heights (WHV)
-        for sel_bin in range(num_bins):
-            bin_ht = round((ens_buff[0].blank + (self.selected_bin[sel_bin] * ens_buff[0].bin_size)), 2)
-            sel_bins_buff.extend(struct.pack('f', bin_ht))
+        bin_hts = [round((ens_buff[0].blank + (sel_bin * ens_buff[0].bin_size)), 2) for sel_bin in self.selected_bin]
+        sel_bins_buff = np.array(bin_hts, dtype=np.float32).tobytes()
 
         # Pressure Sensor Depth
-        ps_depth_buff.extend(struct.pack('f', self.PressureSensorDepth))
+        ps_depth_buff = np.array([self.PressureSensorDepth], dtype=np.float32).tobytes()
 
+        # [TXT] is added when the file is written, it contains the record number
         ba = bytearray()
 
-        ba.extend(self.process_txt(ens_buff[0]))                            # [TXT] Txt to describe burst
         ba.extend(self.process_lat(ens_buff[0]))                            # [LAT] Latitude
         ba.extend(self.process_lon(ens_buff[0]))                            # [LON] Longitude
         ba.extend(self.process_wft(ens_buff[0]))                            # [WFT] Time from the first ensemble
@@ -385,11 +462,11 @@ class WaveForceCodec:
         ba.extend(self.process_whv(sel_bins_buff, num_bins))                # [WHV] Wave Cell Depths
         ba.extend(self.process_whp(ps_depth_buff))                          # [WHP] Pressure Sensor Height
         if len(wus_buff) > 0:
-            ba.extend(self.process_wus(wus_buff, wus_buff_cnt, num_bins))      # [WUS] East Velocity
+            ba.extend(self.process_wus(wus_buff, burst.wus_cnt, num_bins))      # [WUS] East Velocity
         if len(wvs_buff) > 0:
-            ba.extend(self.process_wvs(wvs_buff, wvs_buff_cnt, num_bins))      # [WVS] North Velocity
+            ba.extend(self.process_wvs(wvs_buff, burst.wvs_cnt, num_bins))      # [WVS] North Velocity
         if len(wzs_buff) > 0:
-            ba.extend(self.process_wzs(wzs_buff, wzs_buff_cnt, num_bins))      # [WZS] Vertical Velocity
+            ba.extend(self.process_wzs(wzs_buff, burst.wzs_cnt, num_bins))      # [WZS] Vertical Velocity
         if len(beam_0_vel) > 0:
             ba.extend(self.process_wb0(beam_0_vel, num_4beam_ens, num_bins))    # [WB0] Beam 0 Beam Velocity
         if len(beam_1_vel) > 0:
@@ -454,30 +531,37 @@ class WaveForceCodec:
 
             # Replace the Vertical beam velocity with the 4 beam vertical velocity because vertical data does not exist
             if len(wzs_buff) > 0:
-                ba.extend(self.process_wz0(wzs_buff, wzs_buff_cnt, num_bins))  # [WZS] Vertical Velocity
+                ba.extend(self.process_wz0(wzs_buff, burst.wzs_cnt, num_bins))  # [WZS] Vertical Velocity
 
         # Write the file
-        filename = self.write_file(ba)
-
-        # Increment the record count
-        self.RecordCount += 1
+        # The workers can finish at the same time, so only one can find the file name and write
+        # The record number in the TXT is found with the file name
+        with self.file_lock:
+            filename = self.find_file_name()
+            txt = self.process_txt(ens_buff[0], self.RecordCount)         # [TXT] Txt to describe burst
+            self.write_file(txt + ba, filename)
+
+            # Increment the record count
+            self.RecordCount += 1
 
         # Send event that file process complete
         self.process_data_event(filename)
 
         logging.debug("WaveForce Codec data processing complete: " + str(self.RecordCount) + " " + str(len(ens_buff)) + " " + str(len(self.Buffer)) + " " + str(self.TotalEnsInBurst) + " " + str(self.VertEnsCount))
 
-    def write_file(self, ba):
+    def write_file(self, ba, filename=None):
         """
         Write the Bytearray to a file.  Save it with the record number
         :param ba: Byte Array with record data.
+        :param filename: File name to write.  None = Find the file name with the record number.
         :return:
         """
         # Check if the file path exist, if not, then create the file path
         if not os.path.isdir(self.FilePath):
             os.mkdir(self.FilePath)
 
-        filename = self.find_file_name()
+        if filename is None:
+            filename = self.find_file_name()
         with open(filename, 'wb') as f:
             f.write(ba)
 
@@ -498,7 +582,7 @@ class WaveForceCodec:
 
         return filename
 
-    def process_txt(self, ens):
+    def process_txt(self, ens, record_num=None):
         """
         This will give a text description of the burst.  This will include the record number,
         the serial number and the date and time of the burst started.
@@ -508,11 +592,15 @@ class WaveForceCodec:
         Columns: Text Length 2013/07/30 21:00:00.00
         txt = 2013/07/30 21:00:00.00, Record No. 7, SN013B0000000000000000000000000000
         :param ens: Ensemble data.
+        :param record_num: Record number of the burst.  None = Use the RecordCount.
         :return: Byte array of the data in MATLAB format.
         """
+        if record_num is None:
+            record_num = self.RecordCount
+
         #txt = ens.EnsembleData.datetime_str() + ", "
         txt = ens.ens_datetime.strftime("%m/%d/%Y %H:%M:%S.%f") + ", "
-        txt += "Record No. " + str(self.RecordCount) + ", "
+        txt += "Record No. " + str(record_num) + ", "
         #txt += "SN" + ens.EnsembleData.SerialNumber
         txt += "SN" + ens.serial_number
 
@@ -648,20 +736,21 @@ class WaveForceCodec:
             # Get the first 4 Beam sample
             sub_cfg = ens_buff[0].ss_config
             sub_code = ens_buff[0].ss_code
-            self.firstTime = ens_buff[0].ens_datetime
-            logging.debug("Wave Codec Diff Time First Time: " + str(self.firstTime) + " " + str(ens_buff[0].ens_datetime))
+            # The workers process bursts at the same time, so the times are not kept in the codec
+            first_time = ens_buff[0].ens_datetime
+            logging.debug("Wave Codec Diff Time First Time: " + str(first_time))
         if len(ens_buff) >= 3:
             # Check if both subsystems match
             # If they do match, then there is no interleaving and we can take the next sample
             # If there is interleaving, then we have to wait for the next sample, because the first 2 go together
             if ens_buff[1].ss_config == sub_cfg and ens_buff[1].ss_code == sub_code:
-                self.secondTime = ens_buff[1].ens_datetime
-                logging.debug("Wave Codec Diff Time Second Time [1]: " + str(self.secondTime) + " " + str(ens_buff[1].ens_datetime))
+                second_time = ens_buff[1].ens_datetime
+                logging.debug("Wave Codec Diff Time Second Time [1]: " + str(second_time))
             else:
-                self.secondTime = ens_buff[2].ens_datetime
-                logging.debug("Wave Codec Diff Time Second Time [2]: " + str(self.secondTime) + " " + str(ens_buff[2].ens_datetime))
+                second_time = ens_buff[2].ens_datetime
+                logging.debug("Wave Codec Diff Time Second Time [2]: " + str(second_time))
 
-            wdt_timedelta = self.secondTime - self.firstTime
+            wdt_timedelta = second_time - first_time
             wdt = wdt_timedelta.total_seconds()
 
             ba.extend(struct.pack('i', 10))     # Indicate Floating Point
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from obsub import event
+from rti_python.Codecs.AdcpCodecAsync import AdcpCodecAsync
+
+
+class AdcpTcpIngestServer:
+    """
+    asyncio TCP server to receive ADCP data from many feeds.
+
+    Each connection is a feed with its own codec.  All the feeds are
+    decoded in one event loop, there is no thread per connection.
+
+    server = AdcpTcpIngestServer(port=55056)
+    server.ensemble_event += ens_handler
+    await server.start()
+    await server.serve_forever()
+
+    ens_handler(sender, ens, source)
+    source is the (host, port) of the feed.
+    """
+
+    def __init__(self, host="0.0.0.0", port=55056, use_np=False):
+        """
+        Initialize the server.
+        :param host: Host to listen on.
+        :param port: TCP port to listen on.  0 = Use any free port.
+        :param use_np: TRUE = Use numpy to decode the [Bin x Beam] datasets.
+        """
+        self.host = host
+        self.port = port
+        self.use_np = use_np
+        self.server = None
+        self.feeds = {}                         # Codec for each connected feed
+
+    @event
+    def ensemble_event(self, ens, source):
+        """
+        Event to subscribe to receive the decoded ensembles from all the feeds.
+        :param ens: Ensemble object.
+        :param source: (host, port) of the feed.
+        :return:
+        """
+        pass
+
+    async def start(self):
+        """
+        Start listening for connections.
+        If the port was 0, the port is updated to the port used.
+        :return:
+        """
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        logging.info("ADCP TCP ingest server: " + str(self.host) + ":" + str(self.port))
+
+    async def serve_forever(self):
+        """
+        Accept connections until the server is closed.
+        :return:
+        """
+        await self.server.serve_forever()
+
+    async def close(self):
+        """
+        Stop accepting connections.
+        :return:
+        """
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def handle_connection(self, reader, writer):
+        """
+        Decode all the data from the feed until it disconnects.
+        :param reader: Stream reader for the connection.
+        :param writer: Stream writer for the connection.
+        :return:
+        """
+        source = writer.get_extra_info("peername")
+        codec = AdcpCodecAsync(use_np=self.use_np)
+        self.feeds[source] = codec
+        logging.info("ADCP feed connected: " + str(source))
+
+        try:
+            async for ens in codec.stream(reader):
+                self.ensemble_event(ens, source)
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            logging.error("ADCP feed error: " + str(source) + " " + str(e))
+        finally:
+            del self.feeds[source]
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError as e:
+                logging.debug("ADCP feed close error: " + str(source) + " " + str(e))
+            logging.info("ADCP feed disconnected: " + str(source))
+
+
+class AdcpUdpIngestServer(asyncio.DatagramProtocol):
+    """
+    asyncio UDP server to receive ADCP data from many feeds.
+
+    Each sender address is a feed with its own codec, so an ensemble
+    can be split across datagrams.  UDP has no disconnect, so only the
+    max_feeds feeds heard from most recently are kept.  The codec of the
+    oldest feed is removed, with its incomplete ensemble.
+
+    The datagrams are decoded in the event loop as they are received.
+    Use the TCP server for feeds with large ensembles, it decodes the
+    ensembles in an executor.
+
+    server = AdcpUdpIngestServer(port=55057)
+    server.ensemble_event += ens_handler
+    await server.start()
+
+    ens_handler(sender, ens, source)
+    source is the (host, port) of the feed.
+    """
+
+    def __init__(self, host="0.0.0.0", port=55057, use_np=False, max_feeds=100):
+        """
+        Initialize the server.
+        :param host: Host to listen on.
+        :param port: UDP port to listen on.  0 = Use any free port.
+        :param use_np: TRUE = Use numpy to decode the [Bin x Beam] datasets.
+        :param max_feeds: Maximum number of feeds to keep a codec for.
+        """
+        self.host = host
+        self.port = port
+        self.use_np = use_np
+        self.max_feeds = max_feeds
+        self.transport = None
+        self.feeds = OrderedDict()              # Codec for each feed, the most recent feed is last
+
+    @event
+    def ensemble_event(self, ens, source):
+        """
+        Event to subscribe to receive the decoded ensembles from all the feeds.
+        :param ens: Ensemble object.
+        :param source: (host, port) of the feed.
+        :return:
+        """
+        pass
+
+    async def start(self):
+        """
+        Start listening for datagrams.
+        If the port was 0, the port is updated to the port used.
+        :return:
+        """
+        loop = asyncio.get_running_loop()
+        await loop.create_datagram_endpoint(lambda: self, local_addr=(self.host, self.port))
+        self.port = self.transport.get_extra_info("sockname")[1]
+        logging.info("ADCP UDP ingest server: " + str(self.host) + ":" + str(self.port))
+
+    async def close(self):
+        """
+        Stop listening for datagrams.
+        :return:
+        """
+        if self.transport:
+            self.transport.close()
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        """
+        Decode the datagram with the codec for the feed.
+        :param data: Datagram data.
+        :param addr: (host, port) of the feed.
+        :return:
+        """
+        codec = self.feeds.get(addr)
+        if codec is None:
+            codec = AdcpCodecAsync(use_np=self.use_np)
+            self.feeds[addr] = codec
+            logging.info("ADCP feed: " + str(addr))
+
+            # Remove the feed not heard from the longest
+            while len(self.feeds) > self.max_feeds:
+                old_addr = self.feeds.popitem(last=False)[0]
+                logging.info("ADCP feed removed: " + str(old_addr))
+        else:
+            self.feeds.move_to_end(addr)
+
+        for ens in codec.decode(data):
+            self.ensemble_event(ens, addr)
+
+    def error_received(self, exc):
+        logging.error("ADCP UDP ingest error: " + str(exc))
@@ -30,14 +30,23 @@ class Amplitude:
 
             self.Amplitude.append(bins)
 
-    def decode(self, data):
+    def decode(self, data, use_np=False):
         """
         Take the data bytearray.  Decode the data to populate
         the velocities.
         :param data: Bytearray for the dataset.
+        :param use_np: TRUE = Read all the values with a single numpy read.
         """
         packet_pointer = Ensemble.GetBaseDataSize(self.name_len)
 
+        # Read the entire [beam][bin] array at once, then transpose to [bin][beam]
+        if use_np:
+            amp_array = Ensemble.GetFloatArray(packet_pointer, self.num_elements, self.element_multiplier, data)
+            if amp_array is not None:
+                self.Amplitude = amp_array.T.tolist()
+                logging.debug(self.Amplitude)
+                return
+
         for beam in range(self.element_multiplier):
             for bin_num in range(self.num_elements):
                 self.Amplitude[bin_num][beam] = Ensemble.GetFloat(packet_pointer, Ensemble().BytesInFloat, data)
@@ -50,7 +59,7 @@ class Amplitude:
         Encode the data into RTB format.
         :return:
         """
-        result = []
+        result = bytearray()
 
         # Generate header
         result += Ensemble.generate_header(self.ds_type,
@@ -60,11 +69,8 @@ class Amplitude:
                                            self.name_len,
                                            self.Name)
 
-        # Add the data
-        for beam in range(self.element_multiplier):
-            for bin_num in range(self.num_elements):
-                val = self.Amplitude[bin_num][beam]
-                result += Ensemble.float_to_bytes(val)
+        # Add the data beam by beam
+        result += Ensemble.array_2d_to_bytes(self.Amplitude, self.num_elements, self.element_multiplier)
 
         return result
 
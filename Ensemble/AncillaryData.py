@@ -79,7 +79,7 @@ class AncillaryData:
         Encode the data into RTB format.
         :return:
         """
-        result = []
+        result = bytearray()
 
         # Generate header
         result += Ensemble.generate_header(self.ds_type,
@@ -90,25 +90,25 @@ class AncillaryData:
                                            self.Name)
 
         # Add the data
-        result += Ensemble.float_to_bytes(self.FirstBinRange)
-        result += Ensemble.float_to_bytes(self.BinSize)
-        result += Ensemble.float_to_bytes(self.FirstPingTime)
-        result += Ensemble.float_to_bytes(self.LastPingTime)
-        result += Ensemble.float_to_bytes(self.Heading)
-        result += Ensemble.float_to_bytes(self.Pitch)
-        result += Ensemble.float_to_bytes(self.Roll)
-        result += Ensemble.float_to_bytes(self.WaterTemp)
-        result += Ensemble.float_to_bytes(self.SystemTemp)
-        result += Ensemble.float_to_bytes(self.Salinity)
-        result += Ensemble.float_to_bytes(self.Pressure)
-        result += Ensemble.float_to_bytes(self.TransducerDepth)
-        result += Ensemble.float_to_bytes(self.SpeedOfSound)
-        result += Ensemble.float_to_bytes(self.RawMagFieldStrength)
-        result += Ensemble.float_to_bytes(self.RawMagFieldStrength2)
-        result += Ensemble.float_to_bytes(self.RawMagFieldStrength3)
-        result += Ensemble.float_to_bytes(self.PitchGravityVector)
-        result += Ensemble.float_to_bytes(self.RollGravityVector)
-        result += Ensemble.float_to_bytes(self.VerticalGravityVector)
+        result += Ensemble.float_list_to_bytes([self.FirstBinRange,
+                                                self.BinSize,
+                                                self.FirstPingTime,
+                                                self.LastPingTime,
+                                                self.Heading,
+                                                self.Pitch,
+                                                self.Roll,
+                                                self.WaterTemp,
+                                                self.SystemTemp,
+                                                self.Salinity,
+                                                self.Pressure,
+                                                self.TransducerDepth,
+                                                self.SpeedOfSound,
+                                                self.RawMagFieldStrength,
+                                                self.RawMagFieldStrength2,
+                                                self.RawMagFieldStrength3,
+                                                self.PitchGravityVector,
+                                                self.RollGravityVector,
+                                                self.VerticalGravityVector])
 
         return result
 
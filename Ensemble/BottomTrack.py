@@ -261,7 +261,7 @@ class BottomTrack:
         Encode the data into RTB format.
         :return:
         """
-        result = []
+        result = bytearray()
 
         self.num_elements = (15 * int(self.NumBeams)) + 14
 
@@ -274,66 +274,36 @@ class BottomTrack:
                                            self.Name)
 
         # Add the data
-        result += Ensemble.float_to_bytes(self.FirstPingTime)
-        result += Ensemble.float_to_bytes(self.LastPingTime)
-        result += Ensemble.float_to_bytes(self.Heading)
-        result += Ensemble.float_to_bytes(self.Pitch)
-        result += Ensemble.float_to_bytes(self.Roll)
-        result += Ensemble.float_to_bytes(self.WaterTemp)
-        result += Ensemble.float_to_bytes(self.SystemTemp)
-        result += Ensemble.float_to_bytes(self.Salinity)
-        result += Ensemble.float_to_bytes(self.Pressure)
-        result += Ensemble.float_to_bytes(self.TransducerDepth)
-        result += Ensemble.float_to_bytes(self.SpeedOfSound)
-        result += Ensemble.float_to_bytes(self.Status)
-        result += Ensemble.float_to_bytes(self.NumBeams)
-        result += Ensemble.float_to_bytes(self.ActualPingCount)
-
-        for beam in range(len(self.Range)):
-            result += Ensemble.float_to_bytes(self.Range[beam])
-
-        for beam in range(len(self.SNR)):
-            result += Ensemble.float_to_bytes(self.SNR[beam])
-
-        for beam in range(len(self.Amplitude)):
-            result += Ensemble.float_to_bytes(self.Amplitude[beam])
-
-        for beam in range(len(self.Correlation)):
-            result += Ensemble.float_to_bytes(self.Correlation[beam])
-
-        for beam in range(len(self.BeamVelocity)):
-            result += Ensemble.float_to_bytes(self.BeamVelocity[beam])
-
-        for beam in range(len(self.BeamGood)):
-            result += Ensemble.float_to_bytes(self.BeamGood[beam])
-
-        for beam in range(len(self.InstrumentVelocity)):
-            result += Ensemble.float_to_bytes(self.InstrumentVelocity[beam])
-
-        for beam in range(len(self.InstrumentGood)):
-            result += Ensemble.float_to_bytes(self.InstrumentGood[beam])
-
-        for beam in range(len(self.EarthVelocity)):
-            result += Ensemble.float_to_bytes(self.EarthVelocity[beam])
-
-        for beam in range(len(self.EarthGood)):
-            result += Ensemble.float_to_bytes(self.EarthGood[beam])
-
-        for beam in range(len(self.SNR_PulseCoherent)):
-            result += Ensemble.float_to_bytes(self.SNR_PulseCoherent[beam])
-
-        for beam in range(len(self.Amp_PulseCoherent)):
-            result += Ensemble.float_to_bytes(self.Amp_PulseCoherent[beam])
-
-        for beam in range(len(self.Vel_PulseCoherent)):
-            result += Ensemble.float_to_bytes(self.Vel_PulseCoherent[beam])
-
-        for beam in range(len(self.Noise_PulseCoherent)):
-            result += Ensemble.float_to_bytes(self.Vel_PulseCoherent[beam])
-
-        for beam in range(len(self.Corr_PulseCoherent)):
-            result += Ensemble.float_to_bytes(self.Vel_PulseCoherent[beam])
-
+        result += Ensemble.float_list_to_bytes([self.FirstPingTime,
+                                                self.LastPingTime,
+                                                self.Heading,
+                                                self.Pitch,
+                                                self.Roll,
+                                                self.WaterTemp,
+                                                self.SystemTemp,
+                                                self.Salinity,
+                                                self.Pressure,
+                                                self.TransducerDepth,
+                                                self.SpeedOfSound,
+                                                self.Status,
+                                                self.NumBeams,
+                                                self.ActualPingCount])
+
+        result += Ensemble.float_list_to_bytes(self.Range)
+        result += Ensemble.float_list_to_bytes(self.SNR)
+        result += Ensemble.float_list_to_bytes(self.Amplitude)
+        result += Ensemble.float_list_to_bytes(self.Correlation)
+        result += Ensemble.float_list_to_bytes(self.BeamVelocity)
+        result += Ensemble.float_list_to_bytes(self.BeamGood)
+        result += Ensemble.float_list_to_bytes(self.InstrumentVelocity)
+        result += Ensemble.float_list_to_bytes(self.InstrumentGood)
+        result += Ensemble.float_list_to_bytes(self.EarthVelocity)
+        result += Ensemble.float_list_to_bytes(self.EarthGood)
+        result += Ensemble.float_list_to_bytes(self.SNR_PulseCoherent)
+        result += Ensemble.float_list_to_bytes(self.Amp_PulseCoherent)
+        result += Ensemble.float_list_to_bytes(self.Vel_PulseCoherent)
+        result += Ensemble.float_list_to_bytes(self.Noise_PulseCoherent)
+        result += Ensemble.float_list_to_bytes(self.Corr_PulseCoherent)
         return result
 
     def encode_csv(self, dt, ss_code, ss_config, blank=0, bin_size=0):
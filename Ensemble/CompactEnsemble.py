@@ -0,0 +1,354 @@
+import logging
+import numpy as np
+from rti_python.Ensemble.Ensemble import Ensemble
+from rti_python.Ensemble.BeamVelocity import BeamVelocity
+from rti_python.Ensemble.InstrumentVelocity import InstrumentVelocity
+from rti_python.Ensemble.EarthVelocity import EarthVelocity
+from rti_python.Ensemble.Amplitude import Amplitude
+from rti_python.Ensemble.Correlation import Correlation
+from rti_python.Ensemble.GoodBeam import GoodBeam
+from rti_python.Ensemble.GoodEarth import GoodEarth
+from rti_python.Ensemble.EnsembleData import EnsembleData
+from rti_python.Ensemble.AncillaryData import AncillaryData
+from rti_python.Ensemble.BottomTrack import BottomTrack
+from rti_python.Ensemble.NmeaData import NmeaData
+from rti_python.Ensemble.RangeTracking import RangeTracking
+from rti_python.Ensemble.SystemSetup import SystemSetup
+
+
+class CompactEnsemble:
+    """
+    Compact version of the Ensemble to keep many ensembles in memory.
+
+    The [Bin x Beam] datasets are stored as numpy arrays [bin][beam] in the
+    same type as the RTB data (float32 or int32), instead of lists of Python
+    floats.  The other datasets are small and are stored as their RTB bytes.
+    They are decoded each time they are accessed.  The ensemble number, date
+    and time and subsystem are kept so the ensembles can be sorted and
+    filtered without decoding.
+
+    The CompactEnsemble is read only.  The arrays are not writeable and the
+    decoded datasets raise an AttributeError when a value is set, so a change
+    is not lost without an error.  A dataset can be replaced as a whole, for
+    example compact.EarthVelocity = new_array.  Use to_ensemble() to change
+    the values, or to give the ensemble to code that needs the Ensemble
+    datasets, like AverageWaterColumn and WaveForceCodec.
+
+    For a 200 bin 4 beam ensemble with all the datasets, this uses about 25KB
+    instead of about 240KB for the Ensemble.
+
+    compact = CompactEnsemble.from_ensemble(ens)
+    compact = CompactEnsemble.decode(ens_bin)
+    ens = compact.to_ensemble()
+    """
+
+    __slots__ = ('EnsembleNumber', 'DateTime', 'SsCode', 'SsConfig',
+                 'BeamVelocity', 'InstrumentVelocity', 'EarthVelocity',
+                 'Amplitude', 'Correlation', 'GoodBeam', 'GoodEarth',
+                 '_ensemble_data', '_ancillary_data', '_bottom_track',
+                 '_nmea_data', '_system_setup', '_range_tracking')
+
+    # [Bin x Beam] datasets
+    # Attribute: (Dataset name, Dataset class, Dataset value attribute, numpy type)
+    BIN_BEAM_DATASETS = {'BeamVelocity': ("E000001", BeamVelocity, 'Velocities', np.float32),
+                         'InstrumentVelocity': ("E000002", InstrumentVelocity, 'Velocities', np.float32),
+                         'EarthVelocity': ("E000003", EarthVelocity, 'Velocities', np.float32),
+                         'Amplitude': ("E000004", Amplitude, 'Amplitude', np.float32),
+                         'Correlation': ("E000005", Correlation, 'Correlation', np.float32),
+                         'GoodBeam': ("E000006", GoodBeam, 'GoodBeam', np.int32),
+                         'GoodEarth': ("E000007", GoodEarth, 'GoodEarth', np.int32)}
+
+    # Datasets stored as RTB bytes
+    # Attribute: (Dataset name, Dataset class, Slot)
+    RAW_DATASETS = {'EnsembleData': ("E000008", EnsembleData, '_ensemble_data'),
+                    'AncillaryData': ("E000009", AncillaryData, '_ancillary_data'),
+                    'BottomTrack': ("E000010", BottomTrack, '_bottom_track'),
+                    'NmeaData': ("E000011", NmeaData, '_nmea_data'),
+                    'SystemSetup': ("E000014", SystemSetup, '_system_setup'),
+                    'RangeTracking': ("E000015", RangeTracking, '_range_tracking')}
+
+    def __init__(self):
+        self.EnsembleNumber = 0
+        self.DateTime = None                    # datetime or None if not known
+        self.SsCode = ""                        # Subsystem code
+        self.SsConfig = 0                       # Subsystem configuration
+        for attr in CompactEnsemble.BIN_BEAM_DATASETS:
+            setattr(self, attr, None)
+        for name, ds_class, slot in CompactEnsemble.RAW_DATASETS.values():
+            setattr(self, slot, None)
+
+    @property
+    def EnsembleData(self):
+        return self.get_dataset('EnsembleData')
+
+    @property
+    def AncillaryData(self):
+        return self.get_dataset('AncillaryData')
+
+    @property
+    def BottomTrack(self):
+        return self.get_dataset('BottomTrack')
+
+    @property
+    def NmeaData(self):
+        return self.get_dataset('NmeaData')
+
+    @property
+    def SystemSetup(self):
+        return self.get_dataset('SystemSetup')
+
+    @property
+    def RangeTracking(self):
+        return self.get_dataset('RangeTracking')
+
+    @property
+    def IsBeamVelocity(self):
+        return self.BeamVelocity is not None
+
+    @property
+    def IsInstrumentVelocity(self):
+        return self.InstrumentVelocity is not None
+
+    @property
+    def IsEarthVelocity(self):
+        return self.EarthVelocity is not None
+
+    @property
+    def IsAmplitude(self):
+        return self.Amplitude is not None
+
+    @property
+    def IsCorrelation(self):
+        return self.Correlation is not None
+
+    @property
+    def IsGoodBeam(self):
+        return self.GoodBeam is not None
+
+    @property
+    def IsGoodEarth(self):
+        return self.GoodEarth is not None
+
+    @property
+    def IsEnsembleData(self):
+        return self._ensemble_data is not None
+
+    @property
+    def IsAncillaryData(self):
+        return self._ancillary_data is not None
+
+    @property
+    def IsBottomTrack(self):
+        return self._bottom_track is not None
+
+    @property
+    def IsNmeaData(self):
+        return self._nmea_data is not None
+
+    @property
+    def IsSystemSetup(self):
+        return self._system_setup is not None
+
+    @property
+    def IsRangeTracking(self):
+        return self._range_tracking is not None
+
+    def get_dataset(self, attr):
+        """
+        Decode the dataset stored as RTB bytes.
+        The dataset is read only, see ReadOnlyDataset.
+        :param attr: Dataset attribute name.  (EnsembleData, AncillaryData, ...)
+        :return: Decoded dataset or None if the dataset is not in the ensemble.
+        """
+        ds = self.decode_dataset(attr)
+        if ds is None:
+            return None
+
+        return ReadOnlyDataset(ds)
+
+    def decode_dataset(self, attr):
+        """
+        Decode the dataset stored as RTB bytes.
+        :param attr: Dataset attribute name.  (EnsembleData, AncillaryData, ...)
+        :return: Decoded dataset or None if the dataset is not in the ensemble.
+        """
+        name, ds_class, slot = CompactEnsemble.RAW_DATASETS[attr]
+        ds_bin = getattr(self, slot)
+        if ds_bin is None:
+            return None
+
+        num_elements = Ensemble.GetInt32(Ensemble.BytesInInt32 * 1, Ensemble.BytesInInt32, ds_bin)
+        element_multiplier = Ensemble.GetInt32(Ensemble.BytesInInt32 * 2, Ensemble.BytesInInt32, ds_bin)
+        ds = ds_class(num_elements, element_multiplier)
+        ds.decode(ds_bin)
+        return ds
+
+    def datetime(self):
+        """
+        Date and time of the ensemble.
+        :return: datetime or None if not known.
+        """
+        return self.DateTime
+
+    def set_ensemble_data(self, ds_bin):
+        """
+        Store the Ensemble Data RTB bytes and
+        set the ensemble number, date and time and subsystem.
+        :param ds_bin: Ensemble Data dataset RTB bytes.
+        :return:
+        """
+        self._ensemble_data = ds_bin
+        ed = self.decode_dataset('EnsembleData')
+        self.EnsembleNumber = ed.EnsembleNumber
+        self.SsCode = ed.SysFirmwareSubsystemCode
+        self.SsConfig = ed.SubsystemConfig
+
+        # Do not use ed.datetime(), it gives the current time if the date is bad
+        self.DateTime = ed.valid_datetime()
+
+    @staticmethod
+    def from_ensemble(ens):
+        """
+        Create a compact ensemble from the Ensemble.
+        :param ens: Ensemble.
+        :return: CompactEnsemble.
+        """
+        compact = CompactEnsemble()
+
+        for attr, (name, ds_class, value_attr, np_type) in CompactEnsemble.BIN_BEAM_DATASETS.items():
+            if getattr(ens, "Is" + attr):
+                ds = getattr(ens, attr)
+                values = np.array(getattr(ds, value_attr), dtype=np_type)
+
+                # Values not decoded are stored as [bin][beam][1]
+                values = values.reshape(ds.num_elements, ds.element_multiplier)
+                values.flags.writeable = False
+                setattr(compact, attr, values)
+
+        for attr, (name, ds_class, slot) in CompactEnsemble.RAW_DATASETS.items():
+            if getattr(ens, "Is" + attr):
+                ds_bin = bytes(getattr(ens, attr).encode())
+                if attr == 'EnsembleData':
+                    compact.set_ensemble_data(ds_bin)
+                else:
+                    setattr(compact, slot, ds_bin)
+
+        return compact
+
+    @staticmethod
+    def decode(ens_bin):
+        """
+        Create a compact ensemble directly from the RTB ensemble.
+        The [Bin x Beam] datasets are read with numpy and the other datasets
+        are copied, so no lists are created.
+        Use BinaryCodec.verify_ens_data to verify the ensemble first.
+        :param ens_bin: RTB ensemble data.
+        :return: CompactEnsemble or None if the ensemble could not be decoded.
+        """
+        compact = CompactEnsemble()
+        names = {}
+        for attr, values in CompactEnsemble.BIN_BEAM_DATASETS.items():
+            names[values[0]] = attr
+        for attr, values in CompactEnsemble.RAW_DATASETS.items():
+            names[values[0]] = attr
+
+        packet_pointer = Ensemble.HeaderSize
+        ens_end = len(ens_bin) - Ensemble.ChecksumSize
+
+        try:
+            for x in range(Ensemble.MaxNumDataSets):
+                if packet_pointer + Ensemble.GetBaseDataSize(8) > ens_end:
+                    break
+
+                ds_type = Ensemble.GetInt32(packet_pointer, Ensemble.BytesInInt32, ens_bin)
+                num_elements = Ensemble.GetInt32(packet_pointer + Ensemble.BytesInInt32 * 1, Ensemble.BytesInInt32, ens_bin)
+                element_multiplier = Ensemble.GetInt32(packet_pointer + Ensemble.BytesInInt32 * 2, Ensemble.BytesInInt32, ens_bin)
+                name_len = Ensemble.GetInt32(packet_pointer + Ensemble.BytesInInt32 * 4, Ensemble.BytesInInt32, ens_bin)
+                name = str(bytes(ens_bin[packet_pointer + Ensemble.BytesInInt32 * 5:packet_pointer + Ensemble.BytesInInt32 * 5 + 7]), 'UTF-8')
+                data_set_size = Ensemble.GetDataSetSize(ds_type, name_len, num_elements, element_multiplier)
+                if data_set_size <= 0 or packet_pointer + data_set_size > ens_end:
+                    break
+
+                attr = names.get(name)
+                if attr in CompactEnsemble.BIN_BEAM_DATASETS:
+                    np_type = CompactEnsemble.BIN_BEAM_DATASETS[attr][3]
+                    values_start = packet_pointer + Ensemble.GetBaseDataSize(name_len)
+                    if np_type == np.int32:
+                        values = Ensemble.GetInt32Array(values_start, num_elements, element_multiplier, ens_bin)
+                    else:
+                        values = Ensemble.GetFloatArray(values_start, num_elements, element_multiplier, ens_bin)
+
+                    # [beam][bin] to [bin][beam] and copy out of the ensemble buffer
+                    if values is not None:
+                        values = np.ascontiguousarray(values.T)
+                        values.flags.writeable = False
+                        setattr(compact, attr, values)
+                elif attr == 'EnsembleData':
+                    compact.set_ensemble_data(bytes(ens_bin[packet_pointer:packet_pointer + data_set_size]))
+                elif attr is not None:
+                    setattr(compact, CompactEnsemble.RAW_DATASETS[attr][2], bytes(ens_bin[packet_pointer:packet_pointer + data_set_size]))
+
+                packet_pointer += data_set_size
+        except Exception as e:
+            logging.warning("Error decoding the compact ensemble.  " + str(e))
+            return None
+
+        return compact
+
+    def to_ensemble(self):
+        """
+        Create an Ensemble with all the datasets decoded.
+        :return: Ensemble.
+        """
+        ens = Ensemble()
+
+        for attr, (name, ds_class, value_attr, np_type) in CompactEnsemble.BIN_BEAM_DATASETS.items():
+            values = getattr(self, attr)
+            if values is not None:
+                ds = ds_class(values.shape[0], values.shape[1])
+                setattr(ds, value_attr, values.tolist())
+                if attr == 'EarthVelocity':
+                    ds.generate_velocity_vectors()
+                getattr(ens, "Add" + attr)(ds)
+
+        for attr in CompactEnsemble.RAW_DATASETS:
+            ds = self.decode_dataset(attr)
+            if ds is not None:
+                getattr(ens, "Add" + attr)(ds)
+
+        return ens
+
+
+class ReadOnlyDataset:
+    """
+    Read only view of a dataset decoded from a CompactEnsemble.
+    The values are read from the dataset.  Lists are given as tuples and
+    setting a value raises an AttributeError, because the dataset is decoded
+    again on the next access and the change would be lost.
+    """
+
+    __slots__ = ('_ds',)
+
+    def __init__(self, ds):
+        object.__setattr__(self, '_ds', ds)
+
+    def __getattr__(self, name):
+        return ReadOnlyDataset.read_only(getattr(self._ds, name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompactEnsemble datasets are read only, use to_ensemble() to change " + name)
+
+    def __delattr__(self, name):
+        raise AttributeError("CompactEnsemble datasets are read only, use to_ensemble() to change " + name)
+
+    @staticmethod
+    def read_only(value):
+        """
+        Convert the lists to tuples, so the values can not be changed in place.
+        :param value: Dataset value.
+        :return: Value with the lists as tuples.
+        """
+        if isinstance(value, list):
+            return tuple(ReadOnlyDataset.read_only(item) for item in value)
+
+        return value
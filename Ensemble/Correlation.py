@@ -26,14 +26,23 @@ class Correlation:
 
             self.Correlation.append(bins)
 
-    def decode(self, data):
+    def decode(self, data, use_np=False):
         """
         Take the data bytearray.  Decode the data to populate
         the velocities.
         :param data: Bytearray for the dataset.
+        :param use_np: TRUE = Read all the values with a single numpy read.
         """
         packet_pointer = Ensemble.GetBaseDataSize(self.name_len)
 
+        # Read the entire [beam][bin] array at once, then transpose to [bin][beam]
+        if use_np:
+            corr_array = Ensemble.GetFloatArray(packet_pointer, self.num_elements, self.element_multiplier, data)
+            if corr_array is not None:
+                self.Correlation = corr_array.T.tolist()
+                logging.debug(self.Correlation)
+                return
+
         for beam in range(self.element_multiplier):
             for bin_num in range(self.num_elements):
                 self.Correlation[bin_num][beam] = Ensemble.GetFloat(packet_pointer, Ensemble().BytesInFloat, data)
@@ -46,7 +55,7 @@ class Correlation:
         Encode the data into RTB format.
         :return:
         """
-        result = []
+        result = bytearray()
 
         # Generate header
         result += Ensemble.generate_header(self.ds_type,
@@ -56,11 +65,8 @@ class Correlation:
                                            self.name_len,
                                            self.Name)
 
-        # Add the data
-        for beam in range(self.element_multiplier):
-            for bin_num in range(self.num_elements):
-                val = self.Correlation[bin_num][beam]
-                result += Ensemble.float_to_bytes(val)
+        # Add the data beam by beam
+        result += Ensemble.array_2d_to_bytes(self.Correlation, self.num_elements, self.element_multiplier)
 
         return result
 
@@ -32,14 +32,26 @@ class EarthVelocity:
             self.Magnitude.append(Ensemble.BadVelocity)     # Mark Mag Bad
             self.Direction.append(Ensemble.BadVelocity)     # Mark Dir Bad
 
-    def decode(self, data):
+    def decode(self, data, use_np=False):
         """
         Take the data bytearray.  Decode the data to populate
         the velocities.
         :param data: Bytearray for the dataset.
+        :param use_np: TRUE = Read all the values with a single numpy read.
         """
         packet_pointer = Ensemble.GetBaseDataSize(self.name_len)
 
+        # Read the entire [beam][bin] array at once, then transpose to [bin][beam]
+        if use_np:
+            vel_array = Ensemble.GetFloatArray(packet_pointer, self.num_elements, self.element_multiplier, data)
+            if vel_array is not None:
+                self.Velocities = vel_array.T.tolist()
+
+                # Generate Water Current Magnitude and Direction
+                self.generate_velocity_vectors()
+                logging.debug(self.Velocities)
+                return
+
         for beam in range(self.element_multiplier):
             for bin_num in range(self.num_elements):
                 self.Velocities[bin_num][beam] = Ensemble.GetFloat(packet_pointer, Ensemble().BytesInFloat, data)
@@ -66,17 +78,14 @@ class EarthVelocity:
         :param bt_vert: Bottom Track Vertical velocity
         :return:
         """
-        # Remove the vessel speed
-        for bin_num in range(len(self.Velocities)):
-            if not Ensemble.is_bad_velocity(self.Velocities[bin_num][0]):
-                self.Velocities[bin_num][0] = self.Velocities[bin_num][0] + bt_east            # Remove vessel speed
-            if not Ensemble.is_bad_velocity(self.Velocities[bin_num][1]):
-                self.Velocities[bin_num][1] = self.Velocities[bin_num][1] + bt_north           # Remove vessel speed
-            if not Ensemble.is_bad_velocity(self.Velocities[bin_num][2]):
-                self.Velocities[bin_num][2] = self.Velocities[bin_num][2] + bt_vert            # Remove vessel speed
+        # Remove the vessel speed from all the bins at once
+        vel = EarthVelocity.remove_vessel_speed_array(self.Velocities, bt_east, bt_north, bt_vert)
+        self.Velocities = vel.tolist()
 
         # Generate the new vectors after removing the vessel speed
-        self.generate_velocity_vectors()
+        mag, dir = EarthVelocity.generate_vectors_array(vel)
+        self.Magnitude = mag.tolist()
+        self.Direction = dir.tolist()
 
     def generate_velocity_vectors(self):
         """
@@ -120,16 +129,90 @@ class EarthVelocity:
         :param earth_vel: Earth Velocities[bin][beam]
         :return: [magnitude], [direction]  List with a value for each bin
         """
-        mag = []
-        dir = []
+        mag, dir = EarthVelocity.generate_vectors_array(earth_vel)
+        return mag.tolist(), dir.tolist()
+
+    @staticmethod
+    def get_bad_array(values):
+        """
+        Find the bad values in the array.
+        Bad Velocity and NaN values are bad.
+        :param values: numpy array.
+        :return: numpy bool array.  TRUE = Bad value.
+        """
+        return np.isnan(values) | np.isclose(values, Ensemble.BadVelocity, rtol=1e-06, atol=0.0)
+
+    @staticmethod
+    def generate_vectors_array(earth_vel):
+        """
+        Generate the velocity vectors for all the bins at once.  This will calculate the
+        magnitude and direction of the water.  If East, North or Vertical is bad in a bin,
+        the magnitude is marked bad.  If East or North is bad, the direction is marked bad.
+
+        The velocities can be a single ensemble [bin][beam] or
+        many ensembles [ens][bin][beam] to calculate a whole transect in one call.
+
+        :param earth_vel: Earth Velocities [bin][beam] or [ens][bin][beam].  List or numpy array.
+        :return: magnitude, direction  numpy arrays [bin] or [ens][bin]
+        """
+        vel = np.asarray(earth_vel, dtype=np.float64)
+        if vel.ndim < 2:
+            return np.zeros(0), np.zeros(0)
 
-        for bin_num in range(len(earth_vel)):
-            # Calculate the magnitude and direction
-            mag.append(EarthVelocity.calculate_magnitude(earth_vel[bin_num][0], earth_vel[bin_num][1], earth_vel[bin_num][2]))
-            dir.append(EarthVelocity.calculate_direction(earth_vel[bin_num][0], earth_vel[bin_num][1]))
+        # A missing beam is bad
+        if vel.shape[-1] < 3:
+            pad = [(0, 0)] * (vel.ndim - 1) + [(0, 3 - vel.shape[-1])]
+            vel = np.pad(vel, pad, constant_values=Ensemble.BadVelocity)
+
+        bad = EarthVelocity.get_bad_array(vel[..., :3])
+        bad_dir = bad[..., 0] | bad[..., 1]
+        bad_mag = bad_dir | bad[..., 2]
+        east = vel[..., 0]
+        north = vel[..., 1]
+        vert = vel[..., 2]
+
+        with np.errstate(invalid='ignore'):
+            mag = np.sqrt((east * east) + (north * north) + (vert * vert))
+            dir = np.arctan2(east, north) * (180.0 / math.pi)
+
+        # The range is -180 to 180
+        # This moves it to 0 to 360
+        dir = np.where(dir < 0.0, 360.0 + dir, dir)
+
+        mag[bad_mag] = Ensemble.BadVelocity
+        dir[bad_dir] = Ensemble.BadVelocity
 
         return mag, dir
 
+    @staticmethod
+    def remove_vessel_speed_array(earth_vel, bt_east=0.0, bt_north=0.0, bt_vert=0.0):
+        """
+        Remove the vessel speed from all the bins at once.  The bottom track velocity
+        is added to the East, North and Vertical velocity that are good.  The bad
+        velocities are left as Bad Velocity.
+
+        The velocities can be a single ensemble [bin][beam] with a single bottom track
+        velocity, or many ensembles [ens][bin][beam] with a bottom track velocity [ens]
+        for each ensemble to correct a whole transect in one call.
+
+        :param earth_vel: Earth Velocities [bin][beam] or [ens][bin][beam].  List or numpy array.
+        :param bt_east: Bottom Track East velocity.  Value or [ens].
+        :param bt_north: Bottom Track North velocity.  Value or [ens].
+        :param bt_vert: Bottom Track Vertical velocity.  Value or [ens].
+        :return: New numpy array of the velocities with the vessel speed removed.
+        """
+        vel = np.array(earth_vel, dtype=np.float64)
+        if vel.ndim < 2:
+            return vel
+
+        bad = EarthVelocity.get_bad_array(vel)
+        for beam, bt_vel in enumerate((bt_east, bt_north, bt_vert)[:vel.shape[-1]]):
+            # Each ensemble has its own bottom track velocity for all the bins
+            bt_vel = np.asarray(bt_vel, dtype=np.float64)[..., np.newaxis]
+            vel[..., beam] = np.where(bad[..., beam], vel[..., beam], vel[..., beam] + bt_vel)
+
+        return vel
+
     @staticmethod
     def calculate_magnitude(east, north, vertical):
         """
@@ -171,7 +254,7 @@ class EarthVelocity:
         Encode the data into RTB format.
         :return:
         """
-        result = []
+        result = bytearray()
 
         # Generate header
         result += Ensemble.generate_header(self.ds_type,
@@ -181,11 +264,8 @@ class EarthVelocity:
                                            self.name_len,
                                            self.Name)
 
-        # Add the data
-        for beam in range(self.element_multiplier):
-            for bin_num in range(self.num_elements):
-                val = self.Velocities[bin_num][beam]
-                result += Ensemble.float_to_bytes(val)
+        # Add the data beam by beam
+        result += Ensemble.array_2d_to_bytes(self.Velocities, self.num_elements, self.element_multiplier)
 
         return result
 
@@ -1,8 +1,8 @@
 import struct
 import json
 import datetime
-import crc16
 import binascii
+import itertools
 import math
 import logging
 import pandas as pd
@@ -242,65 +242,69 @@ class Ensemble:
     def encode(self):
         """
         Encode the ensemble to RTB format.
-        :return:
+        Each dataset is encoded to bytes and copied into a single preallocated
+        buffer.  The header and the checksum are packed in place.
+        :return: Bytearray of the ensemble.
         """
-        payload = []
+        datasets = []
 
         # Generate Payload
         if self.IsEnsembleData:
-            payload += self.EnsembleData.encode()
+            datasets.append(self.EnsembleData.encode())
         if self.IsAncillaryData:
-            payload += self.AncillaryData.encode()
+            datasets.append(self.AncillaryData.encode())
         if self.IsAmplitude:
-            payload += self.Amplitude.encode()
+            datasets.append(self.Amplitude.encode())
         if self.IsCorrelation:
-            payload += self.Correlation.encode()
+            datasets.append(self.Correlation.encode())
         if self.IsBeamVelocity:
-            payload += self.BeamVelocity.encode()
+            datasets.append(self.BeamVelocity.encode())
         if self.IsInstrumentVelocity:
-            payload += self.InstrumentVelocity.encode()
+            datasets.append(self.InstrumentVelocity.encode())
         if self.IsEarthVelocity:
-            payload += self.EarthVelocity.encode()
+            datasets.append(self.EarthVelocity.encode())
         if self.IsGoodBeam:
-            payload += self.GoodBeam.encode()
+            datasets.append(self.GoodBeam.encode())
         if self.IsGoodEarth:
-            payload += self.GoodEarth.encode()
+            datasets.append(self.GoodEarth.encode())
         if self.IsBottomTrack:
-            payload += self.BottomTrack.encode()
+            datasets.append(self.BottomTrack.encode())
         if self.IsRangeTracking:
-            payload += self.RangeTracking.encode()
+            datasets.append(self.RangeTracking.encode())
         if self.IsSystemSetup:
-            payload += self.SystemSetup.encode()
+            datasets.append(self.SystemSetup.encode())
         if self.IsNmeaData:
-            payload += self.NmeaData.encode()
+            datasets.append(self.NmeaData.encode())
 
-        # Generate the header
         # Get the ensemble number
         ens_num = 0
         if self.IsEnsembleData:
             ens_num = self.EnsembleData.EnsembleNumber
 
         # Get the payload size
-        payload_size = len(payload)
+        payload_size = 0
+        for ds in datasets:
+            payload_size += len(ds)
 
-        header = Ensemble.generate_ens_header(ens_num, payload_size)
+        # Allocate the entire ensemble
+        result = bytearray(Ensemble.HeaderSize + payload_size + Ensemble.ChecksumSize)
+        result_view = memoryview(result)
 
-        # Generate the Checksum CITT
-        # Parameters found at https: // pycrc.org / models.html
-        #crc = pycrc.algorithms.Crc(width=16, poly=0x1021,
-        #                           reflect_in=False, xor_in=0x1d0f,
-        #                           reflect_out=False, xor_out=0x0000)
-        #checksum = crc.bit_by_bit_fast(binascii.a2b_hex(bytes(payload)))
-        #checksum = Ensemble.int32_to_bytes(CRCCCITT().calculate(input_data=bytes(payload)))
-        checksum = crc16.crc16xmodem(payload)
+        # Generate the header
+        result[:Ensemble.HeaderSize] = Ensemble.generate_ens_header(ens_num, payload_size)
 
+        # Copy the datasets
+        offset = Ensemble.HeaderSize
+        for ds in datasets:
+            result_view[offset:offset + len(ds)] = ds
+            offset += len(ds)
 
-        result = []
-        result += header
-        result += payload
-        result += checksum
+        # Generate the Checksum CITT (XMODEM) of the payload
+        # This is the checksum verified by BinaryCodec.verify_ens_data()
+        checksum = binascii.crc_hqx(result_view[Ensemble.HeaderSize:offset], 0)
+        struct.pack_into("I", result, offset, checksum)
 
-        return bytearray(result)
+        return result
 
     @staticmethod
     def generate_ens_header(ens_num, payload_size):
@@ -312,20 +316,14 @@ class Ensemble:
         :param payload_size: Payload size.
         :return: Header for an ensemble.
         """
-
-        header = []
+        header = bytearray(Ensemble.HeaderSize)
 
         # Get the Header ID
-        for cnt in range(0, 16):
-            header.append(0x80)
+        header[:16] = b'\x80' * 16
 
         # Ensemble Number and inverse
-        header += Ensemble.int32_to_bytes(ens_num)
-        header += struct.pack("i", ~ens_num)
-
         # Payload size and inverse
-        header += Ensemble.int32_to_bytes(payload_size)
-        header += struct.pack("i", ~payload_size)
+        struct.pack_into("iiii", header, 16, ens_num, ~ens_num, payload_size, ~payload_size)
 
         return header
 
@@ -436,17 +434,73 @@ class Ensemble:
         :param name: Name of the dataset.
         :return: Header for a dataset.
         """
-        result = []
-
-        result += Ensemble.int32_to_bytes(value_type)                   # Value Type
-        result += Ensemble.int32_to_bytes(num_elements)                 # Number of elements
-        result += Ensemble.int32_to_bytes(element_multiplier)           # Element Multiplier
-        result += Ensemble.int32_to_bytes(imag)                         # Image
-        result += Ensemble.int32_to_bytes(name_length)                  # Name Length
+        # Value Type, Number of elements, Element Multiplier, Image, Name Length
+        result = bytearray(struct.pack("iiiii", value_type, num_elements, element_multiplier, imag, name_length))
         result += name.encode()                                         # Name
 
         return result
 
+    @staticmethod
+    def array_2d_to_bytes(values, num_elements, element_multiplier, dtype='<f4'):
+        """
+        Convert the [Bin x Beam] values to bytes in a single pack.
+        The RTB format stores the data beam by beam, so the values are transposed.
+        Lists are packed with struct and numpy arrays are converted with tobytes().
+        If the values do not have the shape given, they are packed one at a time.
+        :param values: Values list[bin][beam] or numpy array.
+        :param num_elements: Number of elements or number of bins.
+        :param element_multiplier: Element multiplier or number of beams.
+        :param dtype: Value type.  '<f4' = float, '<i4' = int.
+        :return: Bytes of the values beam by beam.
+        """
+        num_values = num_elements * element_multiplier
+        if num_values == 0:
+            return b''
+
+        value_fmt = "i" if np.dtype(dtype).kind == 'i' else "f"
+
+        # Transpose the lists to beam by beam
+        if not isinstance(values, np.ndarray):
+            try:
+                beams = itertools.islice(zip(*values[:num_elements]), element_multiplier)
+                return struct.pack(str(num_values) + value_fmt, *itertools.chain.from_iterable(beams))
+            except (struct.error, TypeError):
+                pass
+
+        try:
+            vals = np.asarray(values, dtype=dtype)
+            vals = vals.reshape(vals.shape[0], -1)
+            if vals.shape[0] >= num_elements and vals.shape[1] >= element_multiplier:
+                return vals[:num_elements, :element_multiplier].T.tobytes()
+        except (ValueError, TypeError, IndexError):
+            pass
+
+        # Values with a different number of beams in each bin
+        result = bytearray()
+        for beam in range(element_multiplier):
+            for bin_num in range(num_elements):
+                result += struct.pack(value_fmt, values[bin_num][beam])
+
+        return result
+
+    @staticmethod
+    def float_list_to_bytes(values):
+        """
+        Convert the list of float values to bytes in a single pack.
+        :param values: List of float values.
+        :return: Bytes of the values.
+        """
+        return struct.pack(str(len(values)) + "f", *values)
+
+    @staticmethod
+    def int32_list_to_bytes(values):
+        """
+        Convert the list of Int32 values to bytes in a single pack.
+        :param values: List of Int32 values.
+        :return: Bytes of the values.
+        """
+        return struct.pack(str(len(values)) + "i", *values)
+
     @staticmethod
     def crc16_ccitt(crc, data):
         msb = crc >> 8
@@ -462,12 +516,8 @@ class Ensemble:
     def array_2d_to_df(vel_array, dt, ss_code, ss_config, blank, bin_size, first_ens_num, last_ens_num):
         """
         Convert the given 2D array to a dataframe.
-        Columns: Index, TimeStamp, Bin, Beam, SS_Code, SS_Config, BinSize, Blank, BinDepth, Value
         Columns: Index, time_stamp, ss_code, ss_config, bin_num, beam_num, bin_depth, first_ens_num, last_ens_num, value
 
-        dictionary to dataframe to speed up performance
-        https://stackoverflow.com/questions/27929472/improve-row-append-performance-on-pandas-dataframes
-
         :param vel_array: 2D array containing the data
         :param dt: DateTime
         :param ss_code: SS Code as a string
@@ -478,55 +528,19 @@ class Ensemble:
         :param last_ens_num: Last Ensemble Number.
         :return: Dataframe of all the data from the array given.
         """
+        if vel_array is None or len(vel_array) == 0:
+            return pd.DataFrame()
 
-        # Dictionary to create dataframe
-        # Faster than appending to a dataframe
-        dict_result = {}
-
-        # A counter to use to add entries to dict
-        i = 0
-
-        if vel_array:
-            # Go through each bin and beam
-            for bin_num in range(len(vel_array)):
-                for beam_num in range(len(vel_array[0])):
-                    # Get the bin depth
-                    bin_depth = Ensemble.get_bin_depth(blank, bin_size, bin_num)
-
-                    # Get the value
-                    value = vel_array[bin_num][beam_num]
-
-                    # Create a dict entry
-                    dict_result[i] = {'time_stamp': dt,
-                                      'ss_code': ss_code,
-                                      'ss_config': ss_config,
-                                      'bin_num': bin_num,
-                                      'beam_num': beam_num,
-                                      'bin_depth': bin_depth,
-                                      'first_ens_num': first_ens_num,
-                                      'last_ens_num': last_ens_num,
-                                      'value': value}
-
-                    # Increment index
-                    i = i + 1
-
-        # Create the dataframe from the dictionary
-        # important to set the 'orient' parameter to "index" to make the keys as rows
-        df = pd.DataFrame.from_dict(dict_result, "index")
-
-        return df
+        return Ensemble.arrays_2d_to_df([vel_array], [dt], ss_code, ss_config, blank, bin_size, [first_ens_num], [last_ens_num])
 
     @staticmethod
     def array_1d_to_df(vel_array, dt, ss_code, ss_config, blank, bin_size, first_ens_num, last_ens_num):
         """
         Convert the given 1D array to a dataframe.
-        Columns: Index, TimeStamp, Bin, Beam, SS_Code, SS_Config, BinSize, Blank, BinDepth, Value
+        The array has a value for each bin.  The beam number is 0.
         Columns: Index, time_stamp, ss_code, ss_config, bin_num, beam_num, bin_depth, first_ens_num, last_ens_num, value
 
-        dictionary to dataframe to speed up performance
-        https://stackoverflow.com/questions/27929472/improve-row-append-performance-on-pandas-dataframes
-
-        :param vel_array: 2D array containing the data
+        :param vel_array: 1D array containing the data
         :param dt: DateTime
         :param ss_code: SS Code as a string
         :param ss_config: SS Configuration as int
@@ -536,55 +550,174 @@ class Ensemble:
         :param last_ens_num: Last Ensemble Number.
         :return: Dataframe of all the data from the array given.
         """
+        if vel_array is None or len(vel_array) == 0:
+            return pd.DataFrame()
 
-        # Dictionary to create dataframe
-        # Faster than appending to a dataframe
-        dict_result = {}
+        return Ensemble.arrays_1d_to_df([vel_array], [dt], ss_code, ss_config, blank, bin_size, [first_ens_num], [last_ens_num])
 
-        # A counter to use to add entries to dict
-        i = 0
+    @staticmethod
+    def arrays_2d_to_df(vel_arrays, dts, ss_code, ss_config, blank, bin_size, first_ens_nums, last_ens_nums):
+        """
+        Convert many 2D arrays to a single dataframe.
+        Use this to convert all the averaged profiles at once.
+        Columns: Index, time_stamp, ss_code, ss_config, bin_num, beam_num, bin_depth, first_ens_num, last_ens_num, value
 
-        if vel_array:
-            # Go through each bin and beam
-            for bin_num in range(len(vel_array)):
-                # Get the bin depth
-                bin_depth = Ensemble.get_bin_depth(blank, bin_size, bin_num)
+        If the bins do not all have the same number of beams, the rows are
+        created for each value given with a slower loop.
+        The value column keeps the type of the values given, int values stay int.
 
-                # Get the value
-                value = vel_array[bin_num]
+        :param vel_arrays: List of 2D arrays [bin][beam] or a 3D array [profile][bin][beam].
+        :param dts: DateTime for each array.
+        :param ss_code: SS Code as a string
+        :param ss_config: SS Configuration as int
+        :param blank: Blanking distance.  A value or a value for each array.
+        :param bin_size: Bin Size.  A value or a value for each array.
+        :param first_ens_nums: First Ensemble Number for each array.
+        :param last_ens_nums: Last Ensemble Number for each array.
+        :return: Dataframe of all the data from the arrays given.
+        """
+        values = Ensemble.profiles_to_array(vel_arrays, 3)
+        if values is None:
+            return Ensemble.ragged_profiles_to_df(vel_arrays, dts, ss_code, ss_config, blank, bin_size, first_ens_nums, last_ens_nums)
+        if values.size == 0:
+            return pd.DataFrame()
 
-                # Create a dict entry
-                dict_result[i] = {'time_stamp': dt,
-                                  'ss_code': ss_code,
-                                  'ss_config': ss_config,
-                                  'bin_num': bin_num,
-                                  'beam_num': 0,
-                                  'bin_depth': bin_depth,
-                                  'first_ens_num': first_ens_num,
-                                  'last_ens_num': last_ens_num,
-                                  'value': value}
+        return Ensemble.profiles_to_df(values, dts, ss_code, ss_config, blank, bin_size, first_ens_nums, last_ens_nums)
 
-                # Increment index
-                i = i + 1
+    @staticmethod
+    def arrays_1d_to_df(vel_arrays, dts, ss_code, ss_config, blank, bin_size, first_ens_nums, last_ens_nums):
+        """
+        Convert many 1D arrays to a single dataframe.
+        Each array has a value for each bin.  The beam number is 0.
+        Columns: Index, time_stamp, ss_code, ss_config, bin_num, beam_num, bin_depth, first_ens_num, last_ens_num, value
 
-        # Create the dataframe from the dictionary
-        # important to set the 'orient' parameter to "index" to make the keys as rows
-        df = pd.DataFrame.from_dict(dict_result, "index")
+        If the arrays do not all have the same number of bins, the rows are
+        created for each value given with a slower loop.
+        The value column keeps the type of the values given, int values stay int.
 
-        return df
+        :param vel_arrays: List of 1D arrays [bin] or a 2D array [profile][bin].
+        :param dts: DateTime for each array.
+        :param ss_code: SS Code as a string
+        :param ss_config: SS Configuration as int
+        :param blank: Blanking distance.  A value or a value for each array.
+        :param bin_size: Bin Size.  A value or a value for each array.
+        :param first_ens_nums: First Ensemble Number for each array.
+        :param last_ens_nums: Last Ensemble Number for each array.
+        :return: Dataframe of all the data from the arrays given.
+        """
+        values = Ensemble.profiles_to_array(vel_arrays, 2)
+        if values is None:
+            profiles = [[[value] for value in vel_array] for vel_array in vel_arrays]
+            return Ensemble.ragged_profiles_to_df(profiles, dts, ss_code, ss_config, blank, bin_size, first_ens_nums, last_ens_nums)
+        if values.size == 0:
+            return pd.DataFrame()
+
+        return Ensemble.profiles_to_df(values[:, :, np.newaxis], dts, ss_code, ss_config, blank, bin_size, first_ens_nums, last_ens_nums)
+
+    @staticmethod
+    def profiles_to_array(vel_arrays, ndim):
+        """
+        Convert the profiles to a numpy array.  The type of the values is kept.
+        :param vel_arrays: Profiles to convert.
+        :param ndim: Number of dimensions expected [profile][bin] or [profile][bin][beam].
+        :return: Numpy array of the profiles.  None if the profiles are ragged and can not be an array.
+        """
+        try:
+            values = np.asarray(vel_arrays)
+        except ValueError:
+            # Newer versions of numpy do not allow ragged arrays
+            return None
+
+        if values.size == 0:
+            return values
+        if values.dtype == object or values.ndim != ndim:
+            return None
+
+        return values
+
+    @staticmethod
+    def ragged_profiles_to_df(vel_arrays, dts, ss_code, ss_config, blank, bin_size, first_ens_nums, last_ens_nums):
+        """
+        Create the dataframe with a row for each value given.
+        Use this when the profiles do not all have the same number of bins or beams.
+        :param vel_arrays: Profiles [profile][bin][beam].
+        :param dts: DateTime for each profile.
+        :param ss_code: SS Code as a string
+        :param ss_config: SS Configuration as int
+        :param blank: Blanking distance.  A value or a value for each profile.
+        :param bin_size: Bin Size.  A value or a value for each profile.
+        :param first_ens_nums: First Ensemble Number for each profile.
+        :param last_ens_nums: Last Ensemble Number for each profile.
+        :return: Dataframe of all the data.
+        """
+        num_profiles = len(vel_arrays)
+        blank = np.broadcast_to(np.asarray(blank, dtype=float), (num_profiles,))
+        bin_size = np.broadcast_to(np.asarray(bin_size, dtype=float), (num_profiles,))
+        dts = list(dts)
+
+        rows = []
+        for profile, vel_array in enumerate(vel_arrays):
+            for bin_num in range(len(vel_array)):
+                bin_depth = Ensemble.get_bin_depth(blank[profile], bin_size[profile], bin_num)
+                for beam_num in range(len(vel_array[bin_num])):
+                    rows.append({'time_stamp': dts[profile],
+                                 'ss_code': ss_code,
+                                 'ss_config': ss_config,
+                                 'bin_num': bin_num,
+                                 'beam_num': beam_num,
+                                 'bin_depth': bin_depth,
+                                 'first_ens_num': first_ens_nums[profile],
+                                 'last_ens_num': last_ens_nums[profile],
+                                 'value': vel_array[bin_num][beam_num]})
+
+        return pd.DataFrame(rows)
+
+    @staticmethod
+    def profiles_to_df(values, dts, ss_code, ss_config, blank, bin_size, first_ens_nums, last_ens_nums):
+        """
+        Create the dataframe with a row for each profile, bin and beam.
+        The columns are created with numpy, there is no loop for each value.
+        :param values: 3D array [profile][bin][beam].
+        :param dts: DateTime for each profile.
+        :param ss_code: SS Code as a string
+        :param ss_config: SS Configuration as int
+        :param blank: Blanking distance.  A value or a value for each profile.
+        :param bin_size: Bin Size.  A value or a value for each profile.
+        :param first_ens_nums: First Ensemble Number for each profile.
+        :param last_ens_nums: Last Ensemble Number for each profile.
+        :return: Dataframe of all the data.
+        """
+        num_profiles, num_bins, num_beams = values.shape
+        cells = num_bins * num_beams
+
+        # Profile index, bin and beam for each row
+        profile = np.repeat(np.arange(num_profiles), cells)
+        bin_num = np.tile(np.repeat(np.arange(num_bins), num_beams), num_profiles)
+        beam_num = np.tile(np.arange(num_beams), num_profiles * num_bins)
+
+        # Center of each bin, same as get_bin_depth()
+        blank = np.broadcast_to(np.asarray(blank, dtype=float), (num_profiles,))
+        bin_size = np.broadcast_to(np.asarray(bin_size, dtype=float), (num_profiles,))
+        bin_depth = np.round(blank[:, np.newaxis] + bin_size[:, np.newaxis] * np.arange(num_bins), 2)
+
+        return pd.DataFrame({'time_stamp': pd.Series(list(dts)).to_numpy()[profile],
+                             'ss_code': ss_code,
+                             'ss_config': ss_config,
+                             'bin_num': bin_num,
+                             'beam_num': beam_num,
+                             'bin_depth': np.repeat(bin_depth, num_beams, axis=1).ravel(),
+                             'first_ens_num': np.repeat(np.asarray(first_ens_nums), cells),
+                             'last_ens_num': np.repeat(np.asarray(last_ens_nums), cells),
+                             'value': values.ravel()})
 
     @staticmethod
     def array_beam_1d_to_df(range_array, dt, ss_code, ss_config, first_ens_num, last_ens_num):
         """
         Convert the given 1D array to a dataframe.
         This 1D array should have 4 or less values representing a value
-        for each beam.
-        Columns: Index, TimeStamp, Bin, Beam, SS_Code, SS_Config, BinSize, Blank, BinDepth, Value
+        for each beam.  The bin depth is the value.
         Columns: Index, time_stamp, ss_code, ss_config, bin_num, beam_num, bin_depth, first_ens_num, last_ens_num, value
 
-        dictionary to dataframe to speed up performance
-        https://stackoverflow.com/questions/27929472/improve-row-append-performance-on-pandas-dataframes
-
         :param range_array: 1D Beam array containing the data
         :param dt: DateTime
         :param ss_code: SS Code as a string
@@ -593,40 +726,20 @@ class Ensemble:
         :param last_ens_num: Last Ensemble Number.
         :return: Dataframe of all the data from the array given.
         """
+        if range_array is None or len(range_array) == 0:
+            return pd.DataFrame()
 
-        # Dictionary to create dataframe
-        # Faster than appending to a dataframe
-        dict_result = {}
-
-        # A counter to use to add entries to dict
-        i = 0
+        values = np.asarray(range_array)
 
-        if range_array:
-            # Go through each bin and beam
-            for beam_num in range(len(range_array)):
-
-                # Get the value
-                value = range_array[beam_num]
-
-                # Create a dict entry
-                dict_result[i] = {'time_stamp': dt,
-                                  'ss_code': ss_code,
-                                  'ss_config': ss_config,
-                                  'bin_num': 0,
-                                  'beam_num': beam_num,
-                                  'bin_depth': value,
-                                  'first_ens_num': first_ens_num,
-                                  'last_ens_num': last_ens_num,
-                                  'value': value}
-
-                # Increment index
-                i = i + 1
-
-        # Create the dataframe from the dictionary
-        # important to set the 'orient' parameter to "index" to make the keys as rows
-        df = pd.DataFrame.from_dict(dict_result, "index")
-
-        return df
+        return pd.DataFrame({'time_stamp': [dt] * len(values),
+                             'ss_code': ss_code,
+                             'ss_config': ss_config,
+                             'bin_num': 0,
+                             'beam_num': np.arange(len(values)),
+                             'bin_depth': values,
+                             'first_ens_num': first_ens_num,
+                             'last_ens_num': last_ens_num,
+                             'value': values})
 
     @staticmethod
     def toJSON(self, pretty=False):
@@ -803,6 +916,48 @@ class Ensemble:
         """
         return struct.pack("f", value)
 
+    @staticmethod
+    def GetFloatArray(start, num_elements, element_multiplier, ens):
+        """
+        Convert the bytes given into a 2D float32 array in a single read.
+        The RTB format stores [Bin x Beam] data beam by beam, so the
+        array is shaped [beam][bin].
+        :param start: Start location.
+        :param num_elements: Number of elements or number of bins.
+        :param element_multiplier: Element multiplier or number of beams.
+        :param ens: Buffer containing the bytearray data.
+        :return: Numpy float32 array [beam][bin] or None if not enough data.
+        """
+        try:
+            return np.frombuffer(ens,
+                                 dtype='<f4',
+                                 count=num_elements * element_multiplier,
+                                 offset=start).reshape(element_multiplier, num_elements)
+        except Exception as e:
+            logging.debug("Error creating a float array from bytes. " + str(e))
+            return None
+
+    @staticmethod
+    def GetInt32Array(start, num_elements, element_multiplier, ens):
+        """
+        Convert the bytes given into a 2D int32 array in a single read.
+        The RTB format stores [Bin x Beam] data beam by beam, so the
+        array is shaped [beam][bin].
+        :param start: Start location.
+        :param num_elements: Number of elements or number of bins.
+        :param element_multiplier: Element multiplier or number of beams.
+        :param ens: Buffer containing the bytearray data.
+        :return: Numpy int32 array [beam][bin] or None if not enough data.
+        """
+        try:
+            return np.frombuffer(ens,
+                                 dtype='<i4',
+                                 count=num_elements * element_multiplier,
+                                 offset=start).reshape(element_multiplier, num_elements)
+        except Exception as e:
+            logging.debug("Error creating a Int32 array from bytes. " + str(e))
+            return None
+
     @staticmethod
     def GetDataSetSize(ds_type, name_len, num_elements, element_multipler):
         """
@@ -93,6 +93,17 @@ class EnsembleData:
         except Exception:
             return datetime.now()
 
+    def valid_datetime(self):
+        """
+        Create a datetime object from the date and time of the ensemble.
+        Unlike datetime(), a bad date does not give the current time.
+        :return: datetime of the ensemble or None if the date is bad.
+        """
+        try:
+            return datetime(self.Year, self.Month, self.Day, self.Hour, self.Minute, self.Second, self.HSec * 10000)
+        except Exception:
+            return None
+
     def firmware_str(self):
         """
         Create a string of the firmware version and subsystem code.
@@ -169,7 +180,7 @@ class EnsembleData:
         Encode the data into RTB format.
         :return:
         """
-        result = []
+        result = bytearray()
 
         # Generate header
         result += Ensemble.generate_header(self.ds_type,
@@ -180,19 +191,19 @@ class EnsembleData:
                                            self.Name)
 
         # Add the data
-        result += Ensemble.int32_to_bytes(self.EnsembleNumber)
-        result += Ensemble.int32_to_bytes(self.NumBins)
-        result += Ensemble.int32_to_bytes(self.NumBeams)
-        result += Ensemble.int32_to_bytes(self.DesiredPingCount)
-        result += Ensemble.int32_to_bytes(self.ActualPingCount)
-        result += Ensemble.int32_to_bytes(self.Status)
-        result += Ensemble.int32_to_bytes(self.Year)
-        result += Ensemble.int32_to_bytes(self.Month)
-        result += Ensemble.int32_to_bytes(self.Day)
-        result += Ensemble.int32_to_bytes(self.Hour)
-        result += Ensemble.int32_to_bytes(self.Minute)
-        result += Ensemble.int32_to_bytes(self.Second)
-        result += Ensemble.int32_to_bytes(self.HSec)
+        result += Ensemble.int32_list_to_bytes([self.EnsembleNumber,
+                                                self.NumBins,
+                                                self.NumBeams,
+                                                self.DesiredPingCount,
+                                                self.ActualPingCount,
+                                                self.Status,
+                                                self.Year,
+                                                self.Month,
+                                                self.Day,
+                                                self.Hour,
+                                                self.Minute,
+                                                self.Second,
+                                                self.HSec])
         result += self.SerialNumber.encode("UTF-8")
         result += bytes([self.SysFirmwareRevision])
         result += bytes([self.SysFirmwareMinor])
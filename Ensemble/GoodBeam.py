@@ -26,14 +26,23 @@ class GoodBeam:
 
             self.GoodBeam.append(bins)
 
-    def decode(self, data):
+    def decode(self, data, use_np=False):
         """
         Take the data bytearray.  Decode the data to populate
         the Good Beams.
         :param data: Bytearray for the dataset.
+        :param use_np: TRUE = Read all the values with a single numpy read.
         """
         packet_pointer = Ensemble.GetBaseDataSize(self.name_len)
 
+        # Read the entire [beam][bin] array at once, then transpose to [bin][beam]
+        if use_np:
+            gb_array = Ensemble.GetInt32Array(packet_pointer, self.num_elements, self.element_multiplier, data)
+            if gb_array is not None:
+                self.GoodBeam = gb_array.T.tolist()
+                logging.debug(self.GoodBeam)
+                return
+
         for beam in range(self.element_multiplier):
             for bin_num in range(self.num_elements):
                 self.GoodBeam[bin_num][beam] = Ensemble.GetInt32(packet_pointer, Ensemble().BytesInInt32, data)
@@ -46,7 +55,7 @@ class GoodBeam:
         Encode the data into RTB format.
         :return:
         """
-        result = []
+        result = bytearray()
 
         # Generate header
         result += Ensemble.generate_header(self.ds_type,
@@ -56,11 +65,8 @@ class GoodBeam:
                                            self.name_len,
                                            self.Name)
 
-        # Add the data
-        for beam in range(self.element_multiplier):
-            for bin_num in range(self.num_elements):
-                val = self.GoodBeam[bin_num][beam]
-                result += Ensemble.int32_to_bytes(val)
+        # Add the data beam by beam
+        result += Ensemble.array_2d_to_bytes(self.GoodBeam, self.num_elements, self.element_multiplier, dtype='<i4')
 
         return result
 
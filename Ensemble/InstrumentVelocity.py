@@ -24,14 +24,23 @@ class InstrumentVelocity:
 
             self.Velocities.append(bins)
 
-    def decode(self, data):
+    def decode(self, data, use_np=False):
         """
         Take the data bytearray.  Decode the data to populate
         the velocities.
         :param data: Bytearray for the dataset.
+        :param use_np: TRUE = Read all the values with a single numpy read.
         """
         packetpointer = Ensemble.GetBaseDataSize(self.name_len)
 
+        # Read the entire [beam][bin] array at once, then transpose to [bin][beam]
+        if use_np:
+            vel_array = Ensemble.GetFloatArray(packetpointer, self.num_elements, self.element_multiplier, data)
+            if vel_array is not None:
+                self.Velocities = vel_array.T.tolist()
+                logging.debug(self.Velocities)
+                return
+
         for beam in range(self.element_multiplier):
             for bin_num in range(self.num_elements):
                 self.Velocities[bin_num][beam] = Ensemble.GetFloat(packetpointer, Ensemble().BytesInFloat, data)
@@ -44,7 +53,7 @@ class InstrumentVelocity:
         Encode the data into RTB format.
         :return:
         """
-        result = []
+        result = bytearray()
 
         # Generate header
         result += Ensemble.generate_header(self.ds_type,
@@ -54,11 +63,8 @@ class InstrumentVelocity:
                                            self.name_len,
                                            self.Name)
 
-        # Add the data
-        for beam in range(self.element_multiplier):
-            for bin_num in range(self.num_elements):
-                val = self.Velocities[bin_num][beam]
-                result += Ensemble.float_to_bytes(val)
+        # Add the data beam by beam
+        result += Ensemble.array_2d_to_bytes(self.Velocities, self.num_elements, self.element_multiplier)
 
         return result
 
@@ -94,7 +94,7 @@ class NmeaData:
         Encode the data into RTB format.
         :return:
         """
-        result = []
+        result = bytearray()
 
         # Combine all the NMEA strings into one long string
         str_nmea = ""
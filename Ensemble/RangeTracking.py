@@ -167,7 +167,7 @@ class RangeTracking:
         Encode the data into RTB format.
         :return:
         """
-        result = []
+        result = bytearray()
 
         self.num_elements = (8 * int(self.NumBeams)) + 1     # 8 is the number of list plus 1 for NumBeams
 
@@ -181,31 +181,14 @@ class RangeTracking:
 
         # Add the data
         result += Ensemble.float_to_bytes(self.NumBeams)
-
-        for beam in range(len(self.SNR)):
-            result += Ensemble.float_to_bytes(self.SNR[beam])
-
-        for beam in range(len(self.Range)):
-            result += Ensemble.float_to_bytes(self.Range[beam])
-
-        for beam in range(len(self.Pings)):
-            result += Ensemble.float_to_bytes(self.Pings[beam])
-
-        for beam in range(len(self.Amplitude)):
-            result += Ensemble.float_to_bytes(self.Amplitude[beam])
-
-        for beam in range(len(self.Correlation)):
-            result += Ensemble.float_to_bytes(self.Correlation[beam])
-
-        for beam in range(len(self.BeamVelocity)):
-            result += Ensemble.float_to_bytes(self.BeamVelocity[beam])
-
-        for beam in range(len(self.InstrumentVelocity)):
-            result += Ensemble.float_to_bytes(self.InstrumentVelocity[beam])
-
-        for beam in range(len(self.EarthVelocity)):
-            result += Ensemble.float_to_bytes(self.EarthVelocity[beam])
-
+        result += Ensemble.float_list_to_bytes(self.SNR)
+        result += Ensemble.float_list_to_bytes(self.Range)
+        result += Ensemble.float_list_to_bytes(self.Pings)
+        result += Ensemble.float_list_to_bytes(self.Amplitude)
+        result += Ensemble.float_list_to_bytes(self.Correlation)
+        result += Ensemble.float_list_to_bytes(self.BeamVelocity)
+        result += Ensemble.float_list_to_bytes(self.InstrumentVelocity)
+        result += Ensemble.float_list_to_bytes(self.EarthVelocity)
         return result
 
     def encode_csv(self, dt, ss_code, ss_config, blank=0, bin_size=0):
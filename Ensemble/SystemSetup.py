@@ -106,7 +106,7 @@ class SystemSetup:
         Encode the data into RTB format.
         :return:
         """
-        result = []
+        result = bytearray()
 
         # Generate header
         result += Ensemble.generate_header(self.ds_type,
@@ -117,31 +117,31 @@ class SystemSetup:
                                            self.Name)
 
         # Add the data
-        result += Ensemble.float_to_bytes(self.BtSamplesPerSecond)
-        result += Ensemble.float_to_bytes(self.BtSystemFreqHz)
-        result += Ensemble.float_to_bytes(self.BtCPCE)
-        result += Ensemble.float_to_bytes(self.BtNCE)
-        result += Ensemble.float_to_bytes(self.BtRepeatN)
-        result += Ensemble.float_to_bytes(self.WpSamplesPerSecond)
-        result += Ensemble.float_to_bytes(self.WpSystemFreqHz)
-        result += Ensemble.float_to_bytes(self.WpCPCE)
-        result += Ensemble.float_to_bytes(self.WpNCE)
-        result += Ensemble.float_to_bytes(self.WpRepeatN)
-        result += Ensemble.float_to_bytes(self.WpLagSamples)
-        result += Ensemble.float_to_bytes(self.Voltage)
-        result += Ensemble.float_to_bytes(self.XmtVoltage)
-        result += Ensemble.float_to_bytes(self.BtBroadband)
-        result += Ensemble.float_to_bytes(self.BtLagLength)
-        result += Ensemble.float_to_bytes(self.BtNarrowband)
-        result += Ensemble.float_to_bytes(self.BtBeamMux)
-        result += Ensemble.float_to_bytes(self.WpBroadband)
-        result += Ensemble.float_to_bytes(self.WpLagLength)
-        result += Ensemble.float_to_bytes(self.WpTransmitBandwidth)
-        result += Ensemble.float_to_bytes(self.WpReceiveBandwidth)
-        result += Ensemble.float_to_bytes(self.TransmitBoostNegVolt)
-        result += Ensemble.float_to_bytes(self.WpBeamMux)
-        result += Ensemble.float_to_bytes(self.Reserved)
-        result += Ensemble.float_to_bytes(self.Reserved1)
+        result += Ensemble.float_list_to_bytes([self.BtSamplesPerSecond,
+                                                self.BtSystemFreqHz,
+                                                self.BtCPCE,
+                                                self.BtNCE,
+                                                self.BtRepeatN,
+                                                self.WpSamplesPerSecond,
+                                                self.WpSystemFreqHz,
+                                                self.WpCPCE,
+                                                self.WpNCE,
+                                                self.WpRepeatN,
+                                                self.WpLagSamples,
+                                                self.Voltage,
+                                                self.XmtVoltage,
+                                                self.BtBroadband,
+                                                self.BtLagLength,
+                                                self.BtNarrowband,
+                                                self.BtBeamMux,
+                                                self.WpBroadband,
+                                                self.WpLagLength,
+                                                self.WpTransmitBandwidth,
+                                                self.WpReceiveBandwidth,
+                                                self.TransmitBoostNegVolt,
+                                                self.WpBeamMux,
+                                                self.Reserved,
+                                                self.Reserved1])
 
         return result
 
@@ -0,0 +1,187 @@
+import datetime
+import logging
+from threading import Lock
+from obsub import event
+from rti_python.Post_Process.Average.AverageWaterColumn import AverageWaterColumn
+
+
+class AverageManager:
+    """
+    Average the ensembles of all the subsystem configurations.
+
+    Each ensemble is given to the AverageWaterColumn for its subsystem code
+    and configuration.  The AverageWaterColumn is created the first time the
+    configuration is seen, so all the configurations of a multi-frequency
+    deployment are averaged in one pass.
+
+    Count window:  The average is given when num_ens ensembles of the
+    configuration are accumulated.  With is_running_avg, the average of the
+    last num_ens ensembles is given for every ensemble.
+
+    Time window:  The ensembles are averaged in blocks of time_window aligned
+    to the start of the day (12:00, 12:10, 12:20 for 10 minutes).  The average
+    is given when the first ensemble of the next block is received.
+    Ensembles with a bad date are not averaged and are counted in bad_date_count.
+
+    manager = AverageManager(time_window=datetime.timedelta(minutes=10))
+    manager.avg_event += avg_handler
+    manager.add_ens(ens)
+    manager.flush()
+
+    avg_handler(sender, avg)
+    avg is the result of AverageWaterColumn.average().  Use the
+    AverageWaterColumn INDEX variables to access the data.
+    """
+
+    def __init__(self, num_ens=None, time_window=None, is_running_avg=False):
+        """
+        Initialize the manager.  Give num_ens, time_window or both.  With both,
+        the average is given when either is reached.
+        :param num_ens: Number of ensembles to average.
+        :param time_window: Time to average.  timedelta or seconds.
+        :param is_running_avg: TRUE = Give a running average of the last num_ens ensembles for every ensemble.
+        """
+        if num_ens is None and time_window is None:
+            raise ValueError("Give the number of ensembles or the time to average")
+        if is_running_avg and num_ens is None:
+            raise ValueError("A running average needs the number of ensembles")
+
+        if time_window is not None and not isinstance(time_window, datetime.timedelta):
+            time_window = datetime.timedelta(seconds=time_window)
+
+        self.num_ens = num_ens
+        self.time_window = time_window
+        self.is_running_avg = is_running_avg
+
+        self.averagers = {}             # AverageWaterColumn for each (ss_code, ss_config)
+        self.ens_counts = {}            # Ensembles accumulated for each (ss_code, ss_config)
+        self.window_starts = {}         # Start of the time window for each (ss_code, ss_config)
+        self.bad_date_count = 0         # Ensembles skipped in the time window, because the date is bad
+
+        self.thread_lock = Lock()
+
+    @event
+    def avg_event(self, avg):
+        """
+        Event to subscribe to receive the averaged data.
+        :param avg: Averaged data from AverageWaterColumn.average().
+        :return:
+        """
+        if avg:
+            logging.debug("Average: " + str(avg[AverageWaterColumn.INDEX_SS_CODE]) + " " + str(avg[AverageWaterColumn.INDEX_SS_CONFIG]))
+
+    def add_ens(self, ens):
+        """
+        Add the ensemble to the average for its subsystem configuration.
+        The averages that are complete are passed to avg_event.
+        :param ens: Ensemble to accumulate and average.
+        :return: List of the averages completed by the ensemble.
+        """
+        if not ens.IsEnsembleData:
+            return []
+
+        # A bad date would give the current time and close the time window
+        ens_time = None
+        if self.time_window is not None:
+            ens_time = ens.EnsembleData.valid_datetime()
+            if ens_time is None:
+                with self.thread_lock:
+                    self.bad_date_count += 1
+                return []
+
+        key = (ens.EnsembleData.SysFirmwareSubsystemCode, ens.EnsembleData.SubsystemConfig)
+        results = []
+
+        with self.thread_lock:
+            awc = self.averagers.get(key)
+            if awc is None:
+                awc = AverageWaterColumn(self.num_ens, key[0], key[1])
+                self.averagers[key] = awc
+                self.ens_counts[key] = 0
+
+            # Average the previous time window when the ensemble is in the next one
+            if self.time_window is not None:
+                window_start = self.get_window_start(ens_time)
+                if key in self.window_starts and window_start != self.window_starts[key] and self.ens_counts[key] > 0:
+                    results.append(awc.average())
+                    self.ens_counts[key] = 0
+                self.window_starts[key] = window_start
+
+            awc.add_ens(ens)
+            self.ens_counts[key] += 1
+
+            if self.is_running_avg:
+                results.append(awc.average(is_running_avg=True))
+            elif self.num_ens is not None and self.ens_counts[key] >= self.num_ens:
+                results.append(awc.average())
+                self.ens_counts[key] = 0
+
+        for avg in results:
+            self.avg_event(avg)
+
+        return results
+
+    def get_window_start(self, ens_time):
+        """
+        Get the start of the time window the time is in.
+        The windows are aligned to the start of the day.
+        :param ens_time: Ensemble time.
+        :return: Start of the time window.
+        """
+        day_start = datetime.datetime(ens_time.year, ens_time.month, ens_time.day, tzinfo=ens_time.tzinfo)
+        return day_start + ((ens_time - day_start) // self.time_window) * self.time_window
+
+    def get_average(self, ss_code, ss_config, is_running_avg=True):
+        """
+        Get the average of the ensembles accumulated for the subsystem configuration.
+        :param ss_code: Subsystem code.
+        :param ss_config: Subsystem configuration.
+        :param is_running_avg: TRUE = Keep the accumulated data.
+        :return: Averaged data or None if the configuration has not been seen.
+        """
+        key = (ss_code, ss_config)
+        with self.thread_lock:
+            awc = self.averagers.get(key)
+            if awc is None:
+                return None
+
+            if not is_running_avg:
+                self.ens_counts[key] = 0
+            return awc.average(is_running_avg=is_running_avg)
+
+    def get_configs(self):
+        """
+        Get the subsystem configurations seen.
+        :return: List of (ss_code, ss_config).
+        """
+        with self.thread_lock:
+            return list(self.averagers.keys())
+
+    def flush(self):
+        """
+        Average the ensembles that are accumulated for all the subsystem configurations.
+        Use this at the end of the data to get the last partial averages.
+        The averages are passed to avg_event.
+        :return: List of the averages.
+        """
+        results = []
+        with self.thread_lock:
+            for key, awc in self.averagers.items():
+                if self.ens_counts[key] > 0 and not self.is_running_avg:
+                    results.append(awc.average())
+                    self.ens_counts[key] = 0
+
+        for avg in results:
+            self.avg_event(avg)
+
+        return results
+
+    def reset(self):
+        """
+        Remove all the subsystem configurations and accumulated data.
+        :return:
+        """
+        with self.thread_lock:
+            self.averagers.clear()
+            self.ens_counts.clear()
+            self.window_starts.clear()
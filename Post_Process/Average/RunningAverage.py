@@ -0,0 +1,118 @@
+from collections import deque
+import logging
+import numpy as np
+from rti_python.Ensemble.Ensemble import Ensemble
+
+
+class RunningAverage:
+    """
+    Running average of an array of values over the last num_ens samples.
+
+    The sum and the number of good values are kept as numpy arrays.  When the
+    window is full, the oldest sample is subtracted as the new one is added,
+    so adding a sample and getting the average only cost the size of one
+    sample, not the size of the window.
+
+    Bad Velocity and None values are not averaged.  A value with no good
+    data is averaged to 0.  All the samples in the window must have the same
+    shape.  If the shape changes, the accumulator starts over with the new
+    sample and no average is given until the old samples leave the window.
+
+    avg = RunningAverage(10)
+    avg.add(ens.EarthVelocity.Velocities)
+    result = avg.average()
+    """
+
+    def __init__(self, num_ens=None):
+        """
+        Initialize the accumulator.
+        :param num_ens: Number of samples in the window.  None = Average all the samples.
+        """
+        self.num_ens = num_ens
+        self.samples = deque()              # (values, good, generation)
+        self.accum = None                   # Sum of the good values
+        self.count = None                   # Number of good values
+        self.shape = None                   # Shape of the accumulated samples
+        self.generation = 0                 # Incremented when the shape changes
+
+    def __len__(self):
+        return len(self.samples)
+
+    def add(self, values):
+        """
+        Add the sample to the average.
+        If the window is full, the oldest sample is removed from the average.
+        :param values: Values for the sample.  (list[bin][beam], list[bin], list[beam], ...)
+        :return: TRUE if the sample was added.
+        """
+        try:
+            values = np.array(values, dtype=np.float64)
+        except (ValueError, TypeError) as e:
+            logging.error("Error adding the sample to the average.  " + str(e))
+            return False
+
+        good = ~np.isnan(values) & ~np.isclose(values, Ensemble.BadVelocity, rtol=1e-06, atol=0.0)
+        values = np.where(good, values, 0.0)
+
+        # Remove the oldest sample if it is in the accumulator
+        if self.num_ens is not None and len(self.samples) >= self.num_ens:
+            old_values, old_good, old_generation = self.samples.popleft()
+            if old_generation == self.generation:
+                self.accum -= old_values
+                self.count -= old_good
+
+                # Remove any rounding left after all the values are removed
+                self.accum[self.count == 0] = 0.0
+
+        # Start over if the number of bins or beams changed
+        if values.shape != self.shape:
+            self.shape = values.shape
+            self.generation += 1
+            self.accum = np.zeros(values.shape, dtype=np.float64)
+            self.count = np.zeros(values.shape, dtype=np.int64)
+
+        self.accum += values
+        self.count += good
+
+        # The values are only needed to remove the sample from the window
+        if self.num_ens is None:
+            self.samples.append((None, None, self.generation))
+        else:
+            self.samples.append((values, good, self.generation))
+        return True
+
+    def is_consistent(self):
+        """
+        Check if all the samples in the window have the same shape.
+        :return: TRUE if the samples can be averaged.
+        """
+        return len(self.samples) > 0 and self.samples[0][2] == self.generation
+
+    def average(self):
+        """
+        Average the samples in the window.
+        :return: Average as a list with the shape of the samples or None if there is no data to average.
+        """
+        if not self.samples:
+            return None
+
+        if not self.is_consistent():
+            logging.error("Number of bins or beams is not consistent between ensembles")
+            return None
+
+        if self.accum.size == 0:
+            return None
+
+        avg = np.zeros(self.shape, dtype=np.float64)
+        np.divide(self.accum, self.count, out=avg, where=self.count > 0)
+        return avg.tolist()
+
+    def clear(self):
+        """
+        Remove all the samples.
+        :return:
+        """
+        self.samples.clear()
+        self.accum = None
+        self.count = None
+        self.shape = None
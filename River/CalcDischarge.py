@@ -3,6 +3,7 @@ import datetime
 import numpy as np
 from enum import Enum
 from rti_python.Ensemble.Ensemble import Ensemble
+from rti_python.Ensemble.EarthVelocity import EarthVelocity
 
 
 class EnsembleFlowInfo:
@@ -111,6 +112,10 @@ class CalcDischarge:
     MINIMUM_AMPLITUDE = 0.25
     MINIMUM_CORRELATION = 0.10
 
+    # Edge shape coefficients
+    EDGE_TRIANGULAR = 0.3535
+    EDGE_RECTANGULAR = 0.91
+
     def __init__(self):
         self.version = 1.1
 
@@ -379,7 +384,7 @@ class CalcDischarge:
                           beam_angle: float,
                           pulse_length: float,
                           pulse_width: float,
-                          top_pwr_func_exponent: float = ONE_SIXTH_POWER_LAW,,
+                          top_pwr_func_exponent: float = ONE_SIXTH_POWER_LAW,
                           min_amp=MINIMUM_AMPLITUDE,
                           min_corr=MINIMUM_CORRELATION):
         """
@@ -488,4 +493,293 @@ class CalcDischarge:
         bottom_vx = sum_east_vel * da / z1 * (z1 ** a) / ((z2 ** a) - (z1 ** a))
         bottom_vy = sum_north_vel * da / z1 * (z1 ** a) / ((z2 ** a) - (z1 ** a))
 
-        return top_vx, top_vy, bottom_vx, bottom_vy
\ No newline at end of file
+        return top_vx, top_vy, bottom_vx, bottom_vy
+
+    def calculate_transect_flow(self,
+                                earth_vel,
+                                bt_range,
+                                bin_size,
+                                first_bin_range,
+                                boat_draft: float,
+                                beam_angle: float,
+                                pulse_length: float,
+                                pulse_lag: float,
+                                bt_east,
+                                bt_north,
+                                delta_time,
+                                good_bins=None,
+                                num_bins=None,
+                                top_flow_mode: FlowMode = FlowMode.Constants,
+                                top_pwr_func_exponent: float = ONE_SIXTH_POWER_LAW,
+                                bottom_flow_mode: FlowMode = FlowMode.PowerFunction,
+                                bin_info=True) -> list:
+        """
+        Calculate the measured, top and bottom flow for all the ensembles of a transect at once.
+        This gives the same results as calculate_ensemble_flow for each ensemble, but the
+        bins and ensembles are calculated with numpy arrays.  So the discharge can be
+        calculated again quickly when the flow modes are changed.
+
+        Use get_transect_arrays to get the arrays from a list of ensembles.
+
+        The Slope top flow mode is not supported, because calculate_ensemble_flow cannot
+        calculate it to compare against.  A ValueError is raised if it is used.
+
+        :param earth_vel: Earth Velocity [ens][bin][beam].
+        :param bt_range: Bottom Track Range [ens][beam].
+        :param bin_size: Bin size.  Value or [ens].
+        :param first_bin_range: Range to the first bin.  Value or [ens].
+        :param boat_draft: Boat draft.
+        :param beam_angle: Beam angle in degrees.
+        :param pulse_length: Pulse length.
+        :param pulse_lag: Pulse lag.
+        :param bt_east: Boat East velocity.  Value or [ens].
+        :param bt_north: Boat North velocity.  Value or [ens].
+        :param delta_time: Time difference between ensembles.  Value or [ens].  See get_delta_times.
+        :param good_bins: [ens][bin] TRUE if the bin is good.  If not given, get_good_bins(earth_vel) is used.
+        :param num_bins: Number of bins in each ensemble [ens] if the ensembles are padded.
+        :param top_flow_mode: Top flow extrapolation.
+        :param top_pwr_func_exponent: Power law exponent.
+        :param bottom_flow_mode: Bottom flow extrapolation.
+        :param bin_info: TRUE = Set the measured_bin_info for each ensemble.
+        :return: List of EnsembleFlowInfo for each ensemble.
+        """
+        if top_flow_mode == FlowMode.Slope:
+            raise ValueError("The Slope flow mode is not supported for the transect flow.")
+
+        earth_vel = np.asarray(earth_vel, dtype=np.float64)
+        num_ens, max_bins, num_beams = earth_vel.shape
+        ens_index = np.arange(num_ens)
+
+        def ens_array(value):
+            return np.broadcast_to(np.asarray(value, dtype=np.float64), (num_ens,))
+
+        bin_size = ens_array(bin_size)
+        first_bin_range = ens_array(first_bin_range)
+        bt_east = ens_array(bt_east)
+        bt_north = ens_array(bt_north)
+        delta_time = ens_array(delta_time)
+        bt_range = np.asarray(bt_range, dtype=np.float64).reshape(num_ens, -1)
+        if good_bins is None:
+            good_bins = CalcDischarge.get_good_bins(earth_vel)
+        if num_bins is None:
+            num_bins = np.full(num_ens, max_bins)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # Average and minimum bottom track range
+            good_range = bt_range >= 1E-06
+            range_count = good_range.sum(axis=1)
+            bt_min_depth = np.where(good_range, bt_range, np.inf).min(axis=1)
+            avg_depth = np.where(good_range, bt_range, 0.0).sum(axis=1) / range_count
+
+            # Check vessel velocity, bad cell size and bottom not seen
+            valid = ~(np.abs(bt_east) > 80.0) & ~(np.abs(bt_north) > 80.0) & ~(bin_size < 1E-06) & (range_count > 0)
+
+            # Possible maximum depth
+            depth_angle = bt_min_depth * math.cos(beam_angle / 180.0 * math.pi) + boat_draft - np.maximum((pulse_length + pulse_lag) / 2.0, bin_size / 2.0)
+
+            # Distance from water surface to the bottom
+            overall_depth = avg_depth + boat_draft
+
+            # Bin depths accumulated the same as the bin loop
+            steps = np.repeat(bin_size[:, np.newaxis], max_bins, axis=1)
+            steps[:, 0] = first_bin_range + boat_draft
+            bin_depth = np.cumsum(steps, axis=1)
+
+            # Measured bins are all the bins above the maximum depth
+            measured = (bin_depth < depth_angle[:, np.newaxis]) & (np.arange(max_bins) < np.asarray(num_bins)[:, np.newaxis])
+            measured = np.logical_and.accumulate(measured & valid[:, np.newaxis] & (num_beams >= 2), axis=1)
+            measured_count = measured.sum(axis=1)
+
+            # Flow for each bin
+            east = earth_vel[:, :, 0]
+            north = earth_vel[:, :, 1] if num_beams >= 2 else np.zeros_like(east)
+            cross_prod_bin = self.cross_product(east, north, bt_east[:, np.newaxis], bt_north[:, np.newaxis])
+            bin_flow = cross_prod_bin * delta_time[:, np.newaxis] * bin_size[:, np.newaxis]
+            accum_flow = np.where(measured, bin_flow, 0.0).sum(axis=1)
+
+            # Top most and bottom most good bin
+            valid_bins = measured & np.asarray(good_bins, dtype=bool)
+            has_top = valid_bins.any(axis=1)
+            top_index = np.argmax(valid_bins, axis=1)
+            bottom_index = max_bins - 1 - np.argmax(valid_bins[:, ::-1], axis=1)
+            top_flow_bin = bin_flow[ens_index, top_index]
+            bottom_flow_bin = bin_flow[ens_index, bottom_index]
+
+            # Get the depths
+            x1 = overall_depth
+            x2 = overall_depth - bin_depth[ens_index, top_index] + bin_size / 2.0
+            x3 = overall_depth - bin_depth[ens_index, bottom_index] - bin_size / 2.0
+
+            # Cross product of the average velocities
+            avg_east = np.where(measured, east, 0.0).sum(axis=1) / measured_count
+            avg_north = np.where(measured, north, 0.0).sum(axis=1) / measured_count
+            measured_flow = self.cross_product(avg_east, avg_north, bt_east, bt_north) * delta_time * (x2 - x3)
+
+            # CALCULATE TOP
+            constant_top_flow = top_flow_bin / bin_size * (x1 - x2)
+            if top_flow_mode == FlowMode.PowerFunction:
+                y1 = top_pwr_func_exponent + 1.0
+                top_flow = accum_flow * ((x1 ** y1) - (x2 ** y1)) / ((x2 ** y1) - (x3 ** y1))
+            else:
+                top_flow = constant_top_flow
+
+            # CALCULATE BOTTOM
+            if bottom_flow_mode == FlowMode.PowerFunction:
+                y2 = top_pwr_func_exponent + 1.0
+                bottom_flow = accum_flow * (x3 ** y2) / ((x2 ** y2) - (x3 ** y2))
+            elif bottom_flow_mode == FlowMode.Constants:
+                bottom_flow = bottom_flow_bin / bin_size * x3
+            else:
+                bottom_flow = np.zeros(num_ens)
+
+        # Create the results
+        is_valid = (valid & has_top).tolist()
+        measured_flow = measured_flow.tolist()
+        top_flow = top_flow.tolist()
+        bottom_flow = bottom_flow.tolist()
+        measured_count = measured_count.tolist()
+        if bin_info:
+            bin_depth = bin_depth.tolist()
+            bin_flow = bin_flow.tolist()
+            valid_bins = valid_bins.tolist()
+
+        results = []
+        for ens in range(num_ens):
+            ensemble_flow_info = EnsembleFlowInfo()
+            if bin_info:
+                for bin_num in range(measured_count[ens]):
+                    measured_bin_info = MeasuredBinInfo()
+                    measured_bin_info.depth = bin_depth[ens][bin_num]
+                    measured_bin_info.flow = bin_flow[ens][bin_num]
+                    measured_bin_info.valid = valid_bins[ens][bin_num]
+                    ensemble_flow_info.measured_bin_info.append(measured_bin_info)
+
+            if is_valid[ens]:
+                ensemble_flow_info.measured_flow = measured_flow[ens]
+                ensemble_flow_info.top_flow = top_flow[ens]
+                ensemble_flow_info.bottom_flow = bottom_flow[ens]
+                ensemble_flow_info.valid = True
+            results.append(ensemble_flow_info)
+
+        return results
+
+    @staticmethod
+    def get_good_bins(earth_vel, amplitude=None, correlation=None, min_amp=MINIMUM_AMPLITUDE, min_corr=MINIMUM_CORRELATION):
+        """
+        Check all the bins of all the ensembles the same as Ensemble.is_good_bin.
+        A bin is bad if more than 1 beam has Bad Velocity, or an amplitude or
+        correlation less than the minimum value.
+        :param earth_vel: Earth Velocity [ens][bin][beam].
+        :param amplitude: Amplitude [ens][bin][beam] or None if not available.
+        :param correlation: Correlation [ens][bin][beam] or None if not available.
+        :param min_amp: Minimum Amplitude value.
+        :param min_corr: Minimum Correlation value.
+        :return: [ens][bin] TRUE if the bin is good.
+        """
+        good_bins = EarthVelocity.get_bad_array(np.asarray(earth_vel, dtype=np.float64)).sum(axis=-1) <= 1
+        if amplitude is not None:
+            good_bins &= (np.asarray(amplitude, dtype=np.float64) < min_amp).sum(axis=-1) <= 1
+        if correlation is not None:
+            good_bins &= (np.asarray(correlation, dtype=np.float64) < min_corr).sum(axis=-1) <= 1
+
+        return good_bins
+
+    @staticmethod
+    def get_transect_arrays(ens_list: list, min_amp=MINIMUM_AMPLITUDE, min_corr=MINIMUM_CORRELATION) -> dict:
+        """
+        Get the arrays for calculate_transect_flow from a list of ensembles.
+        Ensembles with fewer bins or beams are padded with Bad Velocity.
+
+        results = discharge.calculate_transect_flow(boat_draft=0.1, ..., **CalcDischarge.get_transect_arrays(ens_list))
+
+        :param ens_list: List of ensembles with Ensemble Data, Ancillary Data, Earth Velocity and Bottom Track.
+        :param min_amp: Minimum Amplitude value.
+        :param min_corr: Minimum Correlation value.
+        :return: Dictionary with earth_vel, bt_range, bin_size, first_bin_range, good_bins and num_bins.
+        """
+        num_ens = len(ens_list)
+        num_bins = np.array([ens.EnsembleData.NumBins if ens.IsEarthVelocity else 0 for ens in ens_list], dtype=np.int64)
+        max_bins = int(num_bins.max()) if num_ens > 0 else 0
+        max_beams = max([ens.EarthVelocity.element_multiplier for ens in ens_list if ens.IsEarthVelocity] + [0])
+        max_bt_beams = max([len(ens.BottomTrack.Range) for ens in ens_list if ens.IsBottomTrack] + [0])
+
+        earth_vel = np.full((num_ens, max_bins, max_beams), Ensemble.BadVelocity)
+        amplitude = np.full((num_ens, max_bins, max_beams), np.inf)
+        correlation = np.full((num_ens, max_bins, max_beams), np.inf)
+        bt_range = np.zeros((num_ens, max_bt_beams))
+        bin_size = np.zeros(num_ens)
+        first_bin_range = np.zeros(num_ens)
+
+        for index, ens in enumerate(ens_list):
+            bins = num_bins[index]
+            if ens.IsEarthVelocity and bins > 0:
+                vel = np.asarray(ens.EarthVelocity.Velocities, dtype=np.float64)[:bins]
+                earth_vel[index, :vel.shape[0], :vel.shape[1]] = vel
+            if ens.IsAmplitude and bins > 0:
+                amp = np.asarray(ens.Amplitude.Amplitude, dtype=np.float64)[:bins]
+                amplitude[index, :amp.shape[0], :amp.shape[1]] = amp
+            if ens.IsCorrelation and bins > 0:
+                corr = np.asarray(ens.Correlation.Correlation, dtype=np.float64)[:bins]
+                correlation[index, :corr.shape[0], :corr.shape[1]] = corr
+            if ens.IsBottomTrack:
+                bt_range[index, :len(ens.BottomTrack.Range)] = ens.BottomTrack.Range
+            if ens.IsAncillaryData:
+                bin_size[index] = ens.AncillaryData.BinSize
+                first_bin_range[index] = ens.AncillaryData.FirstBinRange
+
+        return {'earth_vel': earth_vel,
+                'bt_range': bt_range,
+                'bin_size': bin_size,
+                'first_bin_range': first_bin_range,
+                'good_bins': CalcDischarge.get_good_bins(earth_vel, amplitude, correlation, min_amp, min_corr),
+                'num_bins': num_bins}
+
+    @staticmethod
+    def get_delta_times(times) -> np.ndarray:
+        """
+        Get the time difference between the ensembles in seconds.
+        The first ensemble uses the time difference to the second ensemble.
+        :param times: List of datetime or numpy datetime64 for each ensemble.
+        :return: Time difference in seconds [ens].
+        """
+        times = np.asarray(times, dtype='datetime64[us]')
+        delta_time = np.diff(times).astype(np.float64) / 1e6
+        if len(delta_time) == 0:
+            return np.zeros(len(times))
+
+        return np.concatenate((delta_time[:1], delta_time))
+
+    @staticmethod
+    def calculate_edge_flow(earth_vel, bt_east, bt_north, edge_distance: float, edge_depth: float, edge_coeff: float = EDGE_TRIANGULAR) -> float:
+        """
+        Calculate the flow of an unmeasured edge of the transect.
+        Q = C * Vm * L * dm
+        Vm is the average water velocity of the ensembles at the edge, L is the
+        distance to the bank and dm is the depth at the edge.  The sign is the
+        same as the measured flow.
+        :param earth_vel: Earth Velocity of the ensembles at the edge [ens][bin][beam].
+        :param bt_east: Boat East velocity.  Value or [ens].
+        :param bt_north: Boat North velocity.  Value or [ens].
+        :param edge_distance: Distance from the edge ensembles to the bank.
+        :param edge_depth: Depth at the edge ensembles.
+        :param edge_coeff: Edge shape coefficient.  EDGE_TRIANGULAR or EDGE_RECTANGULAR.
+        :return: Edge flow.
+        """
+        earth_vel = np.asarray(earth_vel, dtype=np.float64)
+        num_ens = earth_vel.shape[0]
+        bt_east = np.broadcast_to(np.asarray(bt_east, dtype=np.float64), (num_ens,))
+        bt_north = np.broadcast_to(np.asarray(bt_north, dtype=np.float64), (num_ens,))
+
+        # Average water velocity of the good bins
+        bad = EarthVelocity.get_bad_array(earth_vel[:, :, 0:2]).any(axis=-1)
+        if bad.all():
+            return 0.0
+        east = earth_vel[:, :, 0][~bad].mean()
+        north = earth_vel[:, :, 1][~bad].mean()
+        avg_bt_east = bt_east.mean()
+        avg_bt_north = bt_north.mean()
+
+        water_vel = math.sqrt((east + avg_bt_east) ** 2 + (north + avg_bt_north) ** 2)
+        direction = math.copysign(1.0, CalcDischarge.cross_product(east, north, avg_bt_east, avg_bt_north))
+
+        return direction * edge_coeff * water_vel * edge_distance * edge_depth
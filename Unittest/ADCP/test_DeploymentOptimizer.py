@@ -0,0 +1,100 @@
+import numpy as np
+import rti_python.ADCP.Predictor.DataStorage
+from rti_python.ADCP.Predictor.PredictorBatch import PredictorBatch
+from rti_python.ADCP.Predictor.DeploymentOptimizer import DeploymentOptimizer
+
+
+def brute_force_front(optimizer, search, bursts, max_batteries, min_range, max_std, max_storage):
+    """
+    Evaluate every candidate and find the front without any pruning.
+    """
+    configs = []
+    for burst in bursts:
+        grid = PredictorBatch.grid(**search)
+        burst_params = {} if burst is None else {"CBI_NumEns": burst[0], "CBI_BurstInterval": burst[1]}
+        params = optimizer.get_predictor_params(**grid, **burst_params)
+        if burst is None:
+            power = optimizer.batch.calculate_power(**params)
+            storage = optimizer.batch.calculate_storage_amount(**params)
+        else:
+            power = optimizer.batch.calculate_burst_power(**params)
+            storage = optimizer.batch.calculate_burst_storage_amount(**params)
+        ranges = optimizer.batch.calculate_predicted_range(**params)
+        std = optimizer.batch.calculate_std(**params)
+
+        ok = power <= max_batteries * optimizer.get_battery_power()
+        ok &= (ranges[1] >= min_range) & (ranges[3] >= min_range)
+        ok &= std <= max_std
+        ok &= storage <= max_storage
+        for i in np.nonzero(ok)[0]:
+            configs.append((power[i], std[i], grid["CEI"][i]))
+
+    front = set()
+    for config in configs:
+        if not any(all(o <= c for o, c in zip(other, config)) and other != config for other in configs):
+            front.add(tuple(np.round(config, 6)))
+    return front
+
+
+def test_pareto_front():
+    values = np.array([[1.0, 5.0],
+                       [2.0, 2.0],
+                       [3.0, 3.0],      # Dominated by [2, 2]
+                       [2.0, 2.0],      # Duplicate
+                       [5.0, 1.0],
+                       [5.0, 4.0]])     # Dominated by [5, 1]
+    front = DeploymentOptimizer.pareto_front(values)
+    assert [0, 1, 4] == sorted(front.tolist())
+
+
+def test_pareto_front_random():
+    rng = np.random.default_rng(0)
+    for num_obj in range(1, 5):
+        values = rng.integers(0, 10, (500, num_obj)).astype(float)
+        front = DeploymentOptimizer.pareto_front(values, block_size=32)
+
+        expected = {tuple(v) for v in values if not np.any(np.all(values <= v, axis=1) & np.any(values < v, axis=1))}
+        assert expected == {tuple(v) for v in values[front]}
+        assert len(expected) == len(front)
+
+
+def test_optimize():
+    optimizer = DeploymentOptimizer(SystemFrequency=288000, DeploymentDuration=30, SystemInitTime=0.25)
+    search = {"CWPBN": np.arange(10, 101, 10),
+              "CWPBS": [0.5, 1.0, 2.0, 4.0, 8.0],
+              "CWPP": [1, 2, 4, 9, 16],
+              "CEI": [1, 10, 60, 600]}
+    bursts = [None, (1024, 3600)]
+    front = optimizer.optimize(**search, bursts=bursts, max_batteries=2, min_range=60.0, max_std=0.05, max_storage=4e9)
+
+    assert len(front["power"]) > 0
+    assert np.all(front["num_batteries"] <= 2)
+    assert np.all(front["cfg_range"] >= 60.0)
+    assert np.all(front["std"] <= 0.05)
+    assert np.all(front["storage"] <= 4e9)
+
+    expected = brute_force_front(optimizer, search, bursts, 2, 60.0, 0.05, 4e9)
+    assert expected == {tuple(np.round(c, 6)) for c in zip(front["power"], front["std"], front["CEI"])}
+
+    # Every candidate is pruned or evaluated
+    stats = optimizer.stats
+    assert 10 * 5 * 5 * 4 * 2 == stats["candidates"]
+    assert stats["candidates"] == stats["pruned_range"] + stats["pruned_std"] + stats["pruned_storage"] + stats["pruned_power"] + stats["evaluated"]
+    assert stats["pareto"] == len(front["power"])
+
+
+def test_optimize_none_feasible():
+    optimizer = DeploymentOptimizer(SystemFrequency=1200000, DeploymentDuration=30)
+    front = optimizer.optimize(CWPBN=[10, 20], CWPBS=[0.5, 1.0], CWPP=[1, 4], CEI=[1, 10], min_range=1000.0)
+
+    assert 0 == len(front["power"])
+    assert 0 == optimizer.stats["feasible"]
+    assert optimizer.stats["candidates"] == optimizer.stats["pruned_range"]
+
+
+def test_burst_storage():
+    storage = PredictorBatch().calculate_burst_storage_amount(CEOUTPUT=["RTB", "PD0"], CWPBN=30, Beams=4, DeploymentDuration=30,
+                                                              CBI_NumEns=1024, CBI_BurstInterval=3600)
+    for i, output in enumerate(["RTB", "PD0"]):
+        assert rti_python.ADCP.Predictor.DataStorage.calculate_burst_storage_amount(CEOUTPUT=output, CWPBN=30, Beams=4, DeploymentDuration=30,
+                                                                                   CBI_NumEns=1024, CBI_BurstInterval=3600) == storage[i]
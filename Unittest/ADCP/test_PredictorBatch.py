@@ -0,0 +1,104 @@
+import pytest
+import numpy as np
+import rti_python.ADCP.Predictor.Power
+import rti_python.ADCP.Predictor.Range
+import rti_python.ADCP.Predictor.MaxVelocity
+import rti_python.ADCP.Predictor.STD
+import rti_python.ADCP.Predictor.DataStorage
+from rti_python.ADCP.Predictor import PredictorConfig
+from rti_python.ADCP.Predictor.PredictorBatch import PredictorBatch
+
+
+def test_config_cache():
+    config = PredictorConfig.get_config()
+    assert config is PredictorConfig.get_config()
+    assert 288000 == config['DEFAULT']['SystemFrequency']
+
+    # Read the file again
+    PredictorConfig.reload_config()
+    assert config is not PredictorConfig.get_config()
+    assert config == PredictorConfig.get_config()
+
+
+def test_grid():
+    grid = PredictorBatch.grid(CWPBN=[30, 60], CWPBS=[1.0, 2.0, 4.0], CEI=[1, 60])
+    assert 12 == len(grid["CWPBN"])
+    assert [30, 30, 30, 30, 30, 30, 60, 60, 60, 60, 60, 60] == grid["CWPBN"].tolist()
+    assert [1, 60] * 6 == grid["CEI"].tolist()
+
+
+def test_unknown_param():
+    with pytest.raises(ValueError):
+        PredictorBatch().calculate(CWPBN=[30], BadParam=1)
+
+
+def test_calculate():
+    batch = PredictorBatch()
+    grid = PredictorBatch.grid(SystemFrequency=[1200000, 576000, 288000, 150000],
+                               CWPBB=[0, 1, 2],
+                               CBTBB=[0, 1],
+                               CWPP=[1, 9],
+                               CEI=[0.5, 5],
+                               CWPBS=[0.5, 4.0],
+                               CWPBN=[30, 100])
+    results = batch.calculate(Beams=4, CWPTBP=0.5, **grid)
+
+    assert len(grid["CEI"]) == len(results["power"])
+
+    for i in range(len(grid["CEI"])):
+        kwargs = {name: values[i].item() for name, values in grid.items()}
+        kwargs["Beams"] = 4
+        kwargs["CWPTBP"] = 0.5
+
+        assert rti_python.ADCP.Predictor.Power.calculate_power(**dict(kwargs)) == pytest.approx(results["power"][i])
+
+        bt_range, wp_range, first_bin, cfg_range = rti_python.ADCP.Predictor.Range.calculate_predicted_range(**dict(kwargs))
+        assert bt_range == pytest.approx(results["bt_range"][i])
+        assert wp_range == pytest.approx(results["wp_range"][i])
+        assert first_bin == pytest.approx(results["first_bin"][i])
+        assert cfg_range == pytest.approx(results["cfg_range"][i])
+
+        assert rti_python.ADCP.Predictor.STD.calculate_std(**dict(kwargs)) == pytest.approx(results["std"][i])
+        assert rti_python.ADCP.Predictor.MaxVelocity.calculate_max_velocity(**dict(kwargs)) == pytest.approx(results["max_velocity"][i])
+        assert rti_python.ADCP.Predictor.DataStorage.calculate_storage_amount(**dict(kwargs)) == pytest.approx(results["storage"][i])
+
+
+def test_power_values():
+    batch = PredictorBatch()
+    power = batch.calculate_power(CEI=1,
+                                  DeploymentDuration=30,
+                                  Beams=4,
+                                  SystemFrequency=[288000, 576000],
+                                  CWPON=True,
+                                  CWPBL=1,
+                                  CWPBS=4,
+                                  CWPBN=30,
+                                  CWPBB_LagLength=1,
+                                  CWPBB=1,
+                                  CWPP=9,
+                                  CWPTBP=0.5,
+                                  CBTON=True,
+                                  CBTBB=1,
+                                  SystemInitTime=0.25,
+                                  Temperature=10.0)
+
+    assert pytest.approx(power[0], 0.01) == 30754.86
+    assert pytest.approx(power[1], 0.01) == 16852.22
+
+
+def test_burst_power():
+    power = PredictorBatch().calculate_burst_power(CEI=0.249,
+                                                   DeploymentDuration=[1, 30],
+                                                   CWPP=1,
+                                                   CBTON=[False, True],
+                                                   SystemInitTime=0.25,
+                                                   CBI_NumEns=4096,
+                                                   CBI_BurstInterval=3600)
+
+    assert pytest.approx(power[0], 0.01) == 65.10
+    assert pytest.approx(power[1], 0.01) == 12475.41
+
+
+def test_storage():
+    storage = PredictorBatch().calculate_storage_amount(CEOUTPUT=["RTB", "PD0"], CWPBN=30, Beams=4, DeploymentDuration=30, CEI=1.0)
+    assert [12172032000, 2153952000] == storage.tolist()
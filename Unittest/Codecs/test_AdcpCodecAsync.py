@@ -0,0 +1,74 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from rti_python.Codecs.AdcpCodecAsync import AdcpCodecAsync
+from rti_python.Unittest.helpers import create_ens_bin
+
+
+def test_stream():
+    data = b''.join(create_ens_bin(ens_num) for ens_num in range(1, 11))
+
+    async def read_all():
+        reader = asyncio.StreamReader()
+        for index in range(0, len(data), 300):
+            reader.feed_data(data[index:index + 300])
+        reader.feed_eof()
+
+        codec = AdcpCodecAsync(read_size=1000)
+        return [ens.EnsembleData.EnsembleNumber async for ens in codec.stream(reader)], codec
+
+    ens_nums, codec = asyncio.run(read_all())
+
+    assert list(range(1, 11)) == ens_nums
+    assert 10 == codec.get_stats()["ens_count"]
+    assert 0 == codec.get_stats()["buffered_bytes"]
+
+
+def test_decode_event():
+    ens_bin = create_ens_bin(7)
+    ens_nums = []
+
+    def ens_handler(sender, ens):
+        ens_nums.append(ens.EnsembleData.EnsembleNumber)
+
+    codec = AdcpCodecAsync(use_np=True)
+    codec.ensemble_event += ens_handler
+
+    assert [] == codec.decode(ens_bin[:100])
+    assert 1 == len(codec.decode(ens_bin[100:]))
+    assert [7] == ens_nums
+
+
+def test_stream_executor():
+    data = b''.join(create_ens_bin(ens_num) for ens_num in range(1, 6))
+    decode_threads = set()
+    event_threads = set()
+
+    def ens_handler(sender, ens):
+        event_threads.add(threading.get_ident())
+
+    async def read_all(executor):
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+
+        codec = AdcpCodecAsync(executor=executor)
+        codec.ensemble_event += ens_handler
+
+        decode_frames = codec.decode_frames
+
+        def decode_in_thread(frames):
+            decode_threads.add(threading.get_ident())
+            return decode_frames(frames)
+
+        codec.decode_frames = decode_in_thread
+        return [ens.EnsembleData.EnsembleNumber async for ens in codec.stream(reader)]
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        ens_nums = asyncio.run(read_all(executor))
+
+    # Decoded in the executor and the subscribers are called in the event loop
+    assert [1, 2, 3, 4, 5] == ens_nums
+    assert 1 == len(decode_threads)
+    assert threading.get_ident() not in decode_threads
+    assert {threading.get_ident()} == event_threads
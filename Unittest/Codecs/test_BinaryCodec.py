@@ -0,0 +1,204 @@
+import pytest
+from rti_python.Ensemble.EnsembleData import EnsembleData
+from rti_python.Ensemble.BeamVelocity import BeamVelocity
+from rti_python.Ensemble.Amplitude import Amplitude
+from rti_python.Ensemble.GoodBeam import GoodBeam
+from rti_python.Ensemble.AncillaryData import AncillaryData
+from rti_python.Ensemble.BottomTrack import BottomTrack
+from rti_python.Codecs.BinaryCodec import BinaryCodec
+from rti_python.Codecs.BinaryCodec import EnsembleFramer
+from rti_python.Utilities.read_binary_file import ReadBinaryFile
+from rti_python.Unittest.helpers import create_ens_bin
+
+
+def test_verify_ens_data():
+    ens_bin = create_ens_bin(1)
+    assert BinaryCodec.verify_ens_data(ens_bin)
+    assert BinaryCodec.verify_ens_data(memoryview(bytearray(ens_bin)))
+
+    # Corrupt the payload
+    bad_ens_bin = bytearray(ens_bin)
+    bad_ens_bin[100] ^= 0xFF
+    assert not BinaryCodec.verify_ens_data(bad_ens_bin)
+
+
+def test_decode_full():
+    ens = BinaryCodec.decode_data_sets(create_ens_bin(3, num_bins=10, full=True))
+
+    assert ens.IsEnsembleData and ens.IsAncillaryData and ens.IsSystemSetup and ens.IsBottomTrack
+    assert ens.IsInstrumentVelocity and ens.IsEarthVelocity and ens.IsCorrelation and ens.IsGoodBeam and ens.IsGoodEarth
+    assert 3.0 == ens.AncillaryData.Heading
+    assert 4 == ens.BottomTrack.NumBeams
+    assert 13.0 == ens.BottomTrack.Range[3]
+    assert 3 == ens.GoodBeam.GoodBeam[9][3]
+
+
+def test_framer_small_chunks():
+    data = b''.join(create_ens_bin(ens_num) for ens_num in range(1, 11))
+
+    # Start with a small buffer so it has to grow
+    framer = EnsembleFramer(buffer_size=64)
+
+    ens_nums = []
+    for index in range(0, len(data), 100):
+        framer.add(data[index:index + 100])
+        for ens_bin in framer.frames():
+            ens = BinaryCodec.decode_data_sets(ens_bin)
+            ens_nums.append(ens.EnsembleData.EnsembleNumber)
+
+    assert list(range(1, 11)) == ens_nums
+    assert 10 == framer.ens_count
+    assert 0 == framer.bad_ens_count
+
+
+def test_framer_reuse_buffer():
+    ens_bin = create_ens_bin(1)
+    framer = EnsembleFramer(buffer_size=len(ens_bin) * 2)
+    buffer = framer.buffer
+
+    count = 0
+    for x in range(20):
+        framer.add(ens_bin)
+        for frame in framer.frames():
+            assert bytes(frame) == ens_bin
+            count += 1
+
+    # All the data fit in the original buffer
+    assert 20 == count
+    assert buffer is framer.buffer
+
+
+def test_framer_bad_data():
+    ens_bin1 = create_ens_bin(1)
+    ens_bin2 = bytearray(create_ens_bin(2))
+    ens_bin2[100] ^= 0xFF
+    ens_bin3 = create_ens_bin(3)
+
+    framer = EnsembleFramer()
+    framer.add(b'\x01\x02\x80\x80garbage' + ens_bin1 + b'\x80' * 20 + ens_bin2 + ens_bin3)
+
+    ens_nums = [BinaryCodec.decode_data_sets(ens_bin).EnsembleData.EnsembleNumber for ens_bin in framer.frames()]
+
+    assert [1, 3] == ens_nums
+    assert 2 == framer.ens_count
+    assert framer.bad_ens_count >= 1
+
+
+def test_framer_incomplete():
+    ens_bin = create_ens_bin(1)
+    framer = EnsembleFramer()
+
+    # Half the ensemble
+    framer.add(ens_bin[:len(ens_bin) // 2])
+    assert [] == list(framer.frames())
+    assert len(ens_bin) // 2 == framer.available()
+
+    # Rest of the ensemble
+    framer.add(ens_bin[len(ens_bin) // 2:])
+    assert 1 == len(list(framer.frames()))
+    assert 0 == framer.available()
+
+
+def test_framer_decode_np():
+    framer = EnsembleFramer()
+    framer.add(create_ens_bin(5, num_bins=200))
+
+    for ens_bin in framer.frames():
+        ens = BinaryCodec.decode_data_sets(ens_bin)
+        ens_np = BinaryCodec.decode_data_sets(ens_bin, use_np=True)
+        assert ens.BeamVelocity.Velocities == ens_np.BeamVelocity.Velocities
+        assert ens.Amplitude.Amplitude == ens_np.Amplitude.Amplitude
+        assert 5.0 == pytest.approx(ens_np.BeamVelocity.Velocities[0][0])
+
+
+def test_playback(tmpdir):
+    file_path = str(tmpdir.join("playback.ens"))
+    with open(file_path, "wb") as f:
+        for ens_num in range(1, 51):
+            f.write(create_ens_bin(ens_num))
+
+    ens_nums = []
+
+    def ens_handler(sender, ens):
+        ens_nums.append(ens.EnsembleData.EnsembleNumber)
+
+    reader = ReadBinaryFile()
+    reader.ensemble_event += ens_handler
+    reader.playback(file_path)
+
+    assert list(range(1, 51)) == ens_nums
+
+
+def test_codec_instances():
+    # Each codec has its own queue, so the data does not get mixed
+    ens_nums1 = []
+    ens_nums2 = []
+
+    def ens_handler1(sender, ens):
+        ens_nums1.append(ens.EnsembleData.EnsembleNumber)
+
+    def ens_handler2(sender, ens):
+        ens_nums2.append(ens.EnsembleData.EnsembleNumber)
+
+    codec1 = BinaryCodec()
+    codec2 = BinaryCodec()
+    codec1.ensemble_event += ens_handler1
+    codec2.ensemble_event += ens_handler2
+
+    for ens_num in range(1, 21):
+        ens_bin1 = create_ens_bin(ens_num)
+        ens_bin2 = create_ens_bin(ens_num + 100)
+        for index in range(0, len(ens_bin1), 500):
+            codec1.add(ens_bin1[index:index + 500])
+            codec2.add(ens_bin2[index:index + 500])
+
+    codec1.shutdown()
+    codec2.shutdown()
+
+    assert list(range(1, 21)) == ens_nums1
+    assert list(range(101, 121)) == ens_nums2
+    assert 20 == codec1.get_stats()["ens_count"]
+    assert 0 == codec1.get_stats()["dropped_count"]
+
+
+def test_codec_queue_full():
+    codec = BinaryCodec(max_queue_size=2, block_when_full=False)
+
+    # Stop the processing thread so the queue fills up
+    codec.data_queue.put(None)
+    codec.process_data_thread.join()
+
+    ens_bin = create_ens_bin(1)
+    assert codec.add(ens_bin)
+    assert codec.add(ens_bin)
+    assert not codec.add(ens_bin)
+
+    stats = codec.get_stats()
+    assert 2 == stats["queue_depth"]
+    assert 2 == stats["max_queue_depth"]
+    assert 0 == stats["blocked_count"]
+    assert 1 == stats["dropped_count"]
+    assert len(ens_bin) == stats["dropped_bytes"]
+
+    codec.shutdown()
+
+
+def test_codec_queue_blocked():
+    codec = BinaryCodec(max_queue_size=1, block_when_full=True, block_timeout=0.1)
+
+    # Stop the processing thread so the queue fills up
+    codec.data_queue.put(None)
+    codec.process_data_thread.join()
+
+    ens_bin = create_ens_bin(1)
+    assert codec.add(ens_bin)
+    assert 0 == codec.get_stats()["blocked_count"]
+
+    # Wait for room then drop the data
+    assert not codec.add(ens_bin)
+
+    stats = codec.get_stats()
+    assert 1 == stats["blocked_count"]
+    assert 1 == stats["dropped_count"]
+
+    codec.shutdown()
@@ -0,0 +1,80 @@
+import pytest
+from rti_python.Codecs.BinaryCodecParallel import BinaryCodecParallel
+from rti_python.Codecs.BinaryCodecParallel import decode_chunk
+from rti_python.Utilities.read_binary_file import ReadBinaryFile
+from rti_python.Unittest.helpers import create_ens_bin
+
+
+def create_file(file_path, num_ens=50):
+    """
+    Create a RTB file with the ensembles numbered 1 to num_ens.
+    Garbage data and a bad ensemble are put between some of the ensembles.
+    """
+    with open(file_path, "wb") as f:
+        for ens_num in range(1, num_ens + 1):
+            f.write(create_ens_bin(ens_num))
+            if ens_num % 7 == 0:
+                f.write(b'\x80' * 20 + b'garbage')
+            if ens_num % 11 == 0:
+                bad_ens = bytearray(create_ens_bin(1000))
+                bad_ens[100] ^= 0xFF
+                f.write(bad_ens)
+
+
+def test_split_file(tmpdir):
+    file_path = str(tmpdir.join("split.ens"))
+    create_file(file_path)
+
+    chunks = BinaryCodecParallel.split_file(file_path, 4096)
+    assert len(chunks) > 1
+    assert 0 == chunks[0][0]
+
+    # Chunks are continuous and start at a delimiter
+    with open(file_path, "rb") as f:
+        data = f.read()
+    for index in range(1, len(chunks)):
+        assert chunks[index - 1][1] == chunks[index][0]
+        assert b'\x80' * 16 == data[chunks[index][0]:chunks[index][0] + 16]
+    assert len(data) == chunks[-1][1]
+
+
+def test_decode_chunk(tmpdir):
+    file_path = str(tmpdir.join("chunk.ens"))
+    create_file(file_path)
+
+    # Decode all the chunks in this process
+    ens_nums = []
+    for chunk_start, chunk_end in BinaryCodecParallel.split_file(file_path, 4096):
+        ens_nums += [ens.EnsembleData.EnsembleNumber for ens in decode_chunk(file_path, chunk_start, chunk_end)]
+
+    assert list(range(1, 51)) == ens_nums
+
+
+@pytest.mark.parametrize("chunk_size", [1000, 4096, 1024 * 1024])
+def test_decode_file(tmpdir, chunk_size):
+    file_path = str(tmpdir.join("parallel.ens"))
+    create_file(file_path)
+
+    codec = BinaryCodecParallel(num_workers=2, chunk_size=chunk_size, max_pending=3)
+    ens_nums = [ens.EnsembleData.EnsembleNumber for ens in codec.decode_file(file_path)]
+
+    assert list(range(1, 51)) == ens_nums
+
+
+def test_playback_parallel(tmpdir):
+    file_path = str(tmpdir.join("playback.ens"))
+    create_file(file_path)
+
+    serial = []
+    parallel = []
+
+    reader = ReadBinaryFile()
+    reader.ensemble_event += lambda sender, ens: serial.append(ens.BeamVelocity.Velocities)
+    reader.playback(file_path)
+
+    reader = ReadBinaryFile()
+    reader.ensemble_event += lambda sender, ens: parallel.append(ens.BeamVelocity.Velocities)
+    reader.playback_parallel(file_path, num_workers=2)
+
+    assert 50 == len(parallel)
+    assert serial == parallel
@@ -0,0 +1,91 @@
+import asyncio
+import socket
+from rti_python.Comm.AdcpIngestServer import AdcpTcpIngestServer
+from rti_python.Comm.AdcpIngestServer import AdcpUdpIngestServer
+from rti_python.Unittest.helpers import create_ens_bin
+
+
+def test_tcp_feeds():
+    num_feeds = 5
+    num_ens = 10
+    received = {}
+
+    def ens_handler(sender, ens, source):
+        received.setdefault(source, []).append(ens.EnsembleData.EnsembleNumber)
+
+    async def send_feed(port, feed):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        for ens_num in range(1, num_ens + 1):
+            ens_bin = create_ens_bin(feed * 100 + ens_num)
+            for index in range(0, len(ens_bin), 700):
+                writer.write(ens_bin[index:index + 700])
+                await writer.drain()
+        writer.close()
+        await writer.wait_closed()
+
+    async def run():
+        server = AdcpTcpIngestServer(host="127.0.0.1", port=0)
+        server.ensemble_event += ens_handler
+        await server.start()
+
+        await asyncio.gather(*[send_feed(server.port, feed) for feed in range(num_feeds)])
+
+        # Wait for the server to process all the data
+        for x in range(100):
+            if sum(len(ens_nums) for ens_nums in received.values()) == num_feeds * num_ens:
+                break
+            await asyncio.sleep(0.01)
+
+        await server.close()
+
+    asyncio.run(run())
+
+    assert num_feeds == len(received)
+    assert sorted(received.values()) == [list(range(feed * 100 + 1, feed * 100 + num_ens + 1)) for feed in range(num_feeds)]
+
+
+def test_udp_feeds():
+    received = []
+
+    def ens_handler(sender, ens, source):
+        received.append(ens.EnsembleData.EnsembleNumber)
+
+    async def run():
+        server = AdcpUdpIngestServer(host="127.0.0.1", port=0)
+        server.ensemble_event += ens_handler
+        await server.start()
+
+        # Split each ensemble across datagrams
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        for ens_num in range(1, 6):
+            ens_bin = create_ens_bin(ens_num)
+            for index in range(0, len(ens_bin), 1000):
+                sock.sendto(ens_bin[index:index + 1000], ("127.0.0.1", server.port))
+                await asyncio.sleep(0)
+
+        for x in range(100):
+            if len(received) == 5:
+                break
+            await asyncio.sleep(0.01)
+
+        sock.close()
+        await server.close()
+
+    asyncio.run(run())
+
+    assert [1, 2, 3, 4, 5] == received
+
+
+def test_udp_max_feeds():
+    server = AdcpUdpIngestServer(max_feeds=2)
+    ens_bin = create_ens_bin(1)
+
+    # Incomplete ensembles from 3 feeds
+    server.datagram_received(ens_bin[:100], ("10.0.0.1", 1000))
+    server.datagram_received(ens_bin[:100], ("10.0.0.2", 1000))
+    server.datagram_received(ens_bin[100:200], ("10.0.0.1", 1000))
+    server.datagram_received(ens_bin[:100], ("10.0.0.3", 1000))
+
+    # The feed not heard from the longest is removed
+    assert [("10.0.0.1", 1000), ("10.0.0.3", 1000)] == list(server.feeds.keys())
+    assert 200 == server.feeds[("10.0.0.1", 1000)].get_stats()["buffered_bytes"]
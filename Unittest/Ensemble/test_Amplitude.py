@@ -173,3 +173,30 @@ def test_encode_decode():
     for beam in range(amp.element_multiplier):
         for bin_num in range(amp.num_elements):
             assert amp.Amplitude[bin_num][beam] == pytest.approx(amp1.Amplitude[bin_num][beam], 0.1)
+
+
+def test_encode_decode_np():
+
+    num_bins = 30
+    num_beams = 4
+
+    amp = Amplitude(num_bins, num_beams)
+
+    # Populate data
+    val = 1.0
+    for beam in range(amp.element_multiplier):
+        for bin_num in range(amp.num_elements):
+            amp.Amplitude[bin_num][beam] = val
+            val += 1.1
+
+    result = amp.encode()
+
+    # Decode with both the per value and numpy path
+    amp1 = Amplitude(num_bins, num_beams)
+    amp1.decode(bytearray(result))
+    amp2 = Amplitude(num_bins, num_beams)
+    amp2.decode(bytearray(result), use_np=True)
+
+    for beam in range(amp2.element_multiplier):
+        for bin_num in range(amp2.num_elements):
+            assert amp1.Amplitude[bin_num][beam] == amp2.Amplitude[bin_num][beam]
@@ -176,3 +176,30 @@ def test_encode_decode():
     for beam in range(vel1.element_multiplier):
         for bin_num in range(vel1.num_elements):
             assert vel1.Velocities[bin_num][beam] == pytest.approx(vel1.Velocities[bin_num][beam], 0.1)
+
+
+def test_encode_decode_np():
+
+    num_bins = 30
+    num_beams = 4
+
+    vel = BeamVelocity(num_bins, num_beams)
+
+    # Populate data
+    val = 1.0
+    for beam in range(vel.element_multiplier):
+        for bin_num in range(vel.num_elements):
+            vel.Velocities[bin_num][beam] = val
+            val += 1.1
+
+    result = vel.encode()
+
+    # Decode with both the per value and numpy path
+    vel1 = BeamVelocity(num_bins, num_beams)
+    vel1.decode(bytearray(result))
+    vel2 = BeamVelocity(num_bins, num_beams)
+    vel2.decode(bytearray(result), use_np=True)
+
+    for beam in range(vel2.element_multiplier):
+        for bin_num in range(vel2.num_elements):
+            assert vel1.Velocities[bin_num][beam] == vel2.Velocities[bin_num][beam]
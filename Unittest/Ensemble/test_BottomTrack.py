@@ -845,8 +845,8 @@ def test_encode_decode():
     bt.SNR_PulseCoherent = [1, 2, 3, 4]
     bt.Amp_PulseCoherent = [1, 2, 3, 4]
     bt.Vel_PulseCoherent = [1, 2, 3, 4]
-    bt.Noise_PulseCoherent = [1, 2, 3, 4]
-    bt.Corr_PulseCoherent = [1, 2, 3, 4]
+    bt.Noise_PulseCoherent = [5, 6, 7, 8]
+    bt.Corr_PulseCoherent = [9, 10, 11, 12]
 
     # Populate data
 
@@ -0,0 +1,74 @@
+import pytest
+import datetime
+import numpy as np
+from rti_python.Ensemble.CompactEnsemble import CompactEnsemble
+from rti_python.Codecs.BinaryCodec import BinaryCodec
+from rti_python.Unittest.helpers import create_ens_bin
+
+
+def test_decode():
+    ens_bin = create_ens_bin(12, num_bins=50, minute=3, second=4, ss_code="3", ss_config=2)
+    compact = CompactEnsemble.decode(ens_bin)
+
+    assert not hasattr(compact, "__dict__")
+    assert 12 == compact.EnsembleNumber
+    assert "3" == compact.SsCode
+    assert 2 == compact.SsConfig
+    assert datetime.datetime(2019, 3, 9, 12, 3, 4) == compact.datetime()
+
+    assert compact.IsBeamVelocity
+    assert compact.IsAmplitude
+    assert not compact.IsEarthVelocity
+    assert not compact.IsAncillaryData
+    assert (50, 4) == compact.BeamVelocity.shape
+    assert np.float32 == compact.BeamVelocity.dtype
+    assert 12.1 == pytest.approx(compact.BeamVelocity[1][3])
+    assert 3.0 == compact.Amplitude[10][3]
+    assert 12 == compact.EnsembleData.EnsembleNumber
+    assert compact.BottomTrack is None
+
+
+def test_to_ensemble():
+    ens_bin = create_ens_bin(7, num_bins=20)
+    ens = BinaryCodec.decode_data_sets(ens_bin)
+
+    compact_ens = CompactEnsemble.decode(ens_bin).to_ensemble()
+    assert ens.BeamVelocity.Velocities == compact_ens.BeamVelocity.Velocities
+    assert ens.Amplitude.Amplitude == compact_ens.Amplitude.Amplitude
+    assert vars(ens.EnsembleData) == vars(compact_ens.EnsembleData)
+    assert not compact_ens.IsEarthVelocity
+
+
+def test_from_ensemble():
+    ens = BinaryCodec.decode_data_sets(create_ens_bin(8, num_bins=20))
+
+    compact = CompactEnsemble.from_ensemble(ens)
+    assert 8 == compact.EnsembleNumber
+    assert np.array_equal(np.array(ens.BeamVelocity.Velocities, dtype=np.float32), compact.BeamVelocity)
+
+    # Round trip
+    ens2 = compact.to_ensemble()
+    assert ens.BeamVelocity.Velocities == ens2.BeamVelocity.Velocities
+    assert ens.EnsembleData.datetime() == ens2.EnsembleData.datetime()
+
+
+def test_read_only():
+    compact = CompactEnsemble.decode(create_ens_bin(9, num_bins=10, full=True))
+
+    # Changes would be lost, so they raise an error
+    with pytest.raises(ValueError):
+        compact.BeamVelocity[0][0] = 1.0
+    with pytest.raises(AttributeError):
+        compact.AncillaryData.Heading = 1.0
+    with pytest.raises(TypeError):
+        compact.BottomTrack.Range[0] = 1.0
+    assert 9.0 == compact.AncillaryData.Heading
+    assert 10.0 == compact.BottomTrack.Range[0]
+
+    # Change the values in the Ensemble
+    ens = compact.to_ensemble()
+    ens.AncillaryData.Heading = 1.0
+    ens.BeamVelocity.Velocities[0][0] = 1.0
+    compact = CompactEnsemble.from_ensemble(ens)
+    assert 1.0 == compact.AncillaryData.Heading
+    assert 1.0 == compact.BeamVelocity[0][0]
@@ -174,3 +174,29 @@ def test_encode_decode():
         for bin_num in range(corr1.num_elements):
             assert corr.Correlation[bin_num][beam] == pytest.approx(corr1.Correlation[bin_num][beam], 0.1)
 
+
+def test_encode_decode_np():
+
+    num_bins = 30
+    num_beams = 4
+
+    corr = Correlation(num_bins, num_beams)
+
+    # Populate data
+    val = 1.0
+    for beam in range(corr.element_multiplier):
+        for bin_num in range(corr.num_elements):
+            corr.Correlation[bin_num][beam] = val
+            val += 1.1
+
+    result = corr.encode()
+
+    # Decode with both the per value and numpy path
+    corr1 = Correlation(num_bins, num_beams)
+    corr1.decode(bytearray(result))
+    corr2 = Correlation(num_bins, num_beams)
+    corr2.decode(bytearray(result), use_np=True)
+
+    for beam in range(corr2.element_multiplier):
+        for bin_num in range(corr2.num_elements):
+            assert corr1.Correlation[bin_num][beam] == corr2.Correlation[bin_num][beam]
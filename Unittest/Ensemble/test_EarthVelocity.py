@@ -353,4 +353,98 @@ def test_encode_csv_vector_no_gen():
         elif bool(re.search(Ensemble.CSV_EARTH_VEL, line[0])):
             assert True
         else:
-            assert False
\ No newline at end of file
+            assert False
+
+
+def test_encode_decode_np():
+
+    num_bins = 30
+    num_beams = 4
+
+    vel = EarthVelocity(num_bins, num_beams)
+
+    # Populate data
+    val = 1.0
+    for beam in range(vel.element_multiplier):
+        for bin_num in range(vel.num_elements):
+            vel.Velocities[bin_num][beam] = val
+            val += 1.1
+
+    result = vel.encode()
+
+    # Decode with both the per value and numpy path
+    vel1 = EarthVelocity(num_bins, num_beams)
+    vel1.decode(bytearray(result))
+    vel2 = EarthVelocity(num_bins, num_beams)
+    vel2.decode(bytearray(result), use_np=True)
+
+    for beam in range(vel2.element_multiplier):
+        for bin_num in range(vel2.num_elements):
+            assert vel1.Velocities[bin_num][beam] == vel2.Velocities[bin_num][beam]
+            assert vel1.Magnitude[bin_num] == pytest.approx(vel2.Magnitude[bin_num], 0.1)
+            assert vel1.Direction[bin_num] == pytest.approx(vel2.Direction[bin_num], 0.1)
+
+
+def test_vectors_bad():
+    earth_vel = [[1.0, 1.0, 0.0, 0.0],
+                 [Ensemble.BadVelocity, 1.0, 0.0, 0.0],
+                 [1.0, 1.0, Ensemble.BadVelocity, 0.0],
+                 [-1.0, 0.0, 0.0, Ensemble.BadVelocity]]
+
+    mag, dir = EarthVelocity.generate_vectors(earth_vel)
+
+    for bin_num in range(len(earth_vel)):
+        east, north, vert = earth_vel[bin_num][0:3]
+        assert EarthVelocity.calculate_magnitude(east, north, vert) == pytest.approx(mag[bin_num])
+        assert EarthVelocity.calculate_direction(east, north) == pytest.approx(dir[bin_num])
+
+    assert Ensemble.BadVelocity == mag[1]
+    assert Ensemble.BadVelocity == dir[1]
+    assert Ensemble.BadVelocity == mag[2]
+    assert 45.0 == pytest.approx(dir[2])
+    assert 270.0 == pytest.approx(dir[3])
+
+
+def test_remove_vessel_speed_bad():
+    earth = EarthVelocity(2, 4)
+    earth.Velocities = [[1.0, Ensemble.BadVelocity, 1.0, 1.0],
+                        [1.0, 2.0, 3.0, 4.0]]
+
+    earth.remove_vessel_speed(-0.5, -1.0, 0.5)
+
+    # Bad Velocity and the error velocity are not changed
+    assert [[0.5, Ensemble.BadVelocity, 1.5, 1.0], [0.5, 1.0, 3.5, 4.0]] == earth.Velocities
+    assert Ensemble.BadVelocity == earth.Magnitude[0]
+    assert 3.674 == pytest.approx(earth.Magnitude[1], 0.01)
+
+
+def test_vectors_array_transect():
+    np = pytest.importorskip("numpy")
+
+    # 3 ensembles, 2 bins, 4 beams
+    earth_vel = np.array([[[1.0, 1.0, 0.0, 0.0], [2.0, 2.0, 0.0, 0.0]],
+                          [[1.0, 0.0, 0.0, 0.0], [Ensemble.BadVelocity, 1.0, 0.0, 0.0]],
+                          [[0.0, 1.0, 0.0, 0.0], [0.0, 2.0, 0.0, 0.0]]])
+    bt_east = np.array([-1.0, 0.0, 1.0])
+    bt_north = np.array([0.0, 1.0, 0.0])
+
+    vel = EarthVelocity.remove_vessel_speed_array(earth_vel, bt_east, bt_north, 0.0)
+    mag, dir = EarthVelocity.generate_vectors_array(vel)
+
+    assert (3, 2, 4) == vel.shape
+    assert (3, 2) == mag.shape
+    assert [0.0, 1.0] == vel[0, :, 0].tolist()
+    assert Ensemble.BadVelocity == vel[1, 1, 0]
+    assert 2.0 == vel[1, 1, 1]
+
+    # Same as each ensemble on its own
+    for ens in range(3):
+        earth = EarthVelocity(2, 4)
+        earth.Velocities = earth_vel[ens].tolist()
+        earth.remove_vessel_speed(bt_east[ens], bt_north[ens], 0.0)
+        assert earth.Velocities == vel[ens].tolist()
+        assert earth.Magnitude == mag[ens].tolist()
+        assert earth.Direction == dir[ens].tolist()
+
+    # Original velocities not changed
+    assert 1.0 == earth_vel[0, 0, 0]
@@ -1,4 +1,7 @@
 import pytest
+import datetime
+import struct
+import numpy as np
 
 from rti_python.Ensemble.Ensemble import Ensemble
 from rti_python.Ensemble.Amplitude import Amplitude
@@ -15,6 +18,7 @@ from rti_python.Ensemble.RangeTracking import RangeTracking
 from rti_python.Ensemble.SystemSetup import SystemSetup
 from rti_python.Codecs.BinaryCodec import BinaryCodec
 from rti_python.Ensemble.NmeaData import NmeaData
+from rti_python.Unittest.helpers import create_ens_bin
 
 
 def test_generate_header():
@@ -649,5 +653,133 @@ def test_ones_compliment():
     assert 9 == result
 
 
+def test_array_2d_to_df():
+    dt = datetime.datetime(2019, 3, 9, 12, 0, 0)
+    vel = [[bin_num + beam * 0.1 for beam in range(4)] for bin_num in range(30)]
 
+    df = Ensemble.array_2d_to_df(vel, dt, "A", 1, 0.5, 0.25, 10, 15)
 
+    assert ['time_stamp', 'ss_code', 'ss_config', 'bin_num', 'beam_num', 'bin_depth', 'first_ens_num', 'last_ens_num', 'value'] == list(df.columns)
+    assert 30 * 4 == len(df)
+    row = df.iloc[5 * 4 + 3]
+    assert (5, 3) == (row['bin_num'], row['beam_num'])
+    assert Ensemble.get_bin_depth(0.5, 0.25, 5) == row['bin_depth']
+    assert 5.3 == pytest.approx(row['value'])
+    assert dt == row['time_stamp']
+    assert 15 == row['last_ens_num']
+
+    assert Ensemble.array_2d_to_df([], dt, "A", 1, 0.5, 0.25, 10, 15).empty
+
+
+def test_array_1d_to_df():
+    dt = datetime.datetime(2019, 3, 9, 12, 0, 0)
+    df = Ensemble.array_1d_to_df([1.5, 2.5, 3.5], dt, "A", 1, 1.0, 0.5, 10, 15)
+
+    assert [0, 1, 2] == df['bin_num'].tolist()
+    assert [0, 0, 0] == df['beam_num'].tolist()
+    assert [1.0, 1.5, 2.0] == df['bin_depth'].tolist()
+    assert [1.5, 2.5, 3.5] == df['value'].tolist()
+
+
+def test_arrays_2d_to_df():
+    dts = [datetime.datetime(2019, 3, 9, 12, 0, x) for x in range(3)]
+    profiles = [[[prof * 100 + bin_num * 10 + beam for beam in range(4)] for bin_num in range(5)] for prof in range(3)]
+
+    df = Ensemble.arrays_2d_to_df(profiles, dts, "A", 1, [0.5, 0.5, 1.0], 0.25, [1, 11, 21], [10, 20, 30])
+    assert 3 * 5 * 4 == len(df)
+
+    # Same as converting each profile
+    for prof in range(3):
+        single = Ensemble.array_2d_to_df(profiles[prof], dts[prof], "A", 1, [0.5, 0.5, 1.0][prof], 0.25, prof * 10 + 1, prof * 10 + 10)
+        assert single.values.tolist() == df.iloc[prof * 20:(prof + 1) * 20].values.tolist()
+
+    df = Ensemble.arrays_1d_to_df([[1.0, 2.0], [3.0, 4.0]], dts[:2], "A", 1, 0.5, 0.25, [1, 2], [1, 2])
+    assert [1.0, 2.0, 3.0, 4.0] == df['value'].tolist()
+    assert [0, 1, 0, 1] == df['bin_num'].tolist()
+    assert [dts[0], dts[0], dts[1], dts[1]] == df['time_stamp'].tolist()
+
+
+def test_arrays_to_df_dtype():
+    dt = datetime.datetime(2019, 3, 9, 12, 0, 0)
+
+    # Int values like the good beam count stay int
+    good_beam = [[bin_num % 2 for beam in range(4)] for bin_num in range(3)]
+    df = Ensemble.array_2d_to_df(good_beam, dt, "A", 1, 0.5, 0.25, 10, 15)
+    assert np.issubdtype(df['value'].dtype, np.integer)
+    assert [0, 0, 0, 0, 1, 1, 1, 1, 0, 0, 0, 0] == df['value'].tolist()
+
+    df = Ensemble.array_1d_to_df([1, 2, 3], dt, "A", 1, 1.0, 0.5, 10, 15)
+    assert np.issubdtype(df['value'].dtype, np.integer)
+
+    df = Ensemble.array_beam_1d_to_df([1, 2, 3, 4], dt, "A", 1, 10, 15)
+    assert np.issubdtype(df['value'].dtype, np.integer)
+
+
+def test_arrays_to_df_ragged():
+    dts = [datetime.datetime(2019, 3, 9, 12, 0, x) for x in range(2)]
+
+    # A bin with fewer beams
+    vel = [[1.0, 2.0, 3.0, 4.0], [5.0, 6.0], [7.0, 8.0, 9.0, 10.0]]
+    df = Ensemble.array_2d_to_df(vel, dts[0], "A", 1, 0.5, 0.25, 10, 15)
+    assert [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0] == df['value'].tolist()
+    assert [0, 0, 0, 0, 1, 1, 2, 2, 2, 2] == df['bin_num'].tolist()
+    assert [0, 1, 2, 3, 0, 1, 0, 1, 2, 3] == df['beam_num'].tolist()
+    assert Ensemble.get_bin_depth(0.5, 0.25, 2) == df['bin_depth'].iloc[-1]
+
+    # Profiles with a different number of bins
+    df = Ensemble.arrays_1d_to_df([[1, 2, 3], [4, 5]], dts, "A", 1, [0.5, 1.0], 0.25, [1, 2], [1, 2])
+    assert [1, 2, 3, 4, 5] == df['value'].tolist()
+    assert [0, 1, 2, 0, 1] == df['bin_num'].tolist()
+    assert [0.5, 0.75, 1.0, 1.0, 1.25] == df['bin_depth'].tolist()
+    assert [dts[0], dts[0], dts[0], dts[1], dts[1]] == df['time_stamp'].tolist()
+    assert [1, 1, 1, 2, 2] == df['last_ens_num'].tolist()
+
+    # Same columns as the arrays with the same shape
+    assert list(Ensemble.arrays_1d_to_df([[1, 2], [4, 5]], dts, "A", 1, 0.5, 0.25, [1, 2], [1, 2]).columns) == list(df.columns)
+
+
+def test_encode_checksum():
+    ens_bin = create_ens_bin(12, num_bins=20, full=True)
+    ens = BinaryCodec.decode_data_sets(ens_bin)
+
+    result = ens.encode()
+    assert isinstance(result, bytearray)
+    assert len(ens_bin) == len(result)
+    assert BinaryCodec.verify_ens_data(result)
+
+    # Decode and encode again gives the same binary data
+    assert result == BinaryCodec.decode_data_sets(result).encode()
+
+    # The checksum is updated with the data
+    ens.AncillaryData.Heading = 123.0
+    result = ens.encode()
+    assert BinaryCodec.verify_ens_data(result)
+    assert 123.0 == BinaryCodec.decode_data_sets(result).AncillaryData.Heading
+
+
+def test_array_2d_to_bytes():
+    values = [[1.0, 2.0, 3.0, 4.0],
+              [5.0, 6.0, 7.0, 8.0],
+              [9.0, 10.0, 11.0, 12.0]]
+
+    # Beam by beam
+    expected = struct.pack("12f", 1.0, 5.0, 9.0, 2.0, 6.0, 10.0, 3.0, 7.0, 11.0, 4.0, 8.0, 12.0)
+    assert expected == Ensemble.array_2d_to_bytes(values, 3, 4)
+    assert expected == Ensemble.array_2d_to_bytes(np.array(values), 3, 4)
+
+    # Only the bins and beams given
+    assert struct.pack("4f", 1.0, 5.0, 2.0, 6.0) == Ensemble.array_2d_to_bytes(values, 2, 2)
+    assert struct.pack("4f", 1.0, 5.0, 2.0, 6.0) == Ensemble.array_2d_to_bytes(np.array(values), 2, 2)
+
+    # Int values
+    assert struct.pack("4i", 1, 3, 2, 4) == Ensemble.array_2d_to_bytes([[1, 2], [3, 4]], 2, 2, dtype='<i4')
+
+    # Initialized values are a list for each bin and beam
+    amp = Amplitude(2, 4)
+    assert struct.pack("8f", *([Ensemble.BadVelocity] * 8)) == Ensemble.array_2d_to_bytes(amp.Amplitude, 2, 4)
+
+    assert b'' == Ensemble.array_2d_to_bytes([], 0, 4)
+
+    # Not enough beams
+    with pytest.raises(IndexError):
+        Ensemble.array_2d_to_bytes([[1.0, 2.0], [3.0]], 2, 2)
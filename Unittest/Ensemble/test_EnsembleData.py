@@ -349,3 +349,19 @@ def test_encode_decode():
     assert ens.Minute == ens1.Minute
     assert ens.Second == ens1.Second
     assert ens.HSec == ens1.HSec
+
+
+def test_valid_datetime():
+    ens = EnsembleData()
+    ens.Year = 2019
+    ens.Month = 3
+    ens.Day = 12
+    ens.Hour = 14
+    ens.Minute = 5
+    ens.Second = 6
+    ens.HSec = 7
+    assert datetime.datetime(2019, 3, 12, 14, 5, 6, 70000) == ens.valid_datetime()
+
+    # Bad date
+    ens.Month = 13
+    assert ens.valid_datetime() is None
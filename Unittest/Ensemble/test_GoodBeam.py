@@ -177,3 +177,29 @@ def test_encode_decode():
         for bin_num in range(gb1.num_elements):
             assert gb1.GoodBeam[bin_num][beam] == pytest.approx(gb1.GoodBeam[bin_num][beam], 0.1)
 
+
+def test_encode_decode_np():
+
+    num_bins = 30
+    num_beams = 4
+
+    gb = GoodBeam(num_bins, num_beams)
+
+    # Populate data
+    val = 1
+    for beam in range(gb.element_multiplier):
+        for bin_num in range(gb.num_elements):
+            gb.GoodBeam[bin_num][beam] = val
+            val += 1
+
+    result = gb.encode()
+
+    # Decode with both the per value and numpy path
+    gb1 = GoodBeam(num_bins, num_beams)
+    gb1.decode(bytearray(result))
+    gb2 = GoodBeam(num_bins, num_beams)
+    gb2.decode(bytearray(result), use_np=True)
+
+    for beam in range(gb2.element_multiplier):
+        for bin_num in range(gb2.num_elements):
+            assert gb1.GoodBeam[bin_num][beam] == gb2.GoodBeam[bin_num][beam]
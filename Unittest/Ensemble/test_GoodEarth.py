@@ -175,4 +175,31 @@ def test_encode_decode():
 
     for beam in range(gb1.element_multiplier):
         for bin_num in range(gb1.num_elements):
-            assert gb1.GoodEarth[bin_num][beam] == pytest.approx(gb1.GoodEarth[bin_num][beam], 0.1)
\ No newline at end of file
+            assert gb1.GoodEarth[bin_num][beam] == pytest.approx(gb1.GoodEarth[bin_num][beam], 0.1)
+
+
+def test_encode_decode_np():
+
+    num_bins = 30
+    num_beams = 4
+
+    ge = GoodEarth(num_bins, num_beams)
+
+    # Populate data
+    val = 1
+    for beam in range(ge.element_multiplier):
+        for bin_num in range(ge.num_elements):
+            ge.GoodEarth[bin_num][beam] = val
+            val += 1
+
+    result = ge.encode()
+
+    # Decode with both the per value and numpy path
+    ge1 = GoodEarth(num_bins, num_beams)
+    ge1.decode(bytearray(result))
+    ge2 = GoodEarth(num_bins, num_beams)
+    ge2.decode(bytearray(result), use_np=True)
+
+    for beam in range(ge2.element_multiplier):
+        for bin_num in range(ge2.num_elements):
+            assert ge1.GoodEarth[bin_num][beam] == ge2.GoodEarth[bin_num][beam]
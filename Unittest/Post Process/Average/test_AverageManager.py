@@ -0,0 +1,133 @@
+import pytest
+import datetime
+from rti_python.Ensemble.Ensemble import Ensemble
+from rti_python.Ensemble.EnsembleData import EnsembleData
+from rti_python.Ensemble.EarthVelocity import EarthVelocity
+from rti_python.Post_Process.Average.AverageWaterColumn import AverageWaterColumn
+from rti_python.Post_Process.Average.AverageManager import AverageManager
+
+
+def create_ens(ens_num, ss_code, ss_config, vel, minute=0, second=0):
+    ens = Ensemble()
+    ensDS = EnsembleData()
+    ensDS.SysFirmwareSubsystemCode = ss_code
+    ensDS.SubsystemConfig = ss_config
+    ensDS.NumBeams = 4
+    ensDS.NumBins = 3
+    ensDS.EnsembleNumber = ens_num
+    ensDS.Year = 2019
+    ensDS.Month = 3
+    ensDS.Day = 12
+    ensDS.Hour = 14
+    ensDS.Minute = minute
+    ensDS.Second = second
+    ens.AddEnsembleData(ensDS)
+
+    earthVel = EarthVelocity(ensDS.NumBins, ensDS.NumBeams)
+    for bin_num in range(ensDS.NumBins):
+        for beam in range(ensDS.NumBeams):
+            earthVel.Velocities[bin_num][beam] = vel
+    ens.AddEarthVelocity(earthVel)
+
+    return ens
+
+
+def test_count_window():
+    results = []
+
+    def avg_handler(sender, avg):
+        results.append(avg)
+
+    manager = AverageManager(num_ens=2)
+    manager.avg_event += avg_handler
+
+    # Two configurations interleaved
+    for ens_num in range(1, 6):
+        manager.add_ens(create_ens(ens_num, '3', 1, float(ens_num)))
+        manager.add_ens(create_ens(ens_num, '4', 2, 10.0 * ens_num))
+
+    assert 4 == len(results)
+    assert [('3', 1), ('4', 2)] == manager.get_configs()
+    assert ['3', '4', '3', '4'] == [avg[AverageWaterColumn.INDEX_SS_CODE] for avg in results]
+    assert 1.5 == results[0][AverageWaterColumn.INDEX_EARTH][0][0]
+    assert 15.0 == results[1][AverageWaterColumn.INDEX_EARTH][0][0]
+    assert 3.5 == results[2][AverageWaterColumn.INDEX_EARTH][0][0]
+    assert 3 == results[2][AverageWaterColumn.INDEX_FIRST_ENS_NUM]
+    assert 4 == results[2][AverageWaterColumn.INDEX_LAST_ENS_NUM]
+
+    # Last ensemble of each configuration
+    last = manager.flush()
+    assert 2 == len(last)
+    assert 6 == len(results)
+    assert 5.0 == last[0][AverageWaterColumn.INDEX_EARTH][0][0]
+    assert 50.0 == last[1][AverageWaterColumn.INDEX_EARTH][0][0]
+    assert [] == manager.flush()
+
+
+def test_running_avg():
+    manager = AverageManager(num_ens=3, is_running_avg=True)
+
+    for ens_num in range(1, 6):
+        results = manager.add_ens(create_ens(ens_num, '3', 1, float(ens_num)))
+        assert 1 == len(results)
+
+    # Average of 3, 4 and 5
+    assert 4.0 == results[0][AverageWaterColumn.INDEX_EARTH][2][3]
+    assert 4.0 == manager.get_average('3', 1)[AverageWaterColumn.INDEX_EARTH][2][3]
+    assert manager.get_average('3', 2) is None
+
+
+def test_time_window():
+    results = []
+
+    def avg_handler(sender, avg):
+        results.append(avg)
+
+    manager = AverageManager(time_window=datetime.timedelta(minutes=10))
+    manager.avg_event += avg_handler
+
+    # 14:00 to 14:29 every minute for 2 configurations
+    for minute in range(30):
+        manager.add_ens(create_ens(minute + 1, '3', 1, float(minute), minute=minute))
+        manager.add_ens(create_ens(minute + 1, '4', 1, 1.0, minute=minute, second=30))
+    manager.flush()
+
+    assert 6 == len(results)
+    config3 = [avg for avg in results if avg[AverageWaterColumn.INDEX_SS_CODE] == '3']
+    assert [4.5, 14.5, 24.5] == [avg[AverageWaterColumn.INDEX_EARTH][0][0] for avg in config3]
+    assert datetime.datetime(2019, 3, 12, 14, 10) == config3[1][AverageWaterColumn.INDEX_FIRST_TIME]
+    assert datetime.datetime(2019, 3, 12, 14, 19) == config3[1][AverageWaterColumn.INDEX_LAST_TIME]
+
+
+def test_time_window_bad_date():
+    results = []
+
+    def avg_handler(sender, avg):
+        results.append(avg)
+
+    manager = AverageManager(time_window=datetime.timedelta(minutes=10))
+    manager.avg_event += avg_handler
+
+    # A bad date in the middle of the window does not close the window
+    for minute in range(10):
+        ens = create_ens(minute + 1, '3', 1, float(minute), minute=minute)
+        if minute == 5:
+            ens.EnsembleData.Month = 0
+        manager.add_ens(ens)
+    manager.flush()
+
+    assert 1 == manager.bad_date_count
+    assert 1 == len(results)
+    assert 10 == results[0][AverageWaterColumn.INDEX_LAST_ENS_NUM]
+    assert datetime.datetime(2019, 3, 12, 14, 0) == results[0][AverageWaterColumn.INDEX_FIRST_TIME]
+
+
+def test_window_start():
+    manager = AverageManager(time_window=600)
+    assert datetime.datetime(2019, 3, 12, 14, 10) == manager.get_window_start(datetime.datetime(2019, 3, 12, 14, 19, 59))
+    assert datetime.datetime(2019, 3, 12, 14, 20) == manager.get_window_start(datetime.datetime(2019, 3, 12, 14, 20))
+
+
+def test_no_window():
+    with pytest.raises(ValueError):
+        AverageManager()
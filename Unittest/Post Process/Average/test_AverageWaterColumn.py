@@ -1615,3 +1615,37 @@ def test_AWC_last_time():
     assert result[AverageWaterColumn.INDEX_FIRST_TIME].hour == pytest.approx(15, 0.1)
     assert result[AverageWaterColumn.INDEX_FIRST_TIME].minute == pytest.approx(33, 0.1)
     assert result[AverageWaterColumn.INDEX_FIRST_TIME].second == pytest.approx(45, 0.1)
+
+
+def test_AWC_running_avg():
+
+    awc = AverageWaterColumn(3, '3', '1')
+
+    for ens_num in range(1, 6):
+        ens = Ensemble()
+        ensDS = EnsembleData()
+        ensDS.SysFirmwareSubsystemCode = '3'
+        ensDS.SubsystemConfig = '1'
+        ensDS.NumBeams = 4
+        ensDS.NumBins = 3
+        ensDS.EnsembleNumber = ens_num
+        ens.AddEnsembleData(ensDS)
+
+        earthVel = EarthVelocity(ensDS.NumBins, ensDS.NumBeams)
+        for bin_num in range(ensDS.NumBins):
+            for beam in range(ensDS.NumBeams):
+                earthVel.Velocities[bin_num][beam] = float(ens_num)
+        earthVel.Velocities[0][3] = Ensemble.BadVelocity
+        ens.AddEarthVelocity(earthVel)
+
+        awc.add_ens(ens)
+        result = awc.average(is_running_avg=True)
+
+        # Average of the last 3 ensembles
+        expected = sum(range(max(1, ens_num - 2), ens_num + 1)) / min(ens_num, 3)
+        assert result[AverageWaterColumn.INDEX_EARTH][2][0] == pytest.approx(expected)
+        assert result[AverageWaterColumn.INDEX_EARTH][0][3] == 0
+        assert result[AverageWaterColumn.INDEX_LAST_ENS_NUM] == ens_num
+
+    # The running average keeps the data
+    assert 3 == len(awc.earth_avg)
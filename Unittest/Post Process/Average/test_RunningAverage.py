@@ -0,0 +1,65 @@
+import pytest
+import numpy as np
+from rti_python.Ensemble.Ensemble import Ensemble
+from rti_python.Post_Process.Average.RunningAverage import RunningAverage
+
+
+def test_window():
+    avg = RunningAverage(3)
+    for x in range(1, 6):
+        avg.add([[float(x), 10.0 * x], [Ensemble.BadVelocity, 1.0]])
+
+    # Only the last 3 samples are averaged
+    assert 3 == len(avg)
+    assert [[4.0, 40.0], [0.0, 1.0]] == avg.average()
+
+
+def test_bad_velocity():
+    avg = RunningAverage(2)
+    avg.add([1.0, Ensemble.BadVelocity, None])
+    avg.add([3.0, 2.0, None])
+    assert [2.0, 2.0, 0.0] == avg.average()
+
+    avg.add([5.0, Ensemble.BadVelocity, 4.0])
+    assert [4.0, 2.0, 4.0] == avg.average()
+
+    # The good value leaves the window
+    avg.add([7.0, Ensemble.BadVelocity, 6.0])
+    assert [6.0, 0.0, 5.0] == avg.average()
+
+
+def test_shape_change():
+    avg = RunningAverage(2)
+    avg.add([1.0, 2.0])
+    avg.add([1.0, 2.0, 3.0])
+    assert not avg.is_consistent()
+    assert avg.average() is None
+
+    # The old shape left the window
+    avg.add([3.0, 4.0, 5.0])
+    assert avg.is_consistent()
+    assert [2.0, 3.0, 4.0] == avg.average()
+
+
+def test_compare_full_average():
+    rng = np.random.default_rng(1)
+    data = rng.uniform(-2.0, 2.0, (200, 30, 4))
+    data[rng.uniform(size=data.shape) < 0.1] = Ensemble.BadVelocity
+
+    avg = RunningAverage(20)
+    for index in range(len(data)):
+        avg.add(data[index].tolist())
+
+        window = data[max(0, index - 19):index + 1]
+        good = window != Ensemble.BadVelocity
+        count = good.sum(axis=0)
+        expected = np.where(count > 0, np.where(good, window, 0.0).sum(axis=0) / np.maximum(count, 1), 0.0)
+        assert expected.ravel().tolist() == pytest.approx(np.array(avg.average()).ravel().tolist(), abs=1e-9)
+
+
+def test_clear():
+    avg = RunningAverage(2)
+    avg.add([1.0])
+    avg.clear()
+    assert 0 == len(avg)
+    assert avg.average() is None
@@ -0,0 +1,140 @@
+import os
+import json
+import pytest
+from rti_python.Codecs.BinaryCodec import BinaryCodec
+from rti_python.Utilities.check_binary_file import RtiCheckFile
+from rti_python.Utilities import check_binary_dir
+from rti_python.Utilities.check_binary_dir import RtiCheckDir
+from rti_python.Unittest.helpers import create_ens_bin
+
+
+def create_ens(ens_num, voltage=24.0, status=0, correlation=0.5):
+    """
+    Create a binary ensemble with all the datasets.
+    The amplitude of beam 0 to 3 is 0 to 3 dB, so every beam is bad.
+    """
+    ens = BinaryCodec.decode_data_sets(create_ens_bin(ens_num, second=ens_num % 60, full=True))
+    ens.SystemSetup.Voltage = voltage
+    ens.EnsembleData.Status = status
+    for bin_num in range(ens.Correlation.num_elements):
+        ens.Correlation.Correlation[bin_num][1] = correlation
+    return bytes(ens.encode())
+
+
+def create_file(file_path):
+    """
+    Create a file with ensembles 1 to 10.
+    Ensemble 4 is missing, 6 has a bad checksum, 7 has a bad voltage, 8 has
+    a bad status and 9 has a bad correlation on beam 1.  The file ends with
+    a partial ensemble.
+    """
+    with open(file_path, "wb") as f:
+        for ens_num in [1, 2, 3, 5, 6, 7, 8, 9, 10]:
+            if ens_num == 6:
+                ens_bin = bytearray(create_ens(ens_num))
+                ens_bin[100] ^= 0xFF
+                f.write(ens_bin)
+            elif ens_num == 7:
+                f.write(create_ens(ens_num, voltage=40.0))
+            elif ens_num == 8:
+                f.write(create_ens(ens_num, status=0x4))
+            elif ens_num == 9:
+                f.write(create_ens(ens_num, correlation=1.0))
+            else:
+                f.write(create_ens(ens_num))
+
+        f.write(create_ens(11)[:200])
+
+
+def test_check_file(tmpdir):
+    file_path = str(tmpdir.join("check.ens"))
+    create_file(file_path)
+
+    report = check_binary_dir.check_file(file_path)
+    assert report["error"] is None
+    assert os.path.getsize(file_path) == report["file_size"]
+    assert 8 == report["ens_count"]
+    assert 1 == report["first_ens_num"]
+    assert "2019-03-09T12:00:01" == report["first_ens_time"]
+    assert 10 == report["last_ens_num"]
+
+    assert 2 == report["missing_ens_count"]
+    assert 1 == report["crc_fail_count"]
+    assert 1 == report["bad_voltage_count"]
+    assert 1 == report["bad_status_count"]
+    assert 8 == report["bad_amp_0db_count"]
+    assert 1 == report["bad_corr_100pct_count"]
+    assert 200 == report["truncated_bytes"]
+
+    issues = [(issue["type"], issue["ens_num"]) for issue in report["issues"]]
+    assert (check_binary_dir.MISSING_ENS, 4) in issues
+    assert (check_binary_dir.MISSING_ENS, 6) in issues
+    assert (check_binary_dir.CRC_FAIL, 6) in issues
+    assert (check_binary_dir.BAD_VOLTAGE, 7) in issues
+    assert (check_binary_dir.BAD_STATUS, 8) in issues
+    assert (check_binary_dir.BAD_CORR_100PCT, 9) in issues
+    assert (check_binary_dir.TRUNCATED, 11) in issues
+    assert len(issues) == report["found_issues"]
+
+    # Only list some of the issues
+    report = check_binary_dir.check_file(file_path, max_issues=3)
+    assert 3 == len(report["issues"])
+    assert 15 == report["found_issues"]
+
+
+def test_same_as_check_file(tmpdir):
+    file_path = str(tmpdir.join("same.ens"))
+    create_file(file_path)
+
+    checker = RtiCheckFile()
+    checker.process([file_path])
+    report = check_binary_dir.check_file(file_path)
+
+    assert checker.ens_count == report["ens_count"]
+    assert checker.missing_ens_count == report["missing_ens_count"]
+    assert checker.bad_status_count == report["bad_status_count"]
+    assert checker.bad_voltage_count == report["bad_voltage_count"]
+    assert checker.bad_amp_0db_count == report["bad_amp_0db_count"]
+    assert checker.bad_corr_100pct_count == report["bad_corr_100pct_count"]
+
+
+def test_process_dir(tmpdir):
+    create_file(str(tmpdir.join("a.ens")))
+    tmpdir.mkdir("sub")
+    with open(str(tmpdir.join("sub", "b.ens")), "wb") as f:
+        for ens_num in range(1, 6):
+            f.write(create_ens(ens_num))
+    open(str(tmpdir.join("sub", "empty.ens")), "wb").close()
+    open(str(tmpdir.join("notes.txt")), "w").close()
+
+    checker = RtiCheckDir(num_workers=2)
+    report = checker.process([str(tmpdir)], show_progress=False)
+
+    assert [str(tmpdir.join("a.ens")), str(tmpdir.join("sub", "b.ens")), str(tmpdir.join("sub", "empty.ens"))] == [f["file_path"] for f in report["files"]]
+    assert 3 == report["summary"]["file_count"]
+    assert 2 == report["summary"]["bad_file_count"]
+    assert 13 == report["summary"]["ens_count"]
+    assert 0 == report["files"][2]["ens_count"]
+
+    # Not recursive
+    assert 1 == len(RtiCheckDir(recursive=False).find_files(str(tmpdir)))
+
+    # JSON report
+    json_path = str(tmpdir.join("report.json"))
+    RtiCheckDir.write_json(report, json_path)
+    with open(json_path) as f:
+        assert report["summary"] == json.load(f)["summary"]
+
+
+def test_write_parquet(tmpdir):
+    pq = pytest.importorskip("pyarrow.parquet")
+    create_file(str(tmpdir.join("a.ens")))
+
+    report = RtiCheckDir(num_workers=1).process([str(tmpdir)], show_progress=False)
+    parquet_path = str(tmpdir.join("report.parquet"))
+    RtiCheckDir.write_parquet(report, parquet_path)
+
+    table = pq.read_table(parquet_path)
+    assert 1 == table.num_rows
+    assert 8 == table.column("ens_count")[0].as_py()
+    assert report["files"][0]["issues"] == table.column("issues")[0].as_py()
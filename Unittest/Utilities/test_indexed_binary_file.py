@@ -0,0 +1,96 @@
+import pytest
+import os
+import datetime
+import numpy as np
+from rti_python.Utilities.indexed_binary_file import IndexedBinaryFile
+from rti_python.Unittest.helpers import create_ens_bin
+
+
+def create_file(file_path, num_ens=20):
+    """
+    Create a RTB file with the ensembles numbered 1 to num_ens.
+    Every ensemble is one second apart.
+    Garbage data is put between some of the ensembles.
+    """
+    with open(file_path, "wb") as f:
+        for ens_num in range(1, num_ens + 1):
+            f.write(create_ens_bin(ens_num, second=ens_num % 60, minute=ens_num // 60))
+            if ens_num % 5 == 0:
+                f.write(b'\x80' * 20 + b'garbage')
+
+
+def test_index(tmpdir):
+    file_path = str(tmpdir.join("index.ens"))
+    create_file(file_path)
+
+    with IndexedBinaryFile(file_path) as ens_file:
+        assert 20 == len(ens_file)
+        assert list(range(1, 21)) == ens_file.index['ens_num'].tolist()
+        assert b'A' == ens_file.index['ss_code'][0]
+        assert 1 == ens_file.index['ss_config'][0]
+        assert datetime.datetime(2019, 3, 9, 12, 0, 5) == ens_file.index['date_time'][5 - 1].item()
+
+        # Random access
+        ens = ens_file[10]
+        assert 11 == ens.EnsembleData.EnsembleNumber
+        assert 11.0 == pytest.approx(ens.BeamVelocity.Velocities[0][0])
+        assert 20 == ens_file[-1].EnsembleData.EnsembleNumber
+
+    # Index file saved
+    assert os.path.exists(file_path + IndexedBinaryFile.INDEX_EXT)
+
+
+def test_load_index(tmpdir):
+    file_path = str(tmpdir.join("load.ens"))
+    create_file(file_path)
+
+    with IndexedBinaryFile(file_path) as ens_file:
+        index = ens_file.index
+
+    # Do not scan the file again, use the index file
+    with IndexedBinaryFile(file_path, verify=False) as ens_file:
+        assert np.array_equal(index, ens_file.index)
+        assert 7 == ens_file[6].EnsembleData.EnsembleNumber
+
+    # File changed, index file is old
+    create_file(file_path, num_ens=5)
+    os.utime(file_path + IndexedBinaryFile.INDEX_EXT, (0, 0))
+    with IndexedBinaryFile(file_path) as ens_file:
+        assert 5 == len(ens_file)
+
+
+def test_ens_num_lookup(tmpdir):
+    file_path = str(tmpdir.join("ens_num.ens"))
+    create_file(file_path)
+
+    with IndexedBinaryFile(file_path, use_index_file=False) as ens_file:
+        assert 14 == ens_file.index_of_ens_num(15)
+        assert -1 == ens_file.index_of_ens_num(100)
+        assert -1 == ens_file.index_of_ens_num(15, ss_code="B")
+        assert 14 == ens_file.index_of_ens_num(15, ss_code="A", ss_config=1)
+        assert 15 == ens_file.get_ens_num(15).EnsembleData.EnsembleNumber
+        assert ens_file.get_ens_num(100) is None
+
+    assert not os.path.exists(file_path + IndexedBinaryFile.INDEX_EXT)
+
+
+def test_time_range(tmpdir):
+    file_path = str(tmpdir.join("time.ens"))
+    create_file(file_path)
+
+    with IndexedBinaryFile(file_path) as ens_file:
+        start_dt = datetime.datetime(2019, 3, 9, 12, 0, 3)
+        end_dt = datetime.datetime(2019, 3, 9, 12, 0, 8)
+        ens_nums = [ens.EnsembleData.EnsembleNumber for ens in ens_file.time_range(start_dt, end_dt)]
+        assert [3, 4, 5, 6, 7] == ens_nums
+
+        assert 0 == len(ens_file.indices_in_time_range(start_dt, end_dt, ss_config=2))
+        assert 20 == len(ens_file.indices_for_subsystem("A", 1))
+
+
+def test_empty_file(tmpdir):
+    file_path = str(tmpdir.join("empty.ens"))
+    open(file_path, "wb").close()
+
+    with IndexedBinaryFile(file_path) as ens_file:
+        assert 0 == len(ens_file)
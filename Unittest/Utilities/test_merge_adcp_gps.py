@@ -0,0 +1,123 @@
+import pytest
+import os
+import datetime
+import numpy as np
+from rti_python.Utilities.merge_adcp_gps import MergeAdcpGps
+from rti_python.Codecs.BinaryCodec import BinaryCodec
+from rti_python.Codecs.BinaryCodec import EnsembleFramer
+from rti_python.Ensemble.NmeaData import NmeaData
+from rti_python.Unittest.helpers import create_ens_bin
+
+
+def nmea_sentence(body):
+    """
+    Add the start and checksum to the NMEA sentence.
+    :param body: NMEA sentence without the $ and checksum.
+    :return: NMEA sentence.
+    """
+    checksum = 0
+    for c in body:
+        checksum ^= ord(c)
+    return "$" + body + "*" + format(checksum, "02X")
+
+
+def gps_block(minute, second, lat_min):
+    """
+    Create a GPS block with a GGA and RMC message on 2019/03/09.
+    :param minute: Minute of the GPS time.
+    :param second: Second of the GPS time.
+    :param lat_min: Latitude minutes.  Used to identify the block.
+    :return: Lines of the GPS block.
+    """
+    gps_time = "12{:02d}{:02d}.00".format(minute, second)
+    lat = "32{:07.4f}".format(lat_min)
+    gga = nmea_sentence("GPGGA," + gps_time + "," + lat + ",N,11715.0000,W,1,08,0.9,10.0,M,-34.0,M,,")
+    rmc = nmea_sentence("GPRMC," + gps_time + ",A," + lat + ",N,11715.0000,W,0.5,54.7,090319,,,A")
+    return gga + "\n" + rmc + "\n"
+
+
+def test_match_gps():
+    merge = MergeAdcpGps("missing_gps", "missing_adcp")
+    times = [datetime.datetime(2019, 3, 9, 12, 0, s) for s in [10, 0, 20, 20]]
+    merge.add_gps_data(times, ["b10", "b0", "b20", "b20_last"])
+
+    assert ["b0", "b10", "b20", "b20_last"] == merge.gps_nmea
+
+    ens_times = np.array(["2019-03-09T12:00:00", "2019-03-09T12:00:09", "2019-03-09T12:00:05", "2019-03-09T12:00:21", "2019-03-09T11:59:00"], dtype='datetime64[us]')
+    index = merge.match_gps(ens_times)
+
+    # Last GPS block within the tolerance of 1 second
+    assert [0, 1, -1, 3, -1] == index.tolist()
+
+    # Tolerance for a single search
+    assert [0, 1, 1, 3, -1] == merge.match_gps(ens_times, datetime.timedelta(seconds=5)).tolist()
+    assert np.timedelta64(1, 's') == merge.tolerance
+
+    merge.tolerance = np.timedelta64(5, 's')
+    assert [0, 1, 1, 3, -1] == merge.match_gps(ens_times).tolist()
+
+
+def test_process_ens_bin():
+    merge = MergeAdcpGps("missing_gps", "missing_adcp")
+    nmea_dataset = NmeaData()
+    for line in gps_block(0, 10, 10).splitlines():
+        nmea_dataset.add_nmea(line)
+    merge.add_gps_data([datetime.datetime(2019, 3, 9, 12, 0, 10)], [nmea_dataset])
+
+    # The given time range is only used for this ensemble
+    merge.process_ens_bin(create_ens_bin(5, second=5), datetime.timedelta(seconds=5), None)
+    assert np.timedelta64(1, 's') == merge.tolerance
+
+    merge.process_ens_bin(create_ens_bin(6, second=6), None, None)
+
+    framer = EnsembleFramer()
+    framer.add(merge.batch_write)
+    ens_list = [BinaryCodec.decode_data_sets(ens_bin) for ens_bin in framer.frames()]
+    assert [5, 6] == [ens.EnsembleData.EnsembleNumber for ens in ens_list]
+    assert ens_list[0].IsNmeaData
+    assert not ens_list[1].IsNmeaData
+
+
+def test_merge(tmpdir):
+    gps_dir = tmpdir.mkdir("gps")
+    adcp_dir = tmpdir.mkdir("adcp")
+
+    # GPS every 2 seconds in 2 files, the second file is earlier in time
+    with open(str(gps_dir.join("b.txt")), "w") as f:
+        for second in range(10, 20, 2):
+            f.write(gps_block(0, second, second))
+    with open(str(gps_dir.join("c.txt")), "w") as f:
+        for second in range(0, 10, 2):
+            f.write(gps_block(0, second, second))
+
+    # Ensemble every second, and garbage between ensembles
+    with open(str(adcp_dir.join("adcp.ens")), "wb") as f:
+        for ens_num in range(25):
+            f.write(create_ens_bin(ens_num, second=ens_num))
+            f.write(b'\x80' * 10 + b'garbage')
+
+    merge = MergeAdcpGps(str(gps_dir), str(adcp_dir))
+    assert 10 == len(merge.gps_times)
+    assert np.all(np.diff(merge.gps_times) > np.timedelta64(0))
+    assert datetime.datetime(2019, 3, 9, 12, 0, 0) == merge.gps_times[0].item()
+
+    out_file = str(adcp_dir.join("adcp_gps.ens"))
+    assert os.path.exists(out_file)
+
+    framer = EnsembleFramer()
+    with open(out_file, "rb") as f:
+        framer.add(f.read())
+    ens_list = [BinaryCodec.decode_data_sets(ens_bin) for ens_bin in framer.frames()]
+
+    assert 25 == len(ens_list)
+    for ens in ens_list:
+        ens_num = ens.EnsembleData.EnsembleNumber
+        if ens_num <= 19:
+            # Last GPS block within 1 second
+            assert ens.IsNmeaData
+            expected_second = min(ens_num + 1 - (ens_num + 1) % 2, 18)
+            assert 32 + expected_second / 60.0 == pytest.approx(ens.NmeaData.latitude)
+            assert 2 == len(ens.NmeaData.nmea_sentences)
+        else:
+            # No GPS data
+            assert not ens.IsNmeaData
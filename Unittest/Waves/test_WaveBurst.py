@@ -0,0 +1,125 @@
+import pytest
+import os
+import struct
+import numpy as np
+import rti_python.Codecs.WaveForceCodec as wfc
+from rti_python.Waves.WaveBurst import WaveBurst
+from rti_python.Waves.WaveEnsemble import WaveEnsemble
+from rti_python.Ensemble.Ensemble import Ensemble
+from rti_python.Ensemble.Correlation import Correlation
+from rti_python.Unittest.helpers import create_ens
+
+
+def pack(values):
+    """
+    Pack the values one at a time like the original byte arrays.
+    :param values: Values to pack.
+    :return: Bytes of the values.
+    """
+    ba = bytearray()
+    for value in values:
+        ba.extend(struct.pack('f', value))
+    return bytes(ba)
+
+
+def test_add_4beam():
+    selected_bins = [3, 4, 5]
+    waves = [WaveEnsemble(create_ens(ens_num), selected_bins) for ens_num in range(5)]
+
+    burst = WaveBurst(len(waves), selected_bins)
+    for ens_wave in waves:
+        burst.add(ens_wave)
+
+    assert 5 == len(burst)
+    assert 5 == burst.num_4beam_ens
+    assert 0 == burst.num_vert_ens
+    assert 5 == burst.wus_cnt
+
+    assert pack([ens_wave.pressure for ens_wave in waves]) == burst.get_bytes(WaveBurst.WPS)
+    assert pack([ens_wave.heading for ens_wave in waves]) == burst.get_bytes(WaveBurst.WHG)
+    assert pack([ens_wave.range_tracking[3] for ens_wave in waves]) == burst.get_bytes(WaveBurst.WR3)
+    assert pack([vel for ens_wave in waves for vel in ens_wave.east_vel]) == burst.get_bytes(WaveBurst.WUS)
+    assert pack([bin_vel[2] for ens_wave in waves for bin_vel in ens_wave.beam_vel]) == burst.get_bytes(WaveBurst.WB2)
+
+    # Correlation screening is kept
+    assert Ensemble.BadVelocity == pytest.approx(burst.get_array(WaveBurst.WB2)[0])
+
+    # Height source 4 is from the vertical beam ensembles
+    assert b'' == burst.get_bytes(WaveBurst.WHS)
+    assert b'' == burst.get_bytes(WaveBurst.WZ0)
+
+
+def test_add_vertical():
+    selected_bins = [3, 4, 5]
+    ens_list = [create_ens(ens_num, num_beams=4 if ens_num % 2 == 0 else 1) for ens_num in range(6)]
+    waves = [WaveEnsemble(ens, selected_bins) for ens in ens_list]
+
+    burst = WaveBurst(len(waves), selected_bins, height_source=4)
+    for ens_wave in waves:
+        burst.add(ens_wave)
+
+    vert_waves = [ens_wave for ens_wave in waves if ens_wave.is_vertical_ens]
+    assert 3 == burst.num_4beam_ens
+    assert 3 == burst.num_vert_ens
+
+    assert pack([ens_wave.pressure for ens_wave in vert_waves]) == burst.get_bytes(WaveBurst.WZP)
+    assert pack([ens_wave.range_tracking[0] for ens_wave in vert_waves]) == burst.get_bytes(WaveBurst.WZR)
+    assert pack([ens_wave.height for ens_wave in vert_waves]) == burst.get_bytes(WaveBurst.WHS)
+    assert pack([vel for ens_wave in vert_waves for vel in ens_wave.vert_beam_vel]) == burst.get_bytes(WaveBurst.WZ0)
+    assert (3, 3) == burst.get_array(WaveBurst.WB0).reshape(-1, 3).shape
+
+
+def test_add_missing_data():
+    # Selected bin past the number of bins, 3 beams and missing data
+    selected_bins = [3, 8, 12]
+    ens_list = [create_ens(0, num_beams=3),
+                create_ens(1, num_beams=3, earth=False),
+                create_ens(2, num_beams=3, num_bins=6, range_tracking=False)]
+    waves = [WaveEnsemble(ens, selected_bins, height_source=1) for ens in ens_list]
+
+    burst = WaveBurst(len(waves), selected_bins, height_source=1)
+    for ens_wave in waves:
+        burst.add(ens_wave)
+
+    assert 2 == burst.wus_cnt
+    assert pack(waves[0].east_vel + waves[2].east_vel) == burst.get_bytes(WaveBurst.WUS)
+    assert 2 + 2 + 1 == len(burst.get_array(WaveBurst.WB0))
+    assert b'' == burst.get_bytes(WaveBurst.WB3)
+    assert b'' == burst.get_bytes(WaveBurst.WR3)
+    assert pack([ens_wave.range_tracking[2] for ens_wave in waves]) == burst.get_bytes(WaveBurst.WR2)
+    assert pack([ens_wave.height for ens_wave in waves]) == burst.get_bytes(WaveBurst.WHS)
+    assert np.float32 == burst.get_array(WaveBurst.WHS).dtype
+
+
+def test_codec_process(tmpdir):
+    selected_bins = [3, 4, 5]
+    ens_list = [create_ens(ens_num, num_beams=4 if ens_num % 2 == 0 else 1) for ens_num in range(20)]
+
+    files = []
+
+    def waves_rcv(sender, file_name):
+        files.append(file_name)
+
+    # The burst is built by the codec as the ensembles are added
+    codec = wfc.WaveForceCodec(10, str(tmpdir.join("add")), 32.0, 118.0, selected_bins[0], selected_bins[1], selected_bins[2], 30, 4)
+    codec.process_data_event += waves_rcv
+    waves = [WaveEnsemble(ens, codec.selected_bin) for ens in ens_list]
+    burst = WaveBurst(len(waves), codec.selected_bin, codec.height_source)
+    for ens_wave in waves:
+        burst.add(ens_wave)
+    codec.process(waves, burst)
+
+    # The burst is built from the wave ensembles
+    codec2 = wfc.WaveForceCodec(10, str(tmpdir.join("process")), 32.0, 118.0, selected_bins[0], selected_bins[1], selected_bins[2], 30, 4)
+    codec2.process_data_event += waves_rcv
+    codec2.process(waves)
+
+    assert 2 == len(files)
+    with open(files[0], 'rb') as f1, open(files[1], 'rb') as f2:
+        data = f1.read()
+        assert data == f2.read()
+
+    # WZ0 variable has the vertical beam velocity
+    wz0 = pack([vel for ens_wave in waves if ens_wave.is_vertical_ens for vel in ens_wave.vert_beam_vel])
+    assert bytes(codec.process_wz0(wz0, 10, 3)) in data
+    assert os.path.basename(files[0]) == "D00000.mat"
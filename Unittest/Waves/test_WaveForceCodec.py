@@ -2,6 +2,7 @@ import pytest
 import os
 import scipy.io as sio
 import datetime
+import threading
 import rti_python.Codecs.WaveForceCodec as wfc
 import rti_python.Ensemble.AncillaryData as AncillaryData
 import rti_python.Ensemble.EnsembleData as EnsembleData
@@ -10,6 +11,7 @@ import rti_python.Ensemble.BeamVelocity as BeamVelocity
 import rti_python.Ensemble.EarthVelocity as EarthVelocity
 import rti_python.Ensemble.Correlation as CorrelationData
 import rti_python.Ensemble.Ensemble as Ensemble
+from rti_python.Unittest.helpers import create_ens
 
 
 def test_constructor():
@@ -3456,4 +3458,126 @@ def waves_rcv_ens_Corr(self, file_name):
     assert -4.67 == pytest.approx(mat_data['wz0'][2][1], 0.1)
     assert -5.45 == pytest.approx(mat_data['wz0'][0][2], 0.1)
     assert -5.67 == pytest.approx(mat_data['wz0'][1][2], 0.1)
-    assert -5.67 == pytest.approx(mat_data['wz0'][2][2], 0.1)
\ No newline at end of file
+    assert -5.67 == pytest.approx(mat_data['wz0'][2][2], 0.1)
+
+
+def test_burst_workers(tmpdir):
+    files = []
+
+    def burst_rcv(sender, file_name):
+        files.append(file_name)
+
+    codec = wfc.WaveForceCodec(3, str(tmpdir), 32.0, 118.0, 3, 4, 5, 30, 4, num_workers=2)
+    codec.process_data_event += burst_rcv
+
+    for ens_num in range(12):
+        codec.add(create_ens(ens_num))
+    codec.shutdown()
+
+    stats = codec.get_stats()
+    assert 4 == stats["burst_count"]
+    assert 0 == stats["dropped_count"]
+    assert 0 == stats["error_count"]
+    assert 0 == stats["queue_depth"]
+    assert 2 == stats["num_workers"]
+    assert stats["max_latency"] >= stats["avg_latency"] > 0.0
+    assert stats["last_latency"] >= stats["last_process_time"] > 0.0
+
+    # Each burst has its own file
+    assert 4 == len(set(files))
+    for record in range(4):
+        assert os.path.isfile(os.path.join(str(tmpdir), "D" + str(record).zfill(5) + ".mat"))
+
+        # The record number matches the file and the time is from the same burst
+        mat = sio.loadmat(os.path.join(str(tmpdir), "D" + str(record).zfill(5) + ".mat"))
+        assert "Record No. " + str(record) + "," in mat["txt"][0]
+        assert 1.0 == pytest.approx(mat["wdt"][0][0])
+
+    # The workers are started again for the next burst
+    for ens_num in range(3):
+        codec.add(create_ens(ens_num))
+    codec.shutdown()
+    assert 5 == codec.get_stats()["burst_count"]
+
+
+def test_burst_queue_full(tmpdir):
+    processing = threading.Event()
+    release = threading.Event()
+
+    def burst_rcv(sender, file_name):
+        processing.set()
+        release.wait(5)
+
+    codec = wfc.WaveForceCodec(3, str(tmpdir), 32.0, 118.0, 3, 4, 5, 30, 4, max_queue_size=1, block_when_full=False)
+    codec.process_data_event += burst_rcv
+
+    # First burst is held by the worker
+    for ens_num in range(3):
+        codec.add(create_ens(ens_num))
+    assert processing.wait(5)
+
+    # Second burst waits in the queue and the third burst is dropped
+    for ens_num in range(3, 9):
+        codec.add(create_ens(ens_num))
+
+    stats = codec.get_stats()
+    assert 1 == stats["queue_depth"]
+    assert 1 == stats["max_queue_depth"]
+    assert 0 == stats["blocked_count"]
+    assert 1 == stats["dropped_count"]
+
+    release.set()
+    codec.shutdown()
+    assert 2 == codec.get_stats()["burst_count"]
+
+
+def test_burst_queue_blocked(tmpdir):
+    processing = threading.Event()
+    release = threading.Event()
+
+    def burst_rcv(sender, file_name):
+        processing.set()
+        release.wait(5)
+
+    codec = wfc.WaveForceCodec(3, str(tmpdir), 32.0, 118.0, 3, 4, 5, 30, 4, max_queue_size=1, block_when_full=True, block_timeout=0.1)
+    codec.process_data_event += burst_rcv
+
+    # First burst is held by the worker
+    for ens_num in range(3):
+        codec.add(create_ens(ens_num))
+    assert processing.wait(5)
+
+    # Second burst waits in the queue and the third burst waits for room then times out
+    for ens_num in range(3, 9):
+        codec.add(create_ens(ens_num))
+
+    stats = codec.get_stats()
+    assert 1 == stats["blocked_count"]
+    assert 1 == stats["dropped_count"]
+
+    release.set()
+    codec.shutdown()
+    assert 2 == codec.get_stats()["burst_count"]
+
+
+def test_buffer_limit(tmpdir):
+    codec = wfc.WaveForceCodec(3, str(tmpdir), 32.0, 118.0, 3, 4, 5, 30, 4)
+
+    # A single vertical beam ensemble would keep the 4 beam bursts from being found
+    codec.add(create_ens(0, num_beams=1))
+    for ens_num in range(1, 7):
+        codec.add(create_ens(ens_num))
+
+    # The buffer is limited to a burst with vertical beam data
+    # The ensembles left in the buffer are processed after the drop
+    assert 1 == codec.get_stats()["dropped_ens_count"]
+    assert 0 == codec.VertEnsCount
+    assert 0 == codec.TotalEnsInBurst
+    assert 0 == len(codec.Buffer)
+
+    codec.add(create_ens(7))
+    assert 1 == codec.TotalEnsInBurst
+    assert 1 == len(codec.Buffer)
+
+    codec.shutdown()
+    assert 2 == codec.get_stats()["burst_count"]
@@ -0,0 +1,20 @@
+"""
+PostgreSQL connection shared by the database unit tests.
+"""
+import os
+import pytest
+from rti_python.Writer.rti_projects import RtiProjects
+
+# Set RTI_TEST_PG_HOST to run the database tests against a local PostgreSQL.
+# RTI_TEST_PG_PORT, RTI_TEST_PG_DB, RTI_TEST_PG_USER and RTI_TEST_PG_PW are optional.
+PG_HOST = os.environ.get("RTI_TEST_PG_HOST")
+requires_db = pytest.mark.skipif(PG_HOST is None, reason="RTI_TEST_PG_HOST not set")
+
+
+def create_projects(array_schema=False):
+    return RtiProjects(host=PG_HOST,
+                       port=os.environ.get("RTI_TEST_PG_PORT", 5432),
+                       dbname=os.environ.get("RTI_TEST_PG_DB", "postgres"),
+                       user=os.environ.get("RTI_TEST_PG_USER", "postgres"),
+                       pw=os.environ.get("RTI_TEST_PG_PW", ""),
+                       array_schema=array_schema)
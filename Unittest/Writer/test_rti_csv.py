@@ -0,0 +1,121 @@
+import csv
+import pytest
+from rti_python.Ensemble.Ensemble import Ensemble
+from rti_python.Ensemble.EnsembleData import EnsembleData
+from rti_python.Ensemble.AncillaryData import AncillaryData
+from rti_python.Writer.rti_csv import RtiCsvWriter
+from rti_python.Codecs.BinaryCodec import BinaryCodec
+from rti_python.Unittest.helpers import create_ens_bin
+
+
+def test_long_same_as_encode_csv(tmpdir):
+    file_path = str(tmpdir.join("long.csv"))
+    ens = BinaryCodec.decode_data_sets(create_ens_bin(1, num_bins=10, full=True))
+
+    writer = RtiCsvWriter(file_path)
+    assert writer.write(ens)
+    writer.close()
+
+    with open(file_path) as f:
+        lines = f.read().splitlines()
+
+    # Same lines, but the datasets are in a different order
+    # Earth Velocity lines are in a list
+    ens_lines = [line[0] if isinstance(line, list) else line for line in ens.encode_csv()]
+    assert RtiCsvWriter.LONG_HEADER == lines[0]
+    assert sorted(ens_lines) == sorted(lines[1:])
+    assert len(lines) - 1 == writer.get_stats()["line_count"]
+
+
+def test_long_filters(tmpdir):
+    file_path = str(tmpdir.join("filter.csv"))
+
+    writer = RtiCsvWriter(file_path, datasets=['EarthVelocity', 'AncillaryData'], bin_start=2, bin_end=5, ss_code="A", ss_config=1)
+    writer.write(BinaryCodec.decode_data_sets(create_ens_bin(1, num_bins=10, full=True)))
+    writer.write(BinaryCodec.decode_data_sets(create_ens_bin(2, num_bins=10, full=True, ss_config=2)))
+    writer.write(BinaryCodec.decode_data_sets(create_ens_bin(3, num_bins=10, full=True, ss_code="B")))
+    writer.close()
+
+    with open(file_path) as f:
+        rows = list(csv.DictReader(f))
+
+    vel_rows = [row for row in rows if row['type'] == "EarthVel"]
+    assert 3 * 4 == len(vel_rows)
+    assert {'2', '3', '4'} == set(row['bin_num'] for row in vel_rows)
+    assert {"Heading", "EarthVel"} <= set(row['type'] for row in rows)
+    assert "Amp" not in set(row['type'] for row in rows)
+
+    # Bin 2 beam 0: 0.5 + 0.25 * 2
+    assert '1.0' == vel_rows[0]['bin_depth']
+    assert 0.04 == pytest.approx(float(vel_rows[0]['value']))
+
+    stats = writer.get_stats()
+    assert 1 == stats["ens_count"]
+    assert 2 == stats["skipped_count"]
+
+
+def test_wide(tmpdir):
+    ens_file_path = str(tmpdir.join("wide.ens"))
+    with open(ens_file_path, "wb") as f:
+        for ens_num in range(1, 11):
+            f.write(create_ens_bin(ens_num, num_bins=8, full=True))
+
+    file_path = str(tmpdir.join("wide.csv"))
+    writer = RtiCsvWriter(file_path, layout="wide", datasets=['EarthVelocity', 'AncillaryData', 'BottomTrack'], bin_end=4)
+    assert 10 == writer.export_file(ens_file_path)
+    writer.close()
+
+    with open(file_path) as f:
+        rows = list(csv.DictReader(f))
+
+    assert 10 == len(rows)
+    assert [str(ens_num) for ens_num in range(1, 11)] == [row['ens_num'] for row in rows]
+    assert 4.0 == float(rows[3]['Heading'])
+    assert 13.0 == float(rows[0]['BT_Range_3'])
+    assert 3 * 0.02 - 1 == pytest.approx(float(rows[0]['EarthVel_3_1']))
+    assert 'EarthVel_4_0' not in rows[0]
+    assert float(rows[0]['Magnitude_2']) > 0
+    assert writer.get_stats()["ens_per_sec"] > 0
+
+
+def test_bad_layout(tmpdir):
+    with pytest.raises(ValueError):
+        RtiCsvWriter(str(tmpdir.join("bad.csv")), layout="tall")
+
+
+def test_wide_fewer_bins(tmpdir):
+    file_path = str(tmpdir.join("wide_bins.csv"))
+    writer = RtiCsvWriter(file_path, layout="wide", datasets=['Amplitude'], bin_end=4)
+    writer.write(BinaryCodec.decode_data_sets(create_ens_bin(1, num_bins=8)))
+    writer.write(BinaryCodec.decode_data_sets(create_ens_bin(2, num_bins=3)))
+    writer.close()
+
+    with open(file_path) as f:
+        rows = list(csv.DictReader(f))
+
+    assert '2.0' == rows[1]['Amp_2_2']
+    assert '' == rows[1]['Amp_3_2']
+    assert '2.0' == rows[0]['Amp_3_2']
+
+
+def test_bad_date(tmpdir):
+    bad_ens = Ensemble()
+    ens_data = EnsembleData()
+    ens_data.EnsembleNumber = 2
+    ens_data.Year = 0
+    ens_data.Month = 0
+    ens_data.Day = 0
+    bad_ens.AddEnsembleData(ens_data)
+    bad_ens.AddAncillaryData(AncillaryData())
+
+    for layout in [RtiCsvWriter.LAYOUT_LONG, RtiCsvWriter.LAYOUT_WIDE]:
+        file_path = str(tmpdir.join(layout + "_bad_date.csv"))
+        writer = RtiCsvWriter(file_path, layout=layout, datasets=['EnsembleData', 'AncillaryData'])
+        assert writer.write(BinaryCodec.decode_data_sets(create_ens_bin(1, full=True)))
+        assert not writer.write(bad_ens)
+        assert writer.write(BinaryCodec.decode_data_sets(create_ens_bin(3, full=True)))
+        writer.close()
+
+        stats = writer.get_stats()
+        assert 2 == stats["ens_count"]
+        assert 1 == stats["bad_date_count"]
@@ -0,0 +1,90 @@
+import datetime
+import numpy as np
+import pytest
+from rti_python.Writer.rti_h5py import RtiH5pyStore
+from rti_python.Writer.rti_h5py import RtiH5pyReader
+from rti_python.Codecs.BinaryCodec import BinaryCodec
+from rti_python.Ensemble.CompactEnsemble import CompactEnsemble
+from rti_python.Unittest.helpers import create_ens_bin
+
+
+def test_store_append(tmpdir):
+    file_path = str(tmpdir.join("store.hdf5"))
+
+    # Ensemble 1 to 25, one second apart, in chunks of 10
+    store = RtiH5pyStore(file_path, chunk_size=10)
+    for ens_num in range(1, 26):
+        store.append(BinaryCodec.decode_data_sets(create_ens_bin(ens_num, num_bins=10, second=ens_num, full=True)))
+    assert 20 == store.ens_count
+    store.close()
+
+    # Append to the file with more bins and a CompactEnsemble without the full datasets
+    store = RtiH5pyStore(file_path, chunk_size=10)
+    assert 25 == store.ens_count
+    store.append(CompactEnsemble.decode(create_ens_bin(26, num_bins=15, second=26)))
+    store.close()
+
+    reader = RtiH5pyReader(file_path)
+    assert 'bin_beam/EarthVelocity' in reader.get_names()
+    assert list(range(1, 27)) == reader.get_series('ensemble/EnsembleNumber').tolist()
+    assert np.datetime64('2019-03-09T12:00:26') == reader.get_time()[-1]
+
+    vel = reader.get_bin_beam('BeamVelocity')
+    assert (26, 15, 4) == vel.shape
+    assert 26.0 == pytest.approx(vel[25, 0, 0])
+    assert 2.9 == pytest.approx(vel[1, 9, 3])
+    assert np.isnan(vel[0, 10:, :]).all()
+
+    # The datasets not in the last ensemble are filled
+    assert np.isnan(reader.get_bin_beam('EarthVelocity')[25]).all()
+    assert 0 == reader.get_bin_beam('GoodEarth')[25].max()
+    assert np.isnan(reader.get_series('ancillary/Heading')[25])
+    assert (26, 4) == reader.get_series('bottomtrack/Range').shape
+    reader.close()
+
+
+def test_reader_slice(tmpdir):
+    file_path = str(tmpdir.join("slice.hdf5"))
+
+    store = RtiH5pyStore(file_path, chunk_size=8, compression="lzf")
+    for ens_num in range(1, 31):
+        store.ensemble_handler(None, BinaryCodec.decode_data_sets(create_ens_bin(ens_num, num_bins=20, second=ens_num, full=True)))
+    store.close()
+
+    reader = RtiH5pyReader(file_path)
+    start = datetime.datetime(2019, 3, 9, 12, 0, 10)
+    end = datetime.datetime(2019, 3, 9, 12, 0, 14)
+
+    assert [10, 11, 12, 13, 14] == reader.get_series('ensemble/EnsembleNumber', start, end).tolist()
+    assert [10.0, 11.0, 12.0, 13.0, 14.0] == reader.get_series('ancillary/Heading', start, end).tolist()
+    assert 5 == len(reader.get_time(start, end))
+
+    vel = reader.get_bin_beam('EarthVelocity', start, end, bin_start=5, bin_end=8, beam=2)
+    assert (5, 3) == vel.shape
+    assert 5 * 0.02 - 2 == pytest.approx(vel[0, 0])
+
+    # After the last ensemble
+    assert 0 == len(reader.get_series('ancillary/Heading', datetime.datetime(2020, 1, 1)))
+    assert reader.get_bin_beam('NoDataset') is None
+    reader.close()
+
+
+def test_store_bad_date(tmpdir):
+    file_path = str(tmpdir.join("bad_date.hdf5"))
+
+    store = RtiH5pyStore(file_path)
+    for ens_num in range(1, 11):
+        ens = BinaryCodec.decode_data_sets(create_ens_bin(ens_num, num_bins=5, second=ens_num, full=True))
+        if ens_num == 5:
+            ens.EnsembleData.Month = 13
+        store.append(ens)
+    store.close()
+    assert 1 == store.bad_date_count
+
+    # The bad date is not written as the current time, so the times stay in order
+    reader = RtiH5pyReader(file_path)
+    assert [1, 2, 3, 4, 6, 7, 8, 9, 10] == reader.get_series('ensemble/EnsembleNumber').tolist()
+    start = datetime.datetime(2019, 3, 9, 12, 0, 3)
+    end = datetime.datetime(2019, 3, 9, 12, 0, 7)
+    assert [3, 4, 6, 7] == reader.get_series('ensemble/EnsembleNumber', start, end).tolist()
+    reader.close()
@@ -0,0 +1,79 @@
+import datetime
+import numpy as np
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from rti_python.Writer.rti_parquet import RtiParquetWriter
+from rti_python.Writer.rti_parquet import RtiParquetReader
+from rti_python.Codecs.BinaryCodec import BinaryCodec
+from rti_python.Ensemble.CompactEnsemble import CompactEnsemble
+from rti_python.Unittest.helpers import create_ens_bin
+
+
+def write_dataset(root_path):
+    # 30 ensembles of subsystem A config 1 and 10 of subsystem B config 2
+    writer = RtiParquetWriter(root_path, batch_size=8)
+    for ens_num in range(1, 31):
+        writer.ensemble_handler(None, BinaryCodec.decode_data_sets(create_ens_bin(ens_num, num_bins=10, minute=ens_num, full=True)))
+    for ens_num in range(101, 111):
+        writer.append(CompactEnsemble.decode(create_ens_bin(ens_num, num_bins=5, minute=ens_num - 100, ss_code="B", ss_config=2, full=True)))
+    writer.close()
+    assert 40 == writer.ens_count
+
+
+def test_write_read(tmpdir):
+    root_path = str(tmpdir.join("dataset"))
+    write_dataset(root_path)
+
+    reader = RtiParquetReader(root_path)
+    df = reader.read_profiles()
+    assert 30 * 10 + 10 * 5 == len(df)
+
+    df = reader.read_profiles(ss_code="A", ss_config=1)
+    assert list(range(1, 31)) == df['ens_num'].unique().tolist()
+    row = df[(df['ens_num'] == 3) & (df['bin_num'] == 4)].iloc[0]
+    assert 3.4 == pytest.approx(row['BeamVelocity_2'])
+    assert 4 * 0.02 - 1 == pytest.approx(row['EarthVelocity_1'])
+    assert 0.5 + 0.25 * 4 == pytest.approx(row['bin_depth'])
+    assert row['Magnitude'] > 0
+
+    ens_df = reader.read_ensembles(ss_code="B")
+    assert list(range(101, 111)) == ens_df['ens_num'].tolist()
+    assert 105.0 == ens_df['Heading'].iloc[4]
+    assert 13.0 == ens_df['BT_Range_3'].iloc[0]
+    assert 12.0 == ens_df['Voltage'].iloc[0]
+
+    # Magnitude calculated for the CompactEnsemble
+    assert not np.isnan(reader.read_profiles(['Magnitude'], ss_code="B")['Magnitude']).any()
+
+
+def test_filters(tmpdir):
+    root_path = str(tmpdir.join("dataset"))
+    write_dataset(root_path)
+    reader = RtiParquetReader(root_path)
+
+    start = datetime.datetime(2019, 3, 9, 12, 5)
+    end = datetime.datetime(2019, 3, 9, 12, 8)
+    df = reader.read_profiles(['datetime', 'ens_num', 'bin_num', 'EarthVelocity_0'], start_time=start, end_time=end, bin_start=2, bin_end=4)
+    assert ['datetime', 'ens_num', 'bin_num', 'EarthVelocity_0'] == list(df.columns)
+    assert [5, 5, 6, 6, 7, 7, 8, 8, 105, 105, 106, 106, 107, 107, 108, 108] == sorted(df['ens_num'].tolist())
+    assert {2, 3} == set(df['bin_num'])
+
+    df = reader.read_ensembles(['ens_num'], ens_start=10, ens_end=12)
+    assert [10, 11, 12] == df['ens_num'].tolist()
+
+    # Other days
+    assert 0 == len(reader.read_ensembles(start_time=datetime.datetime(2019, 3, 10)))
+
+    rows = sum(len(df) for df in reader.iter_profiles(['ens_num'], batch_size=50, ss_code="A"))
+    assert 300 == rows
+
+
+def test_append(tmpdir):
+    root_path = str(tmpdir.join("dataset"))
+    write_dataset(root_path)
+    write_dataset(root_path)
+
+    # Each writer adds new files
+    assert 80 == len(RtiParquetReader(root_path).read_ensembles())
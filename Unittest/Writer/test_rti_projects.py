@@ -0,0 +1,221 @@
+import struct
+import datetime
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+from rti_python.Writer.rti_projects import RtiProjects
+from rti_python.Writer.rti_sql import rti_sql
+from rti_python.Codecs.BinaryCodec import BinaryCodec
+from rti_python.Unittest.helpers import create_ens_bin
+from rti_python.Unittest.Writer.db_helpers import create_projects, requires_db
+
+
+def test_dataset_values():
+    data = [[bin_num + beam * 0.1 for beam in range(4)] for bin_num in range(3)]
+    data[1][2] = None
+
+    values = RtiProjects.dataset_values(data, 3, 4, bad_val=88.888)
+
+    assert (4, 3) == values.shape
+    assert [0.2, 88.888, 2.2] == pytest.approx(values[2].tolist())
+    assert ('ensIndex', 'beam', 'created', 'modified', 'Bin0', 'Bin1', 'Bin2') == RtiProjects.dataset_columns(3)
+
+
+def test_dataset_values_zero():
+    data = [[0.0, 1.5], [None, float("nan")]]
+
+    # Only the missing values are bad, a 0 value is kept
+    values = RtiProjects.dataset_values(data, 2, 2, bad_val=88.888)
+    assert [[0.0, 88.888], [1.5, 88.888]] == values.tolist()
+
+
+def test_nmea_text():
+    # Same array text psycopg2 stores for the list in add_nmea_ds
+    assert '{"$GPGGA,1,2","$GPVTG,3"}' == RtiProjects.nmea_text(["$GPGGA,1,2", "$GPVTG,3"])
+    assert '{abc,"a\\"b","",NULL,"null"}' == RtiProjects.nmea_text(["abc", 'a"b', "", None, "null"])
+    assert '{}' == RtiProjects.nmea_text([])
+
+
+def test_dataset_copy_data():
+    values = RtiProjects.dataset_values([[1.5, 2.5], [3.5, 4.5]], 2, 2)
+    data = RtiProjects.dataset_copy_data([(7, values), (8, values)], datetime.datetime(2000, 1, 1, 0, 0, 1))
+
+    # Header, 4 rows and trailer
+    row_size = 2 + 4 * (4 + 4) + 2 * (4 + 8)
+    assert 19 + 4 * row_size + 2 == len(data)
+    assert data.startswith(b'PGCOPY\n\xff\r\n\x00')
+    assert data.endswith(b'\xff\xff')
+
+    # Second row is beam 1 of ensemble 7
+    row = data[19 + row_size:19 + 2 * row_size]
+    assert (6, 4, 7, 4, 1, 8, 1000000) == struct.unpack('>hiiiiiq', row[:30])
+    assert (4, 2.5, 4, 4.5) == struct.unpack('>ifif', row[-16:])
+
+
+def test_encode_decode_array():
+    data = [[bin_num + beam * 0.1 for beam in range(5)] for bin_num in range(3)]
+    values = RtiProjects.dataset_values(data, 3, 5, max_beams=None)
+    assert (5, 3) == values.shape
+
+    vel_data = rti_sql.encode_array(values, 'beamvelocity')
+    assert 5 * 3 * 4 == len(vel_data)
+    assert values.ravel().tolist() == pytest.approx(rti_sql.decode_array(vel_data, 3, 5, 'beamvelocity').ravel().tolist())
+
+    good_data = rti_sql.encode_array(values, 'goodbeamping')
+    assert [0, 1, 2] == rti_sql.decode_array(good_data, 3, 5, 'goodbeamping')[4].tolist()
+
+
+def test_bottomtrack_row():
+    ens = BinaryCodec.decode_data_sets(create_ens_bin(1, num_bins=5, full=True))
+    columns, row = RtiProjects.bottomtrack_row(ens, 5, datetime.datetime.now())
+
+    assert len(columns) == len(row)
+    assert 16 + 15 * 4 == len(columns)
+    assert 13.0 == row[columns.index('rangeBeam3')]
+
+
+class FailingSql:
+    """
+    Batch connection where every query fails.
+    """
+    def __init__(self):
+        self.cursor = self
+        self.conn = self
+        self.rollback_count = 0
+
+    def execute(self, query, values=None):
+        raise psycopg2.OperationalError("connection lost")
+
+    def rollback(self):
+        self.rollback_count += 1
+
+
+def test_flush_bulk_error():
+    ens = BinaryCodec.decode_data_sets(create_ens_bin(1, num_bins=5, full=True))
+    prjs = RtiProjects()
+    prjs.batch_sql = FailingSql()
+    prjs.batch_prj_id = [(1,)]
+    prjs.add_ensemble_bulk(ens)
+
+    # The error is raised and the batch is kept to retry
+    with pytest.raises(psycopg2.OperationalError):
+        prjs.flush_bulk()
+    assert 1 == prjs.batch_sql.rollback_count
+    assert [(ens, 0)] == prjs.bulk_ens
+    assert 0 == prjs.bulk_ens_count
+
+
+@requires_db
+def test_bulk_insert():
+    ens_list = [BinaryCodec.decode_data_sets(create_ens_bin(ens_num, num_bins=20, full=True)) for ens_num in range(1, 26)]
+
+    for use_copy in [True, False]:
+        prj_name = "bulk_test_" + str(use_copy) + "_" + datetime.datetime.now().strftime("%Y%m%d%H%M%S%f")
+        prjs = create_projects()
+
+        sql = rti_sql(prjs.sql_conn_string)
+        sql.create_tables()
+        sql.close()
+
+        prj_idx = prjs.add_prj_sql(prj_name, "")
+
+        prjs.begin_bulk(prj_name, batch_size=10, use_copy=use_copy)
+        for ens in ens_list:
+            prjs.add_ensemble_bulk(ens)
+        prjs.end_bulk()
+        assert 25 == prjs.bulk_ens_count
+
+        sql = rti_sql(prjs.sql_conn_string)
+        ens_rows = sql.query("SELECT id, ensnum, heading FROM ensembles WHERE project_id = {0} ORDER BY ensnum;".format(prj_idx))
+        assert list(range(1, 26)) == [row[1] for row in ens_rows]
+        assert 5.0 == ens_rows[4][2]
+
+        # Each dataset has a row for each beam
+        ens_idx = ens_rows[2][0]
+        vel_rows = sql.query("SELECT beam, bin0, bin19 FROM beamvelocity WHERE ensindex = {0} ORDER BY beam;".format(ens_idx))
+        assert 4 == len(vel_rows)
+        assert pytest.approx(3.0) == vel_rows[0][1]
+        assert pytest.approx(4.9) == vel_rows[3][2]
+
+        assert 1 == sql.query("SELECT count(*) FROM bottomtrack WHERE ensindex = {0};".format(ens_idx))[0][0]
+        assert 4 == sql.query("SELECT count(*) FROM goodearthping WHERE ensindex = {0};".format(ens_idx))[0][0]
+        sql.close()
+
+
+@requires_db
+def test_legacy_same_as_bulk():
+    ens = BinaryCodec.decode_data_sets(create_ens_bin(1, num_bins=5, full=True))
+
+    values = []
+    for use_bulk in [True, False]:
+        prj_name = "same_test_" + str(use_bulk) + "_" + datetime.datetime.now().strftime("%Y%m%d%H%M%S%f")
+        prjs = create_projects()
+
+        sql = rti_sql(prjs.sql_conn_string)
+        sql.create_tables()
+        sql.close()
+
+        prj_idx = prjs.add_prj_sql(prj_name, "")
+        if use_bulk:
+            prjs.begin_bulk(prj_name)
+            prjs.add_ensemble_bulk(ens)
+            prjs.end_bulk()
+        else:
+            prjs.begin_batch(prj_name)
+            prjs.add_ensemble(ens)
+            prjs.end_batch()
+
+        sql = rti_sql(prjs.sql_conn_string)
+        ens_idx = sql.query("SELECT id FROM ensembles WHERE project_id = {0};".format(prj_idx))[0][0]
+        values.append((sql.query("SELECT bin0 FROM earthvelocity WHERE ensindex = {0} AND beam = 0;".format(ens_idx))[0][0],
+                       sql.query("SELECT bin0 FROM goodbeamping WHERE ensindex = {0} AND beam = 0;".format(ens_idx))[0][0]))
+        sql.close()
+
+    # The 0 values are not replaced with the bad value
+    assert [(0.0, 0), (0.0, 0)] == values
+
+
+@requires_db
+def test_array_schema():
+    ens_list = [BinaryCodec.decode_data_sets(create_ens_bin(ens_num, num_bins=20, full=True)) for ens_num in range(1, 11)]
+
+    for use_bulk in [True, False]:
+        prj_name = "array_test_" + str(use_bulk) + "_" + datetime.datetime.now().strftime("%Y%m%d%H%M%S%f")
+        prjs = create_projects(array_schema=True)
+
+        sql = rti_sql(prjs.sql_conn_string)
+        sql.create_tables()
+        sql.create_array_tables()
+        sql.close()
+
+        prj_idx = prjs.add_prj_sql(prj_name, "")
+
+        if use_bulk:
+            prjs.begin_bulk(prj_name, batch_size=4)
+            for ens in ens_list:
+                prjs.add_ensemble_bulk(ens)
+            prjs.end_bulk()
+        else:
+            prjs.begin_batch(prj_name)
+            for ens in ens_list:
+                prjs.add_ensemble(ens)
+            prjs.end_batch()
+
+        sql = rti_sql(prjs.sql_conn_string)
+        ens_nums, num_bins, num_beams, values = sql.get_array_data(prj_idx, 'beamvelocity')
+        assert list(range(1, 11)) == ens_nums.tolist()
+        assert [20] * 10 == num_bins.tolist()
+        assert (10, 4, 20) == values.shape
+        assert pytest.approx(3.0) == values[2, 0, 0]
+        assert pytest.approx(4.9) == values[2, 3, 19]
+
+        # Same columns as the earth velocity table
+        df = sql.get_earth_vel_array(prj_idx, 1)
+        assert ['ensnum', 'numbeams', 'numbins', 'beam', 'bin0'] == list(df.columns[:5])
+        assert pytest.approx(0.02 * 19 - 1) == df['bin19'][0]
+
+        # No rows per beam
+        ens_idx = sql.query("SELECT id FROM ensembles WHERE project_id = {0};".format(prj_idx))[0][0]
+        assert 0 == sql.query("SELECT count(*) FROM beamvelocity WHERE ensindex = {0};".format(ens_idx))[0][0]
+        sql.close()
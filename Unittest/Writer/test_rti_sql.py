@@ -0,0 +1,110 @@
+import datetime
+import threading
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+from rti_python.Writer.rti_sql import rti_sql, WaitingConnectionPool
+from rti_python.Codecs.BinaryCodec import BinaryCodec
+from rti_python.Unittest.helpers import create_ens_bin
+from rti_python.Unittest.Writer.db_helpers import create_projects, requires_db
+
+
+class FakeConn:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_pool_wait(monkeypatch):
+    monkeypatch.setattr(psycopg2, "connect", lambda *args, **kwargs: FakeConn())
+    pool = WaitingConnectionPool(0, 2, "", timeout=0.1)
+
+    conn1 = pool.getconn()
+    conn2 = pool.getconn()
+
+    # All max_conn connections are in use
+    with pytest.raises(psycopg2.pool.PoolError, match="All 2 connections"):
+        pool.getconn()
+
+    # Wait for a connection to be given back
+    pool.timeout = 5
+    timer = threading.Timer(0.1, pool.putconn, (conn1,))
+    timer.start()
+    conn3 = pool.getconn()
+    timer.join()
+    assert conn1.closed
+    assert conn3 is not conn2
+
+    pool.putconn(conn2)
+    pool.putconn(conn3)
+    pool.closeall()
+
+
+@requires_db
+def test_pool():
+    prjs = create_projects()
+
+    sql = rti_sql(prjs.sql_conn_string, use_pool=True)
+    conn = sql.conn
+    assert 1 == sql.query("SELECT 1;")[0][0]
+    sql.close()
+
+    # The connection is reused
+    sql = rti_sql(prjs.sql_conn_string, use_pool=True)
+    assert conn is sql.conn
+    assert not sql.conn.closed
+
+    # A second connection at the same time
+    sql2 = rti_sql(prjs.sql_conn_string, use_pool=True)
+    assert conn is not sql2.conn
+    sql2.close()
+    sql.close()
+
+    rti_sql.close_pools()
+    assert conn.closed
+
+
+@requires_db
+def test_query_chunks():
+    prj_name = "chunk_test_" + datetime.datetime.now().strftime("%Y%m%d%H%M%S%f")
+    prjs = create_projects()
+
+    sql = rti_sql(prjs.sql_conn_string, use_pool=True)
+    sql.create_tables()
+    sql.close()
+
+    prj_idx = prjs.add_prj_sql(prj_name, "")
+    prjs.begin_bulk(prj_name)
+    for ens_num in range(1, 26):
+        prjs.add_ensemble_bulk(BinaryCodec.decode_data_sets(create_ens_bin(ens_num, num_bins=10, full=True)))
+    prjs.end_bulk()
+
+    sql = rti_sql(prjs.sql_conn_string, use_pool=True)
+
+    # Same data as the query of the whole project
+    chunks = list(sql.get_earth_vel_data_chunks(prj_idx, 1, chunk_size=10))
+    assert [10, 10, 5] == [len(df) for df in chunks]
+    assert list(chunks[0].columns) == list(sql.get_earth_vel_data(prj_idx, 1).columns)
+    assert list(range(1, 26)) == [ens_num for df in chunks for ens_num in df['ensnum']]
+
+    chunks = list(sql.get_compass_data_chunks(prj_idx, chunk_size=20))
+    assert ['ensnum', 'datetime', 'heading', 'pitch', 'roll'] == list(chunks[0].columns)
+    assert 25.0 == chunks[1]['heading'].iloc[-1]
+
+    chunks = list(sql.get_bottom_track_range_chunks(prj_idx, ss_code="A", chunk_size=100))
+    assert 1 == len(chunks)
+    assert 13.0 == chunks[0]['RangeBeam3'][0]
+
+    # Stop reading early, the connection can still be used
+    gen = sql.get_voltage_data_chunks(prj_idx, chunk_size=5)
+    assert 12.0 == next(gen)['voltage'][0]
+    gen.close()
+    assert 25 == len(sql.get_voltage_data(prj_idx))
+
+    # Bad query
+    assert [] == list(sql.query_chunks("SELECT * FROM no_table;"))
+    assert 1 == sql.query("SELECT 1;")[0][0]
+    sql.close()
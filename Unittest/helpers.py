@@ -0,0 +1,164 @@
+"""
+Ensemble builders shared by the unit tests.
+"""
+import struct
+import binascii
+from rti_python.Ensemble.Ensemble import Ensemble
+from rti_python.Ensemble.EnsembleData import EnsembleData
+from rti_python.Ensemble.BeamVelocity import BeamVelocity
+from rti_python.Ensemble.Amplitude import Amplitude
+from rti_python.Ensemble.InstrumentVelocity import InstrumentVelocity
+from rti_python.Ensemble.EarthVelocity import EarthVelocity
+from rti_python.Ensemble.Correlation import Correlation
+from rti_python.Ensemble.GoodBeam import GoodBeam
+from rti_python.Ensemble.GoodEarth import GoodEarth
+from rti_python.Ensemble.AncillaryData import AncillaryData
+from rti_python.Ensemble.SystemSetup import SystemSetup
+from rti_python.Ensemble.BottomTrack import BottomTrack
+from rti_python.Ensemble.RangeTracking import RangeTracking
+
+
+def create_ens_bin(ens_num, num_bins=30, num_beams=4, minute=0, second=0, ss_code="A", ss_config=1, full=False):
+    """
+    Create a binary RTB ensemble with Ensemble Data, Beam Velocity and Amplitude.
+    With full, the Ancillary Data, System Setup, Bottom Track and the other
+    [Bin x Beam] datasets are also added.
+    :param ens_num: Ensemble number.
+    :param num_bins: Number of bins.
+    :param num_beams: Number of beams.
+    :param minute: Minute of the ensemble time.
+    :param second: Second of the ensemble time.
+    :param ss_code: Subsystem code.
+    :param ss_config: Subsystem configuration.
+    :param full: TRUE = Add all the datasets.
+    :return: Binary ensemble.
+    """
+    ens_ds = EnsembleData()
+    ens_ds.EnsembleNumber = ens_num
+    ens_ds.NumBins = num_bins
+    ens_ds.NumBeams = num_beams
+    ens_ds.SerialNumber = "01H00000000000000000000000999999"
+    ens_ds.SysFirmwareSubsystemCode = ss_code
+    ens_ds.SubsystemConfig = ss_config
+    ens_ds.Year = 2019
+    ens_ds.Month = 3
+    ens_ds.Day = 9
+    ens_ds.Hour = 12
+    ens_ds.Minute = minute
+    ens_ds.Second = second
+
+    beam_vel = BeamVelocity(num_bins, num_beams)
+    amp = Amplitude(num_bins, num_beams)
+    for beam in range(num_beams):
+        for bin_num in range(num_bins):
+            beam_vel.Velocities[bin_num][beam] = ens_num + bin_num * 0.1
+            amp.Amplitude[bin_num][beam] = float(beam)
+
+    payload = bytes(ens_ds.encode() + beam_vel.encode() + amp.encode())
+
+    if full:
+        instr_vel = InstrumentVelocity(num_bins, num_beams)
+        earth_vel = EarthVelocity(num_bins, num_beams)
+        corr = Correlation(num_bins, num_beams)
+        good_beam = GoodBeam(num_bins, num_beams)
+        good_earth = GoodEarth(num_bins, num_beams)
+        for beam in range(num_beams):
+            for bin_num in range(num_bins):
+                instr_vel.Velocities[bin_num][beam] = bin_num * 0.01 + beam
+                earth_vel.Velocities[bin_num][beam] = bin_num * 0.02 - beam
+                corr.Correlation[bin_num][beam] = 0.5
+                good_beam.GoodBeam[bin_num][beam] = beam
+                good_earth.GoodEarth[bin_num][beam] = bin_num % 5
+
+        anc = AncillaryData()
+        anc.FirstBinRange = 0.5
+        anc.BinSize = 0.25
+        anc.Heading = float(ens_num)
+        anc.Pressure = 1.5
+        anc.TransducerDepth = 2.5
+
+        ss = SystemSetup()
+        ss.Voltage = 12.0
+
+        bt = BottomTrack()
+        bt.NumBeams = float(num_beams)
+        bt.ActualPingCount = 3.0
+        for beam in range(num_beams):
+            bt.Range.append(10.0 + beam)
+            bt.SNR.append(20.0)
+            bt.Amplitude.append(30.0)
+            bt.Correlation.append(0.9)
+            bt.BeamVelocity.append(0.1 * beam)
+            bt.BeamGood.append(1.0)
+            bt.InstrumentVelocity.append(0.2 * beam)
+            bt.InstrumentGood.append(1.0)
+            bt.EarthVelocity.append(0.3 * beam)
+            bt.EarthGood.append(1.0)
+            bt.SNR_PulseCoherent.append(0.0)
+            bt.Amp_PulseCoherent.append(0.0)
+            bt.Vel_PulseCoherent.append(0.0)
+            bt.Noise_PulseCoherent.append(0.0)
+            bt.Corr_PulseCoherent.append(0.0)
+
+        payload += bytes(instr_vel.encode() + earth_vel.encode() + corr.encode() + good_beam.encode() + good_earth.encode())
+        payload += bytes(anc.encode() + ss.encode() + bt.encode())
+    header = bytes(Ensemble.generate_ens_header(ens_num, len(payload)))
+    checksum = struct.pack("I", binascii.crc_hqx(payload, 0))
+
+    return header + payload + checksum
+
+
+def create_ens(ens_num, num_beams=4, num_bins=10, earth=True, range_tracking=True):
+    """
+    Create an ensemble for a wave burst.
+    :param ens_num: Ensemble number.
+    :param num_beams: Number of beams.  1 = Vertical beam.
+    :param num_bins: Number of bins.
+    :param earth: TRUE = Add Earth Velocity.
+    :param range_tracking: TRUE = Add Range Tracking.
+    :return: Ensemble.
+    """
+    ens_data = EnsembleData()
+    ens_data.EnsembleNumber = ens_num
+    ens_data.NumBeams = num_beams
+    ens_data.NumBins = num_bins
+    ens_data.Year = 2019
+    ens_data.Month = 2
+    ens_data.Day = 19
+    ens_data.Hour = 10
+    ens_data.Minute = ens_num // 60
+    ens_data.Second = ens_num % 60
+
+    anc = AncillaryData()
+    anc.Heading = 20.0 + ens_num
+    anc.Pitch = 1.5
+    anc.Roll = -0.5
+    anc.TransducerDepth = 30.0 + ens_num * 0.1
+    anc.WaterTemp = 12.3
+    anc.BinSize = 0.5
+    anc.FirstBinRange = 1.3
+
+    beam_vel = BeamVelocity(num_bins, num_beams)
+    corr = Correlation(num_bins, num_beams)
+    earth_vel = EarthVelocity(num_bins, num_beams)
+    for bin_num in range(num_bins):
+        for beam in range(num_beams):
+            beam_vel.Velocities[bin_num][beam] = ens_num * 0.01 + bin_num * 0.1 + beam
+            corr.Correlation[bin_num][beam] = 0.1 if (bin_num + beam) % 5 == 0 else 0.9
+            earth_vel.Velocities[bin_num][beam] = ens_num * 0.02 - bin_num * 0.1 + beam
+
+    ens = Ensemble()
+    ens.AddEnsembleData(ens_data)
+    ens.AddAncillaryData(anc)
+    ens.AddBeamVelocity(beam_vel)
+    ens.AddCorrelation(corr)
+    if earth and num_beams > 1:
+        ens.AddEarthVelocity(earth_vel)
+    if range_tracking:
+        rt = RangeTracking()
+        rt.NumBeams = num_beams
+        for beam in range(num_beams):
+            rt.Range.append(29.0 + beam + ens_num * 0.1)
+        ens.AddRangeTracking(rt)
+
+    return ens
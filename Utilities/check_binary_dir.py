@@ -0,0 +1,421 @@
+import os
+import mmap
+import json
+import time
+import struct
+import datetime
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from tqdm import tqdm
+from rti_python.Ensemble.Ensemble import Ensemble
+from rti_python.Codecs.BinaryCodec import BinaryCodec
+from rti_python.Codecs.BinaryCodec import EnsembleFramer
+
+
+# Issue types in the report
+MISSING_ENS = "missing_ens"
+CRC_FAIL = "crc_fail"
+TRUNCATED = "truncated"
+BAD_STATUS = "bad_status"
+BAD_VOLTAGE = "bad_voltage"
+BAD_AMP_0DB = "bad_amplitude_0db"
+BAD_CORR_100PCT = "bad_correlation_100pct"
+
+# Limits used by RtiCheckFile
+MIN_VOLTAGE = 12
+MAX_VOLTAGE = 36
+AMP_0DB = 7.0
+CORR_100PCT = 1.0
+BAD_BIN_RATIO = 0.8
+
+# Dataset header: type, number of elements, element multiplier, image, name length
+DS_HEADER = struct.Struct("<5i")
+
+# Ensemble Data values: ensemble number, bins, beams, desired pings, actual pings, status,
+# year, month, day, hour, minute, second, hundredth of second
+ENS_DATA = struct.Struct("<13i")
+
+
+def get_data_sets(ens_bin):
+    """
+    Find the datasets in the ensemble without decoding them.
+    :param ens_bin: Binary ensemble data.
+    :return: Dictionary of dataset name to (data offset, number of elements, element multiplier).
+    """
+    data_sets = {}
+    ens_end = len(ens_bin) - Ensemble.ChecksumSize
+    packet_pointer = Ensemble.HeaderSize
+
+    while packet_pointer + Ensemble.GetBaseDataSize(8) <= ens_end:
+        ds_type, num_elements, element_multiplier, image, name_len = DS_HEADER.unpack_from(ens_bin, packet_pointer)
+        if name_len < 0 or num_elements < 0 or element_multiplier < 0:
+            break
+
+        base_size = Ensemble.GetBaseDataSize(name_len)
+        data_set_size = Ensemble.GetDataSetSize(ds_type, name_len, num_elements, element_multiplier)
+        if data_set_size <= 0 or packet_pointer + data_set_size > ens_end:
+            break
+
+        name = bytes(ens_bin[packet_pointer + base_size - name_len:packet_pointer + base_size]).rstrip(b'\0')
+        data_sets[name] = (packet_pointer + base_size, num_elements, element_multiplier)
+
+        packet_pointer += data_set_size
+
+    return data_sets
+
+
+def get_bad_beams(ens_bin, data_set, is_bad):
+    """
+    Find the beams where most of the bins are bad in a [Bin x Beam] float dataset.
+    The values are stored beam by beam.
+    :param ens_bin: Binary ensemble data.
+    :param data_set: (data offset, number of bins, number of beams) from get_data_sets().
+    :param is_bad: Function to give the bad values of the array.
+    :return: List of the bad beams.
+    """
+    offset, num_bins, num_beams = data_set
+    values = np.frombuffer(ens_bin, dtype='<f4', count=num_bins * num_beams, offset=offset).reshape(num_beams, num_bins)
+    bad_beams = np.count_nonzero(is_bad(values), axis=1) > int(num_bins * BAD_BIN_RATIO)
+    return np.nonzero(bad_beams)[0].tolist()
+
+
+def check_file(file_path, max_issues=1000):
+    """
+    Check the ensemble file for any issues.  This is run in a worker process.
+
+    Each ensemble header and checksum is verified.  Only the values needed
+    for the checks are read from the Ensemble Data, System Setup, Amplitude and
+    Correlation datasets, the ensembles are not decoded.  The checks are the
+    same as RtiCheckFile.
+    :param file_path: Ensemble file path.
+    :param max_issues: Maximum number of issues listed for the file.  All the issues are still counted.
+    :return: Dictionary with the results for the file.
+    """
+    start_time = time.perf_counter()
+    report = {"file_path": file_path,
+              "file_size": 0,
+              "ens_count": 0,
+              "found_issues": 0,
+              "missing_ens_count": 0,
+              "crc_fail_count": 0,
+              "bad_header_count": 0,
+              "truncated_bytes": 0,
+              "bad_status_count": 0,
+              "bad_voltage_count": 0,
+              "bad_amp_0db_count": 0,
+              "bad_corr_100pct_count": 0,
+              "unused_bytes": 0,
+              "first_ens_num": None,
+              "first_ens_time": None,
+              "last_ens_num": None,
+              "last_ens_time": None,
+              "issues": [],
+              "error": None,
+              "elapsed": 0.0}
+
+    def add_issue(issue_type, count_name, offset, ens_num, detail):
+        if count_name:
+            report[count_name] += 1
+        report["found_issues"] += 1
+        if len(report["issues"]) < max_issues:
+            report["issues"].append({"type": issue_type, "offset": offset, "ens_num": ens_num, "detail": detail})
+
+    try:
+        report["file_size"] = file_size = os.path.getsize(file_path)
+
+        used_bytes = 0
+        prev_ens_num = 0
+        if file_size > 0:
+            with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                pos = mm.find(EnsembleFramer.DELIMITER)
+                while 0 <= pos <= file_size - Ensemble.HeaderSize:
+                    # Verify the header
+                    ens_size = EnsembleFramer.get_ens_size(mm, pos)
+                    if not ens_size:
+                        report["bad_header_count"] += 1
+                        pos = mm.find(EnsembleFramer.DELIMITER, pos + 1)
+                        continue
+
+                    header_ens_num = struct.unpack_from("<i", mm, pos + 16)[0]
+
+                    # The file ends before the ensemble
+                    if pos + ens_size > file_size:
+                        report["truncated_bytes"] = file_size - pos
+                        add_issue(TRUNCATED, None, pos, header_ens_num,
+                                  "Incomplete Ensemble: " + str(file_size - pos) + " of " + str(ens_size) + " bytes")
+                        break
+
+                    # Verify the checksum
+                    ens_bin = mm[pos:pos + ens_size]
+                    if not BinaryCodec.verify_ens_data(ens_bin):
+                        add_issue(CRC_FAIL, "crc_fail_count", pos, header_ens_num, "Ensemble fails checksum")
+                        pos = mm.find(EnsembleFramer.DELIMITER, pos + 1)
+                        continue
+
+                    report["ens_count"] += 1
+                    used_bytes += ens_size
+                    data_sets = get_data_sets(ens_bin)
+                    ens_num = header_ens_num
+
+                    # Ensemble number, status and time
+                    if b"E000008" in data_sets:
+                        values = ENS_DATA.unpack_from(ens_bin, data_sets[b"E000008"][0])
+                        ens_num = values[0]
+                        status = values[5]
+                        try:
+                            ens_time = datetime.datetime(*values[6:12], values[12] * 10000).isoformat()
+                        except Exception:
+                            ens_time = None
+
+                        if report["first_ens_num"] is None:
+                            report["first_ens_num"] = ens_num
+                            report["first_ens_time"] = ens_time
+                        report["last_ens_num"] = ens_num
+                        report["last_ens_time"] = ens_time
+
+                        # Check for missing ensembles
+                        if prev_ens_num != 0 and ens_num != prev_ens_num + 1:
+                            add_issue(MISSING_ENS, "missing_ens_count", pos, prev_ens_num + 1,
+                                      "Missing Ensemble: " + str(prev_ens_num + 1) + " Next Ensemble: " + str(ens_num))
+                        prev_ens_num = ens_num
+
+                        # Check the status
+                        if status != 0:
+                            add_issue(BAD_STATUS, "bad_status_count", pos, ens_num, "Status: [" + hex(status) + "]")
+
+                        # Check the voltage
+                        if b"E000014" in data_sets and data_sets[b"E000014"][1] > 11:
+                            voltage = struct.unpack_from("<f", ens_bin, data_sets[b"E000014"][0] + Ensemble.BytesInFloat * 11)[0]
+                            if voltage > MAX_VOLTAGE or voltage < MIN_VOLTAGE:
+                                add_issue(BAD_VOLTAGE, "bad_voltage_count", pos, ens_num, "Voltage: [" + str(round(voltage, 3)) + "]")
+
+                    # Check the amplitude
+                    if b"E000004" in data_sets:
+                        bad_beams = get_bad_beams(ens_bin, data_sets[b"E000004"], lambda amp: amp <= AMP_0DB)
+                        if bad_beams:
+                            add_issue(BAD_AMP_0DB, "bad_amp_0db_count", pos, ens_num,
+                                      "Amplitude[" + ",".join(str(beam) for beam in bad_beams) + "] : 0 dB")
+
+                    # Check the correlation
+                    if b"E000005" in data_sets:
+                        bad_beams = get_bad_beams(ens_bin, data_sets[b"E000005"], lambda corr: corr >= CORR_100PCT)
+                        if bad_beams:
+                            add_issue(BAD_CORR_100PCT, "bad_corr_100pct_count", pos, ens_num,
+                                      "Correlation[" + ",".join(str(beam) for beam in bad_beams) + "] : 100%")
+
+                    # Move to the next ensemble
+                    pos = mm.find(EnsembleFramer.DELIMITER, pos + ens_size)
+
+        report["unused_bytes"] = file_size - used_bytes
+    except Exception as e:
+        logging.error("Error checking file " + file_path + ". " + str(e))
+        report["error"] = str(e)
+
+    report["elapsed"] = time.perf_counter() - start_time
+    return report
+
+
+class RtiCheckDir:
+    """
+    Check all the ensemble files in the deployment directories for any issues.
+
+    RtiCheckFile decodes every ensemble and checks one file at a time.
+    This checks the files in a process pool.  Each ensemble header and
+    checksum is verified and only the values needed for the checks are read,
+    so the ensembles are not decoded.  The same checks as RtiCheckFile are done:
+    missing ensembles, status, voltage, amplitude 0 dB and correlation 100%.
+    Checksum failures and truncated ensembles are also reported.
+
+    The report has the counts and a list of the issues for each file and a
+    summary of all the files.  It can be saved as JSON or Parquet.
+
+    checker = RtiCheckDir(num_workers=8)
+    report = checker.process(["/path/to/deployment"])
+    RtiCheckDir.write_json(report, "/path/to/report.json")
+    """
+
+    # Ensemble file extensions
+    EXTENSIONS = [".ens", ".bin", ".rtb"]
+
+    # Counts summed for all the files
+    COUNTS = ["file_size", "ens_count", "found_issues", "missing_ens_count", "crc_fail_count", "bad_header_count",
+              "truncated_bytes", "bad_status_count", "bad_voltage_count", "bad_amp_0db_count", "bad_corr_100pct_count",
+              "unused_bytes"]
+
+    def __init__(self, num_workers=None, extensions=None, recursive=True, max_issues=1000):
+        """
+        Initialize the checker.
+        :param num_workers: Number of worker processes.  Default: Number of CPUs.  1 = Check in this process.
+        :param extensions: File extensions to check in the directories.  Default: EXTENSIONS.
+        :param recursive: TRUE = Also check the sub directories.
+        :param max_issues: Maximum number of issues listed for each file.
+        """
+        self.num_workers = num_workers if num_workers else os.cpu_count()
+        self.extensions = [ext.lower() for ext in (extensions if extensions is not None else RtiCheckDir.EXTENSIONS)]
+        self.recursive = recursive
+        self.max_issues = max_issues
+
+    def find_files(self, paths):
+        """
+        Find all the ensemble files.
+        :param paths: List of directories and files.  Files are always checked.
+        :return: Sorted list of file paths.
+        """
+        if isinstance(paths, str):
+            paths = [paths]
+
+        files = set()
+        for path in paths:
+            if os.path.isfile(path):
+                files.add(path)
+                continue
+
+            for folder, sub_folders, file_names in os.walk(path):
+                for file_name in file_names:
+                    if os.path.splitext(file_name)[1].lower() in self.extensions:
+                        files.add(os.path.join(folder, file_name))
+
+                if not self.recursive:
+                    break
+
+        return sorted(files)
+
+    def process(self, paths, show_progress=True):
+        """
+        Check all the files.
+        :param paths: List of directories and files.
+        :param show_progress: TRUE = Show a progress bar of the bytes checked.
+        :return: Dictionary with the report for each file and the summary.
+        """
+        start_time = time.perf_counter()
+        files = self.find_files(paths)
+
+        file_reports = []
+        with tqdm(total=sum(os.path.getsize(file) for file in files), disable=not show_progress) as pbar:
+            if self.num_workers == 1:
+                for file in files:
+                    file_reports.append(check_file(file, self.max_issues))
+                    pbar.update(file_reports[-1]["file_size"])
+            else:
+                # Start the largest files first, so one large file does not finish last
+                with ProcessPoolExecutor(max_workers=self.num_workers) as executor:
+                    futures = [executor.submit(check_file, file, self.max_issues)
+                               for file in sorted(files, key=os.path.getsize, reverse=True)]
+                    for future in as_completed(futures):
+                        file_reports.append(future.result())
+                        pbar.update(file_reports[-1]["file_size"])
+
+        file_reports.sort(key=lambda file_report: file_report["file_path"])
+
+        elapsed = time.perf_counter() - start_time
+        summary = RtiCheckDir.summarize(file_reports)
+        summary["elapsed"] = elapsed
+        summary["mb_per_sec"] = summary["file_size"] / elapsed / 1e6 if elapsed > 0 else 0.0
+
+        return {"created": datetime.datetime.now().isoformat(),
+                "summary": summary,
+                "files": file_reports}
+
+    @staticmethod
+    def summarize(file_reports):
+        """
+        Sum the counts of all the files.
+        :param file_reports: List of file reports from check_file().
+        :return: Dictionary of the totals.
+        """
+        summary = {name: sum(file_report[name] for file_report in file_reports) for name in RtiCheckDir.COUNTS}
+        summary["file_count"] = len(file_reports)
+        summary["bad_file_count"] = sum(1 for file_report in file_reports if file_report["found_issues"] > 0 or file_report["error"])
+        summary["error_file_count"] = sum(1 for file_report in file_reports if file_report["error"])
+        return summary
+
+    @staticmethod
+    def write_json(report, file_path):
+        """
+        Write the report to a JSON file.
+        :param report: Report from process().
+        :param file_path: JSON file path.
+        :return:
+        """
+        with open(file_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    @staticmethod
+    def write_parquet(report, file_path):
+        """
+        Write the report to a Parquet file with a row for each file.
+        The issues are a list column in each row.  pyarrow is
+        only needed to write the Parquet file.
+        :param report: Report from process().
+        :param file_path: Parquet file path.
+        :return:
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        issue_type = pa.list_(pa.struct([("type", pa.string()),
+                                         ("offset", pa.int64()),
+                                         ("ens_num", pa.int64()),
+                                         ("detail", pa.string())]))
+        fields = [(name, pa.int64()) for name in RtiCheckDir.COUNTS]
+        fields += [("file_path", pa.string()),
+                   ("first_ens_num", pa.int64()),
+                   ("first_ens_time", pa.string()),
+                   ("last_ens_num", pa.int64()),
+                   ("last_ens_time", pa.string()),
+                   ("issues", issue_type),
+                   ("error", pa.string()),
+                   ("elapsed", pa.float64())]
+        schema = pa.schema(fields)
+
+        table = pa.Table.from_pylist([{name: file_report[name] for name in schema.names} for file_report in report["files"]], schema=schema)
+        pq.write_table(table, file_path)
+
+    @staticmethod
+    def print_summary(report):
+        """
+        Print the summary and the files with issues.
+        :param report: Report from process().
+        :return:
+        """
+        summary = report["summary"]
+
+        print("---------------------------------------------")
+        for file_report in report["files"]:
+            if file_report["error"]:
+                print("ERROR " + file_report["file_path"] + ": " + file_report["error"])
+            elif file_report["found_issues"] > 0:
+                print(str(file_report["found_issues"]) + " ISSUES FOUND: " + file_report["file_path"])
+
+        print("Files checked: " + str(summary["file_count"]))
+        print("Files with issues: " + str(summary["bad_file_count"]))
+        print("Total number of ensembles: " + str(summary["ens_count"]))
+        print("Total Missing Ensembles: " + str(summary["missing_ens_count"]))
+        print("Total Bad Checksum: " + str(summary["crc_fail_count"]))
+        print("Total Bad Status: " + str(summary["bad_status_count"]))
+        print("Total Bad Voltage: " + str(summary["bad_voltage_count"]))
+        print("Total Bad Amplitude (0dB): " + str(summary["bad_amp_0db_count"]))
+        print("Total Bad Correlation (100%): " + str(summary["bad_corr_100pct_count"]))
+        print("Checked {:.1f} MB in {:.1f} s ({:.1f} MB/s)".format(summary["file_size"] / 1e6, summary["elapsed"], summary["mb_per_sec"]))
+        print("---------------------------------------------")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check all the RTB ensemble files in the directories for any issues.")
+    parser.add_argument("paths", nargs="+", help="Directories or files to check.")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes.")
+    parser.add_argument("--json", default=None, help="Write the report to this JSON file.")
+    parser.add_argument("--parquet", default=None, help="Write the report to this Parquet file.")
+    parser.add_argument("--max-issues", type=int, default=1000, help="Maximum number of issues listed for each file.")
+    args = parser.parse_args()
+
+    checker = RtiCheckDir(num_workers=args.workers, max_issues=args.max_issues)
+    check_report = checker.process(args.paths)
+    RtiCheckDir.print_summary(check_report)
+
+    if args.json:
+        RtiCheckDir.write_json(check_report, args.json)
+    if args.parquet:
+        RtiCheckDir.write_parquet(check_report, args.parquet)
@@ -0,0 +1,85 @@
+"""
+Measure the CSV export throughput in ensembles per second.
+This compares writing the lines from Ensemble.encode_csv() against the RtiCsvWriter.
+The time to decode the ensembles is not included.
+
+python -m rti_python.Utilities.csv_export_benchmark /path/to/file.ens --max-ens 1000
+"""
+import argparse
+import os
+import tempfile
+import time
+from rti_python.Codecs.BinaryCodec import BinaryCodec
+from rti_python.Codecs.BinaryCodec import EnsembleFramer
+from rti_python.Writer.rti_csv import RtiCsvWriter
+
+
+def read_ensembles(ens_file_path, max_ens=None):
+    """
+    Decode the ensembles in the file.
+    :param ens_file_path: Ensemble file path.
+    :param max_ens: Maximum number of ensembles to decode.
+    :return: List of ensembles.
+    """
+    ensembles = []
+    framer = EnsembleFramer()
+    with open(ens_file_path, "rb") as f:
+        while framer.read_file(f, 1024 * 1024):
+            for ens_bin in framer.frames():
+                ensembles.append(BinaryCodec.decode_data_sets(ens_bin))
+                if max_ens and len(ensembles) >= max_ens:
+                    return ensembles
+
+    return ensembles
+
+
+def encode_csv_throughput(ens_list, csv_file_path):
+    """
+    Write the lines from Ensemble.encode_csv() to the file.
+    :param ens_list: List of ensembles.
+    :param csv_file_path: CSV file path.
+    :return: Ensembles per second.
+    """
+    start_time = time.perf_counter()
+    with open(csv_file_path, "w") as f:
+        for ens in ens_list:
+            for line in ens.encode_csv():
+                # Earth Velocity lines are in a list
+                if isinstance(line, list):
+                    line = line[0]
+                f.write(line + "\n")
+
+    return len(ens_list) / (time.perf_counter() - start_time)
+
+
+def writer_throughput(ens_list, csv_file_path, layout):
+    """
+    Write the ensembles with the RtiCsvWriter.
+    :param ens_list: List of ensembles.
+    :param csv_file_path: CSV file path.
+    :param layout: "long" or "wide".
+    :return: Ensembles per second.
+    """
+    start_time = time.perf_counter()
+    writer = RtiCsvWriter(csv_file_path, layout=layout)
+    for ens in ens_list:
+        writer.write(ens)
+    writer.close()
+
+    return len(ens_list) / (time.perf_counter() - start_time)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="CSV export throughput.")
+    parser.add_argument("file", help="RTB ensemble file.")
+    parser.add_argument("--max-ens", type=int, default=None, help="Maximum number of ensembles to export.")
+    args = parser.parse_args()
+
+    ensembles = read_ensembles(args.file, args.max_ens)
+    print("{} ensembles".format(len(ensembles)))
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        csv_file_path = os.path.join(temp_dir, "export.csv")
+        print("encode_csv:   {:8.1f} ens/s".format(encode_csv_throughput(ensembles, csv_file_path)))
+        print("Writer long:  {:8.1f} ens/s".format(writer_throughput(ensembles, csv_file_path, RtiCsvWriter.LAYOUT_LONG)))
+        print("Writer wide:  {:8.1f} ens/s".format(writer_throughput(ensembles, csv_file_path, RtiCsvWriter.LAYOUT_WIDE)))
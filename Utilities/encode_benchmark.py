@@ -0,0 +1,116 @@
+"""
+Measure the ensemble encode throughput in ensembles per second.
+This compares Ensemble.encode() against packing the values one at a time
+into a list of ints, the way the ensembles were originally encoded.
+The time to decode the ensembles is not included.
+
+python -m rti_python.Utilities.encode_benchmark /path/to/file.ens --max-ens 1000
+"""
+import argparse
+import binascii
+import struct
+import time
+from rti_python.Ensemble.Ensemble import Ensemble
+from rti_python.Codecs.BinaryCodec import BinaryCodec
+from rti_python.Codecs.BinaryCodec import EnsembleFramer
+
+
+# [Bin x Beam] datasets and the attribute with the values
+BIN_BEAM_DATASETS = [("Amplitude", "Amplitude"),
+                     ("Correlation", "Correlation"),
+                     ("BeamVelocity", "Velocities"),
+                     ("InstrumentVelocity", "Velocities"),
+                     ("EarthVelocity", "Velocities"),
+                     ("GoodBeam", "GoodBeam"),
+                     ("GoodEarth", "GoodEarth")]
+
+
+def read_ensembles(ens_file_path, max_ens=None):
+    """
+    Decode the ensembles in the file.
+    :param ens_file_path: Ensemble file path.
+    :param max_ens: Maximum number of ensembles to decode.  None = All.
+    :return: List of ensembles.
+    """
+    ens_list = []
+    framer = EnsembleFramer()
+    with open(ens_file_path, "rb") as f:
+        while framer.read_file(f, 1024 * 1024):
+            for ens_bin in framer.frames():
+                ens_list.append(BinaryCodec.decode_data_sets(ens_bin))
+                if max_ens and len(ens_list) >= max_ens:
+                    return ens_list
+
+    return ens_list
+
+
+def value_by_value_encode(ens):
+    """
+    Encode the ensemble by packing each value into a list of ints.
+    The [Bin x Beam] datasets are packed one value at a time.  The other
+    datasets are small, so their encode() is used.
+    :param ens: Ensemble to encode.
+    :return: Bytearray of the ensemble.
+    """
+    payload = []
+    if ens.IsEnsembleData:
+        payload += ens.EnsembleData.encode()
+    if ens.IsAncillaryData:
+        payload += ens.AncillaryData.encode()
+
+    for ds_name, values_name in BIN_BEAM_DATASETS:
+        if getattr(ens, "Is" + ds_name):
+            ds = getattr(ens, ds_name)
+            values = getattr(ds, values_name)
+            payload += Ensemble.generate_header(ds.ds_type, ds.num_elements, ds.element_multiplier, ds.image, ds.name_len, ds.Name)
+            for beam in range(ds.element_multiplier):
+                for bin_num in range(ds.num_elements):
+                    if ds.ds_type == 20:
+                        payload += Ensemble.int32_to_bytes(values[bin_num][beam])
+                    else:
+                        payload += Ensemble.float_to_bytes(values[bin_num][beam])
+
+    if ens.IsBottomTrack:
+        payload += ens.BottomTrack.encode()
+    if ens.IsRangeTracking:
+        payload += ens.RangeTracking.encode()
+    if ens.IsSystemSetup:
+        payload += ens.SystemSetup.encode()
+    if ens.IsNmeaData:
+        payload += ens.NmeaData.encode()
+
+    ens_num = ens.EnsembleData.EnsembleNumber if ens.IsEnsembleData else 0
+
+    result = []
+    result += Ensemble.generate_ens_header(ens_num, len(payload))
+    result += payload
+    result += struct.pack("I", binascii.crc_hqx(bytes(payload), 0))
+
+    return bytearray(result)
+
+
+def encode_throughput(ens_list, encode):
+    """
+    Encode all the ensembles.
+    :param ens_list: List of ensembles.
+    :param encode: Function to encode an ensemble.
+    :return: Ensembles per second.
+    """
+    start_time = time.perf_counter()
+    for ens in ens_list:
+        encode(ens)
+
+    return len(ens_list) / (time.perf_counter() - start_time)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Ensemble encode throughput.")
+    parser.add_argument("file", help="RTB ensemble file.")
+    parser.add_argument("--max-ens", type=int, default=None, help="Maximum number of ensembles to encode.")
+    args = parser.parse_args()
+
+    ensembles = read_ensembles(args.file, args.max_ens)
+    print("{} ensembles".format(len(ensembles)))
+
+    print("Value by value:  {:8.1f} ens/s".format(encode_throughput(ensembles, value_by_value_encode)))
+    print("Ensemble.encode: {:8.1f} ens/s".format(encode_throughput(ensembles, lambda ens: ens.encode())))
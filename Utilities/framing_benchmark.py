@@ -0,0 +1,87 @@
+"""
+Measure the throughput of finding and verifying the ensembles in an RTB file.
+This compares the EnsembleFramer against splitting a growing buffer on the delimiter.
+
+python -m rti_python.Utilities.framing_benchmark /path/to/file.ens --decode
+"""
+import argparse
+import os
+import time
+from rti_python.Codecs.BinaryCodec import BinaryCodec
+from rti_python.Codecs.BinaryCodec import EnsembleFramer
+
+
+def split_throughput(ens_file_path, block_size=4096, decode=False):
+    """
+    Find the ensembles by accumulating the data and splitting on the delimiter.
+    This is how the file was read before the EnsembleFramer.
+    :param ens_file_path: Ensemble file path.
+    :param block_size: Number of bytes to read at a time.
+    :param decode: TRUE = Also decode the ensembles.
+    :return: Number of good ensembles, MB/s
+    """
+    DELIMITER = b'\x80' * 16
+    ens_count = 0
+    buff = bytes()
+
+    start_time = time.perf_counter()
+    with open(ens_file_path, "rb") as f:
+        data = f.read(block_size)
+        while data:
+            buff += data
+            if DELIMITER in buff:
+                chunks = buff.split(DELIMITER)
+                buff = chunks.pop()
+
+                for chunk in chunks:
+                    ens_bin = DELIMITER + chunk
+                    if BinaryCodec.verify_ens_data(ens_bin):
+                        ens_count += 1
+                        if decode:
+                            BinaryCodec.decode_data_sets(ens_bin)
+
+            data = f.read(block_size)
+
+    # Process whatever is remaining in the buffer
+    if BinaryCodec.verify_ens_data(DELIMITER + buff):
+        ens_count += 1
+        if decode:
+            BinaryCodec.decode_data_sets(DELIMITER + buff)
+
+    elapsed = time.perf_counter() - start_time
+    return ens_count, os.path.getsize(ens_file_path) / elapsed / 1e6
+
+
+def framer_throughput(ens_file_path, block_size=4096, decode=False):
+    """
+    Find the ensembles with the EnsembleFramer.
+    :param ens_file_path: Ensemble file path.
+    :param block_size: Number of bytes to read at a time.
+    :param decode: TRUE = Also decode the ensembles.
+    :return: Number of good ensembles, MB/s
+    """
+    framer = EnsembleFramer()
+
+    start_time = time.perf_counter()
+    with open(ens_file_path, "rb") as f:
+        while framer.read_file(f, block_size):
+            for ens_bin in framer.frames():
+                if decode:
+                    BinaryCodec.decode_data_sets(ens_bin)
+
+    elapsed = time.perf_counter() - start_time
+    return framer.ens_count, os.path.getsize(ens_file_path) / elapsed / 1e6
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="RTB ensemble framing throughput.")
+    parser.add_argument("file", help="RTB ensemble file.")
+    parser.add_argument("--block-size", type=int, default=4096, help="Number of bytes to read at a time.")
+    parser.add_argument("--decode", action="store_true", help="Also decode the ensembles.")
+    args = parser.parse_args()
+
+    count, mb_per_sec = split_throughput(args.file, args.block_size, args.decode)
+    print("Split:  {} ensembles  {:.1f} MB/s".format(count, mb_per_sec))
+
+    count, mb_per_sec = framer_throughput(args.file, args.block_size, args.decode)
+    print("Framer: {} ensembles  {:.1f} MB/s".format(count, mb_per_sec))
@@ -0,0 +1,322 @@
+import mmap
+import os
+import logging
+import numpy as np
+from rti_python.Ensemble.Ensemble import Ensemble
+from rti_python.Ensemble.EnsembleData import EnsembleData
+from rti_python.Codecs.BinaryCodec import BinaryCodec
+from rti_python.Codecs.BinaryCodec import EnsembleFramer
+
+
+class IndexedBinaryFile:
+    """
+    Random access to the ensembles in an RTB file.
+
+    The file is memory mapped and an index of every good ensemble is
+    created.  The index contains the offset, length, ensemble number,
+    date and time and subsystem code and configuration of each ensemble.
+    The index is saved next to the file (file path + ".idx") and reused
+    the next time the file is opened, unless the file has changed.
+
+    Only the ensembles requested are decoded.
+
+    with IndexedBinaryFile("/path/to/file.ens") as ens_file:
+        ens = ens_file[10]
+        for ens in ens_file.time_range(start_dt, end_dt):
+            print(ens.EnsembleData.EnsembleNumber)
+    """
+
+    # Sidecar index file extension
+    INDEX_EXT = ".idx"
+
+    # Index entry for each ensemble
+    INDEX_DTYPE = np.dtype([('offset', '<i8'),
+                            ('length', '<i4'),
+                            ('ens_num', '<i4'),
+                            ('date_time', '<M8[us]'),
+                            ('ss_code', 'S1'),
+                            ('ss_config', '<i4')])
+
+    def __init__(self, ens_file_path, use_index_file=True, verify=True, use_np=False):
+        """
+        Open the file and load or create the index.
+        :param ens_file_path: Ensemble file path.
+        :param use_index_file: TRUE = Load the index file if it is up to date and save the index file when created.
+        :param verify: TRUE = Verify the checksum of each ensemble when creating the index.
+        :param use_np: TRUE = Use numpy to decode the [Bin x Beam] datasets.
+        """
+        self.file_path = ens_file_path
+        self.index_file_path = ens_file_path + IndexedBinaryFile.INDEX_EXT
+        self.use_np = use_np
+        self._ens_num_lookup = None
+        self._time_order = None
+
+        # Memory map the file
+        self.file = open(ens_file_path, "rb")
+        if os.path.getsize(ens_file_path) > 0:
+            self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.mm = b''
+
+        # Load the index or create the index
+        self.index = None
+        if use_index_file:
+            self.index = self.load_index()
+        if self.index is None:
+            self.index = self.create_index(verify)
+            if use_index_file:
+                self.save_index()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        """
+        Number of ensembles in the file.
+        """
+        return len(self.index)
+
+    def __getitem__(self, i):
+        """
+        Decode the ensemble at the given index.
+        :param i: Index of the ensemble in the file.
+        :return: Decoded ensemble.
+        """
+        return BinaryCodec.decode_data_sets(self.get_raw(i), self.use_np)
+
+    def __iter__(self):
+        for i in range(len(self.index)):
+            yield self[i]
+
+    def close(self):
+        """
+        Close the memory map and the file.
+        :return:
+        """
+        if isinstance(self.mm, mmap.mmap):
+            self.mm.close()
+        self.file.close()
+
+    def get_raw(self, i):
+        """
+        Get the binary data of the ensemble at the given index.
+        :param i: Index of the ensemble in the file.
+        :return: Binary ensemble data.
+        """
+        entry = self.index[i]
+        return self.mm[entry['offset']:entry['offset'] + entry['length']]
+
+    def create_index(self, verify=True):
+        """
+        Scan the file for all the ensembles and create the index.
+        :param verify: TRUE = Verify the checksum of each ensemble.
+        :return: Index array.
+        """
+        entries = []
+        file_size = len(self.mm)
+        delimiter = EnsembleFramer.DELIMITER
+
+        with memoryview(self.mm) as view:
+            pos = self.mm.find(delimiter, 0)
+            while 0 <= pos <= file_size - Ensemble.HeaderSize:
+                # Verify the header and the ensemble is complete
+                ens_size = EnsembleFramer.get_ens_size(self.mm, pos)
+                if not ens_size or pos + ens_size > file_size:
+                    pos = self.mm.find(delimiter, pos + 1)
+                    continue
+
+                # Verify the checksum
+                ens_bin = view[pos:pos + ens_size]
+                if verify and not BinaryCodec.verify_ens_data(ens_bin):
+                    ens_bin.release()
+                    pos = self.mm.find(delimiter, pos + 1)
+                    continue
+
+                ens_num, dt, ss_code, ss_config = IndexedBinaryFile.get_ens_info(ens_bin)
+                ens_bin.release()
+                entries.append((pos, ens_size, ens_num, dt, ss_code, ss_config))
+
+                # Move to the next ensemble
+                pos = self.mm.find(delimiter, pos + ens_size)
+
+        logging.debug("Indexed " + str(len(entries)) + " ensembles in " + self.file_path)
+        return np.array(entries, dtype=IndexedBinaryFile.INDEX_DTYPE)
+
+    @staticmethod
+    def get_ens_info(ens_bin):
+        """
+        Decode only the Ensemble Data dataset to get the
+        ensemble number, date and time and subsystem.
+        If there is no Ensemble Data, the ensemble number
+        is taken from the header.
+        :param ens_bin: Binary ensemble data.
+        :return: Ensemble Number, datetime (or None), Subsystem Code, Subsystem Config
+        """
+        ens_num = Ensemble.GetInt32(16, Ensemble.BytesInInt32, ens_bin)
+        ens_end = len(ens_bin) - Ensemble.ChecksumSize
+        packet_pointer = Ensemble.HeaderSize
+
+        # Look through the dataset headers for the Ensemble Data
+        while packet_pointer + Ensemble.GetBaseDataSize(8) <= ens_end:
+            ds_type = Ensemble.GetInt32(packet_pointer, Ensemble.BytesInInt32, ens_bin)
+            num_elements = Ensemble.GetInt32(packet_pointer + Ensemble.BytesInInt32 * 1, Ensemble.BytesInInt32, ens_bin)
+            element_multiplier = Ensemble.GetInt32(packet_pointer + Ensemble.BytesInInt32 * 2, Ensemble.BytesInInt32, ens_bin)
+            name_len = Ensemble.GetInt32(packet_pointer + Ensemble.BytesInInt32 * 4, Ensemble.BytesInInt32, ens_bin)
+            name = bytes(ens_bin[packet_pointer + Ensemble.BytesInInt32 * 5:packet_pointer + Ensemble.BytesInInt32 * 5 + 8])
+            data_set_size = Ensemble.GetDataSetSize(ds_type, name_len, num_elements, element_multiplier)
+            if data_set_size <= 0:
+                break
+
+            if b"E000008" in name:
+                ed = EnsembleData(num_elements, element_multiplier)
+                try:
+                    ed.decode(ens_bin[packet_pointer:packet_pointer + data_set_size])
+                except Exception as e:
+                    logging.warning("Error decoding the Ensemble Data. " + str(e))
+                    break
+
+                # Do not use ed.datetime(), it gives the current time if the date is bad
+                return ed.EnsembleNumber, ed.valid_datetime(), ed.SysFirmwareSubsystemCode, ed.SubsystemConfig
+
+            packet_pointer += data_set_size
+
+        return ens_num, None, "", 0
+
+    def load_index(self):
+        """
+        Load the index file.  The index file is only used if it
+        is newer than the ensemble file.
+        :return: Index array or None if the index file could not be used.
+        """
+        try:
+            if not os.path.exists(self.index_file_path):
+                return None
+            if os.path.getmtime(self.index_file_path) < os.path.getmtime(self.file_path):
+                return None
+
+            with open(self.index_file_path, "rb") as f:
+                index = np.load(f, allow_pickle=False)
+
+            if index.dtype != IndexedBinaryFile.INDEX_DTYPE:
+                return None
+
+            # Verify the index fits the file
+            if len(index) > 0 and index['offset'][-1] + index['length'][-1] > len(self.mm):
+                return None
+
+            return index
+        except Exception as e:
+            logging.warning("Error loading the index file. " + str(e))
+            return None
+
+    def save_index(self):
+        """
+        Save the index next to the ensemble file.
+        :return:
+        """
+        try:
+            with open(self.index_file_path, "wb") as f:
+                np.save(f, self.index, allow_pickle=False)
+        except Exception as e:
+            logging.warning("Error saving the index file. " + str(e))
+
+    def index_of_ens_num(self, ens_num, ss_code=None, ss_config=None):
+        """
+        Find the index of the given ensemble number.
+        :param ens_num: Ensemble number.
+        :param ss_code: Subsystem code.  None = Any subsystem code.
+        :param ss_config: Subsystem configuration.  None = Any subsystem configuration.
+        :return: Index of the first matching ensemble or -1 if not found.
+        """
+        # Create the lookup the first time it is used
+        if self._ens_num_lookup is None:
+            self._ens_num_lookup = {}
+            for i, num in enumerate(self.index['ens_num'].tolist()):
+                self._ens_num_lookup.setdefault(num, []).append(i)
+
+        for i in self._ens_num_lookup.get(ens_num, []):
+            if self._is_subsystem(i, ss_code, ss_config):
+                return i
+
+        return -1
+
+    def get_ens_num(self, ens_num, ss_code=None, ss_config=None):
+        """
+        Decode the ensemble with the given ensemble number.
+        :param ens_num: Ensemble number.
+        :param ss_code: Subsystem code.  None = Any subsystem code.
+        :param ss_config: Subsystem configuration.  None = Any subsystem configuration.
+        :return: Decoded ensemble or None if not found.
+        """
+        i = self.index_of_ens_num(ens_num, ss_code, ss_config)
+        if i < 0:
+            return None
+
+        return self[i]
+
+    def indices_in_time_range(self, start_dt, end_dt, ss_code=None, ss_config=None):
+        """
+        Find the index of all the ensembles within the time range.
+        :param start_dt: Start datetime.  Included.
+        :param end_dt: End datetime.  Not included.
+        :param ss_code: Subsystem code.  None = Any subsystem code.
+        :param ss_config: Subsystem configuration.  None = Any subsystem configuration.
+        :return: Array of indices in time order.
+        """
+        # Sort the times the first time it is used
+        # Ensembles without a date and time (NaT) are sorted to the end
+        if self._time_order is None:
+            self._time_order = np.argsort(self.index['date_time'], kind='stable')
+
+        times = self.index['date_time'][self._time_order]
+        first = np.searchsorted(times, np.datetime64(start_dt, 'us'), side='left')
+        last = np.searchsorted(times, np.datetime64(end_dt, 'us'), side='left')
+        indices = self._time_order[first:last]
+
+        return indices[self._subsystem_mask(indices, ss_code, ss_config)]
+
+    def time_range(self, start_dt, end_dt, ss_code=None, ss_config=None):
+        """
+        Decode all the ensembles within the time range.
+        :param start_dt: Start datetime.  Included.
+        :param end_dt: End datetime.  Not included.
+        :param ss_code: Subsystem code.  None = Any subsystem code.
+        :param ss_config: Subsystem configuration.  None = Any subsystem configuration.
+        :return: Generator of decoded ensembles in time order.
+        """
+        for i in self.indices_in_time_range(start_dt, end_dt, ss_code, ss_config):
+            yield self[i]
+
+    def indices_for_subsystem(self, ss_code=None, ss_config=None):
+        """
+        Find the index of all the ensembles for the given subsystem.
+        :param ss_code: Subsystem code.  None = Any subsystem code.
+        :param ss_config: Subsystem configuration.  None = Any subsystem configuration.
+        :return: Array of indices in file order.
+        """
+        indices = np.arange(len(self.index))
+        return indices[self._subsystem_mask(indices, ss_code, ss_config)]
+
+    def _is_subsystem(self, i, ss_code, ss_config):
+        """
+        Check if the ensemble at the index matches the subsystem.
+        """
+        if ss_code is not None and self.index['ss_code'][i] != ss_code.encode():
+            return False
+        if ss_config is not None and self.index['ss_config'][i] != ss_config:
+            return False
+        return True
+
+    def _subsystem_mask(self, indices, ss_code, ss_config):
+        """
+        Create a mask of the indices that match the subsystem.
+        """
+        mask = np.ones(len(indices), dtype=bool)
+        if ss_code is not None:
+            mask &= self.index['ss_code'][indices] == ss_code.encode()
+        if ss_config is not None:
+            mask &= self.index['ss_config'][indices] == ss_config
+        return mask
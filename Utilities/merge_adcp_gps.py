@@ -3,12 +3,11 @@ from os import listdir
 from os.path import isfile, join
 import logging
 from tqdm import tqdm
-import pynmea2
 import datetime
-import time
-import pandas as pd
+import numpy as np
 
 from rti_python.Codecs.BinaryCodec import BinaryCodec
+from rti_python.Codecs.BinaryCodec import EnsembleFramer
 from rti_python.Ensemble.NmeaData import NmeaData
 
 
@@ -21,9 +20,20 @@ class MergeAdcpGps:
     It will then map all the GPS data to a time.
     It will then read in the ADCP and match the time from the GPS and the ADCP.
 
+    The GPS blocks are kept in a sorted NumPy datetime64 array with a list of
+    the NMEA datasets in the same order.  Each ensemble is matched to the last
+    GPS block within the time tolerance with a binary search, so the GPS data
+    is only loaded once and each lookup is O(log n).  The ADCP files are read
+    and written in a stream, so only a batch of ensembles is in memory.
     """
 
-    def __init__(self, gps_folder_path, adcp_folder_path):
+    # Size of the data read from the ADCP file at a time
+    READ_SIZE = 1024 * 1024
+
+    # Size of the output buffer before it is written to the file
+    WRITE_SIZE = 4096 * 30
+
+    def __init__(self, gps_folder_path, adcp_folder_path, tolerance=datetime.timedelta(seconds=1)):
         """
         Give the GPS folder and ADCP folder paths.
         It will then read in all the GPS data and map it to a time.
@@ -31,6 +41,7 @@ class MergeAdcpGps:
         :param self:
         :param gps_folder_path: GPS Folder
         :param adcp_folder_path: ADCP Folder
+        :param tolerance: Time range for the GPS data and ensemble data to match.
         :return:
         """
         # Usually GPS messages come in blocks
@@ -40,15 +51,16 @@ class MergeAdcpGps:
         # off one of the GPS messages (GGA) in the block
         self.LAST_GPS_ID = '$GPRMC'
 
-        # GPS Dataframe List.  The list will contain a a NMEA dataset
-        # and a datetime as the index
-        self.gps_df = pd.DataFrame(columns=['dt', 'nmea'])
+        # Time range for the GPS data and ensemble data to match
+        self.tolerance = np.timedelta64(tolerance)
 
-        # ADCP List.  List of all the ADCP data.
-        self.adcp_list = []
+        # GPS index.  Sorted datetime of the GPS blocks and
+        # the NMEA dataset of each block in the same order
+        self.gps_times = np.empty(0, dtype='datetime64[us]')
+        self.gps_nmea = []
 
         # Write in batches, so buffer up the data to write
-        self.batch_write = bytes()
+        self.batch_write = bytearray()
 
         # Load the GPS data
         self.load_gps_dir(gps_folder_path)
@@ -56,7 +68,6 @@ class MergeAdcpGps:
         # Load the ADCP data and merge it with GPS data
         self.load_adcp_dir(adcp_folder_path)
 
-
     def load_gps_dir(self, folder_path):
         """
         Load all the GPS data in the GPS directory.
@@ -72,16 +83,29 @@ class MergeAdcpGps:
         gps_files = [f for f in listdir(folder_path) if isfile(join(folder_path, f))]
 
         # Read in all the GPS data
-        for gps in gps_files:
-            self.read_gps_data(folder_path + os.sep + gps)
+        gps_times = []
+        gps_nmea = []
+        for gps in sorted(gps_files):
+            times, nmea = self.read_gps_data(folder_path + os.sep + gps)
+            gps_times += times
+            gps_nmea += nmea
+
+        # Sort the GPS data by time once all the files are loaded
+        self.add_gps_data(gps_times, gps_nmea)
 
     def read_gps_data(self, file_name):
         """
         Read in the GPS data from the file.
         Create blocks of GPS data based off the last GPS ID.
+
+        The time of the block is the GGA time (UTC) without the timezone,
+        like the ensemble time.  The date is from the RMC message.  If the
+        block has no RMC date, today's date is used.
         :param file_name: File path
-        :return:
+        :return: List of the datetime of each block and list of the NMEA dataset of each block.
         """
+        gps_times = []
+        gps_nmea = []
 
         # Create a NMEA dataset to create a GPS block
         nmea_dataset = NmeaData()
@@ -98,20 +122,63 @@ class MergeAdcpGps:
                 # When the last GPS id is found, add it to the list
                 if self.LAST_GPS_ID in gps_line:
 
-                    # Create a new entry in the dataframe
+                    # Add the block with its date and time
                     if nmea_dataset.datetime:
-                        self.gps_df = self.gps_df.append({'dt': datetime.datetime.combine(datetime.datetime.now().date(), nmea_dataset.datetime), 'nmea': nmea_dataset}, ignore_index=True)
+                        gps_times.append(datetime.datetime.combine(MergeAdcpGps.get_gps_date(nmea_dataset), nmea_dataset.datetime.replace(tzinfo=None)))
+                        gps_nmea.append(nmea_dataset)
 
                     # Create a new dataset
                     nmea_dataset = NmeaData()
 
-        # Close the file
-        f.close()
+        return gps_times, gps_nmea
+
+    @staticmethod
+    def get_gps_date(nmea_dataset):
+        """
+        Get the date of the GPS block from the RMC message.
+        :param nmea_dataset: NMEA dataset of the GPS block.
+        :return: Date from the RMC message or today's date if there is no date.
+        """
+        if nmea_dataset.GPRMC is not None and nmea_dataset.GPRMC.datestamp:
+            return nmea_dataset.GPRMC.datestamp
+
+        return datetime.datetime.now().date()
+
+    def add_gps_data(self, gps_times, gps_nmea):
+        """
+        Add the GPS blocks to the GPS index and sort the index by time.
+        A stable sort is used, so blocks with the same time stay in the order loaded.
+        :param gps_times: List of datetime of each GPS block.
+        :param gps_nmea: List of NMEA dataset of each GPS block.
+        :return:
+        """
+        times = np.concatenate((self.gps_times, np.array(gps_times, dtype='datetime64[us]')))
+        nmea = self.gps_nmea + list(gps_nmea)
+
+        order = np.argsort(times, kind='stable')
+        self.gps_times = times[order]
+        self.gps_nmea = [nmea[i] for i in order]
+
+    def match_gps(self, ens_times, tolerance=None):
+        """
+        Find the GPS block for each ensemble time.  The last GPS block within
+        the time tolerance of the ensemble time is used.
+        :param ens_times: Array of datetime64 of the ensembles.
+        :param tolerance: Time range for the GPS data and ensemble data to match.  None = Use the tolerance of this object.
+        :return: Array with the index of the GPS block for each ensemble.  -1 if no GPS block matches.
+        """
+        ens_times = np.asarray(ens_times, dtype='datetime64[us]')
+        tolerance = self.tolerance if tolerance is None else np.timedelta64(tolerance)
+
+        # Last GPS block before the end of the time range
+        index = np.searchsorted(self.gps_times, ens_times + tolerance, side='right') - 1
 
-        # Move datetime column to the index
-        self.gps_df['datetime'] = pd.to_datetime(self.gps_df['dt'])
-        self.gps_df = self.gps_df.set_index('datetime')
-        self.gps_df.drop(['dt'], axis=1, inplace=True)
+        # Verify the GPS block is after the start of the time range
+        found = index >= 0
+        found[found] = self.gps_times[index[found]] >= ens_times[found] - tolerance
+        index[~found] = -1
+
+        return index
 
     def load_adcp_dir(self, folder_path):
         """
@@ -134,55 +201,71 @@ class MergeAdcpGps:
     def read_adcp_data(self, file_path):
         """
         Read in the data from the file.  Find all the ensembles.
+        The ensembles found in each read are merged with the GPS data as a batch.
         :param file_path: File path to file.
         :return:
         """
-        DELIMITER = b'\x80' * 16
-        datetime_delta = datetime.timedelta(seconds=1)          # Time range for GPS data and Ens data
-
         # Create Output file path
         file_name = os.path.splitext(file_path)[0]              # Get the file name
         mod_file_path = file_name + "_gps.ens"                  # Create a new file path
 
-        # Create a buffer
-        buff = bytes()
+        # Find the ensembles in the file
+        framer = EnsembleFramer()
 
         print("Processing ADCP Data: " + file_path)
 
         with tqdm(total=os.path.getsize(file_path)) as pbar:
 
-            # Open the output file
-            with open(mod_file_path, "wb") as output_file:
-                # Open the file
-                file = open(file_path, 'rb')
+            # Open the input and output file
+            with open(file_path, 'rb') as file, open(mod_file_path, "wb") as output_file:
+                num_read = framer.read_file(file, MergeAdcpGps.READ_SIZE)   # Read in data
+                while num_read:                                             # Verify data was found
+                    pbar.update(num_read)                                   # Update the progressbar
 
-                data = file.read(4096)                                  # Read in data
-                pbar.update(len(data))                                  # Update the progressbar
+                    # Decode all the ensembles found and merge them with the GPS data
+                    ens_list = [BinaryCodec.decode_data_sets(ens_bin) for ens_bin in framer.frames()]
+                    self.process_ens_list(ens_list, output_file)
 
-                while data:                                             # Verify data was found
-                    buff += data                                        # Accumulate the buffer
-                    if DELIMITER in buff:                               # Check for the delimiter
-                        chunks = buff.split(DELIMITER)                  # If delimiter found, split to get the remaining buffer data
-                        buff = chunks.pop()                             # Put the remaining data back in the buffer
-                        for chunk in chunks:                            # Take out the ens data
-                            self.process_ens_bin(DELIMITER + chunk,     # Combine the delimiter and ens data
-                                                 datetime_delta,        # Time Range
-                                                 output_file)           # Output file
-                    data = file.read(4096)                              # Read the next batch of data
-                    pbar.update(len(data))                              # Update the progressbar
+                    num_read = framer.read_file(file, MergeAdcpGps.READ_SIZE)  # Read the next batch of data
 
-                # Process whatever is remaining in the buffer
+                # Write the remaining ensembles to the file
+                output_file.write(self.batch_write)
+                self.batch_write = bytearray()
 
+    def process_ens_list(self, ens_list, output_file, tolerance=None):
+        """
+        Merge the GPS data into the ensembles.  Then write the ensembles to the new file.
+        All the ensembles are matched to the GPS data with one search.
+
+        Write the output file in batches to save on writes.
+        :param ens_list: List of decoded ensembles.
+        :param output_file: Output file.
+        :param tolerance: Time range for the GPS data and ensemble data to match.  None = Use the tolerance of this object.
+        :return:
+        """
+        ens_list = [ens for ens in ens_list if ens]
+        if not ens_list:
+            return
 
+        # Find the GPS data for the ensembles with a time
+        timed_ens = [ens for ens in ens_list if ens.IsEnsembleData]
+        if timed_ens and len(self.gps_times) > 0:
+            ens_times = np.array([ens.EnsembleData.datetime() for ens in timed_ens], dtype='datetime64[us]')
+            for ens, gps_index in zip(timed_ens, self.match_gps(ens_times, tolerance)):
+                # Add the NMEA data to the file if it exist
+                if gps_index >= 0:
+                    ens.AddNmeaData(self.gps_nmea[gps_index])
 
-                # Close the input files
-                file.close()
+        for ens in ens_list:
+            # Accumulate the buffer
+            self.batch_write += ens.encode()
 
-                # Write the remaining ensembles to the file
+            if len(self.batch_write) > MergeAdcpGps.WRITE_SIZE:
+                # Write the ensemble to the file
                 output_file.write(self.batch_write)
 
-            # Close the output file
-            output_file.close()
+                # Clear the buffer
+                self.batch_write = bytearray()
 
     def process_ens_bin(self, ens_bin, datetime_delta, output_file):
         """
@@ -203,31 +286,8 @@ class MergeAdcpGps:
             # Decode the ens binary data
             ens = BinaryCodec.decode_data_sets(ens_bin)
 
-            # Add the ensemble to the list
-            if ens:
-                # Find the GPS datetime in the dictionary matching the datetime range
-                min_time = (ens.EnsembleData.datetime() - datetime_delta).time()
-                max_time = (ens.EnsembleData.datetime() + datetime_delta).time()
-                matching_key = self.gps_df[min_time:max_time]
-
-                # Get the last matching key
-                nmea_ds = None
-                if not matching_key.empty:
-                    nmea_ds = matching_key[-1:]['nmea'].item()
-
-                # Add the NMEA data to the file if it exist
-                if nmea_ds:
-                    ens.AddNmeaData(nmea_ds)
-
-                # Accumulate the buffer
-                self.batch_write += ens.encode()
-
-                if len(self.batch_write) > 4096 * 30:
-                    # Write the ensemble to the file
-                    output_file.write(self.batch_write)
-
-                    # Clear the buffer
-                    self.batch_write = bytes()
+            # Use the given time range
+            self.process_ens_list([ens], output_file, datetime_delta)
 
 
 if __name__ == '__main__':
@@ -241,4 +301,4 @@ if __name__ == '__main__':
 
 
     MergeAdcpGps(gps_folder, adcp_folder)
-    print("process complete")
\ No newline at end of file
+    print("process complete")
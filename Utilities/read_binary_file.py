@@ -1,4 +1,6 @@
 from rti_python.Codecs.BinaryCodec import BinaryCodec
+from rti_python.Codecs.BinaryCodec import EnsembleFramer
+from rti_python.Codecs.BinaryCodecParallel import BinaryCodecParallel
 from obsub import event
 import logging
 import os
@@ -13,50 +15,64 @@ class ReadBinaryFile:
         :param ens_file_path: Ensemble file path.
         :return:
         """
-        # RTB ensemble delimiter
-        DELIMITER = b'\x80' * 16
-
         BLOCK_SIZE = 4096
 
         # Get the total file size to keep track of total bytes read and show progress
         file_size = os.path.getsize(ens_file_path)
         bytes_read = 0
 
-        # Create a buffer
-        buff = bytes()
+        # Create a framer to find the ensembles
+        # The file data is read directly into the framer buffer
+        framer = EnsembleFramer()
 
         with open(ens_file_path, "rb") as f:
 
             # Read in the file
-            # for chunk in iter(lambda: f.read(4096), b''):
-            #    self.adcp_codec.add(chunk)
-
-            data = f.read(BLOCK_SIZE)  # Read in data
+            while framer.read_file(f, BLOCK_SIZE):
 
-            # Keep track of bytes read
-            bytes_read += BLOCK_SIZE
-            self.file_progress(bytes_read, file_size, ens_file_path)
+                # Keep track of bytes read
+                bytes_read += BLOCK_SIZE
+                self.file_progress(bytes_read, file_size, ens_file_path)
 
-            while data:  # Verify data was found
-                buff += data  # Accumulate the buffer
-                if DELIMITER in buff:  # Check for the delimiter
-                    chunks = buff.split(DELIMITER)  # If delimiter found, split to get the remaining buffer data
-                    buff = chunks.pop()  # Put the remaining data back in the buffer
+                # Process all the complete ensembles
+                # The framer already verified the ensemble
+                for ens_bin in framer.frames():
+                    self.decode_playback_ens(ens_bin)
 
-                    for chunk in chunks:  # Take out the ens data
-                        self.process_playback_ens(DELIMITER + chunk)  # Process the binary ensemble data
+    def playback_parallel(self, ens_file_path, num_workers=None, use_np=True):
+        """
+        Playback the given file.  The file is decoded with multiple
+        processes.  The ensembles are passed to the event handler
+        in the same order as the file.
+        :param ens_file_path: Ensemble file path.
+        :param num_workers: Number of worker processes.  Default: Number of CPUs.
+        :param use_np: TRUE = Use numpy to decode the [Bin x Beam] datasets.
+        :return:
+        """
+        # Get the total file size to keep track of total bytes read and show progress
+        file_size = os.path.getsize(ens_file_path)
 
-                data = f.read(BLOCK_SIZE)  # Read the next batch of data
+        codec = BinaryCodecParallel(num_workers=num_workers, use_np=use_np)
+        for chunk_end, ensembles in codec.decode_file_chunks(ens_file_path):
+            for ens in ensembles:
+                # Pass the ensemble to the event handler
+                self.ensemble_event(ens)
 
-                # Keep track of bytes read
-                bytes_read += BLOCK_SIZE
-                self.file_progress(bytes_read, file_size, ens_file_path)
+            # Keep track of bytes read
+            self.file_progress(chunk_end, file_size, ens_file_path)
 
-        # Process whatever is remaining in the buffer
-        self.process_playback_ens(DELIMITER + buff)
+    def decode_playback_ens(self, ens_bin):
+        """
+        Decode the verified playback ensemble and pass it to the event handler.
+        :param ens_bin: Verified binary Ensemble data to decode
+        :return:
+        """
+        # Decode the ens binary data
+        ens = BinaryCodec.decode_data_sets(ens_bin)
 
-        # Close the file
-        f.close()
+        if ens:
+            # Pass the ensemble to the event handler
+            self.ensemble_event(ens)
 
     def process_playback_ens(self, ens_bin):
         """
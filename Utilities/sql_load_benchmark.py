@@ -0,0 +1,106 @@
+"""
+Measure the rate ensembles are loaded into a PostgreSQL project.
+This compares adding each ensemble with add_ensemble() against the
+bulk insert with COPY FROM STDIN and with execute_values.
+
+python -m rti_python.Utilities.sql_load_benchmark /path/to/file.ens --host localhost --user user --pw pw
+"""
+import argparse
+import datetime
+import time
+from rti_python.Codecs.BinaryCodec import BinaryCodec
+from rti_python.Codecs.BinaryCodec import EnsembleFramer
+from rti_python.Writer.rti_projects import RtiProjects
+from rti_python.Writer.rti_sql import rti_sql
+
+# Tables written for each ensemble
+TABLES = ['ensembles', 'beamvelocity', 'instrumentvelocity', 'earthvelocity', 'amplitude', 'correlation',
+          'goodbeamping', 'goodearthping', 'bottomtrack', 'rangetracking', 'nmea']
+
+
+def read_ensembles(ens_file_path, max_ens=None):
+    """
+    Decode the ensembles in the file.
+    :param ens_file_path: Ensemble file path.
+    :param max_ens: Maximum number of ensembles to read.  None = All.
+    :return: List of ensembles.
+    """
+    ens_list = []
+    framer = EnsembleFramer()
+    with open(ens_file_path, "rb") as f:
+        while framer.read_file(f, 1024 * 1024):
+            for ens_bin in framer.frames():
+                ens_list.append(BinaryCodec.decode_data_sets(ens_bin, use_np=True))
+                if max_ens and len(ens_list) >= max_ens:
+                    return ens_list
+
+    return ens_list
+
+
+def count_rows(conn_string):
+    """
+    Count the rows in all the ensemble tables.
+    :param conn_string: Database connection string.
+    :return: Number of rows.
+    """
+    sql = rti_sql(conn_string)
+    count = 0
+    for table in TABLES:
+        count += sql.query("SELECT count(*) FROM {0};".format(table))[0][0]
+    sql.close()
+    return count
+
+
+def load(prjs, ens_list, mode, batch_size=500):
+    """
+    Load the ensembles into a new project.
+    :param prjs: RtiProjects.
+    :param ens_list: List of ensembles.
+    :param mode: "insert", "copy" or "execute_values".
+    :param batch_size: Number of ensembles in each bulk insert.
+    :return: Ensembles/sec, Rows/sec
+    """
+    prj_name = "benchmark_" + mode + "_" + datetime.datetime.now().strftime("%Y%m%d%H%M%S%f")
+    prjs.add_prj_sql(prj_name, "")
+    start_rows = count_rows(prjs.sql_conn_string)
+
+    start_time = time.perf_counter()
+    if mode == "insert":
+        prjs.begin_batch(prj_name)
+        for ens in ens_list:
+            prjs.add_ensemble(ens)
+        prjs.end_batch()
+    else:
+        prjs.begin_bulk(prj_name, batch_size=batch_size, use_copy=(mode == "copy"))
+        for ens in ens_list:
+            prjs.add_ensemble_bulk(ens)
+        prjs.end_bulk()
+    elapsed = time.perf_counter() - start_time
+
+    rows = count_rows(prjs.sql_conn_string) - start_rows
+    return len(ens_list) / elapsed, rows / elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="PostgreSQL project load rate.")
+    parser.add_argument("file", help="RTB ensemble file.")
+    parser.add_argument("--host", default="localhost", help="Database host.")
+    parser.add_argument("--port", default=5432, help="Database port.")
+    parser.add_argument("--dbname", default="postgres", help="Database name.")
+    parser.add_argument("--user", default="user", help="Database user.")
+    parser.add_argument("--pw", default="pw", help="Database password.")
+    parser.add_argument("--max-ens", type=int, default=None, help="Maximum number of ensembles to load.")
+    parser.add_argument("--batch-size", type=int, default=500, help="Number of ensembles in each bulk insert.")
+    args = parser.parse_args()
+
+    projects = RtiProjects(host=args.host, port=args.port, dbname=args.dbname, user=args.user, pw=args.pw)
+    create_sql = rti_sql(projects.sql_conn_string)
+    create_sql.create_tables()
+    create_sql.close()
+
+    ensembles = read_ensembles(args.file, args.max_ens)
+    print("{} ensembles".format(len(ensembles)))
+
+    for load_mode in ["insert", "execute_values", "copy"]:
+        ens_per_sec, rows_per_sec = load(projects, ensembles, load_mode, args.batch_size)
+        print("{:15s} {:8.1f} ens/s  {:10.1f} rows/s".format(load_mode, ens_per_sec, rows_per_sec))
@@ -0,0 +1,258 @@
+import numpy as np
+
+
+class WaveBurst:
+    """
+    Columnar buffer of the wave ensembles in a burst.
+
+    The data of the burst is kept in preallocated float32 arrays with a row
+    for each wave ensemble.  The wave ensembles are added as they are created,
+    each with a few row assignments.  Each MATLAB variable of the WaveForce
+    file is then selected from the rows and converted to bytes with a single
+    tobytes().
+
+    Values that do not exist for an ensemble (missing bins, beams or range
+    tracking) are masked out, so a variable only contains the values that
+    exist, in ensemble then bin order.  This is the same data and order as
+    packing the values one at a time, so the file is unchanged.
+
+    burst = WaveBurst(2048, [8, 9, 10], height_source=4)
+    burst.add(ens_wave)
+    wus = burst.get_bytes(WaveBurst.WUS)
+    """
+
+    # Selected bin data [ens][bin]
+    WUS = "wus"             # East Velocity
+    WVS = "wvs"             # North Velocity
+    WZS = "wzs"             # Vertical Velocity
+    WB0 = "wb0"             # Beam 0 Beam Velocity
+    WB1 = "wb1"             # Beam 1 Beam Velocity
+    WB2 = "wb2"             # Beam 2 Beam Velocity
+    WB3 = "wb3"             # Beam 3 Beam Velocity
+    WZ0 = "wz0"             # Vertical Beam Beam Velocity
+
+    # Ensemble data [ens]
+    WR0 = "wr0"             # Beam 0 Range Tracking
+    WR1 = "wr1"             # Beam 1 Range Tracking
+    WR2 = "wr2"             # Beam 2 Range Tracking
+    WR3 = "wr3"             # Beam 3 Range Tracking
+    WPS = "wps"             # Pressure
+    WHG = "whg"             # Heading
+    WPH = "wph"             # Pitch
+    WRL = "wrl"             # Roll
+    WTS = "wts"             # Water Temp
+    WHS = "whs"             # Wave Height Source
+    WAH = "wah"             # Average Range Tracking
+    WZP = "wzp"             # Vertical Beam Pressure
+    WZR = "wzr"             # Vertical Beam Range Tracking
+
+    # Columns of the ensemble data
+    COL_PRESSURE = 0
+    COL_HEADING = 1
+    COL_PITCH = 2
+    COL_ROLL = 3
+    COL_WATER_TEMP = 4
+    COL_AVG_RANGE = 5
+    COL_HEIGHT = 6
+    COL_RANGE = 7           # Range Tracking for each beam.  Columns 7 - 10.
+    NUM_COLS = 11
+
+    MAX_BEAMS = 4
+
+    def __init__(self, num_ens, selected_bins, height_source=4):
+        """
+        Allocate the arrays for the burst.
+        :param num_ens: Maximum number of wave ensembles in the burst.  Include the vertical beam ensembles.
+        :param selected_bins: The bins selected to process.
+        :param height_source: The height source.  0-3 = Range Tracking Beam, 4 = Vertical Beam Height, 5 = Pressure.
+        """
+        num_bins = len(selected_bins)
+        self.num_selected_bins = num_bins
+        self.height_source = height_source
+        self.num_ens = 0
+
+        self.is_vertical = np.zeros(num_ens, dtype=bool)                                # Vertical beam ensemble
+        self.num_beams = np.zeros(num_ens, dtype=np.int32)                              # Number of beams
+        self.num_range = np.zeros(num_ens, dtype=np.int32)                              # Number of range tracking values
+        self.ens_data = np.zeros((num_ens, WaveBurst.NUM_COLS), dtype=np.float32)       # Pressure, Heading, Pitch ...
+
+        self.num_earth_bins = np.zeros((num_ens, 3), dtype=np.int32)                    # Number of East, North, Vertical bins
+        self.earth_vel = np.zeros((num_ens, 3, num_bins), dtype=np.float32)             # [ens][East, North, Vertical][bin]
+
+        self.num_beam_bins = np.zeros(num_ens, dtype=np.int32)                          # Number of Beam Velocity bins
+        self.beam_vel = np.zeros((num_ens, num_bins, WaveBurst.MAX_BEAMS), dtype=np.float32)   # [ens][bin][beam]
+
+        self.num_vert_bins = np.zeros(num_ens, dtype=np.int32)                          # Number of Vertical Beam bins
+        self.vert_vel = np.zeros((num_ens, num_bins), dtype=np.float32)                 # [ens][bin]
+
+    def __len__(self):
+        return self.num_ens
+
+    @property
+    def num_4beam_ens(self):
+        """
+        Number of 4 beam (or 3 beam) ensembles.
+        """
+        return int(np.count_nonzero(~self.is_vertical[:self.num_ens]))
+
+    @property
+    def num_vert_ens(self):
+        """
+        Number of vertical beam ensembles.
+        """
+        return int(np.count_nonzero(self.is_vertical[:self.num_ens]))
+
+    @property
+    def wus_cnt(self):
+        """
+        Number of 4 beam ensembles with East Velocity.
+        """
+        return self.count_earth_ens(0)
+
+    @property
+    def wvs_cnt(self):
+        """
+        Number of 4 beam ensembles with North Velocity.
+        """
+        return self.count_earth_ens(1)
+
+    @property
+    def wzs_cnt(self):
+        """
+        Number of 4 beam ensembles with Vertical Velocity.
+        """
+        return self.count_earth_ens(2)
+
+    def count_earth_ens(self, index):
+        """
+        Count the 4 beam ensembles with Earth Velocity data.
+        :param index: 0 = East, 1 = North, 2 = Vertical.
+        :return: Number of ensembles.
+        """
+        has_data = self.num_earth_bins[:self.num_ens, index] > 0
+        return int(np.count_nonzero(has_data & ~self.is_vertical[:self.num_ens]))
+
+    def add(self, ens_wave):
+        """
+        Add the wave ensemble to the burst.
+        :param ens_wave: WaveEnsemble to add.
+        """
+        row = self.num_ens
+        num_bins = self.num_selected_bins
+        self.num_ens += 1
+
+        if ens_wave.is_vertical_ens:
+            # Vertical Beam data
+            self.is_vertical[row] = True
+
+            # Pressure (WZP), Height (WHS) and Range Tracking (WZR)
+            self.ens_data[row, WaveBurst.COL_PRESSURE] = ens_wave.pressure
+            self.ens_data[row, WaveBurst.COL_HEIGHT] = ens_wave.height
+            if len(ens_wave.range_tracking) > 0:
+                self.num_range[row] = 1
+                self.ens_data[row, WaveBurst.COL_RANGE] = ens_wave.range_tracking[0]
+
+            # Beam Velocity (WZ0)
+            vert_vel = ens_wave.vert_beam_vel[:num_bins]
+            if len(vert_vel) > 0:
+                self.num_vert_bins[row] = len(vert_vel)
+                self.vert_vel[row, :len(vert_vel)] = vert_vel
+        else:
+            # 4 Beam data
+            num_beams = min(ens_wave.num_beams, WaveBurst.MAX_BEAMS)
+            self.num_beams[row] = num_beams
+
+            # Range Tracking (WR0, WR1, WR2, WR3)
+            range_tracking = ens_wave.range_tracking[:num_beams]
+            self.num_range[row] = len(range_tracking)
+
+            # Pressure (WPS), Heading (WHG), Pitch (WPH), Roll (WRL), Water Temp (WTS), Avg Range Tracking (WAH), Height (WHS)
+            self.ens_data[row, :WaveBurst.COL_RANGE + len(range_tracking)] = [ens_wave.pressure,
+                                                                              ens_wave.heading,
+                                                                              ens_wave.pitch,
+                                                                              ens_wave.roll,
+                                                                              ens_wave.water_temp,
+                                                                              ens_wave.avg_range_tracking,
+                                                                              ens_wave.height] + range_tracking
+
+            # Earth Velocity (WUS, WVS, WZS)
+            if len(ens_wave.east_vel) > 0 or len(ens_wave.north_vel) > 0 or len(ens_wave.vertical_vel) > 0:
+                for index, earth_vel in enumerate([ens_wave.east_vel, ens_wave.north_vel, ens_wave.vertical_vel]):
+                    earth_vel = earth_vel[:num_bins]
+                    self.num_earth_bins[row, index] = len(earth_vel)
+                    self.earth_vel[row, index, :len(earth_vel)] = earth_vel
+
+            # Beam Velocity (WB0, WB1, WB2, WB3)
+            # Bins without beam data are not used
+            beam_vel = [bin_vel[:num_beams] for bin_vel in ens_wave.beam_vel[:num_bins] if len(bin_vel) > 0]
+            if len(beam_vel) > 0:
+                self.num_beam_bins[row] = len(beam_vel)
+                self.beam_vel[row, :len(beam_vel), :num_beams] = beam_vel
+
+    def get_array(self, name):
+        """
+        Get the values of the variable.
+        Only the values that exist are returned, in ensemble then bin order.
+        :param name: Variable name.
+        :return: Float32 array of the values.
+        """
+        num_ens = self.num_ens
+        is_vertical = self.is_vertical[:num_ens]
+        is_4beam = ~is_vertical
+        bin_index = np.arange(self.num_selected_bins)
+
+        # Earth Velocity
+        if name in (WaveBurst.WUS, WaveBurst.WVS, WaveBurst.WZS):
+            index = [WaveBurst.WUS, WaveBurst.WVS, WaveBurst.WZS].index(name)
+            num_earth_bins = self.num_earth_bins[:num_ens, index]
+            mask = (bin_index[np.newaxis, :] < num_earth_bins[:, np.newaxis]) & is_4beam[:, np.newaxis]
+            return self.earth_vel[:num_ens, index, :][mask]
+
+        # Beam Velocity
+        if name in (WaveBurst.WB0, WaveBurst.WB1, WaveBurst.WB2, WaveBurst.WB3):
+            beam = [WaveBurst.WB0, WaveBurst.WB1, WaveBurst.WB2, WaveBurst.WB3].index(name)
+            has_beam = is_4beam & (self.num_beams[:num_ens] > beam)
+            mask = (bin_index[np.newaxis, :] < self.num_beam_bins[:num_ens, np.newaxis]) & has_beam[:, np.newaxis]
+            return self.beam_vel[:num_ens, :, beam][mask]
+
+        # Vertical Beam Velocity
+        if name == WaveBurst.WZ0:
+            mask = (bin_index[np.newaxis, :] < self.num_vert_bins[:num_ens, np.newaxis]) & is_vertical[:, np.newaxis]
+            return self.vert_vel[:num_ens][mask]
+
+        # Range Tracking
+        if name in (WaveBurst.WR0, WaveBurst.WR1, WaveBurst.WR2, WaveBurst.WR3):
+            beam = [WaveBurst.WR0, WaveBurst.WR1, WaveBurst.WR2, WaveBurst.WR3].index(name)
+            mask = is_4beam & (self.num_range[:num_ens] > beam)
+            return self.ens_data[:num_ens, WaveBurst.COL_RANGE + beam][mask]
+        if name == WaveBurst.WZR:
+            mask = is_vertical & (self.num_range[:num_ens] > 0)
+            return self.ens_data[:num_ens, WaveBurst.COL_RANGE][mask]
+
+        # Height Source
+        # Range Tracking beam height is in the 4 beam data, Vertical Beam and Pressure height is in the vertical data
+        if name == WaveBurst.WHS:
+            if self.height_source in (0, 1, 2, 3):
+                return self.ens_data[:num_ens, WaveBurst.COL_HEIGHT][is_4beam]
+            if self.height_source in (4, 5):
+                return self.ens_data[:num_ens, WaveBurst.COL_HEIGHT][is_vertical]
+            return np.empty(0, dtype=np.float32)
+
+        if name == WaveBurst.WZP:
+            return self.ens_data[:num_ens, WaveBurst.COL_PRESSURE][is_vertical]
+
+        cols = {WaveBurst.WPS: WaveBurst.COL_PRESSURE,
+                WaveBurst.WHG: WaveBurst.COL_HEADING,
+                WaveBurst.WPH: WaveBurst.COL_PITCH,
+                WaveBurst.WRL: WaveBurst.COL_ROLL,
+                WaveBurst.WTS: WaveBurst.COL_WATER_TEMP,
+                WaveBurst.WAH: WaveBurst.COL_AVG_RANGE}
+        return self.ens_data[:num_ens, cols[name]][is_4beam]
+
+    def get_bytes(self, name):
+        """
+        Get the values of the variable as bytes for the MATLAB file.
+        :param name: Variable name.
+        :return: Bytes of the float32 values.
+        """
+        return self.get_array(name).tobytes()
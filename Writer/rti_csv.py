@@ -0,0 +1,344 @@
+import time
+import numpy as np
+from collections import Counter
+from rti_python.Ensemble.Ensemble import Ensemble
+from rti_python.Codecs.BinaryCodec import BinaryCodec
+from rti_python.Codecs.BinaryCodec import EnsembleFramer
+
+
+class RtiCsvWriter:
+    """
+    Write the ensembles to a CSV file.
+
+    Long layout has a line for each value, the same lines as Ensemble.encode_csv():
+    datetime,type,ss_code,ss_config,bin_num,beam_num,bin_depth,value
+
+    Wide layout has a line for each ensemble.  The columns are the datetime,
+    ensemble number, subsystem, a column for each value of the small datasets
+    (Heading, BT_Range_3, ...) and a column for each bin and beam of the
+    [Bin x Beam] datasets (EarthVel_12_3 is bin 12 beam 3, Magnitude_12 is bin 12).  The columns are
+    set by the first ensemble written.  The NMEA data is not in the wide layout.
+
+    The [Bin x Beam] values are converted with numpy a dataset at a time, the
+    bin, beam and depth strings are cached and each ensemble is written with
+    a single write to a buffered file.  Ensembles
+    without Ensemble Data or with a bad date are not written, because there is
+    no date and time.  The ensembles with a bad date are counted in get_stats().
+
+    writer = RtiCsvWriter("/path/to/file.csv", datasets=['EarthVelocity', 'AncillaryData'], bin_start=0, bin_end=20)
+    writer.export_file("/path/to/file.ens")
+    writer.close()
+    print(writer.get_stats())
+    """
+
+    LAYOUT_LONG = "long"
+    LAYOUT_WIDE = "wide"
+
+    # Long layout header
+    LONG_HEADER = "datetime,type,ss_code,ss_config,bin_num,beam_num,bin_depth,value"
+
+    # [Bin x Beam] datasets
+    # Attribute: (CSV type, Dataset value attribute, numpy type)
+    BIN_BEAM_DATASETS = {'Amplitude': (Ensemble.CSV_AMP, 'Amplitude', float),
+                         'Correlation': (Ensemble.CSV_CORR, 'Correlation', float),
+                         'BeamVelocity': (Ensemble.CSV_BEAM_VEL, 'Velocities', float),
+                         'InstrumentVelocity': (Ensemble.CSV_INSTR_VEL, 'Velocities', float),
+                         'EarthVelocity': (Ensemble.CSV_EARTH_VEL, 'Velocities', float),
+                         'GoodBeam': (Ensemble.CSV_GOOD_BEAM, 'GoodBeam', int),
+                         'GoodEarth': (Ensemble.CSV_GOOD_EARTH, 'GoodEarth', int)}
+
+    # Earth Velocity magnitude and direction for each bin
+    # Attribute: CSV type
+    VECTORS = {'Magnitude': Ensemble.CSV_MAG,
+               'Direction': Ensemble.CSV_DIR}
+
+    # Datasets written with their encode_csv()
+    DATASETS = ('EnsembleData', 'AncillaryData', 'BottomTrack', 'RangeTracking', 'NmeaData', 'SystemSetup')
+
+    def __init__(self, file_path, layout="long", datasets=None, bin_start=0, bin_end=None,
+                 ss_code=None, ss_config=None, buffer_size=1024 * 1024):
+        """
+        Open the CSV file.
+        :param file_path: CSV file path.
+        :param layout: "long" = A line for each value.  "wide" = A line for each ensemble.
+        :param datasets: List of datasets to write.  (EarthVelocity, AncillaryData, ...)  Default: All.
+        :param bin_start: First bin to write.
+        :param bin_end: Bin to stop at, not included.  None = All the bins.
+        :param ss_code: Only write the ensembles with this subsystem code.  None = All.
+        :param ss_config: Only write the ensembles with this subsystem configuration.  None = All.
+        :param buffer_size: Size of the file buffer in bytes.
+        """
+        if layout not in (RtiCsvWriter.LAYOUT_LONG, RtiCsvWriter.LAYOUT_WIDE):
+            raise ValueError("Unknown CSV layout: " + str(layout))
+
+        self.layout = layout
+        self.datasets = datasets if datasets else list(RtiCsvWriter.BIN_BEAM_DATASETS) + list(RtiCsvWriter.DATASETS)
+        self.bin_start = bin_start
+        self.bin_end = bin_end
+        self.ss_code = ss_code
+        self.ss_config = ss_config
+
+        self.file = open(file_path, "w", buffering=buffer_size, newline="")
+        self.wide_columns = None                # Columns of the small datasets in the wide layout
+        self.wide_shapes = None                 # [Bin x Beam] datasets in the wide layout: (Attribute, Bins, Beams)
+        self.cell_cache = {}                    # "bin,beam,depth," strings for the long layout
+
+        # Statistics
+        self.ens_count = 0
+        self.skipped_count = 0
+        self.bad_date_count = 0
+        self.line_count = 0
+        self.write_time = 0.0
+
+        if layout == RtiCsvWriter.LAYOUT_LONG:
+            self.file.write(RtiCsvWriter.LONG_HEADER + "\n")
+
+    def ensemble_handler(self, sender, ens):
+        """
+        Event handler to subscribe to a codec ensemble_event.
+        :param sender: Sender of the event.
+        :param ens: Ensemble.
+        """
+        self.write(ens)
+
+    def export_file(self, ens_file_path, block_size=1024 * 1024):
+        """
+        Decode all the ensembles in the RTB file and write them to the CSV file.
+        :param ens_file_path: Ensemble file path.
+        :param block_size: Number of bytes to read at a time.
+        :return: Number of ensembles written.
+        """
+        ens_count = self.ens_count
+        framer = EnsembleFramer()
+        with open(ens_file_path, "rb") as f:
+            while framer.read_file(f, block_size):
+                for ens_bin in framer.frames():
+                    self.write(BinaryCodec.decode_data_sets(ens_bin, use_np=True))
+
+        return self.ens_count - ens_count
+
+    def write(self, ens):
+        """
+        Write the ensemble to the file.
+        :param ens: Ensemble.
+        :return: TRUE = Ensemble written.  FALSE = Filtered, no Ensemble Data or a bad date.
+        """
+        if not ens or not ens.IsEnsembleData:
+            self.skipped_count += 1
+            return False
+
+        ens_data = ens.EnsembleData
+        if self.ss_code is not None and ens_data.SysFirmwareSubsystemCode != self.ss_code:
+            self.skipped_count += 1
+            return False
+        if self.ss_config is not None and ens_data.SubsystemConfig != self.ss_config:
+            self.skipped_count += 1
+            return False
+
+        # Do not use ens_data.datetime(), it gives the current time if the date is bad
+        dt = ens_data.valid_datetime()
+        if dt is None:
+            self.bad_date_count += 1
+            return False
+
+        start_time = time.perf_counter()
+
+        if self.layout == RtiCsvWriter.LAYOUT_LONG:
+            lines = self.long_lines(ens, dt)
+        else:
+            lines = self.wide_lines(ens, dt)
+
+        self.file.write("\n".join(lines) + "\n")
+        self.line_count += len(lines)
+        self.ens_count += 1
+        self.write_time += time.perf_counter() - start_time
+
+        return True
+
+    def bin_beam_values(self, ens, attr):
+        """
+        Get the selected bins of the [Bin x Beam] dataset or the Earth Velocity vectors.
+        :param ens: Ensemble.
+        :param attr: Dataset attribute or vector.  (EarthVelocity, Amplitude, Magnitude, ...)
+        :return: Array [bin][beam] of the selected bins.  The vectors have 1 beam.  None if not in the ensemble.
+        """
+        if attr in RtiCsvWriter.VECTORS:
+            if not ens.IsEarthVelocity:
+                return None
+            return np.asarray(getattr(ens.EarthVelocity, attr), dtype=float)[self.bin_start:self.bin_end, np.newaxis]
+
+        if not getattr(ens, "Is" + attr):
+            return None
+
+        csv_type, value_attr, np_type = RtiCsvWriter.BIN_BEAM_DATASETS[attr]
+        ds = getattr(ens, attr)
+
+        # Values not decoded are stored as [bin][beam][1]
+        values = np.asarray(getattr(ds, value_attr), dtype=np_type).reshape(ds.num_elements, ds.element_multiplier)
+        return values[self.bin_start:self.bin_end]
+
+    def long_cells(self, num_bins, num_beams, blank, bin_size):
+        """
+        Get the "bin,beam,depth," strings for each value in a [Bin x Beam] dataset.
+        The order is the same as encode_csv(), each bin of beam 0, then beam 1 ...
+        The strings are cached, because they only change if the bins change.
+        :param num_bins: Number of bins in the dataset.
+        :param num_beams: Number of beams in the dataset.
+        :param blank: Blank or first bin position in meters.
+        :param bin_size: Bin size in meters.
+        :return: List of strings.
+        """
+        key = (num_bins, num_beams, blank, bin_size)
+        cells = self.cell_cache.get(key)
+        if cells is None:
+            bin_nums = np.arange(num_bins)[self.bin_start:self.bin_end]
+            bin_depths = np.round(float(blank) + float(bin_size) * bin_nums.astype(float), 2)
+            bin_strs = [str(bin_num) + "," for bin_num in bin_nums]
+            depth_strs = ["," + depth + "," for depth in bin_depths.astype(str)]
+            cells = [bin_str + str(beam) + depth_str
+                     for beam in range(num_beams)
+                     for bin_str, depth_str in zip(bin_strs, depth_strs)]
+            self.cell_cache[key] = cells
+
+        return cells
+
+    def long_lines(self, ens, dt):
+        """
+        Create the long layout lines for the ensemble.
+        :param ens: Ensemble.
+        :param dt: Date and time of the ensemble.
+        :return: List of CSV lines.
+        """
+        lines = []
+
+        ens_data = ens.EnsembleData
+        dt_str = dt.isoformat()
+        ss_code = ens_data.SysFirmwareSubsystemCode
+        ss_config = ens_data.SubsystemConfig
+
+        blank = 0
+        bin_size = 0
+        if ens.IsAncillaryData:
+            blank = ens.AncillaryData.FirstBinRange
+            bin_size = ens.AncillaryData.BinSize
+
+        for attr in self.datasets:
+            if not getattr(ens, "Is" + attr):
+                continue
+
+            if attr in RtiCsvWriter.BIN_BEAM_DATASETS:
+                ds = getattr(ens, attr)
+                values = self.bin_beam_values(ens, attr)
+                cells = self.long_cells(ds.num_elements, ds.element_multiplier, blank, bin_size)
+                prefix = "{},{},{},{},".format(dt_str, RtiCsvWriter.BIN_BEAM_DATASETS[attr][0], ss_code, ss_config)
+
+                # Beam major order, same as encode_csv()
+                value_strs = map(str, values.T.ravel().tolist())
+                lines += [prefix + cell + value for cell, value in zip(cells, value_strs)]
+
+                # Earth Velocity also has the magnitude and direction of each bin
+                if attr == 'EarthVelocity':
+                    cells = self.long_cells(ds.num_elements, 1, blank, bin_size)
+                    for vector, csv_type in RtiCsvWriter.VECTORS.items():
+                        prefix = "{},{},{},{},".format(dt_str, csv_type, ss_code, ss_config)
+                        value_strs = map(str, self.bin_beam_values(ens, vector).ravel().tolist())
+                        lines += [prefix + cell + value for cell, value in zip(cells, value_strs)]
+            else:
+                lines += getattr(ens, attr).encode_csv(dt, ss_code, ss_config, blank, bin_size)
+
+        return lines
+
+    def wide_lines(self, ens, dt):
+        """
+        Create the wide layout line for the ensemble.
+        The header is created with the first ensemble.
+        :param ens: Ensemble.
+        :param dt: Date and time of the ensemble.
+        :return: List with the header and the CSV line, or only the CSV line.
+        """
+        lines = []
+
+        ens_data = ens.EnsembleData
+        blank = 0
+        bin_size = 0
+        if ens.IsAncillaryData:
+            blank = ens.AncillaryData.FirstBinRange
+            bin_size = ens.AncillaryData.BinSize
+
+        # Values of the small datasets
+        # datetime,type,ss_code,ss_config,bin_num,beam_num,bin_depth,value
+        fields = []
+        for attr in self.datasets:
+            if attr in RtiCsvWriter.BIN_BEAM_DATASETS or attr == 'NmeaData' or not getattr(ens, "Is" + attr):
+                continue
+            fields += [line.split(",", 7) for line in getattr(ens, attr).encode_csv(dt, "", 0, blank, bin_size)]
+
+        # Values by column name
+        # If a type has more than one value, the beam (and bin) is added to the name
+        type_counts = Counter(field[1] for field in fields)
+        values = {}
+        for field in fields:
+            if type_counts[field[1]] == 1:
+                values[field[1]] = field[7]
+            elif field[4] == "0":
+                values[field[1] + "_" + field[5]] = field[7]
+            else:
+                values[field[1] + "_" + field[4] + "_" + field[5]] = field[7]
+
+        # The first ensemble sets the columns
+        if self.wide_columns is None:
+            self.wide_columns = list(values)
+            self.wide_shapes = []
+            header = ['datetime', 'ens_num', 'ss_code', 'ss_config'] + self.wide_columns
+            for attr in self.datasets:
+                if attr in RtiCsvWriter.BIN_BEAM_DATASETS and getattr(ens, "Is" + attr):
+                    bins = self.bin_beam_values(ens, attr)
+                    bin_nums = np.arange(getattr(ens, attr).num_elements)[self.bin_start:self.bin_end]
+                    self.wide_shapes.append((attr, bins.shape[0], bins.shape[1]))
+                    csv_type = RtiCsvWriter.BIN_BEAM_DATASETS[attr][0]
+                    header += [csv_type + "_" + str(bin_num) + "_" + str(beam)
+                               for bin_num in bin_nums
+                               for beam in range(bins.shape[1])]
+
+                    # Earth Velocity also has the magnitude and direction of each bin
+                    if attr == 'EarthVelocity':
+                        for vector, csv_type in RtiCsvWriter.VECTORS.items():
+                            self.wide_shapes.append((vector, bins.shape[0], 1))
+                            header += [csv_type + "_" + str(bin_num) for bin_num in bin_nums]
+            lines.append(",".join(header))
+
+        row = [dt.isoformat(), str(ens_data.EnsembleNumber), str(ens_data.SysFirmwareSubsystemCode), str(ens_data.SubsystemConfig)]
+        row += [values.get(column, "") for column in self.wide_columns]
+
+        # Bin major order, missing bins and beams are empty
+        for attr, num_bins, num_beams in self.wide_shapes:
+            bins = self.bin_beam_values(ens, attr)
+            if bins is not None and bins.shape == (num_bins, num_beams):
+                row += map(str, bins.ravel().tolist())
+            else:
+                cells = np.full((num_bins, num_beams), "", dtype=object)
+                if bins is not None:
+                    bins = bins[:num_bins, :num_beams]
+                    cells[:bins.shape[0], :bins.shape[1]] = [list(map(str, bin_values)) for bin_values in bins.tolist()]
+                row += cells.ravel().tolist()
+
+        lines.append(",".join(row))
+        return lines
+
+    def get_stats(self):
+        """
+        Get the export statistics.
+        :return: Dictionary of the statistics.
+        """
+        return {"ens_count": self.ens_count,
+                "skipped_count": self.skipped_count,
+                "bad_date_count": self.bad_date_count,
+                "line_count": self.line_count,
+                "write_time": self.write_time,
+                "ens_per_sec": self.ens_count / self.write_time if self.write_time > 0 else 0.0}
+
+    def close(self):
+        """
+        Flush and close the file.
+        """
+        self.file.close()
@@ -1,4 +1,7 @@
 import h5py
+import numpy as np
+from datetime import datetime
+from rti_python.Ensemble.CompactEnsemble import CompactEnsemble
 
 
 class RtiH5py:
@@ -30,3 +33,322 @@ class RtiH5py:
             self.file['ens'] = ens_df.to_records(index=False)       # Convert the df to numpy array and write without index
 
 
+
+
+class RtiH5pyStore:
+    """
+    Write the ensembles to an HDF5 file as they are decoded.
+
+    Each dataset is a resizable, chunked and compressed HDF5 dataset, so the
+    ensembles are appended to the file and the deployment does not need to
+    be in memory.  The ensembles are buffered and written chunk_size at a time.
+
+    /ensemble/time              [time]                Seconds since 1970-01-01
+    /ensemble/EnsembleNumber    [time]
+    /bin_beam/BeamVelocity      [time][bin][beam]     Also InstrumentVelocity, EarthVelocity, Amplitude, ...
+    /ancillary/Heading          [time]                Also Pitch, Roll, WaterTemp, Pressure, ...
+    /bottomtrack/Range          [time][beam]          Also SNR, BeamVelocity, EarthVelocity, ...
+    /bottomtrack/Status         [time]                Also ActualPingCount
+
+    Missing values are NaN, or 0 for the good ping datasets.  If an ensemble
+    has more bins or beams, the datasets grow to fit them.  Ensembles without
+    a good date and time are not written, so the times stay in order for
+    RtiH5pyReader.  They are counted in bad_date_count.
+
+    store = RtiH5pyStore("/path/to/file.hdf5")
+    codec.ensemble_event += store.ensemble_handler
+    ...
+    store.close()
+
+    Use RtiH5pyReader to read the file.
+    """
+
+    # Start of the time values
+    EPOCH = datetime(1970, 1, 1)
+
+    # Ancillary Data values stored
+    ANCILLARY_VALUES = ('FirstBinRange', 'BinSize', 'FirstPingTime', 'LastPingTime',
+                        'Heading', 'Pitch', 'Roll', 'WaterTemp', 'SystemTemp',
+                        'Salinity', 'Pressure', 'TransducerDepth', 'SpeedOfSound')
+
+    # Bottom Track values stored, one value per ensemble
+    BT_VALUES = ('Heading', 'Pitch', 'Roll', 'Pressure', 'TransducerDepth', 'Status', 'ActualPingCount')
+
+    # Bottom Track values stored, one value per beam
+    BT_BEAM_VALUES = ('Range', 'SNR', 'Amplitude', 'Correlation',
+                      'BeamVelocity', 'BeamGood', 'InstrumentVelocity', 'InstrumentGood',
+                      'EarthVelocity', 'EarthGood')
+
+    def __init__(self, file_path, chunk_size=256, compression="gzip", compression_opts=4):
+        """
+        Open the file.  If the file exists, the ensembles are appended to it.
+        :param file_path: File path to the HDF5 file.
+        :param chunk_size: Number of ensembles in each HDF5 chunk and in each write.
+        :param compression: HDF5 compression filter.  ("gzip", "lzf" or None)
+        :param compression_opts: Compression level for gzip.
+        """
+        self.chunk_size = chunk_size
+        self.compression = compression
+        self.compression_opts = compression_opts if compression == "gzip" else None
+        self.buffer = []
+        self.file = h5py.File(file_path, "a")
+
+        # Ensembles not written, because the date is bad
+        self.bad_date_count = 0
+
+        # Number of ensembles in the file
+        self.ens_count = 0
+        if 'ensemble/time' in self.file:
+            self.ens_count = self.file['ensemble/time'].shape[0]
+
+    def ensemble_handler(self, sender, ens):
+        """
+        Event handler to subscribe to a codec ensemble_event.
+        :param sender: Sender of the event.
+        :param ens: Ensemble.
+        """
+        self.append(ens)
+
+    def append(self, ens):
+        """
+        Add the ensemble to the file.
+        The ensemble is written when chunk_size ensembles are buffered.
+        An ensemble with a bad date is not written.
+        :param ens: Ensemble or CompactEnsemble.
+        """
+        if RtiH5pyStore.ens_datetime(ens) is None:
+            self.bad_date_count += 1
+            return
+
+        self.buffer.append(ens)
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Write all the buffered ensembles to the file.
+        """
+        if not self.buffer:
+            return
+
+        ens_list = self.buffer
+        self.buffer = []
+
+        times = []
+        ens_nums = []
+        for ens in ens_list:
+            times.append((RtiH5pyStore.ens_datetime(ens) - RtiH5pyStore.EPOCH).total_seconds())
+            if isinstance(ens, CompactEnsemble):
+                ens_nums.append(ens.EnsembleNumber)
+            else:
+                ens_nums.append(ens.EnsembleData.EnsembleNumber)
+
+        self.write_rows('ensemble/time', times, np.float64)
+        self.write_rows('ensemble/EnsembleNumber', ens_nums, np.int32, fill=0)
+
+        # [Bin x Beam] datasets as [time][bin][beam]
+        for attr, (name, ds_class, value_attr, np_type) in CompactEnsemble.BIN_BEAM_DATASETS.items():
+            rows = [RtiH5pyStore.bin_beam_values(ens, attr, value_attr, np_type) for ens in ens_list]
+            if any(row is not None for row in rows):
+                self.write_rows('bin_beam/' + attr, rows, np_type, fill=0 if np_type == np.int32 else np.nan)
+
+        # Ancillary Data series
+        anc_list = [ens.AncillaryData if ens.IsAncillaryData else None for ens in ens_list]
+        if any(anc is not None for anc in anc_list):
+            for value in RtiH5pyStore.ANCILLARY_VALUES:
+                self.write_rows('ancillary/' + value, [getattr(anc, value) if anc else None for anc in anc_list], np.float32)
+
+        # Bottom Track series
+        bt_list = [ens.BottomTrack if ens.IsBottomTrack else None for ens in ens_list]
+        if any(bt is not None for bt in bt_list):
+            for value in RtiH5pyStore.BT_VALUES:
+                self.write_rows('bottomtrack/' + value, [getattr(bt, value) if bt else None for bt in bt_list], np.float32)
+            for value in RtiH5pyStore.BT_BEAM_VALUES:
+                self.write_rows('bottomtrack/' + value, [getattr(bt, value) if bt else None for bt in bt_list], np.float32)
+
+        self.ens_count += len(ens_list)
+
+        # Fill the datasets not in the buffered ensembles
+        datasets = []
+        self.file.visititems(lambda name, obj: datasets.append(obj) if isinstance(obj, h5py.Dataset) else None)
+        for ds in datasets:
+            if ds.shape[0] < self.ens_count:
+                ds.resize((self.ens_count,) + ds.shape[1:])
+
+    @staticmethod
+    def bin_beam_values(ens, attr, value_attr, np_type):
+        """
+        Get the [Bin x Beam] values from the ensemble.
+        :param ens: Ensemble or CompactEnsemble.
+        :param attr: Dataset attribute.  (BeamVelocity, Amplitude, ...)
+        :param value_attr: Dataset value attribute.  (Velocities, Amplitude, ...)
+        :param np_type: numpy type of the values.
+        :return: Array [bin][beam] or None if the dataset is not in the ensemble.
+        """
+        if not getattr(ens, "Is" + attr):
+            return None
+
+        ds = getattr(ens, attr)
+        if isinstance(ds, np.ndarray):
+            return ds
+
+        # Values not decoded are stored as [bin][beam][1]
+        return np.array(getattr(ds, value_attr), dtype=np_type).reshape(ds.num_elements, ds.element_multiplier)
+
+    @staticmethod
+    def ens_datetime(ens):
+        """
+        Date and time of the ensemble.
+        Do not use EnsembleData.datetime(), it gives the current time if the date is bad.
+        :param ens: Ensemble or CompactEnsemble.
+        :return: datetime or None if the date is bad or there is no Ensemble Data.
+        """
+        if isinstance(ens, CompactEnsemble):
+            return ens.DateTime
+        if ens.IsEnsembleData:
+            return ens.EnsembleData.valid_datetime()
+
+        return None
+
+    def write_rows(self, name, rows, dtype, fill=np.nan):
+        """
+        Append a row for each buffered ensemble to the dataset.
+        The dataset is created if it does not exist.  Rows that are None are filled.
+        Ensembles before the dataset was created are filled.
+        :param name: Dataset name.
+        :param rows: List of values for each ensemble.  A value, a list or an array.
+        :param dtype: numpy type of the dataset.
+        :param fill: Value used for missing values.
+        """
+        rows = [np.asarray(row, dtype=dtype) if row is not None else None for row in rows]
+
+        # Largest shape of the values
+        row_shape = ()
+        for row in rows:
+            if row is not None:
+                row_shape = tuple(max(dims) for dims in zip(row.shape, row_shape)) if row_shape else row.shape
+
+        block = np.full((len(rows),) + row_shape, fill, dtype=dtype)
+        for index, row in enumerate(rows):
+            if row is not None and row.size:
+                block[(index,) + tuple(slice(0, dim) for dim in row.shape)] = row
+
+        if name not in self.file:
+            self.file.create_dataset(name,
+                                     shape=(self.ens_count,) + row_shape,
+                                     maxshape=(None,) * (len(row_shape) + 1),
+                                     chunks=(self.chunk_size,) + tuple(max(dim, 1) for dim in row_shape),
+                                     dtype=dtype,
+                                     fillvalue=fill,
+                                     compression=self.compression,
+                                     compression_opts=self.compression_opts)
+        ds = self.file[name]
+
+        # Grow the dataset for the new ensembles and any new bins or beams
+        start = self.ens_count
+        new_shape = (start + len(rows),) + tuple(max(dims) for dims in zip(ds.shape[1:], row_shape))
+        ds.resize(new_shape)
+        ds[(slice(start, start + len(rows)),) + tuple(slice(0, dim) for dim in row_shape)] = block
+
+    def close(self):
+        """
+        Write the buffered ensembles and close the file.
+        """
+        self.flush()
+        self.file.close()
+
+
+class RtiH5pyReader:
+    """
+    Read the HDF5 file written by RtiH5pyStore.
+    Only the time, bin and beam ranges requested are read from the file.
+
+    reader = RtiH5pyReader("/path/to/file.hdf5")
+    vel = reader.get_bin_beam('EarthVelocity', start_time, end_time, bin_start=0, bin_end=20)
+    heading = reader.get_series('ancillary/Heading', start_time, end_time)
+    reader.close()
+    """
+
+    def __init__(self, file_path):
+        """
+        Open the file to read.
+        :param file_path: File path to the HDF5 file.
+        """
+        self.file = h5py.File(file_path, "r")
+        self.times = None
+
+    def close(self):
+        """
+        Close the file.
+        """
+        self.file.close()
+
+    def get_names(self):
+        """
+        Get all the dataset names in the file.
+        :return: List of dataset names.  (bin_beam/EarthVelocity, ancillary/Heading, ...)
+        """
+        names = []
+        self.file.visititems(lambda name, obj: names.append(name) if isinstance(obj, h5py.Dataset) else None)
+        return names
+
+    def time_slice(self, start_time=None, end_time=None):
+        """
+        Find the ensembles between the start and end time.
+        The ensembles are expected to be written in time order.
+        :param start_time: First datetime to include.  None = First ensemble.
+        :param end_time: Last datetime to include.  None = Last ensemble.
+        :return: Slice of the ensembles.
+        """
+        # The times are small, so they are only read once
+        if self.times is None:
+            self.times = self.file['ensemble/time'][:]
+
+        start = 0
+        end = len(self.times)
+        if start_time is not None:
+            start = int(np.searchsorted(self.times, (start_time - RtiH5pyStore.EPOCH).total_seconds(), side='left'))
+        if end_time is not None:
+            end = int(np.searchsorted(self.times, (end_time - RtiH5pyStore.EPOCH).total_seconds(), side='right'))
+
+        return slice(start, end)
+
+    def get_time(self, start_time=None, end_time=None):
+        """
+        Get the date and time of the ensembles.
+        :param start_time: First datetime to include.  None = First ensemble.
+        :param end_time: Last datetime to include.  None = Last ensemble.
+        :return: Array of datetime64.
+        """
+        ens_slice = self.time_slice(start_time, end_time)
+        return np.round(self.times[ens_slice] * 1e6).astype('int64').astype('datetime64[us]')
+
+    def get_series(self, name, start_time=None, end_time=None):
+        """
+        Get the values of a series between the start and end time.
+        :param name: Dataset name.  (ensemble/EnsembleNumber, ancillary/Heading, bottomtrack/Range, ...)
+        :param start_time: First datetime to include.  None = First ensemble.
+        :param end_time: Last datetime to include.  None = Last ensemble.
+        :return: Array [time] or [time][beam].  None if the dataset is not in the file.
+        """
+        if name not in self.file:
+            return None
+
+        return self.file[name][self.time_slice(start_time, end_time)]
+
+    def get_bin_beam(self, name, start_time=None, end_time=None, bin_start=None, bin_end=None, beam=None):
+        """
+        Get the [Bin x Beam] values between the start and end time.
+        :param name: Dataset name.  (BeamVelocity, EarthVelocity, Amplitude, ...)
+        :param start_time: First datetime to include.  None = First ensemble.
+        :param end_time: Last datetime to include.  None = Last ensemble.
+        :param bin_start: First bin to include.  None = First bin.
+        :param bin_end: Bin to stop at, not included.  None = Last bin.
+        :param beam: Beam number.  None = All the beams.
+        :return: Array [time][bin][beam] or [time][bin] if a beam is given.  None if the dataset is not in the file.
+        """
+        if 'bin_beam/' + name not in self.file:
+            return None
+
+        beam_slice = slice(None) if beam is None else beam
+        return self.file['bin_beam/' + name][self.time_slice(start_time, end_time), bin_start:bin_end, beam_slice]
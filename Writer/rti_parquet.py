@@ -0,0 +1,460 @@
+import os
+import uuid
+import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from rti_python.Ensemble.CompactEnsemble import CompactEnsemble
+from rti_python.Ensemble.EarthVelocity import EarthVelocity
+
+
+class RtiParquetWriter:
+    """
+    Write the ensembles to a partitioned Parquet dataset.
+
+    There are 2 tables in the root folder:
+    profile     A row for each ensemble and bin.  The [Bin x Beam] datasets have
+                a column for each beam.  (EarthVelocity_0 ... EarthVelocity_3)
+    ensemble    A row for each ensemble with the Ancillary, Bottom Track and
+                System Setup values.  (Heading, BT_Range_0, Voltage ...)
+
+    Both tables are partitioned by date and subsystem:
+    root/profile/date=2019-03-09/ss_code=A/ss_config=1/part-<id>.parquet
+
+    The ensembles are buffered and batch_size ensembles are written at a time.
+    Each write is a row group, so the readers can skip row groups using the
+    time, ensemble number and bin statistics.  Each writer creates new files,
+    so more data can be added to the dataset later.
+
+    writer = RtiParquetWriter("/path/to/dataset")
+    codec.ensemble_event += writer.ensemble_handler
+    ...
+    writer.close()
+
+    Use RtiParquetReader to read the dataset.
+    """
+
+    # Partition columns
+    PARTITIONING = pa.schema([('date', pa.string()), ('ss_code', pa.string()), ('ss_config', pa.int32())])
+
+    # Date partition for ensembles with a bad date
+    UNKNOWN_DATE = "unknown"
+
+    # [Bin x Beam] datasets
+    # The good pings are stored as float, so missing values can be null
+    # Attribute: (Dataset value attribute, numpy type)
+    BIN_BEAM_DATASETS = {'BeamVelocity': ('Velocities', np.float32),
+                         'InstrumentVelocity': ('Velocities', np.float32),
+                         'EarthVelocity': ('Velocities', np.float32),
+                         'Amplitude': ('Amplitude', np.float32),
+                         'Correlation': ('Correlation', np.float32),
+                         'GoodBeam': ('GoodBeam', np.float32),
+                         'GoodEarth': ('GoodEarth', np.float32)}
+
+    # Ancillary Data values stored
+    ANCILLARY_VALUES = ('FirstBinRange', 'BinSize', 'FirstPingTime', 'LastPingTime',
+                        'Heading', 'Pitch', 'Roll', 'WaterTemp', 'SystemTemp',
+                        'Salinity', 'Pressure', 'TransducerDepth', 'SpeedOfSound')
+
+    # Bottom Track values stored, one value per ensemble
+    BT_VALUES = ('Heading', 'Pitch', 'Roll', 'Pressure', 'TransducerDepth', 'Status', 'ActualPingCount')
+
+    # Bottom Track values stored, one value per beam
+    BT_BEAM_VALUES = ('Range', 'SNR', 'Amplitude', 'Correlation',
+                      'BeamVelocity', 'BeamGood', 'InstrumentVelocity', 'InstrumentGood',
+                      'EarthVelocity', 'EarthGood')
+
+    def __init__(self, root_path, batch_size=1000, num_beams=4, compression="snappy"):
+        """
+        Initialize the writer.
+        :param root_path: Folder of the Parquet dataset.
+        :param batch_size: Number of ensembles in each write (row group).
+        :param num_beams: Number of beam columns for each [Bin x Beam] dataset.
+        :param compression: Parquet compression.  ("snappy", "zstd", "gzip" or None)
+        """
+        self.root_path = root_path
+        self.batch_size = batch_size
+        self.num_beams = num_beams
+        self.compression = compression
+        self.file_id = uuid.uuid4().hex
+        self.buffer = []
+        self.writers = {}                       # (table, date, ss_code, ss_config): ParquetWriter
+        self.ens_count = 0
+
+        self.profile_schema = RtiParquetWriter.create_profile_schema(num_beams)
+        self.ensemble_schema = RtiParquetWriter.create_ensemble_schema(num_beams)
+
+    @staticmethod
+    def create_profile_schema(num_beams):
+        """
+        Create the schema of the profile table.  The partition columns are not in the files.
+        :param num_beams: Number of beam columns for each [Bin x Beam] dataset.
+        :return: Arrow schema.
+        """
+        fields = [('datetime', pa.timestamp('us')),
+                  ('ens_num', pa.int32()),
+                  ('bin_num', pa.int16()),
+                  ('bin_depth', pa.float32())]
+        for attr in RtiParquetWriter.BIN_BEAM_DATASETS:
+            fields += [(attr + "_" + str(beam), pa.float32()) for beam in range(num_beams)]
+        fields += [('Magnitude', pa.float32()), ('Direction', pa.float32())]
+
+        return pa.schema(fields)
+
+    @staticmethod
+    def create_ensemble_schema(num_beams):
+        """
+        Create the schema of the ensemble table.  The partition columns are not in the files.
+        :param num_beams: Number of beam columns for the Bottom Track values.
+        :return: Arrow schema.
+        """
+        fields = [('datetime', pa.timestamp('us')),
+                  ('ens_num', pa.int32()),
+                  ('num_bins', pa.int16()),
+                  ('num_beams', pa.int16())]
+        fields += [(value, pa.float32()) for value in RtiParquetWriter.ANCILLARY_VALUES]
+        fields += [('BT_' + value, pa.float32()) for value in RtiParquetWriter.BT_VALUES]
+        for value in RtiParquetWriter.BT_BEAM_VALUES:
+            fields += [('BT_' + value + "_" + str(beam), pa.float32()) for beam in range(num_beams)]
+        fields += [('Voltage', pa.float32())]
+
+        return pa.schema(fields)
+
+    def ensemble_handler(self, sender, ens):
+        """
+        Event handler to subscribe to a codec ensemble_event.
+        :param sender: Sender of the event.
+        :param ens: Ensemble.
+        """
+        self.append(ens)
+
+    def append(self, ens):
+        """
+        Add the ensemble to the dataset.
+        The ensembles are written when batch_size ensembles are buffered.
+        Ensembles without Ensemble Data are not written.
+        :param ens: Ensemble or CompactEnsemble.
+        :return: TRUE = Ensemble added.
+        """
+        if not ens or not ens.IsEnsembleData:
+            return False
+
+        self.buffer.append(ens)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+        return True
+
+    def flush(self):
+        """
+        Write all the buffered ensembles.
+        Each partition in the buffer is written as a row group.
+        """
+        if not self.buffer:
+            return
+
+        ens_list = self.buffer
+        self.buffer = []
+
+        # Group the ensembles by partition
+        partitions = {}
+        for ens in ens_list:
+            dt, ens_num, ss_code, ss_config = RtiParquetWriter.ensemble_info(ens)
+            date = dt.strftime("%Y-%m-%d") if dt else RtiParquetWriter.UNKNOWN_DATE
+            partitions.setdefault((date, ss_code, ss_config), []).append(ens)
+
+        for partition, partition_ens in partitions.items():
+            self.write_table('profile', partition, self.profile_table(partition_ens))
+            self.write_table('ensemble', partition, self.ensemble_table(partition_ens))
+
+        self.ens_count += len(ens_list)
+
+    def write_table(self, table_name, partition, table):
+        """
+        Write the table as a row group to the file of the partition.
+        The file is created the first time the partition is written.
+        :param table_name: "profile" or "ensemble".
+        :param partition: (date, ss_code, ss_config)
+        :param table: Arrow table.
+        """
+        key = (table_name,) + partition
+        writer = self.writers.get(key)
+        if writer is None:
+            date, ss_code, ss_config = partition
+            folder = os.path.join(self.root_path, table_name,
+                                  "date=" + date, "ss_code=" + str(ss_code), "ss_config=" + str(ss_config))
+            os.makedirs(folder, exist_ok=True)
+            writer = pq.ParquetWriter(os.path.join(folder, "part-" + self.file_id + ".parquet"), table.schema, compression=self.compression)
+            self.writers[key] = writer
+
+        writer.write_table(table, row_group_size=table.num_rows)
+
+    @staticmethod
+    def ensemble_info(ens):
+        """
+        Get the date and time, ensemble number and subsystem of the ensemble.
+        Unlike EnsembleData.datetime(), a bad date does not give the current time.
+        :param ens: Ensemble or CompactEnsemble.
+        :return: datetime or None, Ensemble number, Subsystem code, Subsystem configuration.
+        """
+        if isinstance(ens, CompactEnsemble):
+            return ens.DateTime, ens.EnsembleNumber, ens.SsCode, ens.SsConfig
+
+        ens_data = ens.EnsembleData
+        return ens_data.valid_datetime(), ens_data.EnsembleNumber, ens_data.SysFirmwareSubsystemCode, ens_data.SubsystemConfig
+
+    def bin_beam_values(self, ens, attr):
+        """
+        Get the [Bin x Beam] values of the ensemble.
+        Only num_beams beams are kept, missing beams are NaN.
+        :param ens: Ensemble or CompactEnsemble.
+        :param attr: Dataset attribute.  (BeamVelocity, Amplitude, ...)
+        :return: Array [bin][beam] or None if the dataset is not in the ensemble.
+        """
+        if not getattr(ens, "Is" + attr):
+            return None
+
+        value_attr, np_type = RtiParquetWriter.BIN_BEAM_DATASETS[attr]
+        data = getattr(ens, attr)
+        if isinstance(data, np.ndarray):
+            values = data.astype(np_type)
+        else:
+            # Values not decoded are stored as [bin][beam][1]
+            values = np.array(getattr(data, value_attr), dtype=np_type).reshape(data.num_elements, data.element_multiplier)
+
+        if values.shape[1] != self.num_beams:
+            beams = np.full((values.shape[0], self.num_beams), np.nan, dtype=np_type)
+            beams[:, :min(values.shape[1], self.num_beams)] = values[:, :self.num_beams]
+            values = beams
+
+        return values
+
+    def profile_table(self, ens_list):
+        """
+        Create the profile table with a row for each ensemble and bin.
+        :param ens_list: List of ensembles.
+        :return: Arrow table.
+        """
+        times = []
+        ens_nums = []
+        bin_nums = []
+        bin_depths = []
+        beam_values = {attr: [] for attr in RtiParquetWriter.BIN_BEAM_DATASETS}
+        vectors = {'Magnitude': [], 'Direction': []}
+
+        for ens in ens_list:
+            dt, ens_num, ss_code, ss_config = RtiParquetWriter.ensemble_info(ens)
+            datasets = {attr: self.bin_beam_values(ens, attr) for attr in RtiParquetWriter.BIN_BEAM_DATASETS}
+
+            # Number of bins in the ensemble
+            num_bins = max([values.shape[0] for values in datasets.values() if values is not None], default=0)
+            if num_bins == 0:
+                continue
+
+            blank = 0.0
+            bin_size = 0.0
+            if ens.IsAncillaryData:
+                blank = ens.AncillaryData.FirstBinRange
+                bin_size = ens.AncillaryData.BinSize
+
+            times.append(np.full(num_bins, np.datetime64(dt, 'us') if dt else np.datetime64('NaT', 'us')))
+            ens_nums.append(np.full(num_bins, ens_num, dtype=np.int32))
+            bin_nums.append(np.arange(num_bins, dtype=np.int16))
+            bin_depths.append((blank + bin_size * np.arange(num_bins)).astype(np.float32))
+
+            for attr, values in datasets.items():
+                if values is None or values.shape[0] != num_bins:
+                    values = np.full((num_bins, self.num_beams), np.nan, dtype=np.float32)
+                beam_values[attr].append(values)
+
+            # Water current magnitude and direction
+            mag_dir = {'Magnitude': [], 'Direction': []}
+            if isinstance(ens, CompactEnsemble) and ens.IsEarthVelocity:
+                mag_dir['Magnitude'], mag_dir['Direction'] = EarthVelocity.generate_vectors_array(ens.EarthVelocity)
+            elif ens.IsEarthVelocity:
+                mag_dir['Magnitude'], mag_dir['Direction'] = ens.EarthVelocity.Magnitude, ens.EarthVelocity.Direction
+
+            for vector in vectors:
+                vector_values = np.full(num_bins, np.nan, dtype=np.float32)
+                data = np.asarray(mag_dir[vector], dtype=np.float32)[:num_bins]
+                vector_values[:len(data)] = data
+                vectors[vector].append(vector_values)
+
+        columns = [pa.array(np.concatenate(times) if times else np.array([], dtype='datetime64[us]'), type=pa.timestamp('us')),
+                   pa.array(np.concatenate(ens_nums) if ens_nums else np.array([], dtype=np.int32)),
+                   pa.array(np.concatenate(bin_nums) if bin_nums else np.array([], dtype=np.int16)),
+                   pa.array(np.concatenate(bin_depths) if bin_depths else np.array([], dtype=np.float32))]
+        for attr in RtiParquetWriter.BIN_BEAM_DATASETS:
+            values = np.concatenate(beam_values[attr]) if beam_values[attr] else np.empty((0, self.num_beams), dtype=np.float32)
+            columns += [pa.array(values[:, beam], from_pandas=True) for beam in range(self.num_beams)]
+        for vector in vectors:
+            values = np.concatenate(vectors[vector]) if vectors[vector] else np.array([], dtype=np.float32)
+            columns.append(pa.array(values, from_pandas=True))
+
+        return pa.Table.from_arrays(columns, schema=self.profile_schema)
+
+    def ensemble_table(self, ens_list):
+        """
+        Create the ensemble table with a row for each ensemble.
+        :param ens_list: List of ensembles.
+        :return: Arrow table.
+        """
+        rows = {name: [] for name in self.ensemble_schema.names}
+
+        for ens in ens_list:
+            dt, ens_num, ss_code, ss_config = RtiParquetWriter.ensemble_info(ens)
+            ens_data = ens.EnsembleData
+            rows['datetime'].append(dt)
+            rows['ens_num'].append(ens_num)
+            rows['num_bins'].append(ens_data.NumBins)
+            rows['num_beams'].append(ens_data.NumBeams)
+
+            anc = ens.AncillaryData if ens.IsAncillaryData else None
+            for value in RtiParquetWriter.ANCILLARY_VALUES:
+                rows[value].append(getattr(anc, value) if anc else None)
+
+            bt = ens.BottomTrack if ens.IsBottomTrack else None
+            for value in RtiParquetWriter.BT_VALUES:
+                rows['BT_' + value].append(getattr(bt, value) if bt else None)
+            for value in RtiParquetWriter.BT_BEAM_VALUES:
+                beam_values = getattr(bt, value) if bt else []
+                for beam in range(self.num_beams):
+                    rows['BT_' + value + "_" + str(beam)].append(beam_values[beam] if beam < len(beam_values) else None)
+
+            rows['Voltage'].append(ens.SystemSetup.Voltage if ens.IsSystemSetup else None)
+
+        return pa.Table.from_pydict(rows, schema=self.ensemble_schema)
+
+    def close(self):
+        """
+        Write the buffered ensembles and close all the files.
+        """
+        self.flush()
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+
+
+class RtiParquetReader:
+    """
+    Read the Parquet dataset written by RtiParquetWriter.
+
+    The filters are pushed down to the dataset, so only the partitions and
+    row groups that can match the time, ensemble number, bin and subsystem
+    are read.  Only the columns requested are read.
+
+    reader = RtiParquetReader("/path/to/dataset")
+    df = reader.read_profiles(['datetime', 'bin_num', 'EarthVelocity_0'], start_time=start, end_time=end, bin_end=20)
+    for df in reader.iter_profiles(ss_code="A"):
+        ...
+    """
+
+    def __init__(self, root_path):
+        """
+        Open the dataset.
+        :param root_path: Folder of the Parquet dataset.
+        """
+        self.root_path = root_path
+        self.datasets = {}
+
+    def dataset(self, table_name):
+        """
+        Get the Arrow dataset for the table.
+        :param table_name: "profile" or "ensemble".
+        :return: Arrow dataset.
+        """
+        if table_name not in self.datasets:
+            self.datasets[table_name] = ds.dataset(os.path.join(self.root_path, table_name),
+                                                   format="parquet",
+                                                   partitioning=ds.partitioning(RtiParquetWriter.PARTITIONING, flavor="hive"))
+        return self.datasets[table_name]
+
+    @staticmethod
+    def create_filter(start_time=None, end_time=None, ens_start=None, ens_end=None,
+                      bin_start=None, bin_end=None, ss_code=None, ss_config=None):
+        """
+        Create the filter expression.
+        :param start_time: First datetime to include.
+        :param end_time: Last datetime to include.
+        :param ens_start: First ensemble number to include.
+        :param ens_end: Last ensemble number to include.
+        :param bin_start: First bin to include.
+        :param bin_end: Bin to stop at, not included.
+        :param ss_code: Subsystem code.
+        :param ss_config: Subsystem configuration.
+        :return: Filter expression or None for no filter.
+        """
+        conditions = []
+
+        # The date partition lets the files of other days be skipped
+        if start_time is not None:
+            conditions.append(ds.field('datetime') >= pa.scalar(start_time, type=pa.timestamp('us')))
+            conditions.append(ds.field('date') >= start_time.strftime("%Y-%m-%d"))
+        if end_time is not None:
+            conditions.append(ds.field('datetime') <= pa.scalar(end_time, type=pa.timestamp('us')))
+            conditions.append(ds.field('date') <= end_time.strftime("%Y-%m-%d"))
+        if ens_start is not None:
+            conditions.append(ds.field('ens_num') >= ens_start)
+        if ens_end is not None:
+            conditions.append(ds.field('ens_num') <= ens_end)
+        if bin_start is not None:
+            conditions.append(ds.field('bin_num') >= bin_start)
+        if bin_end is not None:
+            conditions.append(ds.field('bin_num') < bin_end)
+        if ss_code is not None:
+            conditions.append(ds.field('ss_code') == str(ss_code))
+        if ss_config is not None:
+            conditions.append(ds.field('ss_config') == ss_config)
+
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    def read_profiles(self, columns=None, **filters):
+        """
+        Read the profile table.
+        :param columns: List of columns to read.  None = All.
+        :param filters: start_time, end_time, ens_start, ens_end, bin_start, bin_end, ss_code, ss_config.
+        :return: DataFrame sorted by datetime, ensemble number and bin.
+        """
+        table = self.dataset('profile').to_table(columns=columns, filter=RtiParquetReader.create_filter(**filters))
+        return RtiParquetReader.sort_df(table.to_pandas(), ['datetime', 'ens_num', 'bin_num'])
+
+    def read_ensembles(self, columns=None, **filters):
+        """
+        Read the ensemble table.
+        The bin filters can not be used.
+        :param columns: List of columns to read.  None = All.
+        :param filters: start_time, end_time, ens_start, ens_end, ss_code, ss_config.
+        :return: DataFrame sorted by datetime and ensemble number.
+        """
+        table = self.dataset('ensemble').to_table(columns=columns, filter=RtiParquetReader.create_filter(**filters))
+        return RtiParquetReader.sort_df(table.to_pandas(), ['datetime', 'ens_num'])
+
+    def iter_profiles(self, columns=None, batch_size=100000, **filters):
+        """
+        Read the profile table a batch at a time, so the whole table is not in memory.
+        The batches are in file order.
+        :param columns: List of columns to read.  None = All.
+        :param batch_size: Maximum number of rows in each DataFrame.
+        :param filters: start_time, end_time, ens_start, ens_end, bin_start, bin_end, ss_code, ss_config.
+        :return: Generator of DataFrames.
+        """
+        scanner = self.dataset('profile').scanner(columns=columns, filter=RtiParquetReader.create_filter(**filters), batch_size=batch_size)
+        for batch in scanner.to_batches():
+            if batch.num_rows:
+                yield batch.to_pandas()
+
+    @staticmethod
+    def sort_df(df, sort_columns):
+        """
+        Sort the DataFrame by the columns that were read.
+        :param df: DataFrame.
+        :param sort_columns: Columns to sort by.
+        :return: Sorted DataFrame with a new index.
+        """
+        sort_columns = [column for column in sort_columns if column in df.columns]
+        if sort_columns:
+            df = df.sort_values(sort_columns, kind="stable")
+        return df.reset_index(drop=True)
@@ -1,5 +1,12 @@
 from rti_python.Writer.rti_sql import rti_sql
 from rti_python.Ensemble import Ensemble
+import psycopg2
+from psycopg2.extras import execute_values
+import numpy as np
+import struct
+import io
+import csv
+import logging
 
 from datetime import datetime, date, time
 
@@ -8,14 +15,55 @@ class RtiProjects:
     """
     Handle the projects.
     Create projects and add data to the projects.
+
+    To add a lot of ensembles, use the bulk insert.  The ensembles are
+    buffered and each table is written with a single COPY (or execute_values)
+    for every batch of ensembles.
+    prj.begin_bulk(prj_name, batch_size=500)
+    prj.add_ensemble_bulk(ens)
+    prj.end_bulk()
+
+    With array_schema, the [Bin x Beam] datasets are written to the array
+    tables (rti_sql.create_array_tables()) as one row per ensemble instead
+    of a row per beam with a column per bin.
     """
 
+    # Columns in the ensembles table, in the order of ensemble_values()
+    ENSEMBLE_COLUMNS = ('ensnum', 'numbins', 'numbeams', 'desiredpings', 'actualpings', 'status', 'datetime',
+                        'serialnumber', 'firmware', 'subsystemCode', 'subsystemConfig', 'rangeFirstBin', 'binSize',
+                        'firstPingTime', 'lastPingTime', 'heading', 'pitch', 'roll', 'waterTemp', 'sysTemp',
+                        'salinity', 'pressure', 'xdcrDepth', 'sos', 'rawMagFieldStrength', 'pitchGravityVector',
+                        'rollGravityVector', 'verticalGravityVector', 'BtSamplesPerSecond', 'BtSystemFreqHz',
+                        'BtCPCE', 'BtNCE', 'BtRepeatN', 'WpSamplesPerSecond', 'WpSystemFreqHz', 'WpCPCE', 'WpNCE',
+                        'WpRepeatN', 'WpLagSamples', 'Voltage', 'XmtVoltage', 'BtBroadband', 'BtLagLength',
+                        'BtNarrowband', 'BtBeamMux', 'WpBroadband', 'WpLagLength', 'WpTransmitBandwidth',
+                        'WpReceiveBandwidth', 'burstNum', 'project_id', 'created', 'modified')
+
+    # Columns in the [Bin x Beam] array tables
+    ARRAY_COLUMNS = ('ensIndex', 'numBins', 'numBeams', 'data', 'created', 'modified')
+
+    # [Bin x Beam] dataset tables
+    # (Table, Dataset, Dataset value attribute, Bad value)
+    DATASET_TABLES = (('correlation', 'Correlation', 'Correlation', Ensemble.Ensemble.BadVelocity),
+                      ('amplitude', 'Amplitude', 'Amplitude', Ensemble.Ensemble.BadVelocity),
+                      ('beamvelocity', 'BeamVelocity', 'Velocities', Ensemble.Ensemble.BadVelocity),
+                      ('instrumentvelocity', 'InstrumentVelocity', 'Velocities', Ensemble.Ensemble.BadVelocity),
+                      ('earthvelocity', 'EarthVelocity', 'Velocities', Ensemble.Ensemble.BadVelocity),
+                      ('goodbeamping', 'GoodBeam', 'GoodBeam', 0),
+                      ('goodearthping', 'GoodEarth', 'GoodEarth', 0))
+
     def __init__(self,
                  host='localhost',
                  port=5432,
                  dbname='postgres',
                  user='user',
-                 pw='pw'):
+                 pw='pw',
+                 array_schema=False,
+                 use_pool=True):
+        """
+        :param array_schema: TRUE = Write the [Bin x Beam] datasets to the array tables.
+        :param use_pool: TRUE = Reuse the database connections from a connection pool.
+        """
 
         # Construct connection string
         self.sql_conn_string = "host=\'{0}\' port=\'{1}\' dbname=\'{2}\' user=\'{3}\' password=\'{4}\'".format(host, port, dbname, user, pw)
@@ -25,6 +73,18 @@ class RtiProjects:
         self.batch_prj_id = 0
         self.batch_count = 0
 
+        # Buffered ensembles when doing bulk inserts
+        self.bulk_ens = []
+        self.bulk_batch_size = 500
+        self.bulk_use_copy = True
+        self.bulk_ens_count = 0
+
+        # Write the [Bin x Beam] datasets to the array tables
+        self.array_schema = array_schema
+
+        # Get the database connections from the pool
+        self.use_pool = use_pool
+
     def add_prj_sql(self, prj_name, prj_file_path):
         """
         Add the given project name to the projects table.
@@ -37,7 +97,7 @@ class RtiProjects:
         if project_exist == 0:
             # Add project to database
             dt = datetime.now()
-            sql = rti_sql(self.sql_conn_string)
+            sql = rti_sql(self.sql_conn_string, use_pool=self.use_pool)
 
             query = 'INSERT INTO projects (name, path, created, modified) VALUES (%s,%s,%s,%s) RETURNING ID;'
 
@@ -61,7 +121,7 @@ class RtiProjects:
 
         # Make connection
         try:
-            sql = rti_sql(self.sql_conn_string)
+            sql = rti_sql(self.sql_conn_string, use_pool=self.use_pool)
         except Exception as e:
             print("Unable to connect to the database")
             sql.close()
@@ -96,7 +156,7 @@ class RtiProjects:
 
         # Make connection
         try:
-            sql = rti_sql(self.sql_conn_string)
+            sql = rti_sql(self.sql_conn_string, use_pool=self.use_pool)
         except Exception as e:
             print("Unable to connect to the database")
             return result
@@ -116,7 +176,7 @@ class RtiProjects:
     def begin_batch(self, prj_name):
         # Make connection
         try:
-            self.batch_sql = rti_sql(self.sql_conn_string)
+            self.batch_sql = rti_sql(self.sql_conn_string, use_pool=self.use_pool)
         except Exception as e:
             print("Unable to connect to the database")
 
@@ -271,116 +331,10 @@ class RtiProjects:
         dt = datetime.now()
 
         # Add line for each dataset type
-        ens_query = "INSERT INTO ensembles (" \
-                    "ensnum, " \
-                    "numbins, " \
-                    "numbeams, " \
-                    "desiredpings, " \
-                    "actualpings, " \
-                    "status, " \
-                    "datetime, " \
-                    "serialnumber, " \
-                    "firmware, " \
-                    "subsystemCode, " \
-                    "subsystemConfig, " \
-                    'rangeFirstBin, ' \
-                    'binSize, ' \
-                    'firstPingTime, ' \
-                    'lastPingTime, ' \
-                    'heading, ' \
-                    'pitch, ' \
-                    'roll, ' \
-                    'waterTemp, ' \
-                    'sysTemp, ' \
-                    'salinity, ' \
-                    'pressure, ' \
-                    'xdcrDepth, ' \
-                    'sos, ' \
-                    'rawMagFieldStrength,' \
-                    'pitchGravityVector, ' \
-                    'rollGravityVector, ' \
-                    'verticalGravityVector, ' \
-                    'BtSamplesPerSecond, ' \
-                    'BtSystemFreqHz, ' \
-                    'BtCPCE, ' \
-                    'BtNCE, ' \
-                    'BtRepeatN, ' \
-                    'WpSamplesPerSecond, ' \
-                    'WpSystemFreqHz, ' \
-                    'WpCPCE, ' \
-                    'WpNCE, ' \
-                    'WpRepeatN, ' \
-                    'WpLagSamples, ' \
-                    'Voltage, ' \
-                    'XmtVoltage, ' \
-                    'BtBroadband, ' \
-                    'BtLagLength, ' \
-                    'BtNarrowband, ' \
-                    'BtBeamMux, ' \
-                    'WpBroadband, ' \
-                    'WpLagLength, ' \
-                    'WpTransmitBandwidth, ' \
-                    'WpReceiveBandwidth, ' \
-                    'burstNum, ' \
-                    'project_id, ' \
-                    'created, ' \
-                    'modified)' \
-                    'VALUES(%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s) ' \
-                    'RETURNING ID;'
-
-        self.batch_sql.cursor.execute(ens_query, (ens.EnsembleData.EnsembleNumber,
-                                                  ens.EnsembleData.NumBins,
-                                                  ens.EnsembleData.NumBeams,
-                                                  ens.EnsembleData.DesiredPingCount,
-                                                  ens.EnsembleData.ActualPingCount,
-                                                  ens.EnsembleData.Status,
-                                                  ens.EnsembleData.datetime(),
-                                                  ens.EnsembleData.SerialNumber,
-                                                  ens.EnsembleData.firmware_str(),
-                                                  ens.EnsembleData.SysFirmwareSubsystemCode,
-                                                  ens.EnsembleData.SubsystemConfig,
-                                                  ens.AncillaryData.FirstBinRange,
-                                                  ens.AncillaryData.BinSize,
-                                                  ens.AncillaryData.FirstPingTime,
-                                                  ens.AncillaryData.LastPingTime,
-                                                  ens.AncillaryData.Heading,
-                                                  ens.AncillaryData.Pitch,
-                                                  ens.AncillaryData.Roll,
-                                                  ens.AncillaryData.WaterTemp,
-                                                  ens.AncillaryData.SystemTemp,
-                                                  ens.AncillaryData.Salinity,
-                                                  ens.AncillaryData.Pressure,
-                                                  ens.AncillaryData.TransducerDepth,
-                                                  ens.AncillaryData.SpeedOfSound,
-                                                  ens.AncillaryData.RawMagFieldStrength,
-                                                  ens.AncillaryData.PitchGravityVector,
-                                                  ens.AncillaryData.RollGravityVector,
-                                                  ens.AncillaryData.VerticalGravityVector,
-                                                  ens.SystemSetup.BtSamplesPerSecond,
-                                                  ens.SystemSetup.BtSystemFreqHz,
-                                                  ens.SystemSetup.BtCPCE,
-                                                  ens.SystemSetup.BtNCE,
-                                                  ens.SystemSetup.BtRepeatN,
-                                                  ens.SystemSetup.WpSamplesPerSecond,
-                                                  ens.SystemSetup.WpSystemFreqHz,
-                                                  ens.SystemSetup.WpCPCE,
-                                                  ens.SystemSetup.WpNCE,
-                                                  ens.SystemSetup.WpRepeatN,
-                                                  ens.SystemSetup.WpLagSamples,
-                                                  ens.SystemSetup.Voltage,
-                                                  ens.SystemSetup.XmtVoltage,
-                                                  ens.SystemSetup.BtBroadband,
-                                                  ens.SystemSetup.BtLagLength,
-                                                  ens.SystemSetup.BtNarrowband,
-                                                  ens.SystemSetup.BtBeamMux,
-                                                  ens.SystemSetup.WpBroadband,
-                                                  ens.SystemSetup.WpLagLength,
-                                                  ens.SystemSetup.WpTransmitBandwidth,
-                                                  ens.SystemSetup.WpReceiveBandwidth,
-                                                  burst_num,
-                                                  self.batch_prj_id[0][0],
-                                                  dt,
-                                                  dt))
+        ens_query = "INSERT INTO ensembles ({0}) VALUES({1}) RETURNING ID;".format(", ".join(RtiProjects.ENSEMBLE_COLUMNS),
+                                                                                 ",".join(["%s"] * len(RtiProjects.ENSEMBLE_COLUMNS)))
+
+        self.batch_sql.cursor.execute(ens_query, self.ensemble_values(ens, burst_num, self.batch_prj_id[0][0], dt))
         ens_idx = self.batch_sql.cursor.fetchone()[0]
         #print("rti_projects:add_ensemble_ds() Ens Index: " + str(ens_idx))
 
@@ -392,6 +346,71 @@ class RtiProjects:
 
         return ens_idx
 
+    @staticmethod
+    def ensemble_values(ens, burst_num, prj_id, dt):
+        """
+        Get the values for a row in the ensembles table.
+        The values are in the order of ENSEMBLE_COLUMNS.
+        :param ens: Ensemble with Ensemble Data, Ancillary Data and System Setup.
+        :param burst_num: Burst number if a waves deployment.
+        :param prj_id: Project index.
+        :param dt: Created and modified date and time.
+        :return: Tuple of values.
+        """
+        return (ens.EnsembleData.EnsembleNumber,
+                ens.EnsembleData.NumBins,
+                ens.EnsembleData.NumBeams,
+                ens.EnsembleData.DesiredPingCount,
+                ens.EnsembleData.ActualPingCount,
+                ens.EnsembleData.Status,
+                ens.EnsembleData.datetime(),
+                ens.EnsembleData.SerialNumber,
+                ens.EnsembleData.firmware_str(),
+                ens.EnsembleData.SysFirmwareSubsystemCode,
+                ens.EnsembleData.SubsystemConfig,
+                ens.AncillaryData.FirstBinRange,
+                ens.AncillaryData.BinSize,
+                ens.AncillaryData.FirstPingTime,
+                ens.AncillaryData.LastPingTime,
+                ens.AncillaryData.Heading,
+                ens.AncillaryData.Pitch,
+                ens.AncillaryData.Roll,
+                ens.AncillaryData.WaterTemp,
+                ens.AncillaryData.SystemTemp,
+                ens.AncillaryData.Salinity,
+                ens.AncillaryData.Pressure,
+                ens.AncillaryData.TransducerDepth,
+                ens.AncillaryData.SpeedOfSound,
+                ens.AncillaryData.RawMagFieldStrength,
+                ens.AncillaryData.PitchGravityVector,
+                ens.AncillaryData.RollGravityVector,
+                ens.AncillaryData.VerticalGravityVector,
+                ens.SystemSetup.BtSamplesPerSecond,
+                ens.SystemSetup.BtSystemFreqHz,
+                ens.SystemSetup.BtCPCE,
+                ens.SystemSetup.BtNCE,
+                ens.SystemSetup.BtRepeatN,
+                ens.SystemSetup.WpSamplesPerSecond,
+                ens.SystemSetup.WpSystemFreqHz,
+                ens.SystemSetup.WpCPCE,
+                ens.SystemSetup.WpNCE,
+                ens.SystemSetup.WpRepeatN,
+                ens.SystemSetup.WpLagSamples,
+                ens.SystemSetup.Voltage,
+                ens.SystemSetup.XmtVoltage,
+                ens.SystemSetup.BtBroadband,
+                ens.SystemSetup.BtLagLength,
+                ens.SystemSetup.BtNarrowband,
+                ens.SystemSetup.BtBeamMux,
+                ens.SystemSetup.WpBroadband,
+                ens.SystemSetup.WpLagLength,
+                ens.SystemSetup.WpTransmitBandwidth,
+                ens.SystemSetup.WpReceiveBandwidth,
+                burst_num,
+                prj_id,
+                dt,
+                dt)
+
     def add_bottomtrack_ds(self, ens, ens_idx):
         if not ens.IsBottomTrack:
             return
@@ -804,7 +823,7 @@ class RtiProjects:
         #print(query)
 
         self.batch_sql.cursor.execute(query, (ens_idx,
-                                              ens.NmeaData.nmea_sentences,
+                                              RtiProjects.nmea_text(ens.NmeaData.nmea_sentences),
                                               gga,
                                               vtg,
                                               rmc,
@@ -838,11 +857,17 @@ class RtiProjects:
         :param num_elements: Number of bins.
         :param element_multiplier: Number of beams.
         :param ens_idx: Ensemble index in Ensembles table.
-        :param bad_val: If a value is bad or missing, replace it with this value.
+        :param bad_val: If a value is missing (None or NaN), replace it with this value.  A 0 value is kept.
         """
+        if self.array_schema:
+            return self.add_dataset_array(table, data, num_elements, element_multiplier, ens_idx, bad_val)
+
         # Get Date and time for created and modified
         dt = datetime.now()
 
+        # Replace the missing values the same as the bulk loader
+        values = RtiProjects.dataset_values(data, num_elements, element_multiplier, bad_val)
+
         beam0_avail = False
         beam1_avail = False
         beam2_avail = False
@@ -858,34 +883,22 @@ class RtiProjects:
         for bin_num in range(num_elements):
             if element_multiplier > 0:
                 query_b0_label += "Bin{0}, ".format(bin_num)
-                if data[bin_num][0]:
-                    query_b0_val += "{0}, ".format(data[bin_num][0])
-                else:
-                    query_b0_val += "{0}, ".format(bad_val)
+                query_b0_val += "{0}, ".format(values[0][bin_num])
                 beam0_avail = True
 
             if element_multiplier > 1:
                 query_b1_label += "Bin{0}, ".format(bin_num)
-                if data[bin_num][1]:
-                    query_b1_val += "{0}, ".format(data[bin_num][1])
-                else:
-                    query_b1_val += "{0}, ".format(bad_val)
+                query_b1_val += "{0}, ".format(values[1][bin_num])
                 beam1_avail = True
 
             if element_multiplier > 2:
                 query_b2_label += "Bin{0}, ".format(bin_num)
-                if data[bin_num][2]:
-                    query_b2_val += "{0}, ".format(data[bin_num][2])
-                else:
-                    query_b2_val += "{0}, ".format(bad_val)
+                query_b2_val += "{0}, ".format(values[2][bin_num])
                 beam2_avail = True
 
             if element_multiplier > 3:
                 query_b3_label += "Bin{0}, ".format(bin_num)
-                if data[bin_num][3]:
-                    query_b3_val += "{0}, ".format(data[bin_num][3])
-                else:
-                    query_b3_val += "{0}, ".format(bad_val)
+                query_b3_val += "{0}, ".format(values[3][bin_num])
                 beam3_avail = True
 
         query_b0_label = query_b0_label[:-2]        # Remove final comma
@@ -946,4 +959,399 @@ class RtiProjects:
         self.batch_count += 1
         if self.batch_count > 10:
             self.batch_sql.commit()
-            self.batch_count = 0
\ No newline at end of file
+            self.batch_count = 0
+
+    def add_dataset_array(self, table, data, num_elements, element_multiplier, ens_idx, bad_val=Ensemble.Ensemble.BadVelocity):
+        """
+        Add a dataset to the array table.  All the beams and bins are a single row.
+        :param table: Table name as a string.  (beamvelocity, earthvelocity, ...)
+        :param data: 2D Array of the data.
+        :param num_elements: Number of bins.
+        :param element_multiplier: Number of beams.
+        :param ens_idx: Ensemble index in Ensembles table.
+        :param bad_val: If a value is bad or missing, replace it with this value.
+        """
+        # Get Date and time for created and modified
+        dt = datetime.now()
+
+        values = RtiProjects.dataset_values(data, num_elements, element_multiplier, bad_val, max_beams=None)
+
+        query = "INSERT INTO {0} ({1}) VALUES (%s, %s, %s, %s, %s, %s);".format(rti_sql.ARRAY_TABLES[table][0], ", ".join(RtiProjects.ARRAY_COLUMNS))
+        self.batch_sql.cursor.execute(query, (ens_idx, num_elements, element_multiplier, psycopg2.Binary(rti_sql.encode_array(values, table)), dt, dt))
+
+        # Monitor how many inserts have been done so it does not get too big
+        self.batch_count += 1
+        if self.batch_count > 10:
+            self.batch_sql.commit()
+            self.batch_count = 0
+
+    def begin_bulk(self, prj_name, batch_size=500, use_copy=True):
+        """
+        Start a bulk insert.  The ensembles are buffered and written
+        batch_size ensembles at a time.  Each table is written with a single
+        COPY FROM STDIN or execute_values for each batch.
+        :param prj_name: Project name.
+        :param batch_size: Number of ensembles to buffer before writing to the database.
+        :param use_copy: TRUE = Use COPY FROM STDIN.  FALSE = Use execute_values.
+        :return:
+        """
+        self.begin_batch(prj_name)
+        self.bulk_ens = []
+        self.bulk_batch_size = batch_size
+        self.bulk_use_copy = use_copy
+        self.bulk_ens_count = 0
+
+    def add_ensemble_bulk(self, ens, burst_num=0):
+        """
+        Buffer the ensemble.  The buffered ensembles are written to
+        the database when the batch size is reached.
+        :param ens: Ensemble to store data.
+        :param burst_num: Burst number if a waves deployment.
+        :return:
+        """
+        if self.batch_sql is None:
+            print("Bulk import not started.  Please call begin_bulk() first.")
+            return
+
+        self.bulk_ens.append((ens, burst_num))
+        if len(self.bulk_ens) >= self.bulk_batch_size:
+            self.flush_bulk()
+
+    def end_bulk(self):
+        """
+        Write the remaining buffered ensembles and close the connection.
+        :return:
+        """
+        if self.batch_sql is None:
+            return
+
+        self.flush_bulk()
+        self.end_batch()
+
+    def flush_bulk(self):
+        """
+        Write all the buffered ensembles to the database.
+        Ensembles without Ensemble Data, Ancillary Data and System Setup are not written.
+        If the write fails, the transaction is rolled back and the error is raised.
+        The ensembles are kept in the buffer, so calling flush_bulk() again will retry the batch.
+        :return: Number of rows written.
+        """
+        # Ensembles table requires the Ensemble Data, Ancillary Data and System Setup
+        ensembles = [(ens, burst_num) for ens, burst_num in self.bulk_ens if ens.IsEnsembleData and ens.IsAncillaryData and ens.IsSystemSetup]
+        if not ensembles:
+            self.bulk_ens = []
+            return 0
+
+        # Get Date and time for created and modified
+        dt = datetime.now()
+        prj_id = self.batch_prj_id[0][0]
+
+        try:
+            # Reserve the ensemble indexes, so the datasets can refer to their ensemble
+            self.batch_sql.cursor.execute("SELECT nextval(pg_get_serial_sequence('ensembles', 'id')) FROM generate_series(1, %s);", (len(ensembles),))
+            ens_idxs = [row[0] for row in self.batch_sql.cursor.fetchall()]
+
+            # Rows for each table and columns
+            tables = {}
+            datasets = {}
+            for ens_idx, (ens, burst_num) in zip(ens_idxs, ensembles):
+                tables.setdefault(('ensembles', ('id',) + RtiProjects.ENSEMBLE_COLUMNS), []).append((ens_idx,) + RtiProjects.ensemble_values(ens, burst_num, prj_id, dt))
+
+                # [Bin x Beam] datasets are kept as arrays, [beam][bin]
+                for table, ds_name, value_attr, bad_val in RtiProjects.DATASET_TABLES:
+                    if getattr(ens, "Is" + ds_name):
+                        ds = getattr(ens, ds_name)
+                        values = RtiProjects.dataset_values(getattr(ds, value_attr), ds.num_elements, ds.element_multiplier, bad_val,
+                                                            max_beams=None if self.array_schema else 4)
+                        datasets.setdefault((table, ds.num_elements), []).append((ens_idx, values))
+
+                if ens.IsBottomTrack:
+                    columns, row = RtiProjects.bottomtrack_row(ens, ens_idx, dt)
+                    tables.setdefault(('bottomtrack', columns), []).append(row)
+
+                if ens.IsRangeTracking:
+                    columns, row = RtiProjects.rangetracking_row(ens, ens_idx, dt)
+                    tables.setdefault(('rangetracking', columns), []).append(row)
+
+                if ens.IsNmeaData:
+                    columns, row = RtiProjects.nmea_row(ens, ens_idx, dt)
+                    tables.setdefault(('nmea', columns), []).append(row)
+
+            # Write each table
+            row_count = 0
+            for (table, columns), rows in tables.items():
+                self.write_rows(table, columns, rows)
+                row_count += len(rows)
+
+            for (table, num_bins), ds_values in datasets.items():
+                row_count += self.write_dataset(table, num_bins, ds_values, dt)
+
+            self.batch_sql.commit()
+        except Exception as ex:
+            logging.error("Error adding %d ensembles to the project.  The batch is kept to retry.  %s", len(ensembles), ex)
+            self.batch_sql.conn.rollback()
+            raise
+
+        self.bulk_ens = []
+        self.bulk_ens_count += len(ensembles)
+        return row_count
+
+    def write_rows(self, table, columns, rows):
+        """
+        Write all the rows to the table.
+        :param table: Table name.
+        :param columns: Column names.
+        :param rows: List of rows.  Each row has a value for each column.
+        :return:
+        """
+        if self.bulk_use_copy:
+            # Stream the rows as CSV.  None is written as an empty value, which is NULL.
+            buff = io.StringIO()
+            csv.writer(buff).writerows(rows)
+            buff.seek(0)
+            self.batch_sql.cursor.copy_expert("COPY {0} ({1}) FROM STDIN WITH (FORMAT csv);".format(table, ", ".join(columns)), buff)
+        else:
+            execute_values(self.batch_sql.cursor,
+                           "INSERT INTO {0} ({1}) VALUES %s;".format(table, ", ".join(columns)),
+                           rows,
+                           page_size=self.bulk_batch_size)
+
+    def write_dataset(self, table, num_bins, ds_values, dt):
+        """
+        Write a row for each beam of the [Bin x Beam] datasets.
+        With COPY, the rows are sent in the binary format.  Formatting
+        the bin values as text takes longer than writing them to the database.
+        :param table: Table name.
+        :param num_bins: Number of bins in all the datasets.
+        :param ds_values: List of (Ensemble index, Array [beam][bin]).
+        :param dt: Created and modified date and time.
+        :return: Number of rows written.
+        """
+        # One row for each ensemble in the array table
+        if self.array_schema:
+            rows = []
+            for ens_idx, values in ds_values:
+                data = rti_sql.encode_array(values, table)
+                if self.bulk_use_copy:
+                    data = "\\x" + data.hex()
+                else:
+                    data = psycopg2.Binary(data)
+                rows.append((ens_idx, num_bins, values.shape[0], data, dt, dt))
+
+            self.write_rows(rti_sql.ARRAY_TABLES[table][0], RtiProjects.ARRAY_COLUMNS, rows)
+            return len(rows)
+
+        columns = RtiProjects.dataset_columns(num_bins)
+
+        if self.bulk_use_copy:
+            is_int = table in ('goodbeamping', 'goodearthping')
+            data = RtiProjects.dataset_copy_data(ds_values, dt, is_int)
+            self.batch_sql.cursor.copy_expert("COPY {0} ({1}) FROM STDIN WITH (FORMAT binary);".format(table, ", ".join(columns)), io.BytesIO(data))
+        else:
+            rows = []
+            for ens_idx, values in ds_values:
+                for beam in range(values.shape[0]):
+                    rows.append((ens_idx, beam, dt, dt) + tuple(values[beam].tolist()))
+            self.write_rows(table, columns, rows)
+
+        return sum(values.shape[0] for ens_idx, values in ds_values)
+
+    @staticmethod
+    def dataset_columns(num_bins):
+        """
+        Columns in a [Bin x Beam] dataset table.
+        :param num_bins: Number of bins.
+        :return: Column names.
+        """
+        return ('ensIndex', 'beam', 'created', 'modified') + tuple("Bin{0}".format(bin_num) for bin_num in range(num_bins))
+
+    @staticmethod
+    def dataset_values(data, num_elements, element_multiplier, bad_val=Ensemble.Ensemble.BadVelocity, max_beams=4):
+        """
+        Convert the [Bin x Beam] data to an array [beam][bin].
+        :param data: 2D Array of the data [bin][beam].
+        :param num_elements: Number of bins.
+        :param element_multiplier: Number of beams.
+        :param bad_val: If a value is missing (None or NaN), replace it with this value.
+        :param max_beams: Maximum number of beams.  The tables with a row per beam have up to 4 beams.  None = All the beams.
+        :return: Array [beam][bin].
+        """
+        # Values not decoded are stored as [bin][beam][1]
+        values = np.array(data, dtype=float).reshape(num_elements, element_multiplier)[:, :max_beams].T
+        values[np.isnan(values)] = bad_val
+        return values
+
+    @staticmethod
+    def dataset_copy_data(ds_values, dt, is_int=False):
+        """
+        Create the COPY binary format data for the [Bin x Beam] datasets.
+        Each row is the ensemble index, beam, created, modified and the bin values.
+        :param ds_values: List of (Ensemble index, Array [beam][bin]).  All with the same number of bins.
+        :param dt: Created and modified date and time.
+        :param is_int: TRUE = Bin values are integer.  FALSE = Bin values are real.
+        :return: COPY binary data.
+        """
+        num_bins = ds_values[0][1].shape[1]
+        num_rows = sum(values.shape[0] for ens_idx, values in ds_values)
+
+        # Each field has the length of the field before the value
+        fields = [('num_fields', '>i2'),
+                  ('ens_idx_len', '>i4'), ('ens_idx', '>i4'),
+                  ('beam_len', '>i4'), ('beam', '>i4'),
+                  ('created_len', '>i4'), ('created', '>i8'),
+                  ('modified_len', '>i4'), ('modified', '>i8')]
+        for bin_num in range(num_bins):
+            fields += [('len' + str(bin_num), '>i4'), ('bin' + str(bin_num), '>i4' if is_int else '>f4')]
+        rows = np.zeros(num_rows, dtype=np.dtype(fields))
+
+        # Timestamps are microseconds since 2000-01-01
+        pg_time = int((dt - datetime(2000, 1, 1)).total_seconds() * 1e6)
+
+        rows['num_fields'] = 4 + num_bins
+        rows['ens_idx_len'] = 4
+        rows['beam_len'] = 4
+        rows['created_len'] = 8
+        rows['created'] = pg_time
+        rows['modified_len'] = 8
+        rows['modified'] = pg_time
+
+        rows['ens_idx'] = np.concatenate([np.full(values.shape[0], ens_idx) for ens_idx, values in ds_values])
+        rows['beam'] = np.concatenate([np.arange(values.shape[0]) for ens_idx, values in ds_values])
+
+        all_values = np.concatenate([values for ens_idx, values in ds_values])
+        for bin_num in range(num_bins):
+            rows['len' + str(bin_num)] = 4
+            rows['bin' + str(bin_num)] = all_values[:, bin_num]
+
+        # Header, rows and trailer
+        return b'PGCOPY\n\xff\r\n\x00' + struct.pack('>ii', 0, 0) + rows.tobytes() + struct.pack('>h', -1)
+
+    @staticmethod
+    def bottomtrack_row(ens, ens_idx, dt):
+        """
+        Create the row for the bottomtrack table.
+        :param ens: Ensemble with Bottom Track.
+        :param ens_idx: Ensemble index in Ensembles table.
+        :param dt: Created and modified date and time.
+        :return: Column names, Row
+        """
+        bt = ens.BottomTrack
+        columns = ['ensIndex', 'firstPingTime', 'lastPingTime', 'heading', 'pitch', 'roll', 'waterTemp', 'salinity',
+                   'xdcrDepth', 'pressure', 'sos', 'status', 'numBeams', 'pingCount', 'created', 'modified']
+        row = [ens_idx, bt.FirstPingTime, bt.LastPingTime, bt.Heading, bt.Pitch, bt.Roll, bt.WaterTemp, bt.Salinity,
+               bt.TransducerDepth, bt.Pressure, bt.SpeedOfSound, int(bt.Status), int(bt.NumBeams), int(bt.ActualPingCount), dt, dt]
+
+        # (Column prefix, Values, Integer column)
+        beam_values = (("rangeBeam", bt.Range, False),
+                       ("snrBeam", bt.SNR, False),
+                       ("ampBeam", bt.Amplitude, False),
+                       ("corrBeam", bt.Correlation, False),
+                       ("beamVelBeam", bt.BeamVelocity, False),
+                       ("beamGoodBeam", bt.BeamGood, True),
+                       ("instrVelBeam", bt.InstrumentVelocity, False),
+                       ("instrGoodBeam", bt.InstrumentGood, True),
+                       ("earthVelBeam", bt.EarthVelocity, False),
+                       ("earthGoodBeam", bt.EarthGood, True),
+                       ("snrPulseCoherentBeam", bt.SNR_PulseCoherent, False),
+                       ("ampPulseCoherentBeam", bt.Amp_PulseCoherent, False),
+                       ("velPulseCoherentBeam", bt.Vel_PulseCoherent, False),
+                       ("noisePulseCoherentBeam", bt.Noise_PulseCoherent, False),
+                       ("corrPulseCoherentBeam", bt.Corr_PulseCoherent, False))
+        RtiProjects.add_beam_values(columns, row, beam_values, int(bt.NumBeams))
+
+        return tuple(columns), tuple(row)
+
+    @staticmethod
+    def rangetracking_row(ens, ens_idx, dt):
+        """
+        Create the row for the rangetracking table.
+        :param ens: Ensemble with Range Tracking.
+        :param ens_idx: Ensemble index in Ensembles table.
+        :param dt: Created and modified date and time.
+        :return: Column names, Row
+        """
+        rt = ens.RangeTracking
+        columns = ['ensIndex', 'numBeams', 'created', 'modified']
+        row = [ens_idx, int(rt.NumBeams), dt, dt]
+
+        # (Column prefix, Values, Integer column)
+        beam_values = (("snrBeam", rt.SNR, False),
+                       ("rangeBeam", rt.Range, False),
+                       ("pingsBeam", rt.Pings, True),
+                       ("amplitudeBeam", rt.Amplitude, False),
+                       ("correlationBeam", rt.Correlation, False),
+                       ("beamVelocityBeam", rt.BeamVelocity, False),
+                       ("instrVelBeam", rt.InstrumentVelocity, False),
+                       ("earthVelBeam", rt.EarthVelocity, False))
+        RtiProjects.add_beam_values(columns, row, beam_values, int(rt.NumBeams))
+
+        return tuple(columns), tuple(row)
+
+    @staticmethod
+    def add_beam_values(columns, row, beam_values, num_beams):
+        """
+        Add a column and value for each beam.  The tables have up to 4 beams.
+        :param columns: List of columns to add to.
+        :param row: List of values to add to.
+        :param beam_values: List of (Column prefix, Values, Integer column).
+        :param num_beams: Number of beams.
+        :return:
+        """
+        for prefix, values, is_int in beam_values:
+            for beam in range(min(num_beams, 4, len(values))):
+                columns.append(prefix + str(beam))
+                row.append(int(values[beam]) if is_int else values[beam])
+
+    @staticmethod
+    def nmea_text(nmea_sentences):
+        """
+        Create the value for the nmea column.  The nmea column has always stored the
+        list of sentences as the PostgreSQL array text, {"$GPGGA,...","$GPVTG,..."}.
+        The text is created here, so add_nmea_ds and the bulk insert store the same value.
+        :param nmea_sentences: List of NMEA sentences.
+        :return: Array text of the sentences.
+        """
+        elements = []
+        for sentence in nmea_sentences:
+            if sentence is None:
+                elements.append("NULL")
+                continue
+
+            sentence = str(sentence)
+            if sentence == "" or sentence.upper() == "NULL" or any(c in sentence for c in '{}",\\ \t\n\r\v\f'):
+                sentence = '"' + sentence.replace("\\", "\\\\").replace('"', '\\"') + '"'
+            elements.append(sentence)
+
+        return "{" + ",".join(elements) + "}"
+
+    @staticmethod
+    def nmea_row(ens, ens_idx, dt):
+        """
+        Create the row for the nmea table.
+        The GPS date and time uses the date of the ensemble.
+        :param ens: Ensemble with NMEA data.
+        :param ens_idx: Ensemble index in Ensembles table.
+        :param dt: Created and modified date and time.
+        :return: Column names, Row
+        """
+        nmea = ens.NmeaData
+
+        # GPS DateTime
+        gps_datetime = None
+        if nmea.datetime is not None and ens.IsEnsembleData:
+            try:
+                gps_datetime = datetime.combine(date(ens.EnsembleData.Year, ens.EnsembleData.Month, ens.EnsembleData.Day), nmea.datetime)
+            except Exception:
+                gps_datetime = None
+
+        # Set null if does not exist
+        sentences = []
+        for msg_type in ('GPGGA', 'GPVTG', 'GPRMC', 'GPRMF', 'GPGLL', 'GPGSV', 'GPGSA', 'GPHDT', 'GPHDG'):
+            msg = getattr(nmea, msg_type, None)
+            sentences.append(str(msg) if msg is not None else None)
+
+        columns = ('ensIndex', 'nmea', 'GPGGA', 'GPVTG', 'GPRMC', 'GPRMF', 'GPGLL', 'GPGSV', 'GPGSA', 'GPHDT', 'GPHDG',
+                   'latitude', 'longitude', 'speed_knots', 'heading', 'datetime', 'created', 'modified')
+        row = (ens_idx, RtiProjects.nmea_text(nmea.nmea_sentences)) + tuple(sentences) + (nmea.latitude, nmea.longitude, nmea.speed_knots, nmea.heading, gps_datetime, dt, dt)
+
+        return columns, row
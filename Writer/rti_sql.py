@@ -1,6 +1,9 @@
 import psycopg2
+import psycopg2.pool
 import pandas as pd
 import numpy as np
+import threading
+import itertools
 
 """
 Update tables
@@ -10,19 +13,92 @@ ALTER TABLE ensembles ADD COLUMN modified timestamp;
 """
 
 
+class WaitingConnectionPool(psycopg2.pool.ThreadedConnectionPool):
+    """
+    ThreadedConnectionPool that waits for a connection to be given back
+    when all maxconn connections are in use, instead of raising a PoolError.
+    """
+
+    def __init__(self, minconn, maxconn, *args, timeout=60, **kwargs):
+        """
+        :param minconn: Number of connections kept open in the pool.
+        :param maxconn: Maximum number of connections in use at the same time.
+        :param timeout: Seconds to wait for a connection.  None = Wait forever.
+        """
+        self.timeout = timeout
+        self.slots = threading.BoundedSemaphore(maxconn)
+        super().__init__(minconn, maxconn, *args, **kwargs)
+
+    def getconn(self, key=None):
+        """
+        Get a connection.  If all the connections are in use, wait for one to be given back.
+        :param key: Connection key.
+        :return: Connection.
+        """
+        if not self.slots.acquire(timeout=self.timeout):
+            raise psycopg2.pool.PoolError("All {0} connections of the pool (max_conn) are still in use after {1} seconds".format(self.maxconn, self.timeout))
+
+        try:
+            return super().getconn(key)
+        except Exception:
+            self.slots.release()
+            raise
+
+    def putconn(self, conn=None, key=None, close=False):
+        """
+        Give the connection back to the pool.
+        :param conn: Connection.
+        :param key: Connection key.
+        :param close: TRUE = Close the connection.
+        """
+        super().putconn(conn, key, close)
+        self.slots.release()
+
+
 class rti_sql:
 
-    def __init__(self, conn):
+    # [Bin x Beam] tables stored as one array per ensemble
+    # Table: (Array table, numpy type of the values)
+    ARRAY_TABLES = {'beamvelocity': ('beamvelocity_array', '<f4'),
+                    'instrumentvelocity': ('instrumentvelocity_array', '<f4'),
+                    'earthvelocity': ('earthvelocity_array', '<f4'),
+                    'amplitude': ('amplitude_array', '<f4'),
+                    'correlation': ('correlation_array', '<f4'),
+                    'goodbeamping': ('goodbeamping_array', '<i4'),
+                    'goodearthping': ('goodearthping_array', '<i4')}
+
+    # Connection pools shared by all the rti_sql objects
+    # Connection string: ThreadedConnectionPool
+    pools = {}
+    pools_lock = threading.Lock()
+
+    # Seconds to wait for a pool connection when all max_conn connections are in use
+    POOL_TIMEOUT = 60
+
+    # Number of rows in each DataFrame chunk for the streaming queries
+    CHUNK_SIZE = 10000
+
+    # Used to give each server side cursor a unique name
+    cursor_count = itertools.count()
+
+    def __init__(self, conn, use_pool=False, max_conn=10):
         """
         Make a connection to the database
         :param conn: "host='localhost' dbname='my_database' user='postgres' password='secret'"
+        :param use_pool: TRUE = Get the connection from the connection pool.  close() gives it back to the pool.
+                         If all the connections are in use, wait up to POOL_TIMEOUT seconds for one.
+        :param max_conn: Maximum number of connections in the pool.  Only used when the pool is created.
         """
         self.conn_string = conn
         self.conn = None
         self.cursor = None
+        self.pool = None
 
         # Make a connection
-        self.sql_conn(conn)
+        if use_pool:
+            self.pool_conn(conn, max_conn)
+        else:
+            self.sql_conn(conn)
 
     def sql_conn(self, conn_string):
         # print the connection string we will use to connect
@@ -35,9 +111,98 @@ class rti_sql:
         self.cursor = self.conn.cursor()
         print("Connected!\n")
 
+    def pool_conn(self, conn_string, max_conn=10):
+        """
+        Get a connection from the connection pool for the connection string.
+        The pool is created the first time it is used.
+        :param conn_string: Connection string.
+        :param max_conn: Maximum number of connections in the pool.
+        """
+        self.pool = rti_sql.get_pool(conn_string, max_conn)
+
+        # If all the connections are in use, wait for one to be given back.
+        # If none is given back in POOL_TIMEOUT seconds, an exception will be raised here
+        self.conn = self.pool.getconn()
+        self.cursor = self.conn.cursor()
+
+    @staticmethod
+    def get_pool(conn_string, max_conn=10):
+        """
+        Get the connection pool for the connection string.
+        The pool is created the first time it is used.
+        :param conn_string: Connection string.
+        :param max_conn: Maximum number of connections in the pool.
+        :return: Connection pool.
+        """
+        with rti_sql.pools_lock:
+            pool = rti_sql.pools.get(conn_string)
+            if pool is None or pool.closed:
+                print("Creating connection pool\n	->%s" % (conn_string))
+                pool = WaitingConnectionPool(1, max_conn, conn_string, timeout=rti_sql.POOL_TIMEOUT)
+                rti_sql.pools[conn_string] = pool
+
+        return pool
+
+    @staticmethod
+    def close_pools():
+        """
+        Close all the connections in all the connection pools.
+        """
+        with rti_sql.pools_lock:
+            for pool in rti_sql.pools.values():
+                pool.closeall()
+            rti_sql.pools = {}
+
     def close(self):
         self.cursor.close()
-        self.conn.close()
+        if self.pool:
+            # Give the connection back to the pool.  Anything not committed is rolled back.
+            if not self.pool.closed:
+                self.pool.putconn(self.conn)
+        else:
+            self.conn.close()
+
+    def query_chunks(self, query, params=None, columns=None, chunk_size=None):
+        """
+        Run the query with a server side cursor and give the results as DataFrames.
+        Only chunk_size rows are in memory at a time, so large projects can be read.
+        The query is run in its own transaction, which ends when all the chunks are read
+        or the generator is closed.
+        :param query: Query to execute on the database.
+        :param params: Query parameters.
+        :param columns: Column names for the DataFrames.  Default: Names from the query.
+        :param chunk_size: Number of rows in each DataFrame.  Default: CHUNK_SIZE.
+        :return: Generator of DataFrames.
+        """
+        if not chunk_size:
+            chunk_size = rti_sql.CHUNK_SIZE
+
+        cursor = self.conn.cursor(name="rti_sql_cursor_" + str(next(rti_sql.cursor_count)))
+        cursor.itersize = chunk_size
+
+        try:
+            cursor.execute(query, params)
+
+            while True:
+                results = cursor.fetchmany(chunk_size)
+                if not results:
+                    break
+
+                if not columns:
+                    columns = [desc[0] for desc in cursor.description]
+
+                yield pd.DataFrame(results, columns=columns)
+        except Exception as e:
+            print("Unable to run query", e)
+        finally:
+            # The cursor can not be closed if the query failed
+            try:
+                cursor.close()
+            except psycopg2.Error:
+                pass
+
+            # End the transaction.  Rolled back if the query failed.
+            self.conn.commit()
 
     def query(self, query):
         """
@@ -391,6 +556,50 @@ class rti_sql:
         print("Table Creation Complete")
         self.conn.commit()
 
+    def create_array_tables(self):
+        """
+        Create the array tables for the [Bin x Beam] datasets.
+        Each ensemble is a single row.  The data column contains all the
+        values [beam][bin] as little endian float32 (int32 for the good ping
+        tables), so it can be read directly into a numpy array.
+        :return:
+        """
+        for table, (array_table, dtype) in rti_sql.ARRAY_TABLES.items():
+            self.cursor.execute('CREATE TABLE IF NOT EXISTS {0} (id SERIAL PRIMARY KEY, '
+                                'ensIndex integer NOT NULL, '
+                                'numBins integer NOT NULL, '
+                                'numBeams integer NOT NULL, '
+                                'data bytea NOT NULL, '
+                                'meta json,'
+                                'created timestamp, '
+                                'modified timestamp);'.format(array_table))
+            self.cursor.execute('CREATE INDEX IF NOT EXISTS {0}_ensindex ON {0} (ensIndex);'.format(array_table))
+            print(array_table + " table created")
+
+        self.conn.commit()
+
+    @staticmethod
+    def encode_array(values, table):
+        """
+        Encode the [beam][bin] values for the data column of the array table.
+        :param values: Array [beam][bin].
+        :param table: Table name.  (beamvelocity, earthvelocity, ...)
+        :return: Bytes of the values.
+        """
+        return np.ascontiguousarray(values, dtype=rti_sql.ARRAY_TABLES[table][1]).tobytes()
+
+    @staticmethod
+    def decode_array(data, num_bins, num_beams, table):
+        """
+        Decode the data column of the array table.
+        :param data: Bytes of the values.
+        :param num_bins: Number of bins.
+        :param num_beams: Number of beams.
+        :param table: Table name.  (beamvelocity, earthvelocity, ...)
+        :return: Array [beam][bin].
+        """
+        return np.frombuffer(data, dtype=rti_sql.ARRAY_TABLES[table][1], count=num_beams * num_bins).reshape(num_beams, num_bins)
+
     def ss_query(self, ss_code=None, ss_config=None):
         """
         Create a query string for the subsystem code and subsystem configuration.
@@ -414,47 +623,48 @@ class rti_sql:
 
         return ss_code_str, ss_config_str
 
-    def get_earth_vel_data(self, project_idx, beam, ss_code=None, ss_config=None):
+    def earth_vel_query(self, ss_code=None, ss_config=None):
         """
-        Get all the earth velocity data for the given project and beam.
-        :param project_idx: Project index.
-        :param beam: Beam number.
+        Create the query for the earth velocity data for a project and beam.
         :param ss_code: Subsystem Code.
         :param ss_config: Subsystem Configuration.
-        :return: Earth velocity data for beam in the project.
+        :return: Query string, DataFrame columns.
         """
-
         # Create the string of bins for query
         bin_nums = ""
         for x in range(0, 200):
             bin_nums += "bin" + str(x) + ", "
         bin_nums = bin_nums[:-2]  # Remove final comma
 
-        """
-        # Use Subsystem code if given
-        if ss_code:
-            ss_code_str = "AND ensembles.subsystemcode = \'{}\'".format(ss_code)
-        else:
-            ss_code_str = ""
+        ss_code_str, ss_config_str = self.ss_query(ss_code, ss_config)
 
-        # Use Subsystem configuration if given
-        if ss_config:
-            ss_config_str = "AND ensembles.subsystemconfig = {} ".format(ss_config)
-        else:
-            ss_config_str = ""
+        # Get all the ensembles for the project
+        ens_query = 'SELECT ensembles.ensnum, ensembles.numbeams, ensembles.numbins, earthvelocity.beam, {} ' \
+                    'FROM ensembles ' \
+                    'INNER JOIN earthvelocity ON ensembles.id = earthvelocity.ensindex ' \
+                    'WHERE ensembles.project_id = %s AND earthvelocity.beam = %s ' \
+                    '{} {}' \
+                    'ORDER BY ensembles.ensnum ASC;'.format(bin_nums, ss_code_str, ss_config_str)
+
+        columns = ['ensnum', 'numbeams', 'numbins', 'beam']
+        for x in range(0, 200):
+            columns.append('bin' + str(x))
+
+        return ens_query, columns
+
+    def get_earth_vel_data(self, project_idx, beam, ss_code=None, ss_config=None):
         """
-        ss_code_str, ss_config_str = self.ss_query(ss_code, ss_config)
+        Get all the earth velocity data for the given project and beam.
+        :param project_idx: Project index.
+        :param beam: Beam number.
+        :param ss_code: Subsystem Code.
+        :param ss_config: Subsystem Configuration.
+        :return: Earth velocity data for beam in the project.
+        """
+        ens_query, columns = self.earth_vel_query(ss_code, ss_config)
 
         # Get all projects
         try:
-            # Get all the ensembles for the project
-            ens_query = 'SELECT ensembles.ensnum, ensembles.numbeams, ensembles.numbins, earthvelocity.beam, {} ' \
-                        'FROM ensembles ' \
-                        'INNER JOIN earthvelocity ON ensembles.id = earthvelocity.ensindex ' \
-                        'WHERE ensembles.project_id = %s AND earthvelocity.beam = %s ' \
-                        '{} {}' \
-                        'ORDER BY ensembles.ensnum ASC;'.format(bin_nums, ss_code_str, ss_config_str)
-            print(ens_query)
             self.cursor.execute(ens_query, (project_idx, beam))
             vel_results = self.cursor.fetchall()
             self.conn.commit()
@@ -466,11 +676,87 @@ class rti_sql:
         # Make a dataframe
         df = pd.DataFrame(vel_results)
         if not df.empty:
-            columns = ['ensnum', 'numbeams', 'numbins', 'beam']
-            for x in range(0, 200):
-                columns.append('bin' + str(x))
             df.columns = columns
-            #print(df.head())
+
+        return df
+
+    def get_earth_vel_data_chunks(self, project_idx, beam, ss_code=None, ss_config=None, chunk_size=None):
+        """
+        Get all the earth velocity data for the given project and beam.
+        The data is read with a server side cursor and given a chunk at a time.
+        :param project_idx: Project index.
+        :param beam: Beam number.
+        :param ss_code: Subsystem Code.
+        :param ss_config: Subsystem Configuration.
+        :param chunk_size: Number of ensembles in each DataFrame.
+        :return: Generator of DataFrames with the same columns as get_earth_vel_data.
+        """
+        ens_query, columns = self.earth_vel_query(ss_code, ss_config)
+        return self.query_chunks(ens_query, (project_idx, beam), columns, chunk_size)
+
+    def get_array_data(self, project_idx, table, ss_code=None, ss_config=None):
+        """
+        Get all the [Bin x Beam] data for the given project from the array table.
+        Ensembles with less bins or beams are padded with NaN.
+        :param project_idx: Project index.
+        :param table: Table name.  (beamvelocity, earthvelocity, ...)
+        :param ss_code: Subsystem Code.
+        :param ss_config: Subsystem Configuration.
+        :return: Ensemble numbers, Number of bins, Number of beams, Array [ensemble][beam][bin].  All None if the query failed.
+        """
+        ss_code_str, ss_config_str = self.ss_query(ss_code, ss_config)
+        array_table = rti_sql.ARRAY_TABLES[table][0]
+
+        try:
+            # Get all the ensembles for the project
+            ens_query = 'SELECT ensembles.ensnum, {0}.numbins, {0}.numbeams, {0}.data ' \
+                        'FROM ensembles ' \
+                        'INNER JOIN {0} ON ensembles.id = {0}.ensindex ' \
+                        'WHERE ensembles.project_id = %s ' \
+                        '{1} {2}' \
+                        'ORDER BY ensembles.ensnum ASC;'.format(array_table, ss_code_str, ss_config_str)
+            self.cursor.execute(ens_query, (project_idx,))
+            results = self.cursor.fetchall()
+            self.conn.commit()
+        except Exception as e:
+            print("Unable to run query", e)
+            return None, None, None, None
+
+        ens_nums = np.array([row[0] for row in results], dtype=int)
+        num_bins = np.array([row[1] for row in results], dtype=int)
+        num_beams = np.array([row[2] for row in results], dtype=int)
+        max_bins = num_bins.max() if len(results) else 0
+        max_beams = num_beams.max() if len(results) else 0
+
+        values = np.full((len(results), max_beams, max_bins), np.nan)
+        for ens, (ens_num, ens_bins, ens_beams, data) in enumerate(results):
+            values[ens, :ens_beams, :ens_bins] = rti_sql.decode_array(data, ens_bins, ens_beams, table)
+
+        return ens_nums, num_bins, num_beams, values
+
+    def get_earth_vel_array(self, project_idx, beam, ss_code=None, ss_config=None):
+        """
+        Get all the earth velocity data for the given project and beam from the array table.
+        This gives the same columns as get_earth_vel_data, with a column for each bin.
+        :param project_idx: Project index.
+        :param beam: Beam number.
+        :param ss_code: Subsystem Code.
+        :param ss_config: Subsystem Configuration.
+        :return: Earth velocity data for beam in the project.
+        """
+        ens_nums, num_bins, num_beams, values = self.get_array_data(project_idx, 'earthvelocity', ss_code, ss_config)
+        if ens_nums is None:
+            return
+
+        if len(ens_nums) == 0 or beam >= values.shape[1]:
+            return pd.DataFrame()
+
+        beam_values = values[:, beam, :]
+        df = pd.DataFrame(beam_values, columns=['bin' + str(x) for x in range(beam_values.shape[1])])
+        df.insert(0, 'ensnum', ens_nums)
+        df.insert(1, 'numbeams', num_beams)
+        df.insert(2, 'numbins', num_bins)
+        df.insert(3, 'beam', beam)
 
         return df
 
@@ -517,20 +803,10 @@ class rti_sql:
         :return: Dataframe with all the velocities. (Beam, Instrument and Earth)
         """
 
-        # Set the Subsystem query
-        ss_code_str, ss_config_str = self.ss_query(ss_code, ss_config)
+        ens_query, columns = self.bottom_track_range_query(ss_code, ss_config)
 
         # Get all projects
         try:
-            # Get all the ensembles for the project
-            ens_query = 'SELECT ensembles.ensnum, ensembles.numbeams, ensembles.numbins, ' \
-                        'ensembles.binsize, ensembles.rangefirstbin, ' \
-                        'rangebeam0, rangebeam1, rangebeam2, rangebeam3 ' \
-                        'FROM ensembles ' \
-                        'INNER JOIN bottomtrack ON ensembles.id = bottomtrack.ensindex ' \
-                        'WHERE ensembles.project_id = %s ' \
-                        '{} {}' \
-                        'ORDER BY ensembles.ensnum ASC;'.format(ss_code_str, ss_config_str)
             self.cursor.execute(ens_query, (project_idx,))
             vel_results = self.cursor.fetchall()
             self.conn.commit()
@@ -542,10 +818,45 @@ class rti_sql:
         # Make a dataframe
         df = pd.DataFrame(vel_results)
         if not df.empty:
-            df.columns = ['ensnum', 'NumBeams', 'NumBins', 'BinSize', 'RangeFirstBin', 'RangeBeam0', 'RangeBeam1', 'RangeBeam2', 'RangeBeam3']
+            df.columns = columns
 
         return df
 
+    def get_bottom_track_range_chunks(self, project_idx, ss_code=None, ss_config=None, chunk_size=None):
+        """
+        Get Bottom track Range.
+        The data is read with a server side cursor and given a chunk at a time.
+        :param project_idx: Project index.
+        :param ss_code: Subsystem Code.
+        :param ss_config: Subsystem Configuration.
+        :param chunk_size: Number of ensembles in each DataFrame.
+        :return: Generator of DataFrames with the same columns as get_bottom_track_range.
+        """
+        ens_query, columns = self.bottom_track_range_query(ss_code, ss_config)
+        return self.query_chunks(ens_query, (project_idx,), columns, chunk_size)
+
+    def bottom_track_range_query(self, ss_code=None, ss_config=None):
+        """
+        Create the query for the Bottom Track Range for a project.
+        :param ss_code: Subsystem Code.
+        :param ss_config: Subsystem Configuration.
+        :return: Query string, DataFrame columns.
+        """
+        # Set the Subsystem query
+        ss_code_str, ss_config_str = self.ss_query(ss_code, ss_config)
+
+        # Get all the ensembles for the project
+        ens_query = 'SELECT ensembles.ensnum, ensembles.numbeams, ensembles.numbins, ' \
+                    'ensembles.binsize, ensembles.rangefirstbin, ' \
+                    'rangebeam0, rangebeam1, rangebeam2, rangebeam3 ' \
+                    'FROM ensembles ' \
+                    'INNER JOIN bottomtrack ON ensembles.id = bottomtrack.ensindex ' \
+                    'WHERE ensembles.project_id = %s ' \
+                    '{} {}' \
+                    'ORDER BY ensembles.ensnum ASC;'.format(ss_code_str, ss_config_str)
+
+        return ens_query, ['ensnum', 'NumBeams', 'NumBins', 'BinSize', 'RangeFirstBin', 'RangeBeam0', 'RangeBeam1', 'RangeBeam2', 'RangeBeam3']
+
     def get_adcp_info(self, project_idx):
         """
         Get information about the ensemble data.
@@ -583,22 +894,16 @@ class rti_sql:
         :return: Compass data in the project.
         """
 
-        # Set the Subsystem query
-        ss_code_str, ss_config_str = self.ss_query(ss_code, ss_config)
+        ens_query, columns = self.ensemble_query(['heading', 'pitch', 'roll'], ss_code, ss_config)
 
         # Get all projects
         try:
-            # Get all the ensembles for the project
-            ens_query = 'SELECT ensnum, datetime, heading, pitch, roll  FROM ensembles ' \
-                        'WHERE ensembles.project_id = %s ' \
-                        '{} {}' \
-                        'ORDER BY ensembles.ensnum ASC;'.format(ss_code_str, ss_config_str)
             self.cursor.execute(ens_query, (project_idx,))
             results = self.cursor.fetchall()
             self.conn.commit()
 
             df = pd.DataFrame(results)
-            df.columns = ['ensnum', 'datetime', 'heading', 'pitch', 'roll']
+            df.columns = columns
 
         except Exception as e:
             print("Unable to run query", e)
@@ -613,22 +918,16 @@ class rti_sql:
         :return: Compass data in the project.
         """
 
-        # Set the Subsystem query
-        ss_code_str, ss_config_str = self.ss_query(ss_code, ss_config)
+        ens_query, columns = self.ensemble_query(['voltage'], ss_code, ss_config)
 
         # Get all projects
         try:
-            # Get all the ensembles for the project
-            ens_query = 'SELECT ensnum, datetime, voltage  FROM ensembles ' \
-                        'WHERE ensembles.project_id = %s ' \
-                        '{} {}' \
-                        'ORDER BY ensembles.ensnum ASC;'.format(ss_code_str, ss_config_str)
             self.cursor.execute(ens_query, (project_idx,))
             results = self.cursor.fetchall()
             self.conn.commit()
 
             df = pd.DataFrame(results)
-            df.columns = ['ensnum', 'datetime', 'voltage']
+            df.columns = columns
 
         except Exception as e:
             print("Unable to run query", e)
@@ -636,6 +935,51 @@ class rti_sql:
 
         return df
 
+    def get_compass_data_chunks(self, project_idx, ss_code=None, ss_config=None, chunk_size=None):
+        """
+        Get compass ensemble data.
+        The data is read with a server side cursor and given a chunk at a time.
+        :param project_idx: Project index.
+        :param ss_code: Subsystem Code.
+        :param ss_config: Subsystem Configuration.
+        :param chunk_size: Number of ensembles in each DataFrame.
+        :return: Generator of DataFrames with the same columns as get_compass_data.
+        """
+        ens_query, columns = self.ensemble_query(['heading', 'pitch', 'roll'], ss_code, ss_config)
+        return self.query_chunks(ens_query, (project_idx,), columns, chunk_size)
+
+    def get_voltage_data_chunks(self, project_idx, ss_code=None, ss_config=None, chunk_size=None):
+        """
+        Get voltage ensemble data.
+        The data is read with a server side cursor and given a chunk at a time.
+        :param project_idx: Project index.
+        :param ss_code: Subsystem Code.
+        :param ss_config: Subsystem Configuration.
+        :param chunk_size: Number of ensembles in each DataFrame.
+        :return: Generator of DataFrames with the same columns as get_voltage_data.
+        """
+        ens_query, columns = self.ensemble_query(['voltage'], ss_code, ss_config)
+        return self.query_chunks(ens_query, (project_idx,), columns, chunk_size)
+
+    def ensemble_query(self, ens_columns, ss_code=None, ss_config=None):
+        """
+        Create the query for columns in the ensembles table for a project.
+        The ensemble number and date and time are the first columns.
+        :param ens_columns: List of columns in the ensembles table.
+        :param ss_code: Subsystem Code.
+        :param ss_config: Subsystem Configuration.
+        :return: Query string, DataFrame columns.
+        """
+        # Set the Subsystem query
+        ss_code_str, ss_config_str = self.ss_query(ss_code, ss_config)
+
+        # Get all the ensembles for the project
+        ens_query = 'SELECT ensnum, datetime, {}  FROM ensembles ' \
+                    'WHERE ensembles.project_id = %s ' \
+                    '{} {}' \
+                    'ORDER BY ensembles.ensnum ASC;'.format(", ".join(ens_columns), ss_code_str, ss_config_str)
+
+        return ens_query, ['ensnum', 'datetime'] + list(ens_columns)
 
     def get_subsystem_configs(self, project_idx):
         """
@@ -689,6 +1033,13 @@ DROP TABLE goodbeamping;
 DROP TABLE goodearthping;
 DROP TABLE instrumentvelocity;
 DROP TABLE nmea;
+DROP TABLE beamvelocity_array;
+DROP TABLE instrumentvelocity_array;
+DROP TABLE earthvelocity_array;
+DROP TABLE amplitude_array;
+DROP TABLE correlation_array;
+DROP TABLE goodbeamping_array;
+DROP TABLE goodearthping_array;
 """
 
 """
@@ -706,6 +1057,13 @@ DELETE FROM goodbeamping;
 DELETE FROM goodearthping;
 DELETE FROM instrumentvelocity;
 DELETE FROM nmea;
+DELETE FROM beamvelocity_array;
+DELETE FROM instrumentvelocity_array;
+DELETE FROM earthvelocity_array;
+DELETE FROM amplitude_array;
+DELETE FROM correlation_array;
+DELETE FROM goodbeamping_array;
+DELETE FROM goodearthping_array;
 
 
 """